@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+キャプチャ経路のメモリ確保ベンチマーク
+従来のコピー方式とリングバッファ方式で、1フレームあたりの確保量・GC回数・処理時間を比較
+
+frame_allocs_per_frame は確保量をフレームサイズで割った値で、フレームのコピー・確保の回数の目安になる。
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.camera_manager import CameraManager
+from src.frame_ring import FrameRing
+from src.synthetic_camera import SyntheticVideoCapture
+
+
+def _run_mode(ring_size: int, source_size: tuple, size: tuple, frames: int) -> dict:
+    """1つの方式でキャプチャと利用者の取得を繰り返して計測"""
+    width, height = size
+    camera_manager = CameraManager(
+        width=width, height=height, ring_size=ring_size,
+        capture_factory=lambda device_id: SyntheticVideoCapture(*source_size)
+    )
+    # スレッドを使わずに1フレームずつ処理して計測する
+    camera_manager.camera = camera_manager.capture_factory(0)
+    if ring_size > 0:
+        camera_manager.frame_ring = FrameRing(ring_size, (height, width, 3))
+
+    def consume():
+        if ring_size > 0:
+            ref = camera_manager.acquire_frame()
+            if ref is not None:
+                ref.release()
+        else:
+            camera_manager.get_current_frame()
+
+    # ウォームアップ（初回のバッファ確保を除外）
+    for _ in range(5):
+        camera_manager._capture_step()
+        consume()
+
+    source_allocs_before = camera_manager.camera.frames_allocated
+    gc_before = sum(stat["collections"] for stat in gc.get_stats())
+    tracemalloc.start()
+    transient = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        camera_manager._capture_step()
+        consume()
+        _, peak = tracemalloc.get_traced_memory()
+        transient += peak - base
+    elapsed = time.perf_counter() - start
+    _, peak_total = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc_after = sum(stat["collections"] for stat in gc.get_stats())
+
+    frame_bytes = width * height * 3
+    return {
+        "us_per_frame": 1e6 * elapsed / frames,
+        "alloc_bytes_per_frame": transient / frames,
+        "frame_allocs_per_frame": transient / frames / frame_bytes,
+        "source_allocs_per_frame": (camera_manager.camera.frames_allocated - source_allocs_before) / frames,
+        "traced_peak_bytes": peak_total,
+        "gc_collections": gc_after - gc_before,
+        "frames_dropped": camera_manager.frames_dropped,
+    }
+
+
+def run_benchmark(frames: int = 300, width: int = 640, height: int = 480,
+                  source_width: int = 1280, source_height: int = 720, ring_size: int = 4) -> dict:
+    """
+    コピー方式とリングバッファ方式を比較
+
+    Args:
+        frames: 計測フレーム数
+        width: 出力フレーム幅
+        height: 出力フレーム高さ
+        source_width: 合成カメラの映像幅
+        source_height: 合成カメラの映像高さ
+        ring_size: リングバッファのスロット数
+
+    Returns:
+        dict: 方式ごとの計測結果
+    """
+    source = (source_width, source_height)
+    size = (width, height)
+    return {
+        "frames": frames,
+        "source": f"{source_width}x{source_height}",
+        "output": f"{width}x{height}",
+        "copy": _run_mode(0, source, size, frames),
+        "ring": _run_mode(ring_size, source, size, frames),
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="キャプチャ経路のメモリ確保ベンチマーク")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--source-width", type=int, default=1280)
+    parser.add_argument("--source-height", type=int, default=720)
+    parser.add_argument("--ring-size", type=int, default=4)
+    args = parser.parse_args()
+
+    result = run_benchmark(args.frames, args.width, args.height,
+                           args.source_width, args.source_height, args.ring_size)
+    print(f"キャプチャ確保量ベンチマーク (入力 {result['source']} → 出力 {result['output']}, {result['frames']}フレーム)")
+    for mode in ("copy", "ring"):
+        r = result[mode]
+        print(f"  {mode:5s}: {r['us_per_frame']:8.1f} us/frame  "
+              f"確保 {r['alloc_bytes_per_frame'] / 1024:8.1f} KiB/frame  "
+              f"GC {r['gc_collections']}回  ドロップ {r['frames_dropped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+取得モードネゴシエーションのベンチマーク
+合成カメラ（UVC相当の対応モード表）を使い、従来の一律設定＋毎フレームリサイズと
+ネゴシエーション後の取得で、選ばれるモードと1フレームあたりの処理時間を比較
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import asdict
+
+import cv2
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.camera_manager import CameraManager
+from src.synthetic_camera import SyntheticVideoCapture
+
+
+# 一般的なUSBカメラの対応モード (fourcc, 幅, 高さ, 最大fps)
+UVC_MODES = [
+    ("YUYV", 640, 480, 30),
+    ("YUYV", 800, 600, 20),
+    ("YUYV", 1280, 720, 10),
+    ("MJPG", 640, 480, 30),
+    ("MJPG", 800, 600, 30),
+    ("MJPG", 1280, 720, 30),
+    ("MJPG", 1920, 1080, 30),
+]
+
+
+def _factory(device_id: int) -> SyntheticVideoCapture:
+    # V4L2の多くのドライバと同様に既定形式はYUYVとする
+    return SyntheticVideoCapture(640, 480, supported_modes=UVC_MODES)
+
+
+def _measure_legacy(width: int, height: int, fps: int, frames: int) -> dict:
+    """従来の処理: 一律に設定し、サイズに関係なく毎フレームresizeする"""
+    camera = _factory(0)
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    camera.set(cv2.CAP_PROP_FPS, fps)
+    start = time.perf_counter()
+    for _ in range(frames):
+        ret, frame = camera.read()
+        frame = cv2.resize(frame, (width, height))
+        frame.copy()
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": {"fourcc": camera.fourcc, "width": camera.width, "height": camera.height, "fps": camera.fps},
+        "us_per_frame": 1e6 * elapsed / frames,
+        "meets_fps": camera.fps >= fps,
+    }
+
+
+def _measure_negotiated(width: int, height: int, fps: int, frames: int) -> dict:
+    """ネゴシエーション後: 最も軽いモードを選び、同サイズならresizeを省略する"""
+    camera_manager = CameraManager(width=width, height=height, fps=fps, negotiate=True, capture_factory=_factory)
+    camera_manager.camera = _factory(0)
+    negotiate_start = time.perf_counter()
+    mode = camera_manager.negotiate_capture_mode()
+    negotiate_ms = 1000.0 * (time.perf_counter() - negotiate_start)
+    camera_manager.capture_mode = mode
+    start = time.perf_counter()
+    for _ in range(frames):
+        camera_manager._capture_step()
+    elapsed = time.perf_counter() - start
+    info = camera_manager.get_camera_info()
+    return {
+        "mode": asdict(mode),
+        "us_per_frame": 1e6 * elapsed / frames,
+        "meets_fps": mode.fps >= fps,
+        "resize": info["resize"],
+        "negotiate_ms": negotiate_ms,
+    }
+
+
+def run_benchmark(frames: int = 200, scenarios=None) -> dict:
+    """
+    要求解像度ごとに従来方式とネゴシエーション方式を比較
+
+    Args:
+        frames: 計測フレーム数
+        scenarios: (幅, 高さ, fps) のリスト
+
+    Returns:
+        dict: シナリオごとの計測結果
+    """
+    scenarios = scenarios or [(640, 480, 30), (1280, 720, 30)]
+    results = []
+    for width, height, fps in scenarios:
+        results.append({
+            "request": f"{width}x{height}@{fps}",
+            "legacy": _measure_legacy(width, height, fps, frames),
+            "negotiated": _measure_negotiated(width, height, fps, frames),
+        })
+    return {"frames": frames, "scenarios": results}
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="取得モードネゴシエーションのベンチマーク")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    result = run_benchmark(args.frames)
+    print(f"取得モードネゴシエーションベンチマーク ({result['frames']}フレーム)")
+    for scenario in result["scenarios"]:
+        print(f"  要求 {scenario['request']}")
+        for name in ("legacy", "negotiated"):
+            r = scenario[name]
+            mode = r["mode"]
+            print(f"    {name:10s}: {mode['fourcc']} {mode['width']}x{mode['height']}@{mode['fps']:.0f}  "
+                  f"{r['us_per_frame']:8.1f} us/frame  fps条件{'達成' if r['meets_fps'] else '未達'}")
+
+
+if __name__ == "__main__":
+    main()
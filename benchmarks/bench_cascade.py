@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+段階的認識のベンチマーク
+毎フレームYOLOを実行する場合と、色付きテープ判定で決まらないフレームだけYOLOを実行する場合の
+1フレームあたりの平均処理時間と、テープだけで判定できた割合を比較
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.medicine_selector import MedicineSelector, MedicineType
+from src.recognizer import AIRecognizer, CascadeRecognizer, TapeClassifier
+
+
+RED, BLUE = (0, 0, 220), (220, 0, 0)
+
+
+def make_frames(count: int, ambiguous_ratio: float, seed: int = 0) -> list:
+    """
+    テープが見えるフレームと曖昧なフレーム（テープなし・2色）を混ぜた合成映像
+
+    Args:
+        count: フレーム数
+        ambiguous_ratio: 曖昧なフレームの割合
+        seed: 乱数シード
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        frame = rng.integers(110, 140, (480, 640, 3), dtype=np.uint8)
+        x, y = int(rng.integers(0, 520)), int(rng.integers(0, 420))
+        if rng.random() >= ambiguous_ratio:
+            frame[y:y + 60, x:x + 120] = RED
+        elif rng.random() < 0.5:
+            frame[y:y + 60, x:x + 60] = RED
+            frame[y:y + 60, x + 60:x + 120] = BLUE
+        frames.append(frame)
+    return frames
+
+
+def _run_mode(check, frames: list) -> float:
+    """全フレームを処理して1フレームあたりの平均時間（ミリ秒）を返す"""
+    start = time.perf_counter()
+    for frame in frames:
+        check(frame)
+    return 1000.0 * (time.perf_counter() - start) / len(frames)
+
+
+def run_benchmark(model_path: str, frames: int = 100, ambiguous_ratio: float = 0.2,
+                  input_size: int = 640, backend: str = "auto") -> dict:
+    """
+    YOLOのみと段階的認識を比較
+
+    Args:
+        model_path: ONNXモデルのパス
+        frames: 計測フレーム数
+        ambiguous_ratio: テープで判定できないフレームの割合
+        input_size: モデルの入力サイズ
+        backend: 推論バックエンド
+
+    Returns:
+        dict: 方式ごとの平均処理時間と段階的認識の統計
+    """
+    recognizer = AIRecognizer(model_path, input_size=input_size, backend=backend)
+    selector = MedicineSelector()
+    selector.select_medicine(MedicineType.SODIUM_HYPOCHLORITE)
+    cascade = CascadeRecognizer(TapeClassifier(), selector, recognizer)
+    samples = make_frames(frames, ambiguous_ratio)
+
+    # ウォームアップ（初回のバッファ確保を除外）
+    recognizer.detect_batch(samples[0])
+    cascade.check(samples[0])
+    cascade.reset_stats()
+
+    detector_ms = _run_mode(recognizer.detect_batch, samples)
+    cascade_ms = _run_mode(cascade.check, samples)
+    return {
+        "frames": frames,
+        "ambiguous_ratio": ambiguous_ratio,
+        "backend": recognizer.model.name,
+        "detector_only_ms": detector_ms,
+        "cascade_ms": cascade_ms,
+        "speedup": detector_ms / cascade_ms,
+        **cascade.get_stats(),
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="段階的認識のベンチマーク")
+    parser.add_argument("--model", help="ONNXモデルのパス（省略時はダミーモデルを作成）")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--ambiguous-ratio", type=float, default=0.2)
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--backend", default="auto")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = args.model
+        if model_path is None:
+            from tools.make_dummy_model import build_dummy_model
+            # 推論に負荷がかかるよう中間層を増やす（実際のモデルは --model で指定）
+            model_path = build_dummy_model(os.path.join(tmp_dir, "dummy.onnx"), args.input_size,
+                                           hidden_channels=256)
+        result = run_benchmark(model_path, args.frames, args.ambiguous_ratio, args.input_size, args.backend)
+
+    print(f"段階的認識ベンチマーク ({result['frames']} フレーム, 曖昧 {result['ambiguous_ratio']:.0%}, "
+          f"バックエンド {result['backend']})")
+    print(f"  YOLOのみ  : {result['detector_only_ms']:7.2f} ms/frame")
+    print(f"  段階的認識: {result['cascade_ms']:7.2f} ms/frame  ({result['speedup']:.1f}x)")
+    print(f"  テープで判定: {result['fast_path_rate']:.0%}  "
+          f"(テープ {result['avg_fast_path_ms']:.2f} ms, YOLO {result['avg_detector_ms']:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+非同期認識パイプラインのベンチマーク
+取得スレッドのコールバックで認識する従来方式と、InferencePipelineで並行に認識する方式の
+取得fps・認識数・取得から認識完了までの遅延を比較
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.camera_manager import CameraManager
+from src.inference_pipeline import InferencePipeline
+from src.synthetic_camera import SyntheticVideoCapture
+
+
+def _percentile(values: list, ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def _make_camera(camera_fps: float, ring_size: int) -> CameraManager:
+    return CameraManager(
+        width=640, height=480, fps=camera_fps, ring_size=ring_size,
+        capture_factory=lambda device_id: SyntheticVideoCapture(640, 480, fps=camera_fps, realtime=True)
+    )
+
+
+def _run_callback(duration: float, camera_fps: float, work_ms: float) -> dict:
+    """取得スレッドのコールバックで認識（従来方式）"""
+    camera_manager = _make_camera(camera_fps, 0)
+    latencies = []
+
+    def on_frame(frame):
+        captured = camera_manager.frame_timestamp
+        time.sleep(work_ms / 1000.0)
+        latencies.append(1000.0 * (time.monotonic() - captured))
+
+    camera_manager.set_frame_callback(on_frame)
+    camera_manager.start_camera()
+    time.sleep(duration)
+    camera_manager.stop_camera()
+
+    return {
+        "capture_fps": camera_manager.frame_seq / duration,
+        "frames_processed": len(latencies),
+        "avg_latency_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        "p95_latency_ms": _percentile(latencies, 0.95),
+    }
+
+
+def _run_pipeline(duration: float, camera_fps: float, work_ms: float, num_workers: int) -> dict:
+    """InferencePipelineで並行に認識"""
+    camera_manager = _make_camera(camera_fps, num_workers + 3)
+    pipeline = InferencePipeline(camera_manager, lambda frame: time.sleep(work_ms / 1000.0),
+                                 num_workers=num_workers)
+    camera_manager.start_camera()
+    pipeline.start()
+    time.sleep(duration)
+    pipeline.stop()
+    camera_manager.stop_camera()
+
+    stats = pipeline.get_stats()
+    return {
+        "capture_fps": camera_manager.frame_seq / duration,
+        **stats,
+    }
+
+
+def run_benchmark(duration: float = 3.0, camera_fps: float = 30.0, work_ms: float = 50.0,
+                  num_workers: int = 1) -> dict:
+    """
+    従来方式とパイプライン方式を比較
+
+    Args:
+        duration: 計測時間（秒）
+        camera_fps: 合成カメラのフレームレート
+        work_ms: 1フレームあたりの模擬認識時間（ミリ秒）
+        num_workers: パイプラインの認識ワーカー数
+
+    Returns:
+        dict: 方式ごとの計測結果
+    """
+    return {
+        "duration": duration,
+        "camera_fps": camera_fps,
+        "work_ms": work_ms,
+        "num_workers": num_workers,
+        "callback": _run_callback(duration, camera_fps, work_ms),
+        "pipeline": _run_pipeline(duration, camera_fps, work_ms, num_workers),
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="非同期認識パイプラインのベンチマーク")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--camera-fps", type=float, default=30.0)
+    parser.add_argument("--work-ms", type=float, default=50.0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    result = run_benchmark(args.duration, args.camera_fps, args.work_ms, args.workers)
+    print(f"認識パイプラインベンチマーク (カメラ {result['camera_fps']:.0f}fps, "
+          f"認識 {result['work_ms']:.0f}ms/frame, ワーカー {result['num_workers']})")
+    r = result["callback"]
+    print(f"  callback: 取得 {r['capture_fps']:5.1f} fps  認識 {r['frames_processed']:4d}  "
+          f"遅延 平均 {r['avg_latency_ms']:6.1f} ms  p95 {r['p95_latency_ms']:6.1f} ms")
+    r = result["pipeline"]
+    print(f"  pipeline: 取得 {r['capture_fps']:5.1f} fps  認識 {r['frames_processed']:4d}  "
+          f"遅延 平均 {r['avg_latency_ms']:6.1f} ms  p95 {r['p95_latency_ms']:6.1f} ms  "
+          f"間引き {r['frames_skipped']}  破棄 {r['frames_dropped']}  間隔 {r['stride']}")
+
+
+if __name__ == "__main__":
+    main()
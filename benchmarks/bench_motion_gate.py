@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+動き検出ゲートのベンチマーク
+変化のない補充台を映した合成カメラ（30fps）で認識パイプラインを動かし、
+ゲートなし・ありの待機中のCPU使用率と認識回数を比較する。途中で動きを入れてゲートが開くことも確認
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.camera_manager import CameraManager
+from src.inference_pipeline import InferencePipeline
+from src.motion_gate import MotionGate
+from src.recognizer import AIRecognizer
+from src.synthetic_camera import SyntheticVideoCapture
+
+
+def _run_mode(recognizer, gate, duration: float, burst: float) -> dict:
+    """待機中の映像で認識パイプラインを動かし、CPU使用率と認識回数を計測"""
+    camera_manager = CameraManager(
+        width=640, height=480, fps=30, ring_size=4,
+        capture_factory=lambda device_id: SyntheticVideoCapture(640, 480, fps=30, realtime=True, motion=False)
+    )
+    pipeline = InferencePipeline(camera_manager, recognizer.detect_batch, motion_gate=gate)
+    camera_manager.start_camera()
+    pipeline.start()
+    # 起動直後の背景作成とcooldownを除外
+    time.sleep(gate.cooldown + 0.5 if gate else 0.5)
+
+    processed_before = pipeline.get_stats()["frames_processed"]
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    time.sleep(duration)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    idle_processed = pipeline.get_stats()["frames_processed"] - processed_before
+
+    # 動きを入れるとゲートが開いて認識が再開する
+    camera_manager.camera.motion = True
+    time.sleep(burst)
+    camera_manager.camera.motion = False
+    stats = pipeline.get_stats()
+    pipeline.stop()
+    camera_manager.stop_camera()
+
+    return {
+        "idle_cpu_percent": 100.0 * cpu / wall,
+        "idle_inferences_per_sec": idle_processed / wall,
+        "burst_inferences": stats["frames_processed"] - processed_before - idle_processed,
+        "frames_gated": stats["frames_gated"],
+    }
+
+
+def run_benchmark(model_path: str, duration: float = 5.0, burst: float = 1.0, input_size: int = 640,
+                  backend: str = "auto") -> dict:
+    """
+    ゲートなしとゲートありを比較
+
+    Args:
+        model_path: ONNXモデルのパス
+        duration: 待機状態の計測時間（秒）
+        burst: 動きを入れる時間（秒）
+        input_size: モデルの入力サイズ
+        backend: 推論バックエンド
+
+    Returns:
+        dict: 方式ごとの計測結果（CPU使用率は1コアを100%とする）
+    """
+    recognizer = AIRecognizer(model_path, input_size=input_size, backend=backend)
+    return {
+        "duration": duration,
+        "backend": recognizer.model.name,
+        "without_gate": _run_mode(recognizer, None, duration, burst),
+        "with_gate": _run_mode(recognizer, MotionGate(), duration, burst),
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="動き検出ゲートのベンチマーク")
+    parser.add_argument("--model", help="ONNXモデルのパス（省略時はダミーモデルを作成）")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--burst", type=float, default=1.0)
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--backend", default="auto")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = args.model
+        if model_path is None:
+            from tools.make_dummy_model import build_dummy_model
+            # 推論に負荷がかかるよう中間層を増やす（実際のモデルは --model で指定）
+            model_path = build_dummy_model(os.path.join(tmp_dir, "dummy.onnx"), args.input_size,
+                                           hidden_channels=256)
+        result = run_benchmark(model_path, args.duration, args.burst, args.input_size, args.backend)
+
+    print(f"動き検出ゲートベンチマーク (待機 {result['duration']:.0f} 秒, バックエンド {result['backend']})")
+    for mode, label in (("without_gate", "ゲートなし"), ("with_gate", "ゲートあり")):
+        r = result[mode]
+        print(f"  {label}: 待機中CPU {r['idle_cpu_percent']:5.1f}%  認識 {r['idle_inferences_per_sec']:5.1f} 回/秒  "
+              f"動きの間の認識 {r['burst_inferences']} 回")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+YOLO後処理のベンチマーク
+1候補ずつ処理する従来実装（reference_postprocess）とNumPyでまとめて処理する実装（postprocess）の
+1フレームあたりの処理時間を比較し、結果が一致することも確認する
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.recognizer.detection import DEFAULT_CLASS_NAMES
+from src.recognizer.postprocess import postprocess, reference_postprocess
+
+
+def make_output(anchors: int = 8400, candidates: int = 50, num_classes: int = 4, seed: int = 0) -> np.ndarray:
+    """
+    YOLOv8形式の模擬出力を作成
+
+    Args:
+        anchors: アンカー数（640x640入力で8400）
+        candidates: 信頼度が閾値を超える候補数
+        num_classes: クラス数
+        seed: 乱数シード
+
+    Returns:
+        np.ndarray: 形状 (1, 4+クラス数, アンカー数) の出力
+    """
+    rng = np.random.default_rng(seed)
+    output = np.empty((1, 4 + num_classes, anchors), dtype=np.float32)
+    output[0, 0:2] = rng.uniform(0, 640, (2, anchors))
+    output[0, 2:4] = rng.uniform(10, 200, (2, anchors))
+    # 大半のアンカーは背景（低スコア）
+    output[0, 4:] = rng.uniform(0, 0.3, (num_classes, anchors))
+    hits = rng.choice(anchors, candidates, replace=False)
+    output[0, 4 + rng.integers(0, num_classes, candidates), hits] = rng.uniform(0.5, 1.0, candidates)
+    # 候補は数個の物体のまわりに重なって出る
+    objects = rng.uniform(100, 540, (2, 3))
+    owner = rng.integers(0, 3, candidates)
+    output[0, 0:2][:, hits] = objects[:, owner] + rng.normal(0, 8, (2, candidates))
+    output[0, 2:4][:, hits] = rng.uniform(120, 160, (2, candidates))
+    return output
+
+
+def _time_per_frame(func, repeat: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return 1e6 * (time.perf_counter() - start) / repeat
+
+
+def run_benchmark(anchors: int = 8400, candidates: int = 50, repeat: int = 50) -> dict:
+    """
+    従来実装と配列実装を比較
+
+    Args:
+        anchors: アンカー数
+        candidates: 閾値を超える候補数
+        repeat: 計測回数
+
+    Returns:
+        dict: 実装ごとの1フレームあたりの処理時間（マイクロ秒）と高速化率
+    """
+    output = make_output(anchors, candidates)
+    args = (DEFAULT_CLASS_NAMES, 0.5, 0.45, 1.0, (0, 80), (480, 640))
+
+    reference = reference_postprocess(output, *args)
+    batch = postprocess(output, *args)
+
+    reference_us = _time_per_frame(lambda: reference_postprocess(output, *args), repeat)
+    vectorized_us = _time_per_frame(lambda: postprocess(output, *args), repeat)
+    return {
+        "anchors": anchors,
+        "candidates": candidates,
+        "detections": len(batch),
+        "identical": batch.to_detections() == reference,
+        "reference_us": reference_us,
+        "vectorized_us": vectorized_us,
+        "speedup": reference_us / vectorized_us,
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="YOLO後処理のベンチマーク")
+    parser.add_argument("--anchors", type=int, default=8400)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    result = run_benchmark(args.anchors, args.candidates, args.repeat)
+    print(f"YOLO後処理ベンチマーク (アンカー {result['anchors']}, 候補 {result['candidates']}, "
+          f"検出 {result['detections']}, 結果一致: {'はい' if result['identical'] else 'いいえ'})")
+    print(f"  reference : {result['reference_us']:9.1f} us/frame")
+    print(f"  vectorized: {result['vectorized_us']:9.1f} us/frame  ({result['speedup']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
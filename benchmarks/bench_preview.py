@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Kivyプレビュー経路のベンチマーク
+temp_camera.jpg 経由の旧方式とテクスチャ直接転送方式のfps・CPU使用率を比較
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+def make_frames(width: int, height: int, count: int = 8) -> list:
+    """ノイズ入りの合成フレームを生成（JPEG圧縮が効きすぎないようにする）"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        cv2.putText(frame, f"frame {i}", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        frames.append(frame)
+    return frames
+
+
+class _CopyUploader:
+    """GLコンテキストがない環境用の転送代替（テクスチャ転送と同じ1回のmemcpy）"""
+
+    def __init__(self, width: int, height: int):
+        self.buffer = np.empty((height, width, 3), dtype=np.uint8)
+
+    def upload(self, frame: np.ndarray):
+        np.copyto(self.buffer, frame)
+
+
+class _KivyUploader:
+    """Kivyテクスチャへの実転送（GLコンテキストが必要）"""
+
+    def __init__(self, width: int, height: int):
+        from kivy.graphics.texture import Texture
+        self.texture = Texture.create(size=(width, height), colorfmt='bgr')
+        self.texture.flip_vertical()
+
+    def upload(self, frame: np.ndarray):
+        self.texture.blit_buffer(frame.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+
+
+def _measure(step, frames: list, iterations: int, target_fps: float = 30.0) -> dict:
+    """stepをiterations回実行してfpsとCPU使用率を計測"""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i in range(iterations):
+        step(frames[i % len(frames)])
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    return {
+        "fps": iterations / wall if wall > 0 else 0.0,
+        "cpu_percent": 100.0 * cpu / wall if wall > 0 else 0.0,
+        "ms_per_frame": 1000.0 * wall / iterations,
+        # 実運用の30fpsで回した場合に1コアのうち何%を使うか
+        "cpu_percent_at_target_fps": 100.0 * cpu / iterations * target_fps,
+    }
+
+
+def run_benchmark(width: int = 640, height: int = 480, iterations: int = 300,
+                  use_kivy: bool = False) -> dict:
+    """
+    プレビュー経路のベンチマークを実行
+
+    Args:
+        width: フレーム幅
+        height: フレーム高さ
+        iterations: 計測フレーム数
+        use_kivy: Trueの場合は実際のKivyテクスチャへ転送
+
+    Returns:
+        dict: 方式ごとの計測結果
+    """
+    frames = make_frames(width, height)
+    uploader = _KivyUploader(width, height) if use_kivy else _CopyUploader(width, height)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'temp_camera.jpg')
+
+        def file_step(frame):
+            # 旧方式: JPEGエンコード → 書き込み → デコード → 新しいテクスチャ
+            cv2.imwrite(path, frame)
+            decoded = cv2.imread(path)
+            _CopyUploader(width, height).upload(decoded)
+
+        file_result = _measure(file_step, frames, iterations)
+
+    texture_result = _measure(uploader.upload, frames, iterations)
+
+    return {
+        "width": width,
+        "height": height,
+        "iterations": iterations,
+        "uploader": "kivy" if use_kivy else "memcpy",
+        "file": file_result,
+        "texture": texture_result,
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="Kivyプレビュー経路のベンチマーク")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--kivy", action="store_true", help="Kivyテクスチャへ実転送する（GL環境が必要）")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.width, args.height, args.iterations, args.kivy)
+    print(f"プレビュー経路ベンチマーク ({result['width']}x{result['height']}, {result['iterations']}フレーム)")
+    for mode in ("file", "texture"):
+        r = result[mode]
+        print(f"  {mode:8s}: {r['fps']:8.1f} fps  {r['ms_per_frame']:.3f} ms/frame  "
+              f"30fps時CPU {r['cpu_percent_at_target_fps']:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
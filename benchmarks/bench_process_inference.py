@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+認識の実行方式（スレッド / ワーカープロセス）のベンチマーク
+合成カメラとダミーモデルで認識パイプラインを動かしながら、メインスレッドで60HzのUIループを模擬し、
+UIのフレーム時間（GILの奪い合いによる遅れ）と認識のスループットを方式ごとに比較する
+
+- none   : 認識なし（UIループだけの基準値）
+- thread : アプリのプロセス内の認識ワーカースレッド（AIRecognizer）
+- process: ワーカープロセス（ProcessRecognizer、共有メモリのリング）
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.camera_manager import CameraManager
+from src.frame_timing import FrameTimeMonitor
+from src.inference_pipeline import InferencePipeline
+from src.synthetic_camera import SyntheticVideoCapture
+
+
+MODES = ("none", "thread", "process")
+
+
+def _ui_loop(camera_manager: CameraManager, duration: float, ui_fps: float, widget_work: int) -> dict:
+    """メインスレッドで描画ループを模擬（最新フレームの転送と、ウィジェット更新相当のPython処理）"""
+    monitor = FrameTimeMonitor(report_interval=0)
+    staging = np.empty((camera_manager.height, camera_manager.width, 3), dtype=np.uint8)
+    interval = 1.0 / ui_fps
+    last_seq = 0
+    late_frames = 0
+    deadline = time.perf_counter()
+    end = deadline + duration
+    while True:
+        deadline += interval
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -interval:
+            late_frames += 1
+        now = time.perf_counter()
+        if now >= end:
+            break
+        monitor.tick()
+
+        ref = camera_manager.acquire_frame(last_seq)
+        if ref is not None:
+            with ref:
+                last_seq = ref.seq
+                np.copyto(staging, ref.frame)
+        # レイアウト計算などGILを持ったまま行うPython処理
+        sum(index * index for index in range(widget_work))
+    return {**monitor.get_stats(), "late_frames": late_frames}
+
+
+def _run_mode(mode: str, model_path: str, duration: float, num_workers: int, ui_fps: float,
+              widget_work: int, input_size: int) -> dict:
+    """1つの方式で計測"""
+    recognizer = None
+    if mode == "thread":
+        from src.recognizer import AIRecognizer
+        recognizer = AIRecognizer(model_path, input_size=input_size)
+    elif mode == "process":
+        from src.process_inference import ProcessRecognizer
+        recognizer = ProcessRecognizer({"onnx_path": model_path, "input_size": input_size},
+                                       num_processes=num_workers)
+        recognizer.start()
+
+    camera_manager = CameraManager(
+        width=640, height=480, fps=30, ring_size=num_workers + 3, shared_memory=(mode == "process"),
+        capture_factory=lambda device_id: SyntheticVideoCapture(640, 480, fps=30, realtime=True)
+    )
+    if mode == "process":
+        recognizer.camera_manager = camera_manager
+
+    pipeline = None
+    camera_manager.start_camera()
+    try:
+        if recognizer is not None:
+            # 間引きなしで認識し続け、UIへの影響が最も大きい状態で比べる
+            pipeline = InferencePipeline(camera_manager, recognizer.detect_batch, num_workers=num_workers,
+                                         adaptive_skip=False, latency_budget=float("inf"))
+            pipeline.start()
+        cpu_start = time.process_time()
+        ui = _ui_loop(camera_manager, duration, ui_fps, widget_work)
+        cpu = time.process_time() - cpu_start
+    finally:
+        if pipeline is not None:
+            pipeline.stop()
+        camera_manager.stop_camera()
+        if mode == "process":
+            recognizer.close()
+
+    stats = pipeline.get_stats() if pipeline is not None else {}
+    return {
+        "ui": ui,
+        "capture_fps": camera_manager.frame_seq / duration,
+        "inference_fps": stats.get("frames_processed", 0) / duration,
+        "avg_latency_ms": stats.get("avg_latency_ms", 0.0),
+        "p95_latency_ms": stats.get("p95_latency_ms", 0.0),
+        # ワーカープロセスのCPU時間は含まない（アプリのプロセスの負荷）
+        "app_cpu_percent": 100.0 * cpu / duration,
+    }
+
+
+def run_benchmark(duration: float = 5.0, num_workers: int = 1, ui_fps: float = 60.0, widget_work: int = 20000,
+                  input_size: int = 640, hidden_channels: int = 64, modes=MODES) -> dict:
+    """
+    方式ごとにUIフレーム時間と認識スループットを計測
+
+    Args:
+        duration: 方式ごとの計測時間（秒）
+        num_workers: 認識ワーカー（スレッド / プロセス）数
+        ui_fps: 模擬UIループの目標フレームレート
+        widget_work: 1フレームあたりのPython処理量（UIの処理の重さ）
+        input_size: ダミーモデルの入力サイズ
+        hidden_channels: ダミーモデルの中間層のチャンネル数（推論負荷）
+        modes: 計測する方式
+
+    Returns:
+        dict: 方式ごとの計測結果
+    """
+    from tools.make_dummy_model import build_dummy_model
+
+    result = {"duration": duration, "num_workers": num_workers, "ui_fps": ui_fps}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = build_dummy_model(os.path.join(tmp_dir, "dummy.onnx"), input_size=input_size,
+                                       hidden_channels=hidden_channels)
+        for mode in modes:
+            result[mode] = _run_mode(mode, model_path, duration, num_workers, ui_fps, widget_work, input_size)
+    return result
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="認識の実行方式（スレッド / ワーカープロセス）のベンチマーク")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--ui-fps", type=float, default=60.0)
+    parser.add_argument("--widget-work", type=int, default=20000)
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--hidden-channels", type=int, default=64)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    result = run_benchmark(args.duration, args.workers, args.ui_fps, args.widget_work, args.input_size,
+                           args.hidden_channels, args.modes)
+    print(f"認識の実行方式ベンチマーク (UI {result['ui_fps']:.0f}Hz, ワーカー {result['num_workers']}, "
+          f"{result['duration']:.0f}秒)")
+    for mode in args.modes:
+        r = result[mode]
+        ui = r["ui"]
+        print(f"  {mode:7s}: UIフレーム時間 平均 {ui['avg_ms']:5.1f} ms  p95 {ui['p95_ms']:5.1f} ms  "
+              f"最大 {ui['max_ms']:5.1f} ms  遅れ {ui['late_frames']:3d}  |  認識 {r['inference_fps']:5.1f} fps  "
+              f"遅延 p95 {r['p95_latency_ms']:6.1f} ms  アプリCPU {r['app_cpu_percent']:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
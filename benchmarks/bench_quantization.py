@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+FP32 / INT8モデルの比較ベンチマーク
+検証用の分割（既定: data/splits/val.txt）でモデルごとに1フレームあたりの処理時間・ピークメモリ（RSS）・
+mAP（IoU 0.5）をCPUで計測する
+
+ピークRSSがほかのモデルの影響を受けないよう、モデルごとに新しいプロセスで計測する。
+学習済みモデルや検証データがない環境では --dummy でダミーモデルと合成画像を使って動作を確認できる。
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.dataset import DEFAULT_VAL_SPLIT, label_path_for, load_yolo_labels, resolve_images
+from src.recognizer import AIRecognizer
+from src.recognizer.detection import DEFAULT_CLASS_NAMES
+from src.recognizer.metrics import DetectionEvaluator
+
+
+def _percentile(values: list, ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """このプロセスのピークRSS（MB、取得できなければNone）"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxはキロバイト、macOSはバイト
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _evaluate_model(model_path: str, images: List[str], class_names: List[str], input_size: int,
+                    backend: str, num_threads: int, confidence_threshold: float, warmup: int) -> dict:
+    """1つのモデルを検証画像で計測（計測用の子プロセスで実行）"""
+    baseline_rss = _peak_rss_mb()
+    start = time.perf_counter()
+    recognizer = AIRecognizer(model_path, confidence_threshold=confidence_threshold, input_size=input_size,
+                              backend=backend, num_threads=num_threads, class_names=class_names)
+    load_ms = 1000.0 * (time.perf_counter() - start)
+
+    evaluator = DetectionEvaluator(class_names)
+    total_ms, inference_ms = [], []
+    for index, path in enumerate(images):
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f"⚠️ 画像を読み込めません: {path}")
+            continue
+        batch = recognizer.detect_batch(frame)
+        if index >= warmup:
+            total_ms.append(recognizer.last_timings["total_ms"])
+            inference_ms.append(recognizer.last_timings["inference_ms"])
+        height, width = frame.shape[:2]
+        evaluator.add(batch, *load_yolo_labels(label_path_for(path), width, height))
+
+    metrics = evaluator.compute()
+    return {
+        "model": model_path,
+        "backend": recognizer.model.name,
+        "model_mb": os.path.getsize(model_path) / 1e6,
+        "load_ms": load_ms,
+        "frames": len(total_ms),
+        "avg_ms": sum(total_ms) / len(total_ms) if total_ms else 0.0,
+        "p50_ms": _percentile(total_ms, 0.5),
+        "p95_ms": _percentile(total_ms, 0.95),
+        "avg_inference_ms": sum(inference_ms) / len(inference_ms) if inference_ms else 0.0,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+        "mAP": metrics["mAP"],
+        "per_class_ap": {name: values["ap"] for name, values in metrics["per_class"].items()},
+    }
+
+
+def make_dummy_dataset(directory: str, num_images: int = 50, input_size: int = 640) -> tuple:
+    """
+    ダミーモデルと、その出力を正解とする合成の検証画像を作成
+
+    Args:
+        directory: 作成先のディレクトリ
+        num_images: 画像数
+        input_size: モデルの入力サイズ
+
+    Returns:
+        tuple: (モデルのパス, 画像ディレクトリ)
+    """
+    from tools.make_dummy_model import DEFAULT_BOXES, build_dummy_model
+
+    model_path = build_dummy_model(os.path.join(directory, "dummy.onnx"), input_size=input_size,
+                                   hidden_channels=64)
+    image_dir = os.path.join(directory, "images", "val")
+    os.makedirs(image_dir)
+    os.makedirs(os.path.join(directory, "labels", "val"))
+
+    # 640x480のフレームをレターボックスした座標からYOLO形式のラベルに戻す
+    width, height = 640, 480
+    scale = min(input_size / width, input_size / height)
+    left = (input_size - int(round(width * scale))) // 2
+    top = (input_size - int(round(height * scale))) // 2
+    lines = [
+        f"{class_id} {(cx - left) / scale / width:.6f} {(cy - top) / scale / height:.6f} "
+        f"{w / scale / width:.6f} {h / scale / height:.6f}"
+        for cx, cy, w, h, class_id, _ in DEFAULT_BOXES
+    ]
+
+    rng = np.random.default_rng(0)
+    for index in range(num_images):
+        image_path = os.path.join(image_dir, f"{index:04d}.jpg")
+        cv2.imwrite(image_path, rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+        with open(label_path_for(image_path), 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+    return model_path, image_dir
+
+
+def run_benchmark(models: dict, images: List[str], class_names: Optional[List[str]] = None,
+                  input_size: int = 640, backend: str = "onnxruntime", num_threads: int = 0,
+                  confidence_threshold: float = 0.25, warmup: int = 3) -> dict:
+    """
+    モデルごとに新しいプロセスで計測
+
+    Args:
+        models: 名前（fp32 / int8 など） → モデルのパス
+        images: 検証画像のパス（ラベルは labels 以下の同名の .txt）
+        class_names: クラス名のリスト
+        input_size: モデルの入力サイズ
+        backend: 推論バックエンド
+        num_threads: 推論スレッド数（0で既定値）
+        confidence_threshold: 検出とみなす信頼度の下限
+        warmup: 処理時間の集計から除く最初の画像数
+
+    Returns:
+        dict: モデル名 → 計測結果
+    """
+    class_names = list(class_names or DEFAULT_CLASS_NAMES)
+    context = multiprocessing.get_context("spawn")
+    results = {"images": len(images)}
+    for name, model_path in models.items():
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[name] = executor.submit(
+                _evaluate_model, model_path, images, class_names, input_size, backend, num_threads,
+                confidence_threshold, warmup
+            ).result()
+    return results
+
+
+def _format_mb(value: Optional[float]) -> str:
+    return "   n/a" if value is None else f"{value:6.1f}"
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="FP32 / INT8モデルの比較ベンチマーク")
+    parser.add_argument("--fp32", default="models/best.onnx")
+    parser.add_argument("--int8", default="models/best.int8.onnx")
+    parser.add_argument("--val", default=DEFAULT_VAL_SPLIT, help="検証画像のディレクトリまたは分割ファイル")
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--backend", default="onnxruntime")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--confidence", type=float, default=0.25)
+    parser.add_argument("--dummy", action="store_true", help="ダミーモデルと合成画像で計測")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.dummy:
+            from tools.quantize_model import quantize_model
+
+            fp32_path, val = make_dummy_dataset(tmp_dir, input_size=args.input_size)
+            int8_path = quantize_model(fp32_path, val, os.path.join(tmp_dir, "dummy.int8.onnx"))
+        else:
+            fp32_path, int8_path, val = args.fp32, args.int8, args.val
+
+        result = run_benchmark({"fp32": fp32_path, "int8": int8_path}, resolve_images(val),
+                               input_size=args.input_size, backend=args.backend, num_threads=args.threads,
+                               confidence_threshold=args.confidence)
+
+    print(f"FP32 / INT8 比較ベンチマーク (検証画像 {result['images']}枚, 入力 {args.input_size}, CPU)")
+    for name in ("fp32", "int8"):
+        r = result[name]
+        print(f"  {name}: {r['backend']:<11} モデル {r['model_mb']:6.1f} MB  読み込み {r['load_ms']:7.1f} ms  "
+              f"処理 平均 {r['avg_ms']:6.1f} ms  p50 {r['p50_ms']:6.1f} ms  p95 {r['p95_ms']:6.1f} ms  "
+              f"(推論 {r['avg_inference_ms']:6.1f} ms)  ピークRSS {_format_mb(r['peak_rss_mb'])} MB  "
+              f"mAP@0.5 {r['mAP']:.3f}")
+    fp32, int8 = result["fp32"], result["int8"]
+    if int8["avg_ms"] > 0:
+        print(f"  INT8: 処理時間 {fp32['avg_ms'] / int8['avg_ms']:.2f}x, mAP差 {int8['mAP'] - fp32['mAP']:+.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+安全確認の逐次判定ベンチマーク
+1フレームの認識結果が一定の確率で誤る模擬セッションを多数実行し、誤認識率ごとに
+判定までの時間、誤操作の見逃し率（間違ったボトルで◯）、誤警報率（正しいボトルで✕）、判定のちらつきを集計する。
+比較として1フレームごとに判定する従来方式（check_safety）も集計
+"""
+
+import argparse
+import os
+import random
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.medicine_selector import MedicineType
+from src.safety_checker import SafetyChecker, Verdict
+
+
+def _simulate(error_rate: float, sessions: int, frames: int, fps: float, seed: int) -> dict:
+    """誤認識率ごとに正しいボトル・間違ったボトルのセッションを実行"""
+    rng = random.Random(seed)
+    selected, other = MedicineType.SODIUM_HYPOCHLORITE, MedicineType.ACETIC_ACID
+    checker = SafetyChecker()
+    missed = false_alarms = flips = 0
+    single_missed = single_false_alarms = single_flips = 0
+
+    for session in range(sessions):
+        correct_bottle = session % 2 == 0
+        actual = selected if correct_bottle else other
+        wrong = other if correct_bottle else selected
+        start = session * 10.0
+        checker.start_session(selected, timestamp=start)
+        verdicts = []
+        single = []
+        for index in range(frames):
+            detected = wrong if rng.random() < error_rate else actual
+            confidence = rng.uniform(0.5, 1.0)
+            verdicts.append(checker.update(detected, confidence, timestamp=start + (index + 1) / fps))
+            single.append(Verdict.SAFE if SafetyChecker.check_safety(selected, detected) else Verdict.UNSAFE)
+
+        decided = [v for v in verdicts if v != Verdict.PENDING]
+        first = decided[0] if decided else Verdict.PENDING
+        flips += sum(1 for a, b in zip(decided, decided[1:]) if a != b)
+        single_flips += sum(1 for a, b in zip(single, single[1:]) if a != b)
+        if correct_bottle:
+            false_alarms += first == Verdict.UNSAFE
+            single_false_alarms += single[0] == Verdict.UNSAFE
+        else:
+            missed += first == Verdict.SAFE
+            single_missed += single[0] == Verdict.SAFE
+
+    half = sessions / 2
+    stats = checker.get_stats()
+    return {
+        "error_rate": error_rate,
+        "avg_time_to_verdict_ms": stats["avg_time_to_verdict_ms"],
+        "p95_time_to_verdict_ms": stats["p95_time_to_verdict_ms"],
+        "avg_frames_to_verdict": stats["avg_frames_to_verdict"],
+        "undecided_sessions": sessions - stats["sessions"],
+        "missed_rate": missed / half,
+        "false_alarm_rate": false_alarms / half,
+        "flips_per_session": flips / sessions,
+        "single_frame_missed_rate": single_missed / half,
+        "single_frame_false_alarm_rate": single_false_alarms / half,
+        "single_frame_flips_per_session": single_flips / sessions,
+    }
+
+
+def run_benchmark(error_rates=(0.05, 0.1, 0.2, 0.3), sessions: int = 2000, frames: int = 60,
+                  fps: float = 30.0, seed: int = 0) -> dict:
+    """
+    誤認識率ごとに逐次判定を評価
+
+    Args:
+        error_rates: 1フレームの誤認識率のリスト
+        sessions: 誤認識率ごとのセッション数（半分が正しいボトル）
+        frames: 1セッションのフレーム数
+        fps: フレームレート
+        seed: 乱数シード
+
+    Returns:
+        dict: 誤認識率ごとの集計結果
+    """
+    return {
+        "sessions": sessions,
+        "frames": frames,
+        "fps": fps,
+        "results": [_simulate(rate, sessions, frames, fps, seed) for rate in error_rates],
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="安全確認の逐次判定ベンチマーク")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--fps", type=float, default=30.0)
+    args = parser.parse_args()
+
+    result = run_benchmark(sessions=args.sessions, frames=args.frames, fps=args.fps)
+    print(f"安全確認ベンチマーク ({result['sessions']} セッション x {result['frames']} フレーム @ {result['fps']:.0f}fps)")
+    for r in result["results"]:
+        print(f"  誤認識率 {r['error_rate']:4.0%}: 判定まで 平均 {r['avg_time_to_verdict_ms']:6.1f} ms  "
+              f"p95 {r['p95_time_to_verdict_ms']:6.1f} ms  見逃し {r['missed_rate']:6.2%}  "
+              f"誤警報 {r['false_alarm_rate']:6.2%}  ちらつき {r['flips_per_session']:.2f}/回  "
+              f"(1フレーム判定: 見逃し {r['single_frame_missed_rate']:6.2%}  "
+              f"ちらつき {r['single_frame_flips_per_session']:.1f}/回)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+起動時間のベンチマーク
+main.py（英語版のAndroidアプリ）を別プロセスで起動し、起動から次の時点までの時間を計測する
+
+- first_frame : 最初の描画（薬液選択画面が表示された）
+- interactive : 最初の描画の次のメインループ（選択画面が操作を受け付ける）
+- camera_ready: カメラ画面の準備完了（ui.defer_camera_screen: true ならバックグラウンドの読み込み後）
+
+ui.defer_camera_screen を true / false にした設定で起動して比較する（アプリは camera_ready で終了する）。
+あわせて `python -X importtime` でモジュールごとの読み込み時間を集計し、時間のかかるパッケージを表示する。
+Kivyが入っていない環境では起動の計測を省き、読み込み時間だけを計測する。
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import yaml
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.frame_timing import STARTUP_PROFILE_ENV
+
+
+MARKS = ("first_frame", "interactive", "camera_ready")
+
+# 読み込み時間を計測するモジュール（選択画面だけで必要なもの / 後から読み込むもの）
+DEFAULT_MODULES = ("src.android_app_english", "src.android_camera_screen", "src.camera_manager",
+                   "src.recognition_service")
+
+
+def importtime_breakdown(module: str, top: int = 10) -> dict:
+    """
+    新しいインタープリタで `-X importtime` を付けてモジュールを読み込み、読み込み時間を集計
+
+    Args:
+        module: 読み込むモジュール名
+        top: 表示するパッケージ数
+
+    Returns:
+        dict: 合計（ミリ秒）と、モジュールが直接読み込む時間のかかるパッケージ（累積ミリ秒）
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=project_root, capture_output=True, text=True)
+    # 出力は読み込みの完了順（内側が先）で、字下げが深さを表す
+    total_ms, children, packages = 0.0, {}, {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 1:
+            children[name] = children.get(name, 0.0) + int(cumulative) / 1000.0
+        elif depth == 0:
+            # 計測対象の直下で読み込んだモジュールだけを残す（インタープリタ起動時の site などは除く）
+            if name == module:
+                total_ms, packages = int(cumulative) / 1000.0, children
+            children = {}
+    result = {
+        "total_ms": total_ms,
+        "packages_ms": dict(sorted(packages.items(), key=lambda item: -item[1])[:top]),
+    }
+    if completed.returncode != 0:
+        result["error"] = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import failed"
+    return result
+
+
+def measure_launch(defer_camera_screen: bool, timeout: float = 60.0) -> dict:
+    """
+    アプリを1回起動して各時点までの時間を計測
+
+    Args:
+        defer_camera_screen: カメラ画面をバックグラウンドで後から読み込む
+        timeout: 起動を待つ上限（秒）
+
+    Returns:
+        dict: 各時点までの時間（ミリ秒）とプロセス終了までの時間
+    """
+    with open(os.path.join(project_root, "config.yaml"), "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config.setdefault("ui", {})["defer_camera_screen"] = defer_camera_screen
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # アプリはカレントディレクトリの config.yaml を読む
+        with open(os.path.join(work_dir, "config.yaml"), "w", encoding="utf-8") as f:
+            yaml.safe_dump(config, f, allow_unicode=True)
+        env = dict(os.environ, **{STARTUP_PROFILE_ENV: "1"})
+        start = time.time()
+        try:
+            completed = subprocess.run([sys.executable, os.path.join(project_root, "main.py")], cwd=work_dir,
+                                       env=env, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {"error": f"{timeout:.0f}秒以内に起動が完了しませんでした"}
+        exit_ms = 1000.0 * (time.time() - start)
+
+    result = {}
+    for line in completed.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == "STARTUP":
+            result[f"{parts[1]}_ms"] = 1000.0 * (float(parts[2]) - start)
+    result["exit_ms"] = exit_ms
+    missing = [mark for mark in MARKS if f"{mark}_ms" not in result]
+    if missing:
+        result["error"] = f"記録のない時点: {', '.join(missing)} (終了コード {completed.returncode})"
+    return result
+
+
+def _median_runs(runs: List[dict]) -> dict:
+    """各項目の中央値"""
+    valid = [run for run in runs if "error" not in run]
+    if not valid:
+        return runs[-1]
+    result = {}
+    for key in valid[0]:
+        values = sorted(run[key] for run in valid if key in run)
+        result[key] = values[len(values) // 2]
+    result["runs"] = len(valid)
+    return result
+
+
+def run_benchmark(runs: int = 3, modules: Optional[List[str]] = None, timeout: float = 60.0) -> dict:
+    """
+    起動時間と読み込み時間を計測
+
+    Args:
+        runs: 起動の繰り返し回数（中央値を使う）
+        modules: 読み込み時間を計測するモジュール
+        timeout: 1回の起動を待つ上限（秒）
+
+    Returns:
+        dict: 起動方式ごとの時間と、モジュールごとの読み込み時間
+    """
+    result = {"imports": {module: importtime_breakdown(module) for module in modules or DEFAULT_MODULES}}
+    if importlib.util.find_spec("kivy") is None or importlib.util.find_spec("kivymd") is None:
+        result["launch"] = {"skipped": "Kivy / KivyMD が入っていないため起動は計測しません"}
+        return result
+    result["launch"] = {
+        mode: _median_runs([measure_launch(mode == "deferred", timeout) for _ in range(runs)])
+        for mode in ("eager", "deferred")
+    }
+    return result
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="起動時間のベンチマーク")
+    parser.add_argument("--runs", type=int, default=3, help="起動の繰り返し回数（中央値を使う）")
+    parser.add_argument("--modules", nargs="+", default=list(DEFAULT_MODULES), help="読み込み時間を計測するモジュール")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", default=None, help="結果の保存先（JSON）")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.runs, args.modules, args.timeout)
+    print("起動時間ベンチマーク")
+    launch = result["launch"]
+    if "skipped" in launch:
+        print(f"  {launch['skipped']}")
+    for mode, r in launch.items():
+        if mode == "skipped":
+            continue
+        if "error" in r:
+            print(f"  {mode:8s}: {r['error']}")
+            continue
+        print(f"  {mode:8s}: 最初の描画 {r['first_frame_ms']:7.0f} ms  操作可能 {r['interactive_ms']:7.0f} ms  "
+              f"カメラ画面 {r['camera_ready_ms']:7.0f} ms  (中央値, {r['runs']}回)")
+    for module, r in result["imports"].items():
+        error = f"  ({r['error']})" if "error" in r else ""
+        print(f"  import {module}: {r['total_ms']:.0f} ms{error}")
+        for package, ms in r["packages_ms"].items():
+            print(f"    {package:32s} {ms:7.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"結果を保存しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+ホットパスのベンチマークスイート
+カメラなしで合成カメラ（SyntheticVideoCapture）を使い、取得・表示・認識の各経路を計測してJSONに保存する
+
+- capture_loop : CameraManager._capture_loop のスループット（fps指定のペース配分あり / 上限なし）とCPU使用率
+- capture_alloc: 1フレームあたりのコピー・確保量（bench_capture_alloc）
+- display_tk   : Tk表示の変換（リサイズ・BGR→RGB・PIL Image）とPhotoImageへの貼り付け
+- display_kivy : Kivyプレビューのテクスチャ転送（bench_preview、--kivy を付けない場合はmemcpyで代替）
+- recognition  : 前処理・推論・後処理の段階ごとの処理時間（ダミーモデル）、テープ判定、動き検出
+
+--compare で以前の結果と比べ、閾値を超えて悪化した項目があれば終了コード1を返す（リリース間の比較用）。
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks import bench_capture_alloc, bench_preview
+from src.camera_manager import CameraManager
+from src.synthetic_camera import SyntheticVideoCapture
+
+
+CASES = ("capture_loop", "capture_alloc", "display_tk", "display_kivy", "recognition")
+
+# 比較で「大きいほど良い」とみなす項目名の末尾（それ以外の時間・確保量は小さいほど良い）
+HIGHER_IS_BETTER = ("fps",)
+LOWER_IS_BETTER = ("_ms", "_us", "us_per_frame", "ms_per_frame", "_bytes", "bytes_per_frame",
+                   "allocs_per_frame", "cpu_percent")
+
+
+def _stats(samples: List[float]) -> dict:
+    """平均・p50・p95"""
+    if not samples:
+        return {"avg": 0.0, "p50": 0.0, "p95": 0.0}
+    ordered = sorted(samples)
+    return {
+        "avg": sum(ordered) / len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def bench_capture_loop(width: int, height: int, fps: float, duration: float, ring_size: int) -> dict:
+    """キャプチャスレッドを動かし、実際に公開されたフレーム数とCPU使用率を計測"""
+    result = {}
+    for mode, size in (("copy", 0), ("ring", ring_size)):
+        for pacing, target_fps in (("paced", fps), ("max", 100000.0)):
+            sources = []
+
+            def capture_factory(device_id, target_fps=target_fps):
+                sources.append(SyntheticVideoCapture(width, height, fps=target_fps))
+                return sources[-1]
+
+            camera_manager = CameraManager(width=width, height=height, fps=target_fps, ring_size=size,
+                                           capture_factory=capture_factory)
+            camera_manager.start_camera()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            time.sleep(duration)
+            frames = camera_manager.frame_seq
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            camera_manager.stop_camera()
+            result[f"{mode}_{pacing}"] = {
+                "fps": frames / wall,
+                "cpu_percent": 100.0 * cpu / wall,
+                "source_allocs_per_frame": sources[-1].frames_allocated / frames if frames else 0.0,
+            }
+    result["target_fps"] = fps
+    return result
+
+
+def bench_display_tk(width: int, height: int, iterations: int, display_size: tuple) -> dict:
+    """Tk表示の変換と貼り付け（Tkを起動できない環境では変換だけ）"""
+    from src.main_app import DisplayConverter
+
+    frames = bench_preview.make_frames(width, height)
+    converter = DisplayConverter()
+    result = {}
+    for name, size in (("same_size", (width, height)), ("resized", display_size)):
+        converter.convert(frames[0], size)
+        start = time.perf_counter()
+        for index in range(iterations):
+            converter.convert(frames[index % len(frames)], size)
+        result[f"{name}_convert_us"] = 1e6 * (time.perf_counter() - start) / iterations
+
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+    except Exception as e:
+        result["paste"] = f"skipped: {e}"
+        return result
+    try:
+        root.withdraw()
+        image = converter.convert(frames[0], (width, height))
+        photo = ImageTk.PhotoImage(image)
+        start = time.perf_counter()
+        for index in range(iterations):
+            photo.paste(converter.convert(frames[index % len(frames)], (width, height)))
+        result["convert_paste_us"] = 1e6 * (time.perf_counter() - start) / iterations
+    finally:
+        root.destroy()
+    return result
+
+
+def bench_display_kivy(width: int, height: int, iterations: int, use_kivy: bool) -> dict:
+    """Kivyテクスチャ転送（Kivyを使わない場合は同じ量のmemcpyで代替）"""
+    return bench_preview.run_benchmark(width, height, iterations, use_kivy=use_kivy)
+
+
+def bench_recognition(width: int, height: int, frames: int, input_size: int) -> dict:
+    """ダミーモデルで段階ごとの処理時間を計測"""
+    try:
+        from tools.make_dummy_model import build_dummy_model
+        import onnx  # noqa: F401
+    except ImportError as e:
+        return {"skipped": f"onnxがインストールされていません: {e}"}
+
+    from src.motion_gate import MotionGate
+    from src.recognizer import AIRecognizer, TapeClassifier
+
+    capture = SyntheticVideoCapture(width, height)
+    samples = [capture.read()[1] for _ in range(8)]
+    result = {"frames": frames, "input_size": input_size}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = build_dummy_model(os.path.join(tmp_dir, "dummy.onnx"), input_size=input_size)
+        recognizer = AIRecognizer(model_path, input_size=input_size)
+        result["backend"] = recognizer.model.name
+        timings: Dict[str, List[float]] = {}
+        for index in range(frames + 3):
+            recognizer.detect_batch(samples[index % len(samples)])
+            if index < 3:
+                continue
+            for stage, value in recognizer.last_timings.items():
+                timings.setdefault(stage, []).append(value)
+        for stage, values in timings.items():
+            stats = _stats(values)
+            name = stage[:-3] if stage.endswith("_ms") else stage
+            result.update({f"{name}_{key}_ms": value for key, value in stats.items()})
+
+    for name, step in (("tape", TapeClassifier().classify), ("motion_gate", MotionGate().update)):
+        step(samples[0])
+        start = time.perf_counter()
+        for index in range(frames):
+            step(samples[index % len(samples)])
+        result[f"{name}_us"] = 1e6 * (time.perf_counter() - start) / frames
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _metadata(args: argparse.Namespace) -> dict:
+    """比較のための実行環境"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+    }
+
+
+def run_suite(cases=CASES, width: int = 640, height: int = 480, fps: float = 30.0, duration: float = 2.0,
+              frames: int = 200, ring_size: int = 4, input_size: int = 640,
+              display_size: tuple = (800, 600), use_kivy: bool = False) -> dict:
+    """
+    ベンチマークスイートを実行
+
+    Args:
+        cases: 実行するケース
+        width: 合成カメラの映像幅
+        height: 合成カメラの映像高さ
+        fps: 合成カメラ・キャプチャループのフレームレート
+        duration: キャプチャループの計測時間（秒、方式ごと）
+        frames: フレーム単位のケースの計測フレーム数
+        ring_size: リングバッファのスロット数
+        input_size: 認識モデルの入力サイズ
+        display_size: Tk表示でリサイズする場合の表示サイズ
+        use_kivy: Trueの場合は実際のKivyテクスチャへ転送（GL環境が必要）
+
+    Returns:
+        dict: ケース名 → 計測結果
+    """
+    results = {}
+    for case in cases:
+        start = time.perf_counter()
+        if case == "capture_loop":
+            results[case] = bench_capture_loop(width, height, fps, duration, ring_size)
+        elif case == "capture_alloc":
+            results[case] = bench_capture_alloc.run_benchmark(frames, width, height, width * 2, height * 3 // 2,
+                                                              ring_size)
+        elif case == "display_tk":
+            results[case] = bench_display_tk(width, height, frames, display_size)
+        elif case == "display_kivy":
+            results[case] = bench_display_kivy(width, height, frames, use_kivy)
+        elif case == "recognition":
+            results[case] = bench_recognition(width, height, frames, input_size)
+        else:
+            raise ValueError(f"不明なケース: {case}")
+        print(f"  {case}: {time.perf_counter() - start:.1f} 秒")
+    return results
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """入れ子の結果を "ケース.項目" の数値だけに平らにする"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def _direction(name: str) -> int:
+    """大きいほど良い項目は1、小さいほど良い項目は-1、比較しない項目は0"""
+    leaf = name.rsplit(".", 1)[-1]
+    if leaf.endswith(HIGHER_IS_BETTER) or leaf == "speedup":
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.1) -> List[dict]:
+    """
+    以前の結果と比べて悪化した項目を列挙
+
+    Args:
+        current: 今回の結果（results）
+        baseline: 以前の結果（results）
+        threshold: 悪化とみなす変化率
+
+    Returns:
+        List[dict]: 悪化した項目（名前・以前・今回・変化率）
+    """
+    regressions = []
+    old = flatten(baseline)
+    for name, value in flatten(current).items():
+        direction = _direction(name)
+        if not direction or name not in old or old[name] == 0:
+            continue
+        change = (value - old[name]) / abs(old[name])
+        # 確保量が0付近のように小さい値の揺れは除く
+        if direction * change < -threshold and abs(value - old[name]) > 1e-3:
+            regressions.append({"name": name, "baseline": old[name], "current": value, "change": change})
+    return regressions
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="取得・表示・認識のベンチマークスイート（JSON出力）")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--ring-size", type=int, default=4)
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--kivy", action="store_true", help="Kivyテクスチャへ実転送する（GL環境が必要）")
+    parser.add_argument("--output", default="bench_results.json", help="結果のJSONファイル")
+    parser.add_argument("--compare", default=None, help="比較する以前の結果のJSONファイル")
+    parser.add_argument("--threshold", type=float, default=0.1, help="悪化とみなす変化率")
+    args = parser.parse_args()
+
+    print(f"ベンチマークスイート ({args.width}x{args.height}, {args.fps:.0f}fps)")
+    results = run_suite(args.cases, args.width, args.height, args.fps, args.duration, args.frames,
+                        args.ring_size, args.input_size, use_kivy=args.kivy)
+    report = {"meta": _metadata(args), "results": results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を保存しました: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        print(f"{args.compare} ({baseline['meta'].get('git_commit')}) との比較: 悪化 {len(regressions)}件")
+        for item in regressions:
+            print(f"  {item['name']}: {item['baseline']:.3f} → {item['current']:.3f} ({item['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
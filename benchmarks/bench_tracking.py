@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+追跡によるYOLO実行回数削減のベンチマーク
+録画した映像（または合成映像）をカメラと同じfpsで再生し、毎フレームYOLOを実行する場合と
+キーフレームでだけ実行して間を追跡で補う場合の、検出器の実行回数/秒とCPU使用率を比較
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.recognizer import AIRecognizer, TrackingRecognizer
+from src.synthetic_camera import SyntheticVideoCapture
+
+
+def load_frames(video: str = None, frames: int = 150) -> list:
+    """
+    再生するフレームを読み込む
+
+    Args:
+        video: 録画ファイルのパス（Noneで合成映像）
+        frames: 読み込む最大フレーム数
+    """
+    capture = cv2.VideoCapture(video) if video else SyntheticVideoCapture(640, 480, max_frames=frames)
+    loaded = []
+    while len(loaded) < frames:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        loaded.append(frame)
+    capture.release()
+    return loaded
+
+
+def _run_mode(recognizer, frames: list, fps: float) -> dict:
+    """フレームをfpsで再生しながら認識し、CPU使用率と検出器の実行回数を計測"""
+    interval = 1.0 / fps
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    deadline = wall_start
+    for frame in frames:
+        recognizer.detect_batch(frame)
+        deadline += interval
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    return {
+        "detector_calls_per_sec": recognizer.get_stats()["detector_calls"] / wall,
+        "cpu_percent": 100.0 * cpu / wall,
+        "achieved_fps": len(frames) / wall,
+    }
+
+
+def run_benchmark(model_path: str, frames: list, fps: float = 30.0, keyframe_interval: int = 10,
+                  input_size: int = 640, backend: str = "auto") -> dict:
+    """
+    追跡なしと追跡ありを比較
+
+    Args:
+        model_path: ONNXモデルのパス
+        frames: 再生するフレーム
+        fps: 再生フレームレート
+        keyframe_interval: 追跡ありの検出器の実行間隔
+        input_size: モデルの入力サイズ
+        backend: 推論バックエンド
+
+    Returns:
+        dict: 方式ごとの計測結果（CPU使用率は1コアを100%とする）
+    """
+    detector = AIRecognizer(model_path, input_size=input_size, backend=backend)
+    # ウォームアップ（初回のバッファ確保を除外）
+    detector.detect_batch(frames[0])
+
+    return {
+        "frames": len(frames),
+        "fps": fps,
+        "keyframe_interval": keyframe_interval,
+        "backend": detector.model.name,
+        # キーフレーム間隔1は毎フレーム検出器を実行する（追跡なしと同じ）
+        "without_tracking": _run_mode(TrackingRecognizer(detector, keyframe_interval=1), frames, fps),
+        "with_tracking": _run_mode(TrackingRecognizer(detector, keyframe_interval=keyframe_interval), frames, fps),
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="追跡によるYOLO実行回数削減のベンチマーク")
+    parser.add_argument("--video", help="録画ファイル（省略時は合成映像）")
+    parser.add_argument("--model", help="ONNXモデルのパス（省略時はダミーモデルを作成）")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--keyframe-interval", type=int, default=10)
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--backend", default="auto")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = args.model
+        if model_path is None:
+            from tools.make_dummy_model import build_dummy_model
+            # 推論に負荷がかかるよう中間層を増やす（実際のモデルは --model で指定）
+            model_path = build_dummy_model(os.path.join(tmp_dir, "dummy.onnx"), args.input_size,
+                                           hidden_channels=256)
+        result = run_benchmark(model_path, frames, args.fps, args.keyframe_interval,
+                               args.input_size, args.backend)
+
+    print(f"追跡ベンチマーク ({result['frames']} フレーム @ {result['fps']:.0f}fps, "
+          f"キーフレーム間隔 {result['keyframe_interval']}, バックエンド {result['backend']})")
+    for mode, label in (("without_tracking", "追跡なし"), ("with_tracking", "追跡あり")):
+        r = result[mode]
+        print(f"  {label}: 検出器 {r['detector_calls_per_sec']:5.1f} 回/秒  CPU {r['cpu_percent']:5.1f}%  "
+              f"({r['achieved_fps']:.1f} fps)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+モデルの先読み・ウォームアップのベンチマーク
+補充開始（安全確認のセッション開始と認識の開始）から最初の判定（◯ / ✕）が出るまでの時間を、
+モデルを先読みしない場合・先読みだけの場合・先読みしてウォームアップした場合で比較する
+
+- cold   : 補充開始時にモデルを読み込む（従来の動作）
+- preload: 薬液選択中にモデルを読み込んでおく（ウォームアップなし）
+- warmup : 薬液選択中にモデルを読み込み、ダミーフレームで推論しておく
+
+初回の推論の遅さをプロセスごとに再現するため、1回の計測ごとに新しいプロセス（spawn）で実行する。
+合成カメラとダミーモデル（最初のアンカーに次亜塩素酸ナトリウムを出力する）を使う。
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+MODES = ("cold", "preload", "warmup")
+
+
+def _first_verdict(model_path: str, mode: str, pipeline_mode: str, width: int, height: int, input_size: int,
+                   warmup_iterations: int, selection_time: float) -> dict:
+    """1回分の計測（新しいプロセスで実行）"""
+    from src.camera_manager import CameraManager
+    from src.medicine_selector import MedicineType
+    from src.recognition_service import RecognitionService
+    from src.safety_checker import SafetyChecker, Verdict
+    from src.synthetic_camera import SyntheticVideoCapture
+
+    model_config = {"onnx_path": model_path, "input_size": input_size,
+                    "warmup_iterations": warmup_iterations if mode == "warmup" else 0}
+    safety_checker = SafetyChecker()
+    service = RecognitionService(model_config, {"mode": pipeline_mode}, safety_checker=safety_checker)
+    if mode != "cold":
+        service.preload((height, width, 3))
+    camera_manager = CameraManager(
+        width=width, height=height, fps=30, ring_size=5, shared_memory=service.uses_processes,
+        capture_factory=lambda device_id: SyntheticVideoCapture(width, height, fps=30, realtime=True)
+    )
+    camera_manager.start_camera()
+    # 操作者が薬液を選んでいる時間
+    time.sleep(selection_time)
+    load_ready = not service.is_loading and service.is_ready
+
+    first_result_ms = None
+    try:
+        start = time.monotonic()
+        safety_checker.start_session(MedicineType.SODIUM_HYPOCHLORITE, start)
+        # 画面と同じく、attachは待たずに返るので読み込みが終わったら呼び直す
+        is_attached = service.attach(camera_manager)
+        attached = time.monotonic()
+        deadline = start + 60.0
+        while time.monotonic() < deadline:
+            if not is_attached and not service.is_loading:
+                is_attached = service.attach(camera_manager)
+            if first_result_ms is None and service.get_latest_result() is not None:
+                first_result_ms = 1000.0 * (time.monotonic() - start)
+            if safety_checker.get_verdict() != Verdict.PENDING:
+                break
+            time.sleep(0.001)
+        verdict_ms = 1000.0 * (time.monotonic() - start)
+        verdict = safety_checker.get_verdict()
+    finally:
+        service.shutdown()
+        camera_manager.stop_camera()
+    return {
+        "ready_before_start": load_ready,
+        "attach_ms": 1000.0 * (attached - start),
+        "first_result_ms": first_result_ms if first_result_ms is not None else verdict_ms,
+        "first_verdict_ms": verdict_ms,
+        "verdict": verdict.name,
+    }
+
+
+def run_benchmark(runs: int = 3, modes=MODES, pipeline_mode: str = "thread", width: int = 640, height: int = 480,
+                  input_size: int = 640, hidden_channels: int = 64, warmup_iterations: int = 3,
+                  selection_time: float = 3.0) -> dict:
+    """
+    方式ごとに補充開始から最初の判定までの時間を計測
+
+    Args:
+        runs: 方式ごとの計測回数（中央値を使う）
+        modes: 比較する方式
+        pipeline_mode: 認識の実行方式（thread / process）
+        width: カメラの映像幅
+        height: カメラの映像高さ
+        input_size: モデルの入力サイズ
+        hidden_channels: ダミーモデルの中間層のチャンネル数（推論負荷）
+        warmup_iterations: ウォームアップの推論回数
+        selection_time: 薬液選択にかかる時間（秒、この間に先読みする）
+
+    Returns:
+        dict: 方式ごとの最初の認識結果・最初の判定までの時間（ミリ秒、中央値）
+    """
+    from tools.make_dummy_model import build_dummy_model
+
+    result = {"runs": runs, "pipeline_mode": pipeline_mode, "input_size": input_size,
+              "warmup_iterations": warmup_iterations, "selection_time_s": selection_time}
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = build_dummy_model(os.path.join(tmp_dir, "dummy.onnx"), input_size=input_size,
+                                       hidden_channels=hidden_channels)
+        for mode in modes:
+            samples = []
+            for _ in range(runs):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    samples.append(executor.submit(_first_verdict, model_path, mode, pipeline_mode, width, height,
+                                                   input_size, warmup_iterations, selection_time).result())
+            summary = {}
+            for key in ("attach_ms", "first_result_ms", "first_verdict_ms"):
+                values = sorted(sample[key] for sample in samples)
+                summary[key] = values[len(values) // 2]
+                summary[f"{key[:-3]}_max_ms"] = values[-1]
+            summary["ready_before_start"] = all(sample["ready_before_start"] for sample in samples)
+            summary["verdicts"] = [sample["verdict"] for sample in samples]
+            result[mode] = summary
+    return result
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="モデルの先読み・ウォームアップのベンチマーク")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--pipeline-mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--hidden-channels", type=int, default=64)
+    parser.add_argument("--warmup-iterations", type=int, default=3)
+    parser.add_argument("--selection-time", type=float, default=3.0, help="薬液選択にかかる時間（秒）")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.runs, args.modes, args.pipeline_mode, args.width, args.height, args.input_size,
+                           args.hidden_channels, args.warmup_iterations, args.selection_time)
+    print(f"モデル先読みベンチマーク ({result['pipeline_mode']}, 入力 {result['input_size']}, "
+          f"ウォームアップ {result['warmup_iterations']}回, 中央値 {result['runs']}回)")
+    for mode in args.modes:
+        r = result[mode]
+        print(f"  {mode:8s}: 認識開始 {r['attach_ms']:7.1f} ms  最初の認識結果 {r['first_result_ms']:7.1f} ms  "
+              f"最初の判定 {r['first_verdict_ms']:7.1f} ms (最大 {r['first_verdict_max_ms']:7.1f} ms)  "
+              f"開始時に準備済み {'はい' if r['ready_before_start'] else 'いいえ'}  {'/'.join(r['verdicts'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.image import Image
+from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.popup import Popup
 from kivy.clock import Clock
 from kivy.graphics.texture import Texture
@@ -27,13 +28,30 @@ from kivymd.uix.toolbar import MDTopAppBar
 from kivymd.theming import ThemeManager
 import cv2
 import numpy as np
-import yaml
 from plyer import camera
 import threading
 import time
 
 from src.medicine_selector import MedicineSelector, MedicineType
 from src.camera_manager import CameraManager
+from src.config_service import ConfigService
+from src.frame_timing import FrameTimeMonitor
+from src.latency_monitor import LatencyMonitor, LatencyReporter
+from src.kivy_preview import CameraPreview
+from src.recognition_service import RecognitionService
+from src.safety_checker import SafetyChecker
+
+
+# 遅延の表示を更新する間隔（秒）
+LATENCY_OVERLAY_INTERVAL = 0.5
+
+# モデルの準備状況を確認する間隔（秒）
+MODEL_STATUS_INTERVAL = 0.1
+
+MODEL_STATUS_TEXT = {
+    "loading": "認識モデルを読み込んでいます…",
+    "warming_up": "認識モデルを準備しています…",
+}
 
 
 class MedicineSelectionScreen(MDScreen):
@@ -133,6 +151,10 @@ class MedicineSelectionScreen(MDScreen):
         
         self.add_widget(layout)
     
+    def on_enter(self, *args):
+        """薬液を選んでいる間にモデルの読み込みとウォームアップを進める"""
+        App.get_running_app().preload_recognition()
+    
     def on_medicine_selected(self, instance):
         """薬液選択時の処理"""
         if instance == self.sodium_radio and instance.active:
@@ -158,6 +180,7 @@ class MedicineSelectionScreen(MDScreen):
         
         # カメラ画面に遷移
         app = App.get_running_app()
+        app.camera_screen.safety_checker.start_session(self.medicine_selector.get_selected_medicine())
         app.screen_manager.current = 'camera'
         app.camera_screen.start_camera()
 
@@ -166,9 +189,32 @@ class CameraScreen(MDScreen):
     """カメラ画面"""
     
     def __init__(self, **kwargs):
+        self.camera_config = kwargs.pop('camera_config', {})
+        frame_time_report_interval = kwargs.pop('frame_time_report_interval', 5.0)
+        # 段階ごとの遅延計測（latency.enabled: false ならNone）
+        latency_config = kwargs.pop('latency_config', {})
+        self.latency_monitor = LatencyMonitor.from_config(latency_config)
+        self.latency_reporter = LatencyReporter.from_config(self.latency_monitor, latency_config)
+        if self.latency_reporter is not None:
+            self.latency_reporter.start()
+        self.show_latency_overlay = self.latency_monitor is not None and latency_config.get('overlay', False)
+        self.safety_checker = SafetyChecker.from_config(kwargs.pop('safety_config', {}))
+        # 認識パイプライン（pipeline.modeでスレッド / ワーカープロセスを切り替え）
+        self.recognition = RecognitionService(kwargs.pop('model_config', {}), kwargs.pop('pipeline_config', {}),
+                                              safety_checker=self.safety_checker,
+                                              latency_monitor=self.latency_monitor,
+                                              motion_config=kwargs.pop('motion_config', {}),
+                                              tape_config=kwargs.pop('tape_config', {}),
+                                              tracking_config=kwargs.pop('tracking_config', {}),
+                                              medicine_selector=kwargs.pop('medicine_selector', None))
         super().__init__(**kwargs)
         self.camera_manager = None
+        self.camera_preview = None
+        self.latency_label = None
+        self.overlay_event = None
+        self.model_status_event = None
         self.is_camera_active = False
+        self.frame_monitor = FrameTimeMonitor(name="メインループ", report_interval=frame_time_report_interval)
         self.setup_ui()
     
     def setup_ui(self):
@@ -179,13 +225,28 @@ class CameraScreen(MDScreen):
             padding=10
         )
         
-        # カメラ映像表示
+        # カメラ映像表示（遅延の表示は映像の左上に重ねる）
+        camera_area = FloatLayout(size_hint=(1, 0.8))
         self.camera_image = Image(
-            size_hint=(1, 0.8),
             allow_stretch=True,
             keep_ratio=True
         )
-        layout.add_widget(self.camera_image)
+        camera_area.add_widget(self.camera_image)
+        if self.show_latency_overlay:
+            self.latency_label = self.create_latency_label()
+            camera_area.add_widget(self.latency_label)
+        layout.add_widget(camera_area)
+        
+        # モデルの準備状況（認識を開始したら空にする）
+        self.status_label = MDLabel(
+            text="",
+            theme_text_color="Secondary",
+            size_hint_y=None,
+            height=30,
+            halign="center",
+            font_name="Japanese"
+        )
+        layout.add_widget(self.status_label)
         
         # 制御ボタン
         button_layout = MDBoxLayout(
@@ -213,6 +274,19 @@ class CameraScreen(MDScreen):
         
         self.add_widget(layout)
     
+    def create_latency_label(self) -> Label:
+        """段階ごとの遅延の表示（デバッグ用）"""
+        label = Label(text="", font_name="RobotoMono-Regular", font_size="11sp", color=(0, 1, 0, 1),
+                      halign="left", valign="top", size_hint=(1, 1), pos_hint={'x': 0, 'y': 0})
+        label.bind(size=lambda widget, size: setattr(widget, 'text_size', size))
+        return label
+    
+    def update_latency_overlay(self, dt):
+        """段階ごとの遅延と現在の判定の表示を更新"""
+        text = self.latency_monitor.format_overlay()
+        verdict = f"verdict: {self.safety_checker.get_verdict().name}"
+        self.latency_label.text = f"{text}\n{verdict}" if text else verdict
+    
     def start_camera(self):
         """カメラを起動"""
         if not self.is_camera_active:
@@ -228,11 +302,16 @@ class CameraScreen(MDScreen):
     def activate_camera(self):
         """カメラを有効化"""
         try:
-            # Androidカメラの起動
-            camera.take_picture(
-                filename='temp_camera.jpg',
-                on_complete=self.on_camera_result
-            )
+            from kivy.utils import platform
+            if platform == 'android':
+                # Androidカメラの起動
+                camera.take_picture(
+                    filename='temp_camera.jpg',
+                    on_complete=self.on_camera_result
+                )
+            elif not self.start_background_capture():
+                self.show_dialog("エラー", "カメラの起動に失敗しました")
+                return
             self.is_camera_active = True
             self.camera_button.text = "カメラ停止"
             print("カメラを起動しました")
@@ -240,10 +319,57 @@ class CameraScreen(MDScreen):
             print(f"カメラ起動エラー: {e}")
             self.show_dialog("エラー", "カメラの起動に失敗しました")
     
+    def start_background_capture(self) -> bool:
+        """キャプチャスレッドで取得した最新フレームを毎フレーム表示（デスクトップ用）"""
+        self.camera_manager = CameraManager.from_config(self.camera_config,
+                                                        shared_memory=self.recognition.uses_processes,
+                                                        latency_monitor=self.latency_monitor)
+        self.camera_preview = CameraPreview(self.camera_image, self.camera_manager, self.frame_monitor,
+                                            latency_monitor=self.latency_monitor)
+        if self.camera_preview.start():
+            self.attach_recognition()
+            if self.latency_label is not None:
+                self.overlay_event = Clock.schedule_interval(self.update_latency_overlay, LATENCY_OVERLAY_INTERVAL)
+            return True
+        self.camera_preview = None
+        return False
+    
+    def attach_recognition(self):
+        """先読みしたモデルで認識を開始（読み込み中なら準備状況を表示して終わるのを待つ）"""
+        # attachは待たずに返す（未読み込みならバックグラウンドで読み込みを始める）
+        if self.recognition.attach(self.camera_manager) or not self.recognition.is_loading:
+            return
+        self.update_model_status(0)
+        self.model_status_event = Clock.schedule_interval(self.update_model_status, MODEL_STATUS_INTERVAL)
+    
+    def update_model_status(self, dt):
+        """準備状況を表示し、準備ができたら認識を開始"""
+        if self.recognition.is_loading:
+            self.status_label.text = MODEL_STATUS_TEXT.get(self.recognition.load_state, "")
+            return
+        if self.model_status_event is not None:
+            self.model_status_event.cancel()
+            self.model_status_event = None
+        self.status_label.text = ""
+        self.recognition.attach(self.camera_manager)
+    
     def deactivate_camera(self):
         """カメラを無効化"""
         self.is_camera_active = False
         self.camera_button.text = "カメラ起動"
+        # 認識を先に止めてからカメラ（共有メモリ）を停止する
+        if self.model_status_event is not None:
+            self.model_status_event.cancel()
+            self.model_status_event = None
+            self.status_label.text = ""
+        self.recognition.detach()
+        if self.camera_preview:
+            self.camera_preview.stop()
+            self.camera_preview = None
+        if self.overlay_event is not None:
+            self.overlay_event.cancel()
+            self.overlay_event = None
+            self.latency_label.text = ""
         self.camera_image.texture = None
         print("カメラを停止しました")
     
@@ -256,6 +382,20 @@ class CameraScreen(MDScreen):
         else:
             print("カメラ画像の取得に失敗しました")
     
+    def apply_camera_config(self, camera_config, changes):
+        """再読み込みしたfps・解像度を反映（取得中ならカメラを開いたまま）、反映内容を返す"""
+        for key in changes:
+            self.camera_config[key] = camera_config.get(key)
+        if self.camera_manager is None:
+            return []
+        return self.camera_manager.reconfigure(fps=camera_config.get('fps'), width=camera_config.get('width'),
+                                               height=camera_config.get('height'))
+    
+    def apply_safety_config(self, safety_config, changes):
+        """再読み込みした安全確認の信頼度の下限を反映、反映内容を返す"""
+        self.safety_checker.min_confidence = safety_config.get('min_confidence', 0.3)
+        return [f"安全確認: min_confidence を {self.safety_checker.min_confidence} に変更"]
+    
     def go_back(self, instance):
         """前の画面に戻る"""
         if self.is_camera_active:
@@ -287,26 +427,9 @@ class DialysisSupplyApp(MDApp):
         self.screen_manager = None
         self.camera_screen = None
         self.medicine_screen = None
-        self.config_data = self.load_config()
-    
-    def load_config(self):
-        """設定ファイルを読み込み"""
-        try:
-            with open('config.yaml', 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
-        except FileNotFoundError:
-            print("設定ファイルが見つかりません。デフォルト設定を使用します。")
-            return self.get_default_config()
-        except Exception as e:
-            print(f"設定ファイルの読み込みエラー: {e}")
-            return self.get_default_config()
-    
-    def get_default_config(self):
-        """デフォルト設定を取得"""
-        return {
-            'camera': {'device_id': 0, 'width': 640, 'height': 480, 'fps': 30},
-            'ui': {'window_width': 800, 'window_height': 600, 'title': '透析供給装置薬液補充アプリ'}
-        }
+        # 設定ファイルの読み込み（変更は監視スレッドがカメラ画面へ反映する）
+        self.config_service = ConfigService()
+        self.config_data = self.config_service.load()
     
     def build(self):
         """アプリケーションの構築"""
@@ -344,19 +467,55 @@ class DialysisSupplyApp(MDApp):
         self.screen_manager.add_widget(self.medicine_screen)
         
         # カメラ画面
-        self.camera_screen = CameraScreen(name='camera')
+        self.camera_screen = CameraScreen(
+            name='camera',
+            frame_time_report_interval=self.config_data.get('ui', {}).get('frame_time_report_interval', 5.0),
+            camera_config=self.config_data.get('camera', {}),
+            model_config=self.config_data.get('model', {}),
+            pipeline_config=self.config_data.get('pipeline', {}),
+            motion_config=self.config_data.get('motion', {}),
+            tape_config=self.config_data.get('tape', {}),
+            tracking_config=self.config_data.get('tracking', {}),
+            medicine_selector=self.medicine_screen.medicine_selector,
+            safety_config=self.config_data.get('safety', {}),
+            latency_config=self.config_data.get('latency', {})
+        )
         self.screen_manager.add_widget(self.camera_screen)
+        self.preload_recognition()
+        self.watch_config()
         
         return self.screen_manager
     
+    def watch_config(self):
+        """設定ファイルの監視を開始（fps・解像度・認識の閾値をアプリを再起動せずに反映）"""
+        self.config_service.subscribe('camera', self.camera_screen.apply_camera_config, keys=('fps', 'width', 'height'))
+        self.config_service.subscribe('model', self.camera_screen.recognition.update_model_config,
+                                      keys=('confidence_threshold', 'nms_threshold', 'warmup_iterations'))
+        self.config_service.subscribe('safety', self.camera_screen.apply_safety_config, keys=('min_confidence',))
+        reload_config = self.config_data.get('config_reload', {})
+        if reload_config.get('enabled', True):
+            self.config_service.start_watching(reload_config.get('interval_s', 1.0))
+    
+    def preload_recognition(self):
+        """モデルの読み込みとウォームアップをバックグラウンドで開始（カメラ画面の作成後）"""
+        if self.camera_screen is None or not self.config_data.get('model', {}).get('preload', True):
+            return
+        camera_config = self.config_data.get('camera', {})
+        self.camera_screen.recognition.preload((camera_config.get('height', 480), camera_config.get('width', 640), 3))
+    
     def on_start(self):
         """アプリケーション開始時の処理"""
         print("透析供給装置薬液補充アプリを開始しました")
     
     def on_stop(self):
         """アプリケーション終了時の処理"""
-        if self.camera_screen and self.camera_screen.is_camera_active:
-            self.camera_screen.deactivate_camera()
+        self.config_service.stop()
+        if self.camera_screen:
+            if self.camera_screen.is_camera_active:
+                self.camera_screen.deactivate_camera()
+            self.camera_screen.recognition.shutdown()
+            if self.camera_screen.latency_reporter is not None:
+                self.camera_screen.latency_reporter.stop()
         print("アプリケーションを終了しました")
 
 
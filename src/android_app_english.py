@@ -1,39 +1,36 @@
 """
 透析供給装置薬液補充アプリ - Android版（英語版）
 KivyベースのAndroid対応アプリケーション - 英語UI
+
+起動時は薬液選択画面だけを作って表示し、cv2・numpy・認識関連のモジュールとカメラ画面
+（src.android_camera_screen）は、操作者が薬液を選んでいる間にバックグラウンドで読み込む
+（ui.defer_camera_screen: false で従来どおり起動時にすべて作る）
 """
 
-import os
-import sys
+import threading
+
 from kivy.app import App
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.button import Button
-from kivy.uix.label import Label
-from kivy.uix.image import Image
-from kivy.uix.popup import Popup
 from kivy.clock import Clock
-from kivy.graphics.texture import Texture
 from kivy.core.window import Window
-from kivy.uix.screenmanager import ScreenManager, Screen
+from kivy.uix.screenmanager import ScreenManager
 from kivymd.app import MDApp
-from kivymd.uix.button import MDRaisedButton, MDFlatButton
+from kivymd.uix.button import MDRaisedButton
 from kivymd.uix.label import MDLabel
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.card import MDCard
-from kivymd.uix.dialog import MDDialog
 from kivymd.uix.selectioncontrol import MDCheckbox
-from kivymd.uix.toolbar import MDTopAppBar
-from kivymd.theming import ThemeManager
-import cv2
-import numpy as np
-import yaml
-from plyer import camera
-import threading
-import time
 
+from src.config_service import ConfigService
+from src.frame_timing import StartupTimer
 from src.medicine_selector import MedicineSelector, MedicineType
-from src.camera_manager import CameraManager
+
+
+# Used when config.yaml is missing or unreadable
+DEFAULT_CONFIG = {
+    'camera': {'device_id': 0, 'width': 640, 'height': 480, 'fps': 30},
+    'ui': {'window_width': 800, 'window_height': 600, 'title': 'Dialysis Supply App'}
+}
 
 
 class MedicineSelectionScreen(MDScreen):
@@ -145,6 +142,10 @@ class MedicineSelectionScreen(MDScreen):
         
         self.add_widget(layout)
     
+    def on_enter(self, *args):
+        """Start loading and warming up the model while the operator chooses a medicine"""
+        App.get_running_app().preload_recognition()
+    
     def on_medicine_selected(self, instance):
         """Medicine selection handler"""
         if instance == self.sodium_radio and instance.active:
@@ -168,229 +169,12 @@ class MedicineSelectionScreen(MDScreen):
             self.show_dialog("Warning", "Please select a medicine")
             return
         
-        # Navigate to camera screen
+        # Navigate to camera screen (built here if the background preload has not finished yet)
         app = App.get_running_app()
+        camera_screen = app.get_camera_screen()
+        camera_screen.safety_checker.start_session(self.medicine_selector.get_selected_medicine())
         app.screen_manager.current = 'camera'
-        app.camera_screen.start_camera()
-
-
-class CameraScreen(MDScreen):
-    """Camera Screen"""
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.camera_manager = None
-        self.is_camera_active = False
-        self.setup_ui()
-    
-    def setup_ui(self):
-        """UI Setup"""
-        layout = MDBoxLayout(
-            orientation='vertical',
-            spacing=10,
-            padding=10
-        )
-        
-        # Camera title
-        camera_title = MDLabel(
-            text="📷 Camera View",
-            theme_text_color="Primary",
-            size_hint_y=None,
-            height=50,
-            halign="center",
-            font_style="H4"
-        )
-        layout.add_widget(camera_title)
-        
-        # Camera image display with card
-        camera_card = MDCard(
-            orientation='vertical',
-            padding=8,
-            size_hint=(1, 0.75),
-            elevation=4
-        )
-        
-        self.camera_image = Image(
-            allow_stretch=True,
-            keep_ratio=True
-        )
-        camera_card.add_widget(self.camera_image)
-        layout.add_widget(camera_card)
-        
-        # Control buttons
-        button_layout = MDBoxLayout(
-            orientation='horizontal',
-            spacing=8,
-            size_hint_y=None,
-            height=45
-        )
-        
-        self.camera_button = MDRaisedButton(
-            text="📸 Start Camera",
-            on_release=self.toggle_camera,
-            elevation=4,
-            font_style="Button"
-        )
-        
-        self.back_button = MDFlatButton(
-            text="⬅️ Back",
-            on_release=self.go_back,
-            font_style="Button"
-        )
-        
-        button_layout.add_widget(self.camera_button)
-        button_layout.add_widget(self.back_button)
-        layout.add_widget(button_layout)
-        
-        self.add_widget(layout)
-    
-    def start_camera(self):
-        """Start camera"""
-        if not self.is_camera_active:
-            self.toggle_camera()
-    
-    def toggle_camera(self, instance=None):
-        """Toggle camera on/off"""
-        if not self.is_camera_active:
-            self.activate_camera()
-        else:
-            self.deactivate_camera()
-    
-    def activate_camera(self):
-        """Activate camera"""
-        try:
-            # Check if we're on Android or desktop
-            import platform
-            if platform.system() == "Windows":
-                # Desktop camera simulation
-                self.simulate_camera()
-            else:
-                # Android camera activation
-                camera.take_picture(
-                    filename='temp_camera.jpg',
-                    on_complete=self.on_camera_result
-                )
-            self.is_camera_active = True
-            self.camera_button.text = "📸 Stop Camera"
-            print("Camera started")
-        except Exception as e:
-            print(f"Camera activation error: {e}")
-            # Fallback to simulation
-            self.simulate_camera()
-            self.is_camera_active = True
-            self.camera_button.text = "📸 Stop Camera"
-    
-    def simulate_camera(self):
-        """Simulate camera for desktop testing"""
-        try:
-            import cv2
-            import numpy as np
-            from kivy.clock import Clock
-            
-            # Try to access webcam
-            self.cap = cv2.VideoCapture(0)
-            if self.cap.isOpened():
-                # Start continuous capture
-                self.capture_event = Clock.schedule_interval(self.capture_frame, 1.0/30.0)  # 30 FPS
-                print("Real-time camera started")
-            else:
-                # Create a test image if no camera available
-                self.create_test_image()
-        except Exception as e:
-            print(f"Camera simulation error: {e}")
-            self.create_test_image()
-    
-    def capture_frame(self, dt):
-        """Capture frame continuously"""
-        try:
-            if hasattr(self, 'cap') and self.cap.isOpened():
-                ret, frame = self.cap.read()
-                if ret:
-                    # Save the frame
-                    cv2.imwrite('temp_camera.jpg', frame)
-                    # Use Clock.schedule_once to update UI in main thread
-                    from kivy.clock import Clock
-                    Clock.schedule_once(lambda dt: self.on_camera_result('temp_camera.jpg'), 0)
-        except Exception as e:
-            print(f"Frame capture error: {e}")
-    
-    def create_test_image(self):
-        """Create a test image for demonstration"""
-        try:
-            import cv2
-            import numpy as np
-            
-            # Create a test image with text
-            img = np.zeros((480, 640, 3), dtype=np.uint8)
-            img.fill(50)  # Dark gray background
-            
-            # Add text
-            cv2.putText(img, "Camera Test", (200, 200), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
-            cv2.putText(img, "Medicine Detection", (150, 280), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-            cv2.putText(img, "Ready for Analysis", (180, 350), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-            
-            # Save test image
-            cv2.imwrite('temp_camera.jpg', img)
-            self.on_camera_result('temp_camera.jpg')
-        except Exception as e:
-            print(f"Test image creation error: {e}")
-    
-    def deactivate_camera(self):
-        """Deactivate camera"""
-        self.is_camera_active = False
-        self.camera_button.text = "📸 Start Camera"
-        self.camera_image.texture = None
-        
-        # Stop continuous capture
-        if hasattr(self, 'capture_event'):
-            self.capture_event.cancel()
-        
-        # Release camera
-        if hasattr(self, 'cap') and self.cap.isOpened():
-            self.cap.release()
-        
-        print("Camera stopped")
-    
-    def on_camera_result(self, filename):
-        """Camera capture result handler"""
-        if os.path.exists(filename):
-            # Load and display image
-            try:
-                # Force reload the image
-                if hasattr(self, 'camera_image') and self.camera_image:
-                    # Clear existing source
-                    self.camera_image.source = ''
-                    # Set new source
-                    self.camera_image.source = filename
-                    # Force texture reload
-                    self.camera_image.reload()
-                    print(f"Camera image updated: {filename}")
-            except Exception as e:
-                print(f"Image loading error: {e}")
-        else:
-            print("Failed to capture camera image")
-    
-    def go_back(self, instance):
-        """Go back to previous screen"""
-        if self.is_camera_active:
-            self.deactivate_camera()
-        
-        app = App.get_running_app()
-        app.screen_manager.current = 'medicine_selection'
-    
-    def show_dialog(self, title, text):
-        """Show dialog"""
-        dialog = MDDialog(
-            title=title,
-            text=text,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=lambda x: dialog.dismiss()
-                )
-            ]
-        )
-        dialog.open()
+        camera_screen.start_camera()
 
 
 class DialysisSupplyApp(MDApp):
@@ -401,26 +185,11 @@ class DialysisSupplyApp(MDApp):
         self.screen_manager = None
         self.camera_screen = None
         self.medicine_screen = None
-        self.config_data = self.load_config()
-    
-    def load_config(self):
-        """Load configuration file"""
-        try:
-            with open('config.yaml', 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
-        except FileNotFoundError:
-            print("Configuration file not found. Using default settings.")
-            return self.get_default_config()
-        except Exception as e:
-            print(f"Configuration file loading error: {e}")
-            return self.get_default_config()
-    
-    def get_default_config(self):
-        """Get default configuration"""
-        return {
-            'camera': {'device_id': 0, 'width': 640, 'height': 480, 'fps': 30},
-            'ui': {'window_width': 800, 'window_height': 600, 'title': 'Dialysis Supply App'}
-        }
+        # Shared config; changes to config.yaml are applied live by the watcher thread
+        self.config_service = ConfigService(defaults=DEFAULT_CONFIG)
+        self.config_data = self.config_service.load()
+        self.defer_camera_screen = self.config_data.get('ui', {}).get('defer_camera_screen', True)
+        self.startup_timer = StartupTimer()
     
     def build(self):
         """Build application"""
@@ -441,20 +210,128 @@ class DialysisSupplyApp(MDApp):
         self.medicine_screen = MedicineSelectionScreen(name='medicine_selection')
         self.screen_manager.add_widget(self.medicine_screen)
         
-        # Camera screen
-        self.camera_screen = CameraScreen(name='camera')
-        self.screen_manager.add_widget(self.camera_screen)
+        # Camera screen (deferred until after the first frame unless disabled)
+        if not self.defer_camera_screen:
+            self.get_camera_screen()
         
+        Window.bind(on_flip=self.on_first_flip)
+        self.watch_config()
         return self.screen_manager
     
+    def get_camera_screen(self):
+        """Return the camera screen, importing and building it on first use"""
+        if self.camera_screen is not None:
+            return self.camera_screen
+        from src.android_camera_screen import CameraScreen
+        
+        # Built after startup, so use the latest reloaded settings
+        config = self.config_service.get()
+        ui_config = config.get('ui', {})
+        self.camera_screen = CameraScreen(
+            name='camera',
+            preview_mode=ui_config.get('preview_mode', 'texture'),
+            capture_in_background=ui_config.get('capture_in_background', True),
+            frame_time_report_interval=ui_config.get('frame_time_report_interval', 5.0),
+            camera_config=dict(config.get('camera', {})),
+            model_config=dict(config.get('model', {})),
+            pipeline_config=config.get('pipeline', {}),
+            motion_config=config.get('motion', {}),
+            tape_config=config.get('tape', {}),
+            tracking_config=config.get('tracking', {}),
+            medicine_selector=self.medicine_screen.medicine_selector,
+            safety_config=config.get('safety', {}),
+            latency_config=config.get('latency', {})
+        )
+        self.screen_manager.add_widget(self.camera_screen)
+        self.startup_timer.mark("camera_ready")
+        self.preload_recognition()
+        return self.camera_screen
+    
+    def preload_recognition(self):
+        """Load and warm up the model in the background (once the camera screen exists)"""
+        if self.camera_screen is None or not self.config_service.section('model').get('preload', True):
+            return
+        camera_config = self.camera_screen.camera_config
+        self.camera_screen.recognition.preload((camera_config.get('height', 480), camera_config.get('width', 640), 3))
+    
+    def watch_config(self):
+        """Start watching config.yaml (fps, resolution and recognition thresholds apply without a restart)"""
+        self.config_service.subscribe('camera', self.on_camera_config_changed, keys=('fps', 'width', 'height'))
+        self.config_service.subscribe('model', self.on_model_config_changed,
+                                      keys=('confidence_threshold', 'nms_threshold', 'warmup_iterations'))
+        self.config_service.subscribe('safety', self.on_safety_config_changed, keys=('min_confidence',))
+        reload_config = self.config_data.get('config_reload', {})
+        if reload_config.get('enabled', True):
+            self.config_service.start_watching(reload_config.get('interval_s', 1.0))
+    
+    def on_camera_config_changed(self, camera_config, changes):
+        """Camera settings changed (a camera screen built later reads the new config itself)"""
+        if self.camera_screen is None:
+            return []
+        return self.camera_screen.apply_camera_config(camera_config, changes)
+    
+    def on_model_config_changed(self, model_config, changes):
+        """Recognition thresholds changed"""
+        if self.camera_screen is None:
+            return []
+        return self.camera_screen.recognition.update_model_config(model_config, changes)
+    
+    def on_safety_config_changed(self, safety_config, changes):
+        """Safety check minimum confidence changed"""
+        if self.camera_screen is None:
+            return []
+        return self.camera_screen.apply_safety_config(safety_config, changes)
+    
+    def on_first_flip(self, window):
+        """First frame drawn: the selection screen is visible"""
+        Window.unbind(on_flip=self.on_first_flip)
+        self.startup_timer.mark("first_frame")
+        # The next clock tick means input is being handled
+        Clock.schedule_once(self.on_interactive, 0)
+    
+    def on_interactive(self, dt):
+        """Selection screen accepts input: start loading the camera screen in the background"""
+        self.startup_timer.mark("interactive")
+        if self.camera_screen is None:
+            threading.Thread(target=self.preload_camera_modules, name="camera-preload", daemon=True).start()
+        else:
+            self.finish_startup_profile()
+    
+    def preload_camera_modules(self):
+        """Import cv2, numpy and the camera screen off the main thread (widgets are built on the main thread)"""
+        try:
+            import src.android_camera_screen  # noqa: F401
+        except Exception as e:
+            # Retried (and reported) when the camera screen is first needed
+            print(f"Camera screen preload error: {e}")
+            return
+        self.startup_timer.mark("camera_modules_loaded")
+        Clock.schedule_once(self.build_deferred_camera_screen, 0)
+    
+    def build_deferred_camera_screen(self, dt):
+        """Build the camera screen once its modules are loaded"""
+        self.get_camera_screen()
+        self.finish_startup_profile()
+    
+    def finish_startup_profile(self):
+        """Under the startup benchmark, quit once the camera screen is ready"""
+        if self.startup_timer.enabled:
+            self.stop()
+    
     def on_start(self):
         """Application start handler"""
+        self.startup_timer.mark("app_started")
         print("Dialysis Supply App started")
     
     def on_stop(self):
         """Application stop handler"""
-        if self.camera_screen and self.camera_screen.is_camera_active:
-            self.camera_screen.deactivate_camera()
+        self.config_service.stop()
+        if self.camera_screen:
+            if self.camera_screen.is_camera_active:
+                self.camera_screen.deactivate_camera()
+            self.camera_screen.recognition.shutdown()
+            if self.camera_screen.latency_reporter is not None:
+                self.camera_screen.latency_reporter.stop()
         print("Application stopped")
 
 
@@ -0,0 +1,402 @@
+"""
+透析供給装置薬液補充アプリ - Android版（英語版）カメラ画面
+cv2・numpy・認識関連のモジュールを読み込むため、android_app_english からは
+薬液選択画面の表示後に読み込む（起動時間の短縮）
+"""
+
+import os
+from kivy.app import App
+from kivy.uix.label import Label
+from kivy.uix.image import Image
+from kivy.uix.floatlayout import FloatLayout
+from kivy.clock import Clock
+from kivymd.uix.button import MDRaisedButton, MDFlatButton
+from kivymd.uix.label import MDLabel
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.screen import MDScreen
+from kivymd.uix.card import MDCard
+from kivymd.uix.dialog import MDDialog
+import cv2
+from plyer import camera
+
+from src.camera_manager import CameraManager
+from src.frame_timing import FrameTimeMonitor
+from src.latency_monitor import LatencyMonitor, LatencyReporter
+from src.kivy_preview import CameraPreview, TexturePreview
+from src.recognition_service import RecognitionService
+from src.safety_checker import SafetyChecker
+
+
+# How often the latency overlay is refreshed (seconds)
+LATENCY_OVERLAY_INTERVAL = 0.5
+
+# How often the model loading progress is polled (seconds)
+MODEL_STATUS_INTERVAL = 0.1
+
+MODEL_STATUS_TEXT = {
+    "loading": "⏳ Loading recognition model...",
+    "warming_up": "⏳ Warming up recognition model...",
+}
+
+
+class CameraScreen(MDScreen):
+    """Camera Screen"""
+    
+    def __init__(self, **kwargs):
+        # 'texture' blits frames straight into one GPU texture,
+        # 'file' keeps the legacy temp_camera.jpg round trip
+        self.preview_mode = kwargs.pop('preview_mode', 'texture')
+        # Capture on a CameraManager thread instead of the Kivy main loop
+        self.capture_in_background = kwargs.pop('capture_in_background', True)
+        self.camera_config = kwargs.pop('camera_config', {})
+        frame_time_report_interval = kwargs.pop('frame_time_report_interval', 5.0)
+        # Per-stage latency instrumentation (None unless latency.enabled)
+        latency_config = kwargs.pop('latency_config', {})
+        self.latency_monitor = LatencyMonitor.from_config(latency_config)
+        self.latency_reporter = LatencyReporter.from_config(self.latency_monitor, latency_config)
+        if self.latency_reporter is not None:
+            self.latency_reporter.start()
+        self.show_latency_overlay = self.latency_monitor is not None and latency_config.get('overlay', False)
+        self.safety_checker = SafetyChecker.from_config(kwargs.pop('safety_config', {}))
+        # Recognition pipeline (pipeline.mode selects worker threads or worker processes)
+        self.recognition = RecognitionService(kwargs.pop('model_config', {}), kwargs.pop('pipeline_config', {}),
+                                              safety_checker=self.safety_checker,
+                                              latency_monitor=self.latency_monitor,
+                                              motion_config=kwargs.pop('motion_config', {}),
+                                              tape_config=kwargs.pop('tape_config', {}),
+                                              tracking_config=kwargs.pop('tracking_config', {}),
+                                              medicine_selector=kwargs.pop('medicine_selector', None))
+        super().__init__(**kwargs)
+        self.camera_manager = None
+        self.camera_preview = None
+        self.latency_label = None
+        self.overlay_event = None
+        self.model_status_event = None
+        self.is_camera_active = False
+        self.frame_monitor = FrameTimeMonitor(report_interval=frame_time_report_interval)
+        self.setup_ui()
+        self.texture_preview = TexturePreview(self.camera_image)
+    
+    def setup_ui(self):
+        """UI Setup"""
+        layout = MDBoxLayout(
+            orientation='vertical',
+            spacing=10,
+            padding=10
+        )
+        
+        # Camera title
+        camera_title = MDLabel(
+            text="📷 Camera View",
+            theme_text_color="Primary",
+            size_hint_y=None,
+            height=50,
+            halign="center",
+            font_style="H4"
+        )
+        layout.add_widget(camera_title)
+        
+        # Camera image display with card
+        camera_card = MDCard(
+            orientation='vertical',
+            padding=8,
+            size_hint=(1, 0.75),
+            elevation=4
+        )
+        
+        # Latency overlay sits on top of the top-left corner of the preview
+        camera_area = FloatLayout()
+        self.camera_image = Image(
+            allow_stretch=True,
+            keep_ratio=True
+        )
+        camera_area.add_widget(self.camera_image)
+        if self.show_latency_overlay:
+            self.latency_label = self.create_latency_label()
+            camera_area.add_widget(self.latency_label)
+        camera_card.add_widget(camera_area)
+        layout.add_widget(camera_card)
+        
+        # Model loading progress (empty once recognition is running)
+        self.status_label = MDLabel(
+            text="",
+            theme_text_color="Secondary",
+            size_hint_y=None,
+            height=30,
+            halign="center",
+            font_style="Body2"
+        )
+        layout.add_widget(self.status_label)
+        
+        # Control buttons
+        button_layout = MDBoxLayout(
+            orientation='horizontal',
+            spacing=8,
+            size_hint_y=None,
+            height=45
+        )
+        
+        self.camera_button = MDRaisedButton(
+            text="📸 Start Camera",
+            on_release=self.toggle_camera,
+            elevation=4,
+            font_style="Button"
+        )
+        
+        self.back_button = MDFlatButton(
+            text="⬅️ Back",
+            on_release=self.go_back,
+            font_style="Button"
+        )
+        
+        button_layout.add_widget(self.camera_button)
+        button_layout.add_widget(self.back_button)
+        layout.add_widget(button_layout)
+        
+        self.add_widget(layout)
+    
+    def create_latency_label(self) -> Label:
+        """Per-stage latency overlay (debug)"""
+        label = Label(text="", font_name="RobotoMono-Regular", font_size="11sp", color=(0, 1, 0, 1),
+                      halign="left", valign="top", size_hint=(1, 1), pos_hint={'x': 0, 'y': 0})
+        label.bind(size=lambda widget, size: setattr(widget, 'text_size', size))
+        return label
+    
+    def update_latency_overlay(self, dt):
+        """Refresh per-stage latency and the current verdict"""
+        text = self.latency_monitor.format_overlay()
+        verdict = f"verdict: {self.safety_checker.get_verdict().name}"
+        self.latency_label.text = f"{text}\n{verdict}" if text else verdict
+    
+    def start_camera(self):
+        """Start camera"""
+        if not self.is_camera_active:
+            self.toggle_camera()
+    
+    def toggle_camera(self, instance=None):
+        """Toggle camera on/off"""
+        if not self.is_camera_active:
+            self.activate_camera()
+        else:
+            self.deactivate_camera()
+    
+    def activate_camera(self):
+        """Activate camera"""
+        try:
+            # Check if we're on Android or desktop
+            import platform
+            if platform.system() == "Windows":
+                # Desktop camera simulation
+                self.simulate_camera()
+            else:
+                # Android camera activation
+                camera.take_picture(
+                    filename='temp_camera.jpg',
+                    on_complete=self.on_camera_result
+                )
+            self.is_camera_active = True
+            self.camera_button.text = "📸 Stop Camera"
+            print("Camera started")
+        except Exception as e:
+            print(f"Camera activation error: {e}")
+            # Fallback to simulation
+            self.simulate_camera()
+            self.is_camera_active = True
+            self.camera_button.text = "📸 Stop Camera"
+    
+    def simulate_camera(self):
+        """Simulate camera for desktop testing"""
+        try:
+            import cv2
+            import numpy as np
+            from kivy.clock import Clock
+            
+            if self.capture_in_background and self.preview_mode == 'texture':
+                self.start_background_capture()
+                return
+            
+            # Try to access webcam
+            self.cap = cv2.VideoCapture(0)
+            if self.cap.isOpened():
+                # Start continuous capture
+                self.capture_event = Clock.schedule_interval(self.capture_frame, 1.0/30.0)  # 30 FPS
+                self.monitor_event = Clock.schedule_interval(self.frame_monitor.tick, 0)
+                print("Real-time camera started")
+            else:
+                # Create a test image if no camera available
+                self.create_test_image()
+        except Exception as e:
+            print(f"Camera simulation error: {e}")
+            self.create_test_image()
+    
+    def start_background_capture(self):
+        """Start capture on a worker thread and show the newest frame once per frame"""
+        self.camera_manager = CameraManager.from_config(self.camera_config,
+                                                        shared_memory=self.recognition.uses_processes,
+                                                        latency_monitor=self.latency_monitor)
+        self.camera_preview = CameraPreview(self.camera_image, self.camera_manager, self.frame_monitor,
+                                            latency_monitor=self.latency_monitor)
+        if self.camera_preview.start():
+            self.attach_recognition()
+            if self.latency_label is not None:
+                self.overlay_event = Clock.schedule_interval(self.update_latency_overlay, LATENCY_OVERLAY_INTERVAL)
+            print("Real-time camera started (background capture)")
+        else:
+            self.camera_preview = None
+            self.create_test_image()
+    
+    def attach_recognition(self):
+        """Attach to the preloaded model, or show progress until the background load finishes"""
+        # attach returns without waiting (and starts a background load if nothing was preloaded)
+        if self.recognition.attach(self.camera_manager) or not self.recognition.is_loading:
+            return
+        self.update_model_status(0)
+        self.model_status_event = Clock.schedule_interval(self.update_model_status, MODEL_STATUS_INTERVAL)
+    
+    def update_model_status(self, dt):
+        """Show loading progress; attach once the model is ready"""
+        if self.recognition.is_loading:
+            self.status_label.text = MODEL_STATUS_TEXT.get(self.recognition.load_state, "")
+            return
+        if self.model_status_event is not None:
+            self.model_status_event.cancel()
+            self.model_status_event = None
+        self.status_label.text = ""
+        self.recognition.attach(self.camera_manager)
+    
+    def capture_frame(self, dt):
+        """Capture frame continuously"""
+        try:
+            if hasattr(self, 'cap') and self.cap.isOpened():
+                ret, frame = self.cap.read()
+                if ret:
+                    if self.preview_mode == 'texture':
+                        # Already on the main thread: upload directly
+                        self.display_frame(frame)
+                    else:
+                        # Save the frame
+                        cv2.imwrite('temp_camera.jpg', frame)
+                        # Use Clock.schedule_once to update UI in main thread
+                        from kivy.clock import Clock
+                        Clock.schedule_once(lambda dt: self.on_camera_result('temp_camera.jpg'), 0)
+        except Exception as e:
+            print(f"Frame capture error: {e}")
+    
+    def display_frame(self, frame):
+        """Blit a BGR frame into the preview texture (no file I/O)"""
+        self.texture_preview.display(frame)
+    
+    def create_test_image(self):
+        """Create a test image for demonstration"""
+        try:
+            import cv2
+            import numpy as np
+            
+            # Create a test image with text
+            img = np.zeros((480, 640, 3), dtype=np.uint8)
+            img.fill(50)  # Dark gray background
+            
+            # Add text
+            cv2.putText(img, "Camera Test", (200, 200), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+            cv2.putText(img, "Medicine Detection", (150, 280), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+            cv2.putText(img, "Ready for Analysis", (180, 350), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            
+            if self.preview_mode == 'texture':
+                self.display_frame(img)
+            else:
+                # Save test image
+                cv2.imwrite('temp_camera.jpg', img)
+                self.on_camera_result('temp_camera.jpg')
+        except Exception as e:
+            print(f"Test image creation error: {e}")
+    
+    def deactivate_camera(self):
+        """Deactivate camera"""
+        self.is_camera_active = False
+        self.camera_button.text = "📸 Start Camera"
+        
+        # Stop recognition before the camera releases its shared memory
+        if self.model_status_event is not None:
+            self.model_status_event.cancel()
+            self.model_status_event = None
+            self.status_label.text = ""
+        self.recognition.detach()
+        
+        # Stop background capture
+        if self.camera_preview:
+            self.camera_preview.stop()
+            self.camera_preview = None
+        self.texture_preview.clear()
+        if self.overlay_event is not None:
+            self.overlay_event.cancel()
+            self.overlay_event = None
+            self.latency_label.text = ""
+        
+        # Stop continuous capture
+        if hasattr(self, 'capture_event'):
+            self.capture_event.cancel()
+        if hasattr(self, 'monitor_event'):
+            self.monitor_event.cancel()
+            self.frame_monitor.report()
+            self.frame_monitor.reset()
+        
+        # Release camera
+        if hasattr(self, 'cap') and self.cap.isOpened():
+            self.cap.release()
+        
+        print("Camera stopped")
+    
+    def on_camera_result(self, filename):
+        """Camera capture result handler"""
+        if os.path.exists(filename):
+            # Load and display image
+            try:
+                # Force reload the image
+                if hasattr(self, 'camera_image') and self.camera_image:
+                    # Clear existing source
+                    self.camera_image.source = ''
+                    # Set new source
+                    self.camera_image.source = filename
+                    # Force texture reload
+                    self.camera_image.reload()
+                    print(f"Camera image updated: {filename}")
+            except Exception as e:
+                print(f"Image loading error: {e}")
+        else:
+            print("Failed to capture camera image")
+    
+    def apply_camera_config(self, camera_config, changes):
+        """Apply a reloaded fps / resolution (live if the camera is running), returns log lines"""
+        for key in changes:
+            self.camera_config[key] = camera_config.get(key)
+        if self.camera_manager is None:
+            return []
+        return self.camera_manager.reconfigure(fps=camera_config.get('fps'), width=camera_config.get('width'),
+                                               height=camera_config.get('height'))
+    
+    def apply_safety_config(self, safety_config, changes):
+        """Apply a reloaded minimum confidence for the safety check, returns log lines"""
+        self.safety_checker.min_confidence = safety_config.get('min_confidence', 0.3)
+        return [f"safety: min_confidence -> {self.safety_checker.min_confidence}"]
+    
+    def go_back(self, instance):
+        """Go back to previous screen"""
+        if self.is_camera_active:
+            self.deactivate_camera()
+        
+        app = App.get_running_app()
+        app.screen_manager.current = 'medicine_selection'
+    
+    def show_dialog(self, title, text):
+        """Show dialog"""
+        dialog = MDDialog(
+            title=title,
+            text=text,
+            buttons=[
+                MDFlatButton(
+                    text="OK",
+                    on_release=lambda x: dialog.dismiss()
+                )
+            ]
+        )
+        dialog.open()
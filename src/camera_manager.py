@@ -5,15 +5,49 @@
 
 import cv2
 import numpy as np
-from typing import Optional, Callable
+from dataclasses import dataclass, asdict
+from typing import Optional, Callable, Tuple, List
 import threading
 import time
 
+from src.frame_ring import FrameRing, FrameRef, SharedFrameRing
+
+
+# ネゴシエーションで試す一般的なUVC解像度（面積の小さい順に評価）
+STANDARD_RESOLUTIONS = [(640, 480), (800, 600), (1280, 720), (1280, 960), (1920, 1080)]
+
+# デコードが軽い順（非圧縮YUYVはJPEGデコード不要）
+FOURCC_PREFERENCE = ["YUYV", "MJPG"]
+
+# これより早く返るgrab()はドライバのバッファに溜まっていた古いフレームとみなす（秒）
+STALE_GRAB_THRESHOLD = 0.004
+
+
+@dataclass
+class CaptureMode:
+    """カメラの取得モード"""
+    fourcc: str
+    width: int
+    height: int
+    fps: float
+
+
+def fourcc_to_str(code: float) -> str:
+    """CAP_PROP_FOURCCの値を4文字の文字列に変換"""
+    code = int(code)
+    if code <= 0:
+        return ""
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
 
 class CameraManager:
     """カメラ管理クラス"""
     
-    def __init__(self, device_id: int = 0, width: int = 640, height: int = 480, fps: int = 30):
+    def __init__(self, device_id: int = 0, width: int = 640, height: int = 480, fps: int = 30,
+                 ring_size: int = 0, capture_factory: Optional[Callable[[int], cv2.VideoCapture]] = None,
+                 fourcc: Optional[str] = None, negotiate: bool = False, probe_frames: int = 0,
+                 low_latency: bool = False, max_drain: int = 4, shared_memory: bool = False,
+                 latency_monitor=None):
         """
         カメラ管理クラスの初期化
         
@@ -22,18 +56,93 @@ class CameraManager:
             width: 映像幅
             height: 映像高さ
             fps: フレームレート
+            ring_size: 事前確保するフレームバッファ数（0でリングバッファを使わない）
+            capture_factory: device_idからVideoCapture互換オブジェクトを作る関数（テスト・ベンチマーク用）
+            fourcc: 要求する映像形式（"MJPG"、"YUYV"など）、Noneまたは"auto"で指定しない
+            negotiate: Trueの場合は対応モードを調べて条件を満たす最も軽いモードを選ぶ
+            probe_frames: ネゴシエーション時に実測するフレーム数（0で申告値を信用）
+            low_latency: Trueの場合はgrab()でバッファの古いフレームを読み捨て、最新のフレームだけをデコードする
+            max_drain: 1回の取得で読み捨てる最大フレーム数
+            shared_memory: Trueの場合はリングバッファを共有メモリに置く（ワーカープロセスでの認識用）
+            latency_monitor: 取得段階（デコードから公開まで）の所要時間の記録先（LatencyMonitor、任意）
         """
         self.device_id = device_id
         self.width = width
         self.height = height
         self.fps = fps
+        self.ring_size = ring_size
+        self.capture_factory = capture_factory or cv2.VideoCapture
+        self.fourcc = None if fourcc in (None, "", "auto") else fourcc
+        self.negotiate = negotiate
+        self.probe_frames = probe_frames
+        self.capture_mode: Optional[CaptureMode] = None
+        self.low_latency = low_latency
+        self.max_drain = max_drain
+        self.shared_memory = shared_memory
+        self.latency_monitor = latency_monitor
         
         self.camera: Optional[cv2.VideoCapture] = None
         self.is_running = False
         self.capture_thread: Optional[threading.Thread] = None
         self.frame_callback: Optional[Callable[[np.ndarray], None]] = None
         self.current_frame: Optional[np.ndarray] = None
+        self.frame_seq = 0
+        self.frame_timestamp = 0.0
         self.lock = threading.Lock()
+        # 新しいフレームの公開を待機中の利用者へ通知する
+        self.frame_ready = threading.Condition(self.lock)
+        
+        # リングバッファモード用の状態
+        self.frame_ring: Optional[FrameRing] = None
+        self._read_buffer: Optional[np.ndarray] = None
+        self._direct_read = False
+        self.frames_dropped = 0
+        
+        # 取得統計
+        self.frames_grabbed = 0
+        self.frames_decoded = 0
+        self.stale_frames_dropped = 0
+        # 直近のフレームのデコード開始時刻（低遅延モード以外はread()の開始時刻）
+        self._decode_start = 0.0
+        
+        # 取得中に変更を要求された設定（キャプチャスレッドがフレームの合間に反映する）
+        self._pending_settings: dict = {}
+        # 解像度の変更で使わなくなったリング（利用者が全スロットを解放したら閉じる）
+        self._retired_rings: List[FrameRing] = []
+    
+    @classmethod
+    def from_config(cls, camera_config: dict, **kwargs) -> "CameraManager":
+        """
+        config.yamlのcameraセクションからカメラ管理を作成
+        
+        Args:
+            camera_config: カメラ設定
+            **kwargs: 追加の引数（capture_factoryなど）
+            
+        Returns:
+            CameraManager: カメラ管理
+        """
+        from src.session_recording import capture_factory_from_config
+        
+        replay = bool(camera_config.get('replay_path'))
+        if 'capture_factory' not in kwargs:
+            kwargs['capture_factory'] = capture_factory_from_config(camera_config)
+        # 記録の再生では取得モードは記録時のまま。待たずに再生する場合は
+        # grab()が常に即座に返るので、低遅延モードで読み捨てるとフレームが飛んでしまう
+        realtime_replay = camera_config.get('replay_realtime', True)
+        return cls(
+            device_id=camera_config.get('device_id', 0),
+            width=camera_config.get('width', 640),
+            height=camera_config.get('height', 480),
+            fps=camera_config.get('fps', 30),
+            ring_size=camera_config.get('ring_size', 0),
+            fourcc=camera_config.get('fourcc'),
+            negotiate=camera_config.get('negotiate', False) and not replay,
+            probe_frames=camera_config.get('probe_frames', 0),
+            low_latency=camera_config.get('low_latency', False) and (not replay or realtime_replay),
+            max_drain=camera_config.get('max_drain', 4),
+            **kwargs
+        )
     
     def start_camera(self) -> bool:
         """
@@ -43,15 +152,32 @@ class CameraManager:
             bool: 起動成功の場合True
         """
         try:
-            self.camera = cv2.VideoCapture(self.device_id)
+            self.camera = self.capture_factory(self.device_id)
             if not self.camera.isOpened():
                 print(f"カメラデバイス {self.device_id} を開けませんでした")
                 return False
             
             # カメラ設定
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-            self.camera.set(cv2.CAP_PROP_FPS, self.fps)
+            if self.negotiate:
+                self.capture_mode = self.negotiate_capture_mode()
+                print(f"取得モードを選択しました: {self.capture_mode}")
+            else:
+                if self.fourcc:
+                    self.camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+                self.camera.set(cv2.CAP_PROP_FPS, self.fps)
+                self.capture_mode = self._read_capture_mode()
+            
+            if self.low_latency:
+                # 対応しているバックエンドではドライバのバッファ自体を減らす
+                self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            
+            if self.ring_size > 0:
+                ring_class = SharedFrameRing if self.shared_memory else FrameRing
+                self.frame_ring = ring_class(self.ring_size, (self.height, self.width, 3))
+                self._read_buffer = None
+                self._direct_read = False
             
             self.is_running = True
             
@@ -66,9 +192,90 @@ class CameraManager:
             print(f"カメラ起動エラー: {e}")
             return False
     
+    def _candidate_modes(self) -> List[CaptureMode]:
+        """
+        試す取得モードを軽い順に列挙
+        
+        要求解像度以上のものだけを面積の小さい順に並べ、同じ解像度では
+        デコードの軽い形式を先にする。
+        """
+        resolutions = [(self.width, self.height)]
+        resolutions += [
+            size for size in STANDARD_RESOLUTIONS
+            if size[0] >= self.width and size[1] >= self.height and size not in resolutions
+        ]
+        resolutions.sort(key=lambda size: size[0] * size[1])
+        fourccs = [self.fourcc] if self.fourcc else FOURCC_PREFERENCE
+        return [CaptureMode(fourcc, w, h, self.fps) for (w, h) in resolutions for fourcc in fourccs]
+    
+    def _read_capture_mode(self) -> CaptureMode:
+        """カメラから現在の取得モードを読み出す"""
+        return CaptureMode(
+            fourcc_to_str(self.camera.get(cv2.CAP_PROP_FOURCC)),
+            int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            float(self.camera.get(cv2.CAP_PROP_FPS))
+        )
+    
+    def _apply_capture_mode(self, mode: CaptureMode) -> CaptureMode:
+        """
+        取得モードを要求し、実際に有効になったモードを返す
+        
+        ドライバによってはFOURCCを解像度より先に設定しないと反映されない。
+        """
+        self.camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode.fourcc))
+        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, mode.width)
+        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, mode.height)
+        self.camera.set(cv2.CAP_PROP_FPS, mode.fps)
+        actual = self._read_capture_mode()
+        
+        if self.probe_frames > 0:
+            # 申告値ではなく実測のフレームレートを使う
+            self.camera.read()
+            start = time.monotonic()
+            frames = 0
+            for _ in range(self.probe_frames):
+                if self.camera.grab():
+                    frames += 1
+            elapsed = time.monotonic() - start
+            if frames and elapsed > 0:
+                actual.fps = min(actual.fps or float("inf"), frames / elapsed)
+        return actual
+    
+    def negotiate_capture_mode(self) -> CaptureMode:
+        """
+        条件（解像度・フレームレート・形式）を満たす最も軽い取得モードを選んで設定
+        
+        条件を満たすモードがない場合は、最もフレームレートの高いモードを選ぶ。
+        
+        Returns:
+            CaptureMode: 設定された取得モード
+        """
+        fallback: Optional[CaptureMode] = None
+        fallback_request: Optional[CaptureMode] = None
+        for request in self._candidate_modes():
+            actual = self._apply_capture_mode(request)
+            # 形式を報告しないバックエンドもあるので空文字は一致とみなす
+            fourcc_ok = not actual.fourcc or actual.fourcc == request.fourcc
+            size_ok = actual.width >= self.width and actual.height >= self.height
+            if fourcc_ok and size_ok and actual.fps >= self.fps - 0.5:
+                return actual
+            if size_ok and (fallback is None or actual.fps > fallback.fps):
+                fallback, fallback_request = actual, request
+        
+        if fallback_request is not None:
+            print(f"条件を満たす取得モードがありません。最も速いモードを使用します: {fallback}")
+            return self._apply_capture_mode(fallback_request)
+        
+        # どのモードも要求解像度に届かない場合は要求どおりに設定してリサイズで合わせる
+        request = CaptureMode(self.fourcc or FOURCC_PREFERENCE[0], self.width, self.height, self.fps)
+        return self._apply_capture_mode(request)
+    
     def stop_camera(self):
         """カメラを停止"""
         self.is_running = False
+        with self.frame_ready:
+            self.frame_ready.notify_all()
         
         if self.capture_thread and self.capture_thread.is_alive():
             self.capture_thread.join(timeout=2.0)
@@ -77,8 +284,88 @@ class CameraManager:
             self.camera.release()
             self.camera = None
         
+        if self.frame_ring is not None:
+            # 共有メモリのリングはここで削除する（ワーカープロセスより先に停止しても残らない）
+            self.frame_ring.close()
+        for ring in self._retired_rings:
+            ring.close()
+        self._retired_rings = []
+        
         print("カメラを停止しました")
     
+    def reconfigure(self, fps: Optional[float] = None, width: Optional[int] = None,
+                    height: Optional[int] = None) -> List[str]:
+        """
+        フレームレート・解像度を変更（取得中ならカメラを開いたまま、キャプチャスレッドが次のフレームの前に反映する）
+        
+        解像度を変えるとカメラに新しい解像度を要求し、リングバッファは新しい大きさで作り直す
+        （古いリングは利用者が全スロットを解放してから閉じる）。カメラが要求に応じない場合も
+        出力はリサイズで指定の大きさになる。
+        
+        Args:
+            fps: フレームレート（Noneで変更しない）
+            width: 映像幅（Noneで変更しない）
+            height: 映像高さ（Noneで変更しない）
+            
+        Returns:
+            List[str]: 反映内容（ログ用）
+        """
+        settings = {}
+        if fps is not None and fps != self.fps:
+            settings["fps"] = fps
+        new_size = (width or self.width, height or self.height)
+        if new_size != (self.width, self.height):
+            settings["size"] = new_size
+        if not settings:
+            return []
+        
+        effects = []
+        if "fps" in settings:
+            effects.append(f"カメラ: fps {self.fps} → {fps}")
+        if "size" in settings:
+            effects.append(f"カメラ: 解像度 {self.width}x{self.height} → {new_size[0]}x{new_size[1]}")
+        if not self.is_running:
+            self._apply_settings(settings)
+            return [f"{effect}（次回のカメラ起動時に反映）" for effect in effects]
+        with self.lock:
+            self._pending_settings.update(settings)
+        return [f"{effect}（カメラを開いたまま反映）" for effect in effects]
+    
+    def _apply_settings(self, settings: dict):
+        """変更された設定を反映（取得中はキャプチャスレッドから呼ぶ）"""
+        if "fps" in settings:
+            self.fps = settings["fps"]
+        if "size" in settings:
+            self.width, self.height = settings["size"]
+        if self.camera is None:
+            return
+        
+        if "size" in settings:
+            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if "fps" in settings or "size" in settings:
+            self.camera.set(cv2.CAP_PROP_FPS, self.fps)
+        self.capture_mode = self._read_capture_mode()
+        
+        if "size" in settings and self.frame_ring is not None:
+            old_ring = self.frame_ring
+            self.frame_ring = type(old_ring)(self.ring_size, (self.height, self.width, 3))
+            self._retired_rings.append(old_ring)
+            self._read_buffer = None
+            self._direct_read = False
+        print(f"取得設定を変更しました: {self.capture_mode}（出力 {self.width}x{self.height}, {self.fps}fps）")
+    
+    def _apply_pending_settings(self):
+        """要求された設定の反映と、解放された古いリングの削除（キャプチャスレッドで呼ぶ）"""
+        if self._pending_settings:
+            with self.lock:
+                settings, self._pending_settings = self._pending_settings, {}
+            self._apply_settings(settings)
+        if self._retired_rings:
+            for ring in [ring for ring in self._retired_rings if ring.held_count() == 0]:
+                ring.close()
+                self._retired_rings.remove(ring)
+    
     def set_frame_callback(self, callback: Callable[[np.ndarray], None]):
         """
         フレーム取得時のコールバック関数を設定
@@ -95,40 +382,271 @@ class CameraManager:
         Returns:
             np.ndarray: 現在のフレーム（BGR形式）
         """
+        if self.frame_ring is not None:
+            ref = self.frame_ring.acquire_latest()
+            if ref is None:
+                return None
+            with ref:
+                return ref.frame.copy()
+        
         with self.lock:
             return self.current_frame.copy() if self.current_frame is not None else None
     
+    def acquire_frame(self, after_seq: int = 0) -> Optional[FrameRef]:
+        """
+        after_seqより新しい最新フレームを読み取り専用ビューとして取得（コピーしない）
+        
+        リングバッファモードではrelease()するまでスロットは上書きされない。
+        with文で使うと自動的に解放される。
+        
+        Args:
+            after_seq: 前回取得したフレームの通し番号
+            
+        Returns:
+            FrameRef: フレーム参照、新しいフレームがなければNone
+        """
+        if self.frame_ring is not None:
+            return self.frame_ring.acquire_latest(after_seq)
+        
+        with self.lock:
+            if self.current_frame is None or self.frame_seq <= after_seq:
+                return None
+            return FrameRef(self.frame_seq, self.frame_timestamp, self.current_frame)
+    
+    def wait_for_frame(self, after_seq: int = 0, timeout: Optional[float] = None) -> Optional[FrameRef]:
+        """
+        after_seqより新しいフレームが公開されるまで待機して取得
+        
+        返されたFrameRefのseqを次回のafter_seqに渡すと、新しいフレームごとに1回だけ起床する。
+        取得時刻（timestamp）から認識までの遅延を計測できる。
+        
+        Args:
+            after_seq: 前回処理したフレームの通し番号
+            timeout: 最大待機時間（秒）、Noneで無期限
+            
+        Returns:
+            FrameRef: フレーム参照、タイムアウトまたはカメラ停止時はNone
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.frame_ready:
+            while self.frame_seq <= after_seq:
+                if not self.is_running:
+                    return None
+                if deadline is None:
+                    self.frame_ready.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self.frame_ready.wait(remaining)
+        return self.acquire_frame(after_seq)
+    
+    def get_frame_if_newer(self, last_seq: int) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        last_seqより新しいフレームがあれば取得（コピーしない）
+        
+        UIスレッドから毎フレーム呼んでも待たされないよう、古いフレームは返さない。
+        返すフレームは読み取り専用。
+        
+        Args:
+            last_seq: 前回取得したフレームの通し番号
+            
+        Returns:
+            Tuple[int, np.ndarray]: 最新フレームの通し番号とフレーム、新しいフレームがなければ(last_seq, None)
+        """
+        if self.frame_ring is not None:
+            # スロットは保持し続けられないのでコピーを返す
+            ref = self.frame_ring.acquire_latest(last_seq)
+            if ref is None:
+                return last_seq, None
+            with ref:
+                return ref.seq, ref.frame.copy()
+        
+        with self.lock:
+            if self.frame_seq == last_seq or self.current_frame is None:
+                return last_seq, None
+            return self.frame_seq, self.current_frame
+    
     def _capture_loop(self):
         """カメラキャプチャのメインループ"""
-        frame_interval = 1.0 / self.fps
+        # 単調時計上の締め切りで間隔を決め、処理時間の揺らぎで周期がずれないようにする
+        deadline = time.monotonic()
         
         while self.is_running and self.camera:
-            start_time = time.time()
-            
-            ret, frame = self.camera.read()
-            if not ret:
+            self._apply_pending_settings()
+            if not self._capture_step():
                 print("フレームの取得に失敗しました")
                 break
             
-            # フレームをリサイズ
-            frame = cv2.resize(frame, (self.width, self.height))
-            
-            # フレームを保存
-            with self.lock:
-                self.current_frame = frame.copy()
-            
-            # コールバック関数を呼び出し
-            if self.frame_callback:
-                try:
-                    self.frame_callback(frame)
-                except Exception as e:
-                    print(f"フレームコールバックエラー: {e}")
+            # フレームレート制御（fpsは取得中に変更されることがある）
+            frame_interval = 1.0 / self.fps
+            deadline += frame_interval
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -frame_interval:
+                # 1フレーム以上遅れたら追いつこうとせず基準を現在に合わせる
+                deadline = time.monotonic()
+    
+    def _grab_latest(self) -> bool:
+        """
+        ドライバのバッファに溜まった古いフレームを読み捨てて最新フレームをgrabする
+        
+        バッファ済みのフレームはgrab()が即座に返るので、センサーを待つ
+        （閾値より時間がかかる）まで、またはmax_drain回まで読み捨てる。
+        
+        Returns:
+            bool: grabに成功した場合True
+        """
+        start = time.monotonic()
+        if not self.camera.grab():
+            return False
+        self.frames_grabbed += 1
+        
+        drained = 0
+        while drained < self.max_drain and time.monotonic() - start < STALE_GRAB_THRESHOLD:
+            start = time.monotonic()
+            if not self.camera.grab():
+                break
+            self.frames_grabbed += 1
+            drained += 1
+        self.stale_frames_dropped += drained
+        return True
+    
+    def _read_frame(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        1フレームを読み込む（低遅延モードでは最新フレームだけをデコード）
+        
+        Args:
+            image: 書き込み先のバッファ（形状が合えば再利用される）
             
-            # フレームレート制御
-            elapsed = time.time() - start_time
-            sleep_time = max(0, frame_interval - elapsed)
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+        Returns:
+            Tuple[bool, np.ndarray]: 成否とフレーム
+        """
+        if self.low_latency:
+            if not self._grab_latest():
+                return False, None
+            self._decode_start = time.monotonic()
+            ret, frame = self.camera.retrieve(image)
+        else:
+            # read()はセンサーの待ち時間も含む
+            self._decode_start = time.monotonic()
+            ret, frame = self.camera.read(image)
+            if ret:
+                self.frames_grabbed += 1
+        if ret:
+            self.frames_decoded += 1
+        return ret, frame
+    
+    def get_capture_stats(self) -> dict:
+        """
+        取得統計を取得
+        
+        Returns:
+            dict: grab・デコード・読み捨て・ドロップのフレーム数
+        """
+        return {
+            "frames_grabbed": self.frames_grabbed,
+            "frames_decoded": self.frames_decoded,
+            "stale_frames_dropped": self.stale_frames_dropped,
+            "ring_frames_dropped": self.frames_dropped,
+        }
+    
+    def _capture_step(self) -> bool:
+        """
+        1フレームを取得して保存し、コールバックを呼び出す
+        
+        Returns:
+            bool: フレーム取得に成功した場合True
+        """
+        if self.frame_ring is not None:
+            return self._capture_into_ring()
+        
+        ret, frame = self._read_frame()
+        if not ret:
+            return False
+        timestamp = time.monotonic()
+        
+        # フレームをリサイズ（すでに同じサイズなら省略）
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            frame = cv2.resize(frame, (self.width, self.height))
+        
+        # フレームを保存（保存後は書き換えないので読み取り専用にして共有する）
+        stored = frame.copy()
+        stored.flags.writeable = False
+        with self.frame_ready:
+            self.current_frame = stored
+            self.frame_seq += 1
+            self.frame_timestamp = timestamp
+            self.frame_ready.notify_all()
+        if self.latency_monitor is not None:
+            self.latency_monitor.record("capture", time.monotonic() - self._decode_start)
+        
+        # コールバック関数を呼び出し
+        if self.frame_callback:
+            try:
+                self.frame_callback(frame)
+            except Exception as e:
+                print(f"フレームコールバックエラー: {e}")
+        return True
+    
+    def _capture_into_ring(self) -> bool:
+        """
+        事前確保したスロットへ直接読み込み・リサイズする（フレームごとの確保・コピーなし）
+        
+        Returns:
+            bool: フレーム取得に成功した場合True
+        """
+        ring = self.frame_ring
+        index = ring.acquire_write_slot()
+        if index is None:
+            # 全スロットが保持中なので上書きせずに読み捨てる
+            self.frames_dropped += 1
+            if not self.camera.grab():
+                return False
+            self.frames_grabbed += 1
+            return True
+        
+        dst = ring.buffer(index)
+        if self._direct_read:
+            ret, frame = self._read_frame(dst)
+        else:
+            ret, frame = self._read_frame(self._read_buffer)
+            if ret:
+                self._read_buffer = frame
+        if not ret:
+            ring.cancel_write(index)
+            return False
+        timestamp = time.monotonic()
+        
+        if frame is not dst:
+            if frame.shape == dst.shape:
+                # リサイズ不要なので次回からスロットへ直接読み込む
+                np.copyto(dst, frame)
+                self._direct_read = True
+            else:
+                cv2.resize(frame, (self.width, self.height), dst=dst)
+        
+        # 書き込みはキャプチャスレッドだけなので、公開してから待機中の利用者を起こす
+        seq = self.frame_seq + 1
+        ring.publish(index, seq, timestamp)
+        with self.frame_ready:
+            self.frame_seq = seq
+            self.frame_timestamp = timestamp
+            self.frame_ready.notify_all()
+        if self.latency_monitor is not None:
+            self.latency_monitor.record("capture", time.monotonic() - self._decode_start)
+        
+        # コールバック中はスロットを保持して上書きを防ぐ
+        if self.frame_callback:
+            ref = ring.acquire_latest(seq - 1)
+            if ref is not None:
+                with ref:
+                    try:
+                        self.frame_callback(ref.frame)
+                    except Exception as e:
+                        print(f"フレームコールバックエラー: {e}")
+        return True
     
     def is_camera_available(self) -> bool:
         """
@@ -138,7 +656,7 @@ class CameraManager:
             bool: カメラが利用可能な場合True
         """
         try:
-            test_camera = cv2.VideoCapture(self.device_id)
+            test_camera = self.capture_factory(self.device_id)
             if test_camera.isOpened():
                 test_camera.release()
                 return True
@@ -161,5 +679,10 @@ class CameraManager:
             "width": int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)),
             "height": int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)),
             "fps": self.camera.get(cv2.CAP_PROP_FPS),
+            "fourcc": fourcc_to_str(self.camera.get(cv2.CAP_PROP_FOURCC)),
+            "negotiated_mode": asdict(self.capture_mode) if self.capture_mode else None,
+            "resize": self.capture_mode is not None and (
+                self.capture_mode.width != self.width or self.capture_mode.height != self.height
+            ),
             "is_opened": self.camera.isOpened()
         }
@@ -0,0 +1,271 @@
+"""
+設定サービス
+config.yaml を一度だけ読み込んで各画面（Tk / Kivy）で共有し、ファイルの変更を監視して再読み込みする
+
+- 読み込んだ値は検証し、不正な値があればファイル全体を反映しない
+  （起動時はデフォルト設定、再読み込み時は前の設定を使い続ける）
+- 変わった項目は subscribe() で登録したコールバックへセクションごとに渡す
+  （カメラのfps・解像度はカメラを開いたまま、認識の閾値はモデルを読み込み直さずに反映する）
+- コールバックのない項目はアプリの再起動で反映される
+- 再読み込みにかかった時間と、変わった項目・反映内容をログに出力する
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import copy
+import os
+import threading
+import time
+
+import yaml
+
+
+DEFAULT_CONFIG_PATH = "config.yaml"
+
+# 設定ファイルがない・読み込めない場合の設定
+DEFAULT_CONFIG = {
+    'camera': {'device_id': 0, 'width': 640, 'height': 480, 'fps': 30},
+    'ui': {'window_width': 800, 'window_height': 600, 'title': '透析供給装置薬液補充アプリ',
+           'display_width': 640, 'display_height': 480},
+}
+
+# 数値の設定の検証規則: (セクション, キー) → (型, 下限, 上限)（Noneは制限なし）
+VALIDATION_RULES = {
+    ('camera', 'width'): (int, 1, None),
+    ('camera', 'height'): (int, 1, None),
+    ('camera', 'fps'): ((int, float), 1, 240),
+    ('camera', 'ring_size'): (int, 0, None),
+    ('model', 'confidence_threshold'): ((int, float), 0.0, 1.0),
+    ('model', 'nms_threshold'): ((int, float), 0.0, 1.0),
+    ('model', 'input_size'): (int, 32, None),
+    ('model', 'warmup_iterations'): (int, 0, None),
+    ('pipeline', 'num_workers'): (int, 1, None),
+    ('pipeline', 'num_processes'): (int, 1, None),
+    ('pipeline', 'queue_size'): (int, 1, None),
+    ('safety', 'min_confidence'): ((int, float), 0.0, 1.0),
+    ('safety', 'window'): (int, 1, None),
+}
+
+# 選択肢の決まった設定: (セクション, キー) → 選択肢
+CHOICE_RULES = {
+    ('pipeline', 'mode'): ("thread", "process"),
+    ('model', 'precision'): ("fp32", "int8"),
+}
+
+# 変更通知のコールバック: (新しいセクションの設定, {キー: (旧値, 新値)}) → 反映内容（ログ用）
+ConfigCallback = Callable[[dict, Dict[str, Tuple]], Optional[List[str]]]
+
+
+def validate_config(config: dict) -> List[str]:
+    """
+    設定を検証
+
+    Args:
+        config: config.yamlの内容
+
+    Returns:
+        List[str]: 不正な項目の説明（空なら正常）
+    """
+    if not isinstance(config, dict):
+        return ["設定ファイルの最上位がマッピングではありません"]
+    errors = []
+    for name, value in config.items():
+        if not isinstance(value, dict):
+            errors.append(f"{name}: セクションがマッピングではありません")
+    for (section, key), (types, minimum, maximum) in VALIDATION_RULES.items():
+        value = config.get(section, {}).get(key) if isinstance(config.get(section), dict) else None
+        if value is None:
+            continue
+        # YAMLの true / false は int として扱わない
+        if isinstance(value, bool) or not isinstance(value, types):
+            errors.append(f"{section}.{key}: 数値ではありません ({value!r})")
+        elif (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            errors.append(f"{section}.{key}: 範囲外です ({value}, {minimum}〜{'' if maximum is None else maximum})")
+    for (section, key), choices in CHOICE_RULES.items():
+        value = config.get(section, {}).get(key) if isinstance(config.get(section), dict) else None
+        if value is not None and value not in choices:
+            errors.append(f"{section}.{key}: {' / '.join(choices)} のいずれかにしてください ({value!r})")
+    return errors
+
+
+def _diff_section(old: dict, new: dict) -> Dict[str, Tuple]:
+    """セクション内で変わった項目（キー → (旧値, 新値)）"""
+    return {key: (old.get(key), new.get(key)) for key in set(old) | set(new) if old.get(key) != new.get(key)}
+
+
+class ConfigService:
+    """config.yamlを共有し、変更を監視して反映するクラス"""
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH, defaults: Optional[dict] = None):
+        """
+        設定サービスの初期化（load()で読み込む）
+
+        Args:
+            path: 設定ファイルのパス
+            defaults: 設定ファイルがない・読み込めない場合の設定
+        """
+        self.path = path
+        self.defaults = defaults if defaults is not None else DEFAULT_CONFIG
+        self.config: dict = copy.deepcopy(self.defaults)
+        self.lock = threading.Lock()
+        self.subscribers: List[Tuple[str, Optional[Tuple[str, ...]], ConfigCallback]] = []
+        self.reload_count = 0
+        self._file_state: Optional[Tuple[float, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[Tuple[float, int]]:
+        """ファイルの更新時刻と大きさ（ファイルがなければNone）"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime, stat.st_size)
+
+    def _read(self) -> dict:
+        """設定ファイルを読み込む（空のファイルは空の設定）"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+
+    def load(self) -> dict:
+        """
+        設定ファイルを読み込む（起動時に呼ぶ、読み込めない・不正な値があればデフォルト設定）
+
+        Returns:
+            dict: 設定
+        """
+        self._file_state = self._stat()
+        try:
+            config = self._read()
+        except FileNotFoundError:
+            print("設定ファイルが見つかりません。デフォルト設定を使用します。")
+            config = copy.deepcopy(self.defaults)
+        except Exception as e:
+            print(f"設定ファイルの読み込みエラー: {e}")
+            config = copy.deepcopy(self.defaults)
+        errors = validate_config(config)
+        if errors:
+            print(f"設定ファイルに不正な値があるため、デフォルト設定を使用します: {'; '.join(errors)}")
+            config = copy.deepcopy(self.defaults)
+        with self.lock:
+            self.config = config
+        return config
+
+    def get(self) -> dict:
+        """現在の設定（再読み込みで置き換わるので、必要な値はその都度取り出す）"""
+        with self.lock:
+            return self.config
+
+    def section(self, name: str) -> dict:
+        """
+        セクションの設定を取得
+
+        Args:
+            name: セクション名
+
+        Returns:
+            dict: セクションの設定（なければ空）
+        """
+        return self.get().get(name) or {}
+
+    def subscribe(self, section: str, callback: ConfigCallback, keys: Optional[Sequence[str]] = None):
+        """
+        セクションの変更通知を登録（コールバックは監視スレッドから呼ばれる）
+
+        Args:
+            section: セクション名
+            callback: (新しいセクションの設定, {キー: (旧値, 新値)}) を受け取り、反映内容のリストを返す関数
+            keys: 通知するキー（Noneでセクション内の全キー）
+        """
+        self.subscribers.append((section, tuple(keys) if keys is not None else None, callback))
+
+    def check_for_changes(self) -> bool:
+        """
+        ファイルが変わっていれば再読み込み
+
+        Returns:
+            bool: 新しい設定を反映した場合True
+        """
+        state = self._stat()
+        if state is None or state == self._file_state:
+            return False
+        self._file_state = state
+        return self.reload()
+
+    def reload(self) -> bool:
+        """
+        設定ファイルを再読み込みし、変わった項目を登録先へ通知
+
+        Returns:
+            bool: 新しい設定を反映した場合True（読み込めない・不正な値がある場合は前の設定のままFalse）
+        """
+        start = time.perf_counter()
+        try:
+            config = self._read()
+        except Exception as e:
+            print(f"設定ファイルの再読み込みエラー（前の設定を使い続けます）: {e}")
+            return False
+        errors = validate_config(config)
+        if errors:
+            print(f"設定ファイルに不正な値があるため反映しません: {'; '.join(errors)}")
+            return False
+
+        with self.lock:
+            old, self.config = self.config, config
+        changes = {}
+        for name in set(old) | set(config):
+            diff = _diff_section(old.get(name) or {}, config.get(name) or {})
+            if diff:
+                changes[name] = diff
+        if not changes:
+            return False
+        self.reload_count += 1
+
+        effects = []
+        handled = set()
+        for section, keys, callback in self.subscribers:
+            section_changes = {key: value for key, value in changes.get(section, {}).items()
+                               if keys is None or key in keys}
+            if not section_changes:
+                continue
+            handled.update((section, key) for key in section_changes)
+            try:
+                effects.extend(callback(config.get(section) or {}, section_changes) or [])
+            except Exception as e:
+                effects.append(f"{section}: 反映エラー {e}")
+
+        elapsed_ms = 1000.0 * (time.perf_counter() - start)
+        print(f"設定ファイルを再読み込みしました（{elapsed_ms:.1f} ms）: {self.path}")
+        for section, diff in sorted(changes.items()):
+            for key, (old_value, new_value) in sorted(diff.items()):
+                note = "" if (section, key) in handled else "（アプリの再起動で反映）"
+                print(f"  {section}.{key}: {old_value!r} → {new_value!r}{note}")
+        for effect in effects:
+            print(f"  {effect}")
+        return True
+
+    def start_watching(self, interval: float = 1.0):
+        """
+        設定ファイルの監視スレッドを開始
+
+        Args:
+            interval: ファイルの更新を確認する間隔（秒）
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch_loop, args=(interval,), name="config-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """監視スレッドを停止"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _watch_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                print(f"設定ファイルの監視エラー: {e}")
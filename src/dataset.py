@@ -0,0 +1,188 @@
+"""
+学習データ（labelImgのYOLO形式）の読み込み
+data/images/<薬液>/<蓋の状態>/ の画像と、同じ構成の data/labels/ のラベル（.txt）を扱う
+"""
+
+import hashlib
+import os
+from collections import defaultdict
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+
+# 画像ファイルの拡張子
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# 検証用の分割（画像パスを1行ずつ列挙したファイル）
+DEFAULT_VAL_SPLIT = "data/splits/val.txt"
+
+# 学習用・検証用・テスト用の分割の比率（8:1:1）
+SPLIT_RATIOS = (("train", 0.8), ("val", 0.1), ("test", 0.1))
+
+
+def find_images(root: str) -> List[str]:
+    """
+    ディレクトリ以下の画像ファイルを列挙
+
+    Args:
+        root: 画像ディレクトリ
+
+    Returns:
+        List[str]: 画像パス（名前順）
+    """
+    images = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(os.path.join(directory, name))
+    return sorted(images)
+
+
+def read_image_list(path: str) -> List[str]:
+    """
+    分割ファイル（1行1画像パス）を読み込む
+
+    相対パスは分割ファイルの場所ではなくカレントディレクトリ（プロジェクトルート）からのパスとみなす。
+
+    Args:
+        path: 分割ファイルのパス
+
+    Returns:
+        List[str]: 画像パス
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def resolve_images(source: str) -> List[str]:
+    """
+    画像ディレクトリまたは分割ファイルから画像パスを取得
+
+    Args:
+        source: 画像ディレクトリ、または分割ファイル（.txt）
+
+    Returns:
+        List[str]: 画像パス
+    """
+    if os.path.isdir(source):
+        return find_images(source)
+    return read_image_list(source)
+
+
+def label_path_for(image_path: str) -> str:
+    """
+    画像に対応するラベルファイルのパス（パス中の最後の images を labels に置き換え、拡張子を .txt にする）
+
+    Args:
+        image_path: 画像パス
+
+    Returns:
+        str: ラベルファイルのパス
+    """
+    parts = os.path.normpath(image_path).split(os.sep)
+    for index in range(len(parts) - 1, -1, -1):
+        if parts[index] == "images":
+            parts[index] = "labels"
+            break
+    return os.path.splitext(os.sep.join(parts))[0] + ".txt"
+
+
+def load_yolo_labels(label_path: str, width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    YOLO形式のラベル（クラスID cx cy w h、0〜1の相対座標）を画素座標で読み込む
+
+    Args:
+        label_path: ラベルファイルのパス（なければ物体なし）
+        width: 画像の幅
+        height: 画像の高さ
+
+    Returns:
+        Tuple: (x, y, width, height) の配列 (N, 4)、クラスIDの配列 (N,)
+    """
+    if not os.path.exists(label_path):
+        return np.empty((0, 4), dtype=np.float64), np.empty(0, dtype=np.int32)
+
+    values = np.loadtxt(label_path, dtype=np.float64, ndmin=2)
+    if values.size == 0:
+        return np.empty((0, 4), dtype=np.float64), np.empty(0, dtype=np.int32)
+
+    class_ids = values[:, 0].astype(np.int32)
+    boxes = values[:, 1:5] * (width, height, width, height)
+    boxes[:, 0:2] -= boxes[:, 2:4] / 2
+    return boxes, class_ids
+
+
+def validate_yolo_label(label_path: str, num_classes: int) -> Tuple[List[Tuple[int, float, float, float, float]], List[str]]:
+    """
+    YOLO形式のラベルファイルを検証
+
+    各行が「クラスID cx cy w h」で、クラスIDが範囲内、座標が0〜1、幅・高さが正であることを確かめる。
+
+    Args:
+        label_path: ラベルファイルのパス
+        num_classes: クラス数
+
+    Returns:
+        Tuple: 正しい行 (クラスID, cx, cy, w, h) のリスト、問題の説明のリスト（ファイルがなければ問題1件）
+    """
+    if not os.path.exists(label_path):
+        return [], [f"ラベルファイルがありません: {label_path}"]
+
+    rows, errors = [], []
+    with open(label_path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, start=1):
+            fields = line.split()
+            if not fields:
+                continue
+            where = f"{label_path}:{number}"
+            if len(fields) != 5:
+                errors.append(f"{where}: 値が5つではありません")
+                continue
+            try:
+                class_id = int(fields[0])
+                cx, cy, w, h = (float(value) for value in fields[1:])
+            except ValueError:
+                errors.append(f"{where}: 数値ではない値があります")
+                continue
+            if not 0 <= class_id < num_classes:
+                errors.append(f"{where}: クラスID {class_id} が範囲外です")
+            elif not (0.0 <= cx <= 1.0 and 0.0 <= cy <= 1.0 and 0.0 < w <= 1.0 and 0.0 < h <= 1.0):
+                errors.append(f"{where}: 座標が0〜1の範囲外です")
+            else:
+                rows.append((class_id, cx, cy, w, h))
+    return rows, errors
+
+
+def stratified_split(keys: Dict[str, Hashable], ratios: Sequence[Tuple[str, float]] = SPLIT_RATIOS,
+                     seed: int = 0) -> Dict[str, List[str]]:
+    """
+    層ごとに比率を保って分割（クラスのバランスを分割間でそろえる）
+
+    層の中の順序は名前と seed のハッシュで決めるので、同じ入力なら毎回同じ分割になる。
+
+    Args:
+        keys: 名前（画像パスなど） → 層（代表クラスなど）
+        ratios: (分割名, 比率) のリスト
+        seed: 並べ替えのシード
+
+    Returns:
+        Dict[str, List[str]]: 分割名 → 名前のリスト（名前順）
+    """
+    strata = defaultdict(list)
+    for name, key in keys.items():
+        strata[key].append(name)
+
+    total = sum(ratio for _, ratio in ratios)
+    splits = {split: [] for split, _ in ratios}
+    for names in strata.values():
+        names.sort(key=lambda name: hashlib.sha1(f"{seed}:{name}".encode("utf-8")).hexdigest())
+        # 累積の比率で区切ると、端数がどの分割にも偏らない
+        cumulative = 0.0
+        start = 0
+        for split, ratio in ratios:
+            cumulative += ratio
+            end = int(round(len(names) * cumulative / total))
+            splits[split].extend(names[start:end])
+            start = end
+    return {split: sorted(names) for split, names in splits.items()}
@@ -0,0 +1,209 @@
+"""
+フレームリングバッファ
+事前確保したフレームバッファを使い回し、利用者には読み取り専用ビューを渡す
+
+SharedFrameRing はバッファを multiprocessing.shared_memory に置き、
+ワーカープロセスがスロットを直接参照できるようにする（フレームのpickle・コピーなし）。
+"""
+
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+import threading
+
+import numpy as np
+
+
+class FrameRef:
+    """
+    フレームと付随情報の参照（リングバッファ内ならrelease()まで上書きされない）
+
+    seqはCameraManagerごとに1から単調増加する通し番号、timestampは取得時刻（time.monotonic()）。
+    """
+
+    __slots__ = ("seq", "timestamp", "frame", "_ring", "_index")
+
+    def __init__(self, seq: int, timestamp: float, frame: np.ndarray,
+                 ring: Optional["FrameRing"] = None, index: int = -1):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = frame
+        self._ring = ring
+        self._index = index
+
+    def release(self):
+        """スロットの保持を解除（複数回呼んでも安全）"""
+        if self._ring is not None:
+            self._ring.release(self._index)
+            self._ring = None
+
+    def __enter__(self) -> "FrameRef":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FrameRing:
+    """事前確保したフレームバッファのリング"""
+
+    def __init__(self, size: int, shape: tuple, dtype=np.uint8):
+        """
+        リングバッファの初期化
+
+        Args:
+            size: スロット数（書き込み中・最新・保持中を考慮して3以上を推奨）
+            shape: 1フレームの形状 (height, width, channels)
+            dtype: 画素のデータ型
+        """
+        if size < 2:
+            raise ValueError("リングバッファのスロット数は2以上が必要です")
+        self.size = size
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.buffers = self._allocate(size, self.shape, self.dtype)
+        # 利用者に渡す読み取り専用ビュー（スロットごとに1回だけ作る）
+        self.views = []
+        for buffer in self.buffers:
+            view = buffer.view()
+            view.flags.writeable = False
+            self.views.append(view)
+        self.refcounts = [0] * size
+        self.seqs = [0] * size
+        self.timestamps = [0.0] * size
+        self.latest_index = -1
+        self.writing_index = -1
+        self._next_index = 0
+        self.lock = threading.Lock()
+
+    def _allocate(self, size: int, shape: tuple, dtype: np.dtype) -> List[np.ndarray]:
+        """スロットのバッファを確保"""
+        return [np.empty(shape, dtype=dtype) for _ in range(size)]
+
+    def close(self):
+        """バッファを解放（共有メモリを使わないリングでは何もしない）"""
+        pass
+
+    def acquire_write_slot(self) -> Optional[int]:
+        """
+        書き込み用スロットを確保
+
+        最新スロットと利用者が保持中のスロットは選ばない。
+
+        Returns:
+            int: スロット番号、全スロットが使用中の場合None
+        """
+        with self.lock:
+            for offset in range(self.size):
+                index = (self._next_index + offset) % self.size
+                if index != self.latest_index and self.refcounts[index] == 0:
+                    self.writing_index = index
+                    self._next_index = (index + 1) % self.size
+                    return index
+            return None
+
+    def buffer(self, index: int) -> np.ndarray:
+        """書き込み用のバッファを取得（書き込み側専用）"""
+        return self.buffers[index]
+
+    def publish(self, index: int, seq: int, timestamp: float):
+        """書き込みが完了したスロットを最新フレームとして公開"""
+        with self.lock:
+            self.seqs[index] = seq
+            self.timestamps[index] = timestamp
+            self.latest_index = index
+            self.writing_index = -1
+
+    def cancel_write(self, index: int):
+        """書き込みを中止してスロットを返却"""
+        with self.lock:
+            if self.writing_index == index:
+                self.writing_index = -1
+
+    def acquire_latest(self, after_seq: int = -1) -> Optional[FrameRef]:
+        """
+        最新フレームを保持して取得
+
+        Args:
+            after_seq: この通し番号より新しいフレームだけを返す
+
+        Returns:
+            FrameRef: 読み取り専用ビューと通し番号、該当フレームがなければNone
+        """
+        with self.lock:
+            index = self.latest_index
+            if index < 0 or self.seqs[index] <= after_seq:
+                return None
+            self.refcounts[index] += 1
+            return FrameRef(self.seqs[index], self.timestamps[index], self.views[index], self, index)
+
+    def release(self, index: int):
+        """スロットの保持を解除"""
+        with self.lock:
+            if self.refcounts[index] > 0:
+                self.refcounts[index] -= 1
+
+    def held_count(self) -> int:
+        """利用者が保持中のスロット数"""
+        with self.lock:
+            return sum(1 for count in self.refcounts if count > 0)
+
+
+class SharedFrameRing(FrameRing):
+    """
+    共有メモリ上のフレームリング
+
+    全スロットを1つの共有メモリブロックに連続して置く。スロットの保持（参照カウント）は
+    作成したプロセスで管理し、ワーカープロセスへは (共有メモリ名, オフセット, 形状) だけを渡す。
+    """
+
+    def _allocate(self, size: int, shape: tuple, dtype: np.dtype) -> List[np.ndarray]:
+        self.slot_bytes = int(np.prod(shape)) * dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * size)
+        block = np.ndarray((size,) + shape, dtype=dtype, buffer=self.shm.buf)
+        self._base_address = block.__array_interface__["data"][0]
+        return list(block)
+
+    @property
+    def name(self) -> str:
+        """共有メモリ名（ワーカープロセスからの接続用）"""
+        return self.shm.name
+
+    def locate(self, frame: np.ndarray) -> Optional[Tuple[str, int]]:
+        """
+        フレームがこのリングのスロット（またはそのビュー）ならその位置を返す
+
+        Args:
+            frame: 利用者に渡したフレーム
+
+        Returns:
+            Tuple[str, int]: (共有メモリ名, 先頭からのバイトオフセット)、リング外のフレームならNone
+        """
+        if self.shm is None or not frame.flags.c_contiguous or frame.shape != self.shape:
+            return None
+        offset = frame.__array_interface__["data"][0] - self._base_address
+        if offset < 0 or offset % self.slot_bytes or offset // self.slot_bytes >= self.size:
+            return None
+        return self.shm.name, offset
+
+    def close(self):
+        """
+        共有メモリを解放（カメラ停止時に呼ぶ）
+
+        利用者がまだビューを持っている場合はマッピングの解放をガベージコレクションに任せ、
+        名前の削除（unlink）だけを行う。
+        """
+        with self.lock:
+            if self.shm is None:
+                return
+            shm, self.shm = self.shm, None
+            self.latest_index = -1
+            self.buffers = []
+            self.views = []
+        try:
+            shm.close()
+        except BufferError:
+            pass
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,139 @@
+"""
+フレーム時間計測クラス
+UIメインループの1フレームあたりの所要時間を記録・集計
+"""
+
+from collections import deque
+from typing import Dict, Optional
+import os
+import time
+
+
+# 起動時間の計測結果を標準出力へ出す環境変数（benchmarks/bench_startup.py が設定する）
+STARTUP_PROFILE_ENV = "DIALYSIS_STARTUP_PROFILE"
+
+
+class FrameTimeMonitor:
+    """メインループのフレーム時間計測クラス"""
+
+    def __init__(self, name: str = "main loop", window: int = 300, report_interval: float = 5.0):
+        """
+        フレーム時間計測クラスの初期化
+
+        Args:
+            name: レポートに表示する名前
+            window: 集計に使う直近のフレーム数
+            report_interval: レポート出力間隔（秒）、0以下で出力しない
+        """
+        self.name = name
+        self.report_interval = report_interval
+        self.samples: deque = deque(maxlen=window)
+        self.last_tick: Optional[float] = None
+        self.last_report = time.perf_counter()
+
+    def tick(self, *args):
+        """
+        1フレームごとに呼び出す（Clock.schedule_intervalのコールバックにそのまま使える）
+        """
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            self.samples.append(now - self.last_tick)
+        self.last_tick = now
+
+        if self.report_interval > 0 and now - self.last_report >= self.report_interval:
+            self.last_report = now
+            self.report()
+
+    def reset(self):
+        """計測値をクリア"""
+        self.samples.clear()
+        self.last_tick = None
+
+    def get_stats(self) -> dict:
+        """
+        フレーム時間の統計を取得
+
+        Returns:
+            dict: 平均・p95・最大フレーム時間（ミリ秒）とフレーム数
+        """
+        if not self.samples:
+            return {"frames": 0, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+        ordered = sorted(self.samples)
+        p95_index = min(len(ordered) - 1, int(len(ordered) * 0.95))
+        return {
+            "frames": len(ordered),
+            "avg_ms": 1000.0 * sum(ordered) / len(ordered),
+            "p95_ms": 1000.0 * ordered[p95_index],
+            "max_ms": 1000.0 * ordered[-1],
+        }
+
+    def report(self) -> dict:
+        """統計を出力して返す"""
+        stats = self.get_stats()
+        print(f"{self.name} frame time: avg {stats['avg_ms']:.1f} ms, "
+              f"p95 {stats['p95_ms']:.1f} ms, max {stats['max_ms']:.1f} ms ({stats['frames']} frames)")
+        return stats
+
+
+class RateMeter:
+    """累積カウンタから毎秒の発生数（fpsなど）を求めるクラス"""
+
+    def __init__(self, window: float = 1.0):
+        """
+        レート計測クラスの初期化
+
+        Args:
+            window: レートを更新する間隔（秒）
+        """
+        self.window = window
+        self.rate = 0.0
+        self._last_total: Optional[int] = None
+        self._last_time = 0.0
+
+    def update(self, total: int) -> float:
+        """
+        累積カウンタの現在値を渡してレートを更新
+
+        Args:
+            total: 累積カウンタ（表示フレーム数やフレーム通し番号など）
+
+        Returns:
+            float: 直近の毎秒の発生数
+        """
+        now = time.perf_counter()
+        if self._last_total is None or total < self._last_total:
+            self._last_total, self._last_time = total, now
+        elif now - self._last_time >= self.window:
+            self.rate = (total - self._last_total) / (now - self._last_time)
+            self._last_total, self._last_time = total, now
+        return self.rate
+
+
+class StartupTimer:
+    """起動の各時点（最初の描画・操作可能・カメラ画面の準備完了など）を記録するクラス"""
+
+    def __init__(self, enabled: Optional[bool] = None):
+        """
+        起動時間計測の初期化
+
+        Args:
+            enabled: 各時点を出力する（Noneなら環境変数 DIALYSIS_STARTUP_PROFILE=1 のとき）
+        """
+        self.enabled = os.environ.get(STARTUP_PROFILE_ENV) == "1" if enabled is None else enabled
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str):
+        """
+        時点を記録（同じ名前は最初の1回だけ）
+
+        計測側のプロセスと比べられるよう、時刻はエポック秒で "STARTUP <名前> <時刻>" の形で出力する。
+
+        Args:
+            name: 時点の名前
+        """
+        if name in self.marks:
+            return
+        self.marks[name] = time.time()
+        if self.enabled:
+            print(f"STARTUP {name} {self.marks[name]:.6f}", flush=True)
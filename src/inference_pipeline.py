@@ -0,0 +1,360 @@
+"""
+非同期認識パイプライン
+カメラの取得と画像認識を別スレッドで並行に実行し、認識が遅い場合はフレームを間引く
+
+CameraManager → 振り分けスレッド → 最新優先キュー → 認識ワーカー → 結果コールバック
+
+- キューは上限付きで、満杯のときは最も古いフレームを捨てる（最新優先）
+- 認識時間の移動平均からフレームの間引き間隔を決め、ワーカーの処理能力を超えて投入しない
+- 取得から認識完了までの遅延が上限（要件REQ-007: 100 ms）を超えそうなフレームは認識せずに捨てる
+- 動き検出ゲートを指定すると、画面に変化がない間は認識しない
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+import math
+import threading
+import time
+
+from src.frame_ring import FrameRef
+from src.motion_gate import MotionGate
+
+
+# 取得から認識完了までの遅延の上限（秒）
+DEFAULT_LATENCY_BUDGET = 0.1
+
+# 移動平均の重み
+EMA_ALPHA = 0.2
+
+
+@dataclass
+class PipelineResult:
+    """認識結果データクラス"""
+    seq: int  # フレーム通し番号
+    timestamp: float  # フレーム取得時刻（time.monotonic()）
+    result: Any  # 認識関数の戻り値
+    inference_time: float  # 認識にかかった時間（秒）
+    latency: float  # 取得から認識完了までの時間（秒）
+
+
+class LatestQueue:
+    """上限付きの最新優先キュー（満杯なら最も古い要素を捨てる）"""
+
+    def __init__(self, maxsize: int = 1, on_drop: Optional[Callable[[Any], None]] = None):
+        """
+        最新優先キューの初期化
+
+        Args:
+            maxsize: 保持する要素数の上限
+            on_drop: 捨てた要素を受け取るコールバック（FrameRefの解放など）
+        """
+        self.maxsize = max(1, maxsize)
+        self.on_drop = on_drop
+        self.items: deque = deque()
+        self.closed = False
+        self.not_empty = threading.Condition()
+
+    def put(self, item: Any) -> int:
+        """
+        要素を追加
+
+        Returns:
+            int: 追加のために捨てた要素数
+        """
+        dropped = []
+        with self.not_empty:
+            if self.closed:
+                dropped.append(item)
+            else:
+                while len(self.items) >= self.maxsize:
+                    dropped.append(self.items.popleft())
+                self.items.append(item)
+                self.not_empty.notify()
+        for old in dropped:
+            if self.on_drop:
+                self.on_drop(old)
+        return len(dropped)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        要素を取り出す（空なら待機）
+
+        Returns:
+            要素、タイムアウトまたはクローズ時はNone
+        """
+        with self.not_empty:
+            if not self.items and not self.closed:
+                self.not_empty.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self) -> int:
+        """
+        キューを閉じて待機中の取り出しを起こし、残った要素を捨てる
+
+        Returns:
+            int: 捨てた要素数
+        """
+        with self.not_empty:
+            self.closed = True
+            remaining = list(self.items)
+            self.items.clear()
+            self.not_empty.notify_all()
+        for old in remaining:
+            if self.on_drop:
+                self.on_drop(old)
+        return len(remaining)
+
+    def __len__(self) -> int:
+        with self.not_empty:
+            return len(self.items)
+
+
+class InferencePipeline:
+    """カメラ取得と画像認識の間に入る非同期パイプライン"""
+
+    def __init__(self, camera_manager, process: Callable[[Any], Any], num_workers: int = 1,
+                 queue_size: int = 1, latency_budget: float = DEFAULT_LATENCY_BUDGET,
+                 adaptive_skip: bool = True, max_stride: int = 30,
+                 result_callback: Optional[Callable[[PipelineResult], None]] = None,
+                 motion_gate: Optional[MotionGate] = None, latency_monitor=None):
+        """
+        非同期パイプラインの初期化
+
+        ワーカーは認識中のフレームを読み取り専用ビューのまま保持するため、
+        リングバッファを使う場合はring_sizeを num_workers + queue_size + 2 以上にする。
+
+        Args:
+            camera_manager: フレームの取得元（CameraManager）
+            process: 1フレームを認識する関数（AIRecognizer.detect_objectsなど）
+            num_workers: 認識ワーカースレッド数
+            queue_size: 認識待ちキューの上限
+            latency_budget: 取得から認識完了までの遅延の上限（秒）
+            adaptive_skip: 認識時間に応じてフレームを間引くかどうか
+            max_stride: 間引き間隔の上限（フレーム数）
+            result_callback: 認識結果を受け取るコールバック（ワーカースレッドから呼ばれる）
+            motion_gate: 動き検出ゲート（画面に変化がない間は認識しない）、Noneで常に認識
+            latency_monitor: 取得から認識完了までの時間の記録先（LatencyMonitor、任意）
+        """
+        self.camera_manager = camera_manager
+        self.process = process
+        self.num_workers = max(1, num_workers)
+        self.latency_budget = latency_budget
+        self.adaptive_skip = adaptive_skip
+        self.max_stride = max(1, max_stride)
+        self.result_callback = result_callback
+        self.motion_gate = motion_gate
+        self.latency_monitor = latency_monitor
+        self.queue = LatestQueue(queue_size, on_drop=self._on_queue_drop)
+
+        self.is_running = False
+        self.dispatch_thread: Optional[threading.Thread] = None
+        self.workers: List[threading.Thread] = []
+        self.lock = threading.Lock()
+
+        self.latest_result: Optional[PipelineResult] = None
+        self.stride = 1
+        self.frame_interval = 0.0
+        self.avg_inference_time = 0.0
+        self.avg_latency = 0.0
+        self.latencies: deque = deque(maxlen=300)
+        self.frames_seen = 0
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self.frames_dropped = 0
+        self.frames_gated = 0
+        self.errors = 0
+
+    @classmethod
+    def from_config(cls, camera_manager, process: Callable[[Any], Any], pipeline_config: dict,
+                    **kwargs) -> "InferencePipeline":
+        """
+        config.yamlのpipelineセクションからパイプラインを作成
+
+        Args:
+            camera_manager: フレームの取得元
+            process: 1フレームを認識する関数
+            pipeline_config: パイプライン設定
+            **kwargs: 追加の引数（result_callback、motion_gate、latency_monitorなど）
+        """
+        return cls(
+            camera_manager, process,
+            num_workers=pipeline_config.get('num_workers', 1),
+            queue_size=pipeline_config.get('queue_size', 1),
+            latency_budget=pipeline_config.get('latency_budget_ms', 100) / 1000.0,
+            adaptive_skip=pipeline_config.get('adaptive_skip', True),
+            max_stride=pipeline_config.get('max_stride', 30),
+            **kwargs
+        )
+
+    def start(self):
+        """パイプラインを開始"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self.queue = LatestQueue(self.queue.maxsize, on_drop=self._on_queue_drop)
+        self.workers = [
+            threading.Thread(target=self._worker_loop, name=f"inference-worker-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+        self.dispatch_thread = threading.Thread(target=self._dispatch_loop, name="inference-dispatch", daemon=True)
+        self.dispatch_thread.start()
+        print(f"認識パイプラインを開始しました（ワーカー {self.num_workers}）")
+
+    def stop(self):
+        """パイプラインを停止（キューに残ったフレームは解放する）"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        # wait_for_frameの待機を起こす
+        with self.camera_manager.frame_ready:
+            self.camera_manager.frame_ready.notify_all()
+        if self.dispatch_thread:
+            self.dispatch_thread.join(timeout=1.0)
+        self.queue.close()
+        for worker in self.workers:
+            worker.join(timeout=1.0)
+        self.workers = []
+        print("認識パイプラインを停止しました")
+
+    def _on_queue_drop(self, ref: FrameRef):
+        """キューから押し出されたフレームを解放"""
+        ref.release()
+        with self.lock:
+            self.frames_dropped += 1
+
+    def _update_stride(self):
+        """認識時間とフレーム間隔から間引き間隔を更新（self.lock内で呼ぶ）"""
+        if not self.adaptive_skip or self.frame_interval <= 0 or self.avg_inference_time <= 0:
+            self.stride = 1
+            return
+        # ワーカー全体で処理できる間隔ごとに1フレームだけ投入する
+        stride = math.ceil(self.avg_inference_time / (self.num_workers * self.frame_interval))
+        # 認識自体は間に合うのに遅延が上限を超えている間は、さらに間引いてキュー待ちを解消する
+        if self.avg_inference_time < self.latency_budget < self.avg_latency:
+            stride = max(stride, self.stride + 1)
+        self.stride = max(1, min(self.max_stride, stride))
+
+    def _dispatch_loop(self):
+        """新しいフレームを待ち、間引いてキューへ投入"""
+        last_seq = 0
+        last_timestamp = 0.0
+        last_submitted = 0
+        while self.is_running:
+            ref = self.camera_manager.wait_for_frame(last_seq, timeout=0.1)
+            if ref is None:
+                if not self.camera_manager.is_running:
+                    time.sleep(0.01)
+                continue
+
+            gap = ref.seq - last_seq if last_seq else 1
+            if last_timestamp and gap > 0:
+                interval = (ref.timestamp - last_timestamp) / gap
+                self.frame_interval = interval if not self.frame_interval else (
+                    (1 - EMA_ALPHA) * self.frame_interval + EMA_ALPHA * interval)
+            last_seq, last_timestamp = ref.seq, ref.timestamp
+
+            # 画面に変化がない間は認識せず、前回の認識結果を使い続ける
+            moving = self.motion_gate is None or self.motion_gate.update(ref.frame, ref.timestamp)
+            with self.lock:
+                self.frames_seen += gap
+                # 振り分けが追いつかずに見送られたフレームも間引きとして数える
+                self.frames_skipped += gap - 1
+                if not moving:
+                    self.frames_gated += 1
+                    submit = False
+                else:
+                    submit = ref.seq - last_submitted >= self.stride
+                    if not submit:
+                        self.frames_skipped += 1
+            if not submit:
+                ref.release()
+                continue
+
+            last_submitted = ref.seq
+            self.queue.put(ref)
+
+    def _worker_loop(self):
+        """キューからフレームを取り出して認識"""
+        while True:
+            ref = self.queue.get(timeout=0.1)
+            if ref is None:
+                if not self.is_running:
+                    break
+                continue
+
+            with ref:
+                # 認識しても遅延の上限に間に合わないフレームは捨てる
+                # （認識時間だけで上限を超える場合は、結果が出なくならないよう捨てない）
+                age = time.monotonic() - ref.timestamp
+                expected = self.avg_inference_time
+                if 0 < expected < self.latency_budget and age + expected > self.latency_budget:
+                    with self.lock:
+                        self.frames_dropped += 1
+                    continue
+
+                start = time.monotonic()
+                try:
+                    result = self.process(ref.frame)
+                except Exception as e:
+                    print(f"認識エラー: {e}")
+                    with self.lock:
+                        self.errors += 1
+                    continue
+                finished = time.monotonic()
+
+            inference_time = finished - start
+            latency = finished - ref.timestamp
+            pipeline_result = PipelineResult(ref.seq, ref.timestamp, result, inference_time, latency)
+            if self.latency_monitor is not None:
+                self.latency_monitor.record("frame_to_result", latency)
+            with self.lock:
+                self.frames_processed += 1
+                self.latencies.append(latency)
+                if self.avg_inference_time:
+                    self.avg_inference_time = (1 - EMA_ALPHA) * self.avg_inference_time + EMA_ALPHA * inference_time
+                    self.avg_latency = (1 - EMA_ALPHA) * self.avg_latency + EMA_ALPHA * latency
+                else:
+                    self.avg_inference_time, self.avg_latency = inference_time, latency
+                self._update_stride()
+                if self.latest_result is None or ref.seq > self.latest_result.seq:
+                    self.latest_result = pipeline_result
+
+            if self.result_callback:
+                try:
+                    self.result_callback(pipeline_result)
+                except Exception as e:
+                    print(f"結果コールバックエラー: {e}")
+
+    def get_latest_result(self) -> Optional[PipelineResult]:
+        """最新の認識結果を取得（動き検出ゲートで認識を止めている間は最後の結果のまま）"""
+        with self.lock:
+            return self.latest_result
+
+    def get_stats(self) -> dict:
+        """
+        パイプラインの統計を取得
+
+        Returns:
+            dict: 処理・間引き・破棄フレーム数、平均認識時間、遅延（ミリ秒）など
+        """
+        with self.lock:
+            ordered = sorted(self.latencies)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+            return {
+                "frames_seen": self.frames_seen,
+                "frames_processed": self.frames_processed,
+                "frames_skipped": self.frames_skipped,
+                "frames_dropped": self.frames_dropped,
+                "frames_gated": self.frames_gated,
+                "errors": self.errors,
+                "stride": self.stride,
+                "avg_inference_ms": 1000.0 * self.avg_inference_time,
+                "avg_latency_ms": 1000.0 * (sum(ordered) / len(ordered) if ordered else 0.0),
+                "p95_latency_ms": 1000.0 * p95,
+                "max_latency_ms": 1000.0 * (ordered[-1] if ordered else 0.0),
+            }
@@ -0,0 +1,138 @@
+"""
+Kivyカメラプレビュー
+バックグラウンドスレッドで取得した最新フレームだけをテクスチャへ転送
+"""
+
+import time
+from typing import Optional
+
+import numpy as np
+from kivy.clock import Clock
+from kivy.graphics.texture import Texture
+
+from src.camera_manager import CameraManager
+from src.frame_timing import FrameTimeMonitor
+from src.latency_monitor import LatencyMonitor
+
+
+class TexturePreview:
+    """1枚のテクスチャを使い回してフレームを表示するクラス"""
+
+    def __init__(self, image_widget):
+        """
+        テクスチャプレビューの初期化
+
+        Args:
+            image_widget: 表示先のkivy.uix.image.Image
+        """
+        self.image_widget = image_widget
+        self.texture: Optional[Texture] = None
+        self.staging: Optional[np.ndarray] = None
+
+    def display(self, frame: np.ndarray):
+        """
+        BGRフレームをテクスチャへ転送（ファイルI/Oなし）
+
+        Args:
+            frame: 表示するフレーム（BGR形式）
+        """
+        height, width = frame.shape[:2]
+        texture = self.texture
+        if texture is None or texture.size != (width, height):
+            # キャプチャサイズごとに1回だけ確保して使い回す
+            texture = Texture.create(size=(width, height), colorfmt='bgr')
+            # OpenCVは上から、GLテクスチャは下から行を並べる
+            texture.flip_vertical()
+            self.texture = texture
+            self.staging = None
+            self.image_widget.texture = texture
+
+        if frame.flags.writeable and frame.flags.c_contiguous:
+            buffer = frame
+        else:
+            # 読み取り専用の共有フレームは転送用バッファへ1回だけコピー
+            if self.staging is None:
+                self.staging = np.empty((height, width, 3), dtype=np.uint8)
+            np.copyto(self.staging, frame)
+            buffer = self.staging
+
+        texture.blit_buffer(buffer.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+        # テクスチャオブジェクトは同じなので再描画を明示的に要求
+        self.image_widget.canvas.ask_update()
+
+    def clear(self):
+        """表示をクリア"""
+        self.image_widget.texture = None
+        self.texture = None
+        self.staging = None
+
+
+class CameraPreview:
+    """CameraManagerのキャプチャスレッドからUIへ最新フレームを渡すクラス"""
+
+    def __init__(self, image_widget, camera_manager: CameraManager,
+                 frame_monitor: Optional[FrameTimeMonitor] = None,
+                 latency_monitor: Optional[LatencyMonitor] = None):
+        """
+        カメラプレビューの初期化
+
+        Args:
+            image_widget: 表示先のkivy.uix.image.Image
+            camera_manager: バックグラウンドでフレームを取得するカメラ管理
+            frame_monitor: メインループのフレーム時間計測（任意）
+            latency_monitor: 表示と取得から表示までの遅延の計測（任意）
+        """
+        self.texture_preview = TexturePreview(image_widget)
+        self.camera_manager = camera_manager
+        self.frame_monitor = frame_monitor
+        self.latency_monitor = latency_monitor
+        self.last_seq = 0
+        self.frames_shown = 0
+        self.frames_skipped = 0
+        self._event = None
+
+    def start(self) -> bool:
+        """
+        キャプチャスレッドと描画コールバックを開始
+
+        Returns:
+            bool: 起動成功の場合True
+        """
+        if not self.camera_manager.start_camera():
+            return False
+        self.last_seq = self.camera_manager.frame_seq
+        # 間隔0で毎フレーム（vsyncごと）に1回だけ呼ばれる
+        self._event = Clock.schedule_interval(self._on_frame, 0)
+        return True
+
+    def stop(self):
+        """描画コールバックとキャプチャスレッドを停止"""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        self.camera_manager.stop_camera()
+        self.texture_preview.clear()
+        if self.frame_monitor:
+            self.frame_monitor.report()
+            self.frame_monitor.reset()
+
+    def _on_frame(self, dt):
+        """UIスレッドで最新フレームだけを転送（古いフレームは溜めずに捨てる）"""
+        if self.frame_monitor:
+            self.frame_monitor.tick()
+
+        ref = self.camera_manager.acquire_frame(self.last_seq)
+        if ref is None:
+            return
+        start = time.monotonic()
+        with ref:
+            # 前回の描画以降に届いて上書きされたフレーム数
+            self.frames_skipped += ref.seq - self.last_seq - 1
+            self.last_seq = ref.seq
+            self.texture_preview.display(ref.frame)
+            timestamp = ref.timestamp
+        self.frames_shown += 1
+        if self.latency_monitor is not None:
+            now = time.monotonic()
+            self.latency_monitor.record("display", now - start)
+            self.latency_monitor.record("frame_to_display", now - timestamp)
@@ -0,0 +1,341 @@
+"""
+処理段階ごとの遅延計測
+フレームの取得・前処理・推論・判定・表示の所要時間を段階ごとのヒストグラムに記録し、
+p50 / p95 / p99 を求める（要件REQ-007: 30 fps、取得から認識完了まで100 ms の確認用）
+
+- ヒストグラムは 10 µs〜10 s を1.1倍刻みの固定バケットで数えるだけなので、記録は短いロック1回で済む
+  （分位点の誤差はバケット幅の10%以内）
+- 分位点は直近 window〜2×window 秒の記録から求める（古い記録は窓の切り替えで捨てる）
+- 件数と合計は起動からの累積で、Prometheusのsummaryと同じ形で出力できる
+- LatencyReporter で一定間隔にJSON / Prometheusのテキスト形式でファイルへ書き出し、
+  またはローカルのHTTPポート（/metrics、/metrics.json）で公開する
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence
+import json
+import math
+import os
+import threading
+import time
+
+
+# 計測する段階（記録のない段階は出力しない）
+STAGES = (
+    "capture",           # カメラからの読み出し・リサイズ・公開
+    "preprocess",        # 推論用の前処理（レターボックス）
+    "inference",         # 推論と後処理（NMS）
+    "decision",          # 安全確認の判定
+    "display",           # 表示用の変換と描画
+    "frame_to_result",   # フレーム取得から認識完了まで
+    "frame_to_display",  # フレーム取得から表示まで
+)
+
+# バケットの下限（秒）と幅の倍率
+_MIN_SECONDS = 1e-5
+_GROWTH = 1.1
+_LOG_GROWTH = math.log(_GROWTH)
+NUM_BUCKETS = int(math.ceil(math.log(10.0 / _MIN_SECONDS) / _LOG_GROWTH)) + 1
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _bucket_upper(index: int) -> float:
+    """バケットの上端（秒）"""
+    return _MIN_SECONDS * _GROWTH ** index
+
+
+class LatencyHistogram:
+    """対数刻みの固定バケットで所要時間を数えるヒストグラム"""
+
+    def __init__(self, window: float = 10.0):
+        """
+        ヒストグラムの初期化
+
+        Args:
+            window: 分位点の集計窓（秒）、0以下で起動からの全記録
+        """
+        self.window = window
+        self.lock = threading.Lock()
+        self.current = [0] * NUM_BUCKETS
+        self.previous = [0] * NUM_BUCKETS
+        self.window_start = time.monotonic()
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        """
+        所要時間を1件記録
+
+        Args:
+            seconds: 所要時間（秒）
+        """
+        if seconds <= _MIN_SECONDS:
+            index = 0
+        else:
+            index = min(NUM_BUCKETS - 1, int(math.log(seconds / _MIN_SECONDS) / _LOG_GROWTH) + 1)
+        with self.lock:
+            if self.window > 0:
+                self._rotate(time.monotonic())
+            self.current[index] += 1
+            self.count += 1
+            self.total += seconds
+
+    def _rotate(self, now: float):
+        """集計窓が過ぎていれば切り替える（self.lock内で呼ぶ）"""
+        elapsed = now - self.window_start
+        if elapsed < self.window:
+            return
+        # 2窓以上記録がなければ直前の窓も古いので捨てる
+        self.previous = self.current if elapsed < 2 * self.window else [0] * NUM_BUCKETS
+        self.current = [0] * NUM_BUCKETS
+        self.window_start = now
+
+    def quantiles(self, ratios: Sequence[float] = QUANTILES) -> list:
+        """
+        直近の記録の分位点（秒、記録がなければ0）
+
+        Args:
+            ratios: 求める分位点（0〜1）
+
+        Returns:
+            list: 分位点ごとのバケットの上端（秒）
+        """
+        with self.lock:
+            if self.window > 0:
+                self._rotate(time.monotonic())
+            counts = [a + b for a, b in zip(self.current, self.previous)]
+        total = sum(counts)
+        if total == 0:
+            return [0.0] * len(ratios)
+        results = []
+        for ratio in ratios:
+            target = max(1, math.ceil(ratio * total))
+            cumulative = 0
+            for index, count in enumerate(counts):
+                cumulative += count
+                if cumulative >= target:
+                    results.append(_bucket_upper(index))
+                    break
+        return results
+
+    def get_stats(self) -> dict:
+        """
+        統計を取得
+
+        Returns:
+            dict: 累積の件数・平均（ミリ秒）と、直近の p50 / p95 / p99（ミリ秒）
+        """
+        p50, p95, p99 = self.quantiles()
+        with self.lock:
+            count, total = self.count, self.total
+        return {
+            "count": count,
+            "avg_ms": 1000.0 * total / count if count else 0.0,
+            "p50_ms": 1000.0 * p50,
+            "p95_ms": 1000.0 * p95,
+            "p99_ms": 1000.0 * p99,
+        }
+
+
+class LatencyMonitor:
+    """処理段階ごとのヒストグラムをまとめるクラス（各スレッドから共有して使う）"""
+
+    def __init__(self, window: float = 10.0):
+        """
+        遅延計測の初期化
+
+        Args:
+            window: 分位点の集計窓（秒）
+        """
+        self.window = window
+        self.histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram(window) for stage in STAGES}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, latency_config: dict) -> Optional["LatencyMonitor"]:
+        """
+        config.yamlのlatencyセクションから遅延計測を作成
+
+        Args:
+            latency_config: 遅延計測の設定
+
+        Returns:
+            Optional[LatencyMonitor]: 遅延計測（enabled: false ならNone で、計測しない）
+        """
+        if not latency_config or not latency_config.get('enabled', False):
+            return None
+        return cls(window=latency_config.get('window_s', 10.0))
+
+    def record(self, stage: str, seconds: float):
+        """
+        段階の所要時間を記録
+
+        Args:
+            stage: 段階名（STAGES以外の名前も使える）
+            seconds: 所要時間（秒）
+        """
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram(self.window))
+        histogram.record(seconds)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        記録のある段階の統計を取得
+
+        Returns:
+            Dict[str, dict]: 段階名 → 件数・平均・p50 / p95 / p99（ミリ秒）
+        """
+        with self.lock:
+            histograms = list(self.histograms.items())
+        return {stage: histogram.get_stats() for stage, histogram in histograms if histogram.count}
+
+    def format_overlay(self) -> str:
+        """画面表示用の複数行テキスト（段階ごとの p50 / p95 / p99）"""
+        lines = []
+        for stage, stats in self.snapshot().items():
+            lines.append(f"{stage:16s} {stats['p50_ms']:6.1f} {stats['p95_ms']:6.1f} {stats['p99_ms']:6.1f} ms")
+        if not lines:
+            return ""
+        return f"{'stage':16s} {'p50':>6s} {'p95':>6s} {'p99':>6s}\n" + "\n".join(lines)
+
+    def to_json(self) -> str:
+        """JSON形式で出力"""
+        return json.dumps({"timestamp": time.time(), "stages": self.snapshot()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheusのテキスト形式（summary）で出力"""
+        name = "dialysis_stage_latency_seconds"
+        lines = [f"# HELP {name} Per-stage processing latency.", f"# TYPE {name} summary"]
+        for stage, stats in self.snapshot().items():
+            for ratio, key in zip(QUANTILES, ("p50_ms", "p95_ms", "p99_ms")):
+                lines.append(f'{name}{{stage="{stage}",quantile="{ratio}"}} {stats[key] / 1000.0:.6f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["avg_ms"] * stats["count"] / 1000.0:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+def record_recognizer_timings(monitor: Optional[LatencyMonitor], timings: dict):
+    """
+    認識クラスの last_timings を前処理・推論（後処理を含む）の段階として記録
+
+    Args:
+        monitor: 遅延計測（Noneなら何もしない）
+        timings: preprocess_ms、inference_ms、postprocess_ms を含む辞書
+    """
+    if monitor is None:
+        return
+    monitor.record("preprocess", timings["preprocess_ms"] / 1000.0)
+    monitor.record("inference", (timings["inference_ms"] + timings["postprocess_ms"]) / 1000.0)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """/metrics（Prometheus）と /metrics.json を返すHTTPハンドラー"""
+
+    monitor: LatencyMonitor = None
+
+    def do_GET(self):
+        if self.path == "/metrics.json":
+            body, content_type = self.monitor.to_json(), "application/json"
+        elif self.path == "/metrics":
+            body, content_type = self.monitor.to_prometheus(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # アクセスごとのログは出さない
+        pass
+
+
+class LatencyReporter:
+    """遅延計測の結果を一定間隔でファイルへ書き出し、またはHTTPで公開するクラス"""
+
+    def __init__(self, monitor: LatencyMonitor, path: str = "", interval: float = 5.0, port: int = 0,
+                 host: str = "127.0.0.1"):
+        """
+        出力の初期化
+
+        Args:
+            monitor: 遅延計測
+            path: 書き出し先（拡張子 .json ならJSON、それ以外はPrometheusのテキスト形式）、空で書き出さない
+            interval: 書き出し間隔（秒）
+            port: HTTPで公開するポート（0で公開しない）
+            host: HTTPで待ち受けるアドレス（既定はローカルのみ）
+        """
+        self.monitor = monitor
+        self.path = path
+        self.interval = interval
+        self.port = port
+        self.host = host
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    @classmethod
+    def from_config(cls, monitor: Optional[LatencyMonitor], latency_config: dict) -> Optional["LatencyReporter"]:
+        """
+        config.yamlのlatencyセクションから出力を作成（計測しない、または出力先がなければNone）
+
+        Args:
+            monitor: 遅延計測
+            latency_config: 遅延計測の設定
+        """
+        if monitor is None:
+            return None
+        path = latency_config.get('dump_path', '')
+        port = latency_config.get('http_port', 0)
+        if not path and not port:
+            return None
+        return cls(monitor, path=path, interval=latency_config.get('dump_interval_s', 5.0), port=port)
+
+    def start(self):
+        """書き出しスレッドとHTTPサーバーを開始"""
+        self._stop.clear()
+        if self.path:
+            thread = threading.Thread(target=self._dump_loop, name="latency-dump", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.port:
+            handler = type("MetricsHandler", (_MetricsHandler,), {"monitor": self.monitor})
+            self.server = ThreadingHTTPServer((self.host, self.port), handler)
+            thread = threading.Thread(target=self.server.serve_forever, name="latency-http", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            print(f"遅延計測を公開しました: http://{self.host}:{self.server.server_port}/metrics")
+
+    def stop(self):
+        """停止（最後に1回書き出す）"""
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+        if self.path:
+            self.dump()
+
+    def dump(self):
+        """現在の統計をファイルへ書き出す（書きかけのファイルを読まれないよう置き換える）"""
+        text = self.monitor.to_json() if self.path.endswith(".json") else self.monitor.to_prometheus()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, self.path)
+
+    def _dump_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"遅延計測の書き出しエラー: {e}")
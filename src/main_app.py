@@ -5,13 +5,68 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import cv2
+import numpy as np
 from PIL import Image, ImageTk
-import yaml
 import os
+import time
 from typing import Optional
 
 from src.camera_manager import CameraManager
+from src.config_service import ConfigService
+from src.frame_timing import RateMeter
+from src.latency_monitor import LatencyMonitor, LatencyReporter
 from src.medicine_selector import MedicineSelector, MedicineType
+from src.recognition_service import RecognitionService
+from src.safety_checker import SafetyChecker
+
+
+# 表示の更新間隔（ミリ秒）。新しいフレームがなければ何もしない
+DISPLAY_INTERVAL_MS = 15
+
+# 遅延の表示を更新する間隔（秒）
+LATENCY_OVERLAY_INTERVAL = 0.5
+
+# モデルの準備状況を確認する間隔（ミリ秒）
+MODEL_STATUS_INTERVAL_MS = 100
+
+MODEL_STATUS_TEXT = {
+    "loading": "認識モデルを読み込んでいます…",
+    "warming_up": "認識モデルを準備しています…",
+}
+
+
+class DisplayConverter:
+    """フレームを表示用のPIL Imageへ変換するクラス（変換先のバッファを使い回す）"""
+    
+    def __init__(self):
+        self.rgb_buffer: Optional[np.ndarray] = None
+        self.resize_buffer: Optional[np.ndarray] = None
+    
+    def convert(self, frame: np.ndarray, size: tuple) -> Image.Image:
+        """
+        BGRフレームを表示サイズのRGB画像に変換（サイズが同じならリサイズしない）
+        
+        Args:
+            frame: 表示するフレーム（BGR形式）
+            size: 表示サイズ (幅, 高さ)
+            
+        Returns:
+            Image.Image: 変換先のバッファを共有するPIL Image（次の変換で上書きされる）
+        """
+        if (frame.shape[1], frame.shape[0]) != size:
+            if self.resize_buffer is None or self.resize_buffer.shape[:2] != (size[1], size[0]):
+                self.resize_buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            # LANCZOSより十分軽く、表示用途では画質差がほぼない
+            cv2.resize(frame, size, dst=self.resize_buffer, interpolation=cv2.INTER_LINEAR)
+            frame = self.resize_buffer
+        
+        # BGRからRGBに変換（事前確保したバッファへ）
+        if self.rgb_buffer is None or self.rgb_buffer.shape[:2] != (size[1], size[0]):
+            self.rgb_buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        
+        # バッファを共有するPIL Imageを作る（コピーしない）
+        return Image.frombuffer('RGB', size, self.rgb_buffer, 'raw', 'RGB', 0, 1)
 
 
 class MainApplication:
@@ -24,8 +79,28 @@ class MainApplication:
         self.medicine_selector = MedicineSelector()
         self.is_camera_active = False
         
-        # 設定ファイルの読み込み
-        self.config = self.load_config()
+        # 表示パイプラインの状態（Tkスレッドだけが触る）
+        self.display_job = None
+        self.model_status_job = None
+        self.last_display_seq = 0
+        self.frames_displayed = 0
+        self.photo: Optional[ImageTk.PhotoImage] = None
+        self.display_converter = DisplayConverter()
+        self.display_rate = RateMeter()
+        self.capture_rate = RateMeter()
+        
+        # 設定ファイルの読み込み（変更は監視スレッドが反映する）
+        self.config_service = ConfigService()
+        self.config = self.config_service.load()
+        
+        # 処理段階ごとの遅延計測（無効ならNone）
+        latency_config = self.config.get('latency', {})
+        self.latency_monitor = LatencyMonitor.from_config(latency_config)
+        self.latency_reporter = LatencyReporter.from_config(self.latency_monitor, latency_config)
+        if self.latency_reporter is not None:
+            self.latency_reporter.start()
+        self.latency_label = None
+        self.last_overlay_update = 0.0
         
         # UIの初期化
         self.setup_ui()
@@ -33,25 +108,6 @@ class MainApplication:
         # カメラ管理の初期化
         self.setup_camera()
     
-    def load_config(self) -> dict:
-        """設定ファイルを読み込み"""
-        try:
-            with open('config.yaml', 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
-        except FileNotFoundError:
-            print("設定ファイルが見つかりません。デフォルト設定を使用します。")
-            return self.get_default_config()
-        except Exception as e:
-            print(f"設定ファイルの読み込みエラー: {e}")
-            return self.get_default_config()
-    
-    def get_default_config(self) -> dict:
-        """デフォルト設定を取得"""
-        return {
-            'camera': {'device_id': 0, 'width': 640, 'height': 480, 'fps': 30},
-            'ui': {'window_width': 800, 'window_height': 600, 'title': '透析供給装置薬液補充アプリ'}
-        }
-    
     def setup_ui(self):
         """UIのセットアップ"""
         # ウィンドウ設定
@@ -122,6 +178,19 @@ class MainApplication:
         self.camera_label = ttk.Label(camera_frame, text="カメラを起動してください", anchor="center")
         self.camera_label.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # 表示fpsと取得fps
+        self.fps_label = ttk.Label(camera_frame, text="", anchor="e")
+        self.fps_label.grid(row=1, column=0, sticky=(tk.E,))
+        
+        # モデルの準備状況（認識を開始したら空にする）
+        self.model_status_label = ttk.Label(camera_frame, text="", anchor="w")
+        self.model_status_label.grid(row=1, column=0, sticky=(tk.W,))
+        
+        # 段階ごとの遅延（デバッグ用、カメラ映像の左上に重ねる）
+        if self.latency_monitor is not None and self.config.get('latency', {}).get('overlay', False):
+            self.latency_label = tk.Label(camera_frame, text="", justify="left", anchor="nw",
+                                          font=("Courier", 9), bg="black", fg="#00ff00")
+        
         # グリッドの重み設定
         camera_frame.columnconfigure(0, weight=1)
         camera_frame.rowconfigure(0, weight=1)
@@ -148,17 +217,38 @@ class MainApplication:
         exit_btn.grid(row=0, column=1)
     
     def setup_camera(self):
-        """カメラ管理のセットアップ"""
-        camera_config = self.config['camera']
-        self.camera_manager = CameraManager(
-            device_id=camera_config['device_id'],
-            width=camera_config['width'],
-            height=camera_config['height'],
-            fps=camera_config['fps']
-        )
-        
-        # フレーム取得時のコールバックを設定
-        self.camera_manager.set_frame_callback(self.on_frame_received)
+        """カメラ管理と認識のセットアップ"""
+        self.safety_checker = SafetyChecker.from_config(self.config.get('safety', {}))
+        self.recognition = RecognitionService.from_config(self.config, safety_checker=self.safety_checker,
+                                                          latency_monitor=self.latency_monitor,
+                                                          medicine_selector=self.medicine_selector)
+        self.camera_manager = CameraManager.from_config(self.config['camera'],
+                                                        shared_memory=self.recognition.uses_processes,
+                                                        latency_monitor=self.latency_monitor)
+        # 薬液を選んでいる間にモデルの読み込みとウォームアップを済ませておく
+        if self.config.get('model', {}).get('preload', True):
+            self.recognition.preload((self.camera_manager.height, self.camera_manager.width, 3))
+        self.watch_config()
+    
+    def watch_config(self):
+        """設定ファイルの変更をカメラと認識へ反映（監視スレッドから呼ばれる）"""
+        self.config_service.subscribe('camera', self.on_camera_config_changed, keys=('fps', 'width', 'height'))
+        self.config_service.subscribe('model', self.recognition.update_model_config,
+                                      keys=('confidence_threshold', 'nms_threshold', 'warmup_iterations'))
+        self.config_service.subscribe('safety', self.on_safety_config_changed, keys=('min_confidence',))
+        reload_config = self.config.get('config_reload', {})
+        if reload_config.get('enabled', True):
+            self.config_service.start_watching(reload_config.get('interval_s', 1.0))
+    
+    def on_camera_config_changed(self, camera_config: dict, changes: dict) -> list:
+        """カメラのfps・解像度を変更（取得中ならカメラを開いたまま反映）"""
+        return self.camera_manager.reconfigure(fps=camera_config.get('fps'), width=camera_config.get('width'),
+                                               height=camera_config.get('height'))
+    
+    def on_safety_config_changed(self, safety_config: dict, changes: dict) -> list:
+        """安全確認に使う信頼度の下限を変更"""
+        self.safety_checker.min_confidence = safety_config.get('min_confidence', 0.3)
+        return [f"安全確認: min_confidence を {self.safety_checker.min_confidence} に変更"]
     
     def on_medicine_selected(self):
         """薬液選択時の処理"""
@@ -180,6 +270,7 @@ class MainApplication:
             return
         
         selected_medicine = self.medicine_selector.get_selected_medicine_name()
+        self.safety_checker.start_session(self.medicine_selector.get_selected_medicine())
         messagebox.showinfo("補充開始", f"{selected_medicine}の補充を開始します")
         print(f"補充開始: {selected_medicine}")
     
@@ -197,44 +288,115 @@ class MainApplication:
             return
         
         if self.camera_manager.start_camera():
+            self.attach_recognition()
             self.is_camera_active = True
             self.camera_btn.config(text="カメラ停止")
+            self.start_display()
             print("カメラを起動しました")
         else:
             messagebox.showerror("エラー", "カメラの起動に失敗しました")
     
+    def attach_recognition(self):
+        """先読みしたモデルで認識を開始（読み込み中なら準備状況を表示して終わるのを待つ）"""
+        self.model_status_job = None
+        # attachは待たずに返す（未読み込みならバックグラウンドで読み込みを始める）
+        if not self.recognition.attach(self.camera_manager) and self.recognition.is_loading:
+            self.model_status_label.config(text=MODEL_STATUS_TEXT.get(self.recognition.load_state, ""))
+            self.model_status_job = self.root.after(MODEL_STATUS_INTERVAL_MS, self.attach_recognition)
+            return
+        self.model_status_label.config(text="")
+    
     def stop_camera(self):
         """カメラを停止"""
+        self.stop_display()
+        if self.model_status_job is not None:
+            self.root.after_cancel(self.model_status_job)
+            self.model_status_job = None
+            self.model_status_label.config(text="")
+        # 認識を先に止めてからカメラ（共有メモリ）を停止する
+        self.recognition.detach()
         self.camera_manager.stop_camera()
         self.is_camera_active = False
         self.camera_btn.config(text="カメラ起動")
         self.camera_label.config(image="", text="カメラを停止しました")
+        self.fps_label.config(text="")
+        if self.latency_label is not None:
+            self.latency_label.place_forget()
         print("カメラを停止しました")
     
-    def on_frame_received(self, frame):
-        """フレーム受信時の処理"""
-        # BGRからRGBに変換
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def start_display(self):
+        """Tkスレッドでの表示ループを開始"""
+        self.last_display_seq = self.camera_manager.frame_seq
+        if self.display_job is None:
+            self.display_job = self.root.after(0, self.render_frame)
+    
+    def stop_display(self):
+        """表示ループを停止"""
+        if self.display_job is not None:
+            self.root.after_cancel(self.display_job)
+            self.display_job = None
+    
+    def render_frame(self):
+        """最新フレームだけを表示（Tkスレッドで実行、途中のフレームは捨てる）"""
+        self.display_job = self.root.after(DISPLAY_INTERVAL_MS, self.render_frame)
         
-        # PIL Imageに変換
-        image = Image.fromarray(frame_rgb)
+        ref = self.camera_manager.acquire_frame(self.last_display_seq)
+        if ref is None:
+            return
+        start = time.monotonic()
+        with ref:
+            self.last_display_seq = ref.seq
+            self.show_frame(ref.frame)
+            timestamp = ref.timestamp
+        self.frames_displayed += 1
+        if self.latency_monitor is not None:
+            now = time.monotonic()
+            self.latency_monitor.record("display", now - start)
+            self.latency_monitor.record("frame_to_display", now - timestamp)
+            self.update_latency_overlay(now)
         
-        # 表示用にリサイズ
-        display_width = 640
-        display_height = 480
-        image = image.resize((display_width, display_height), Image.Resampling.LANCZOS)
+        display_fps = self.display_rate.update(self.frames_displayed)
+        capture_fps = self.capture_rate.update(self.camera_manager.frame_seq)
+        self.fps_label.config(text=f"表示 {display_fps:.1f} fps / 取得 {capture_fps:.1f} fps")
+    
+    def update_latency_overlay(self, now: float):
+        """段階ごとの遅延と現在の判定の表示を一定間隔で更新"""
+        if self.latency_label is None or now - self.last_overlay_update < LATENCY_OVERLAY_INTERVAL:
+            return
+        self.last_overlay_update = now
+        text = self.latency_monitor.format_overlay()
+        verdict = self.safety_checker.get_verdict()
+        self.latency_label.config(text=f"{text}\nverdict: {verdict.name}" if text else f"verdict: {verdict.name}")
+        if not self.latency_label.winfo_ismapped():
+            self.latency_label.place(in_=self.camera_label, x=4, y=4)
+    
+    def show_frame(self, frame: np.ndarray):
+        """
+        フレームを表示用に変換してPhotoImageへ貼り付け
         
-        # Tkinter用の画像に変換
-        photo = ImageTk.PhotoImage(image)
+        変換先のバッファとPhotoImageは使い回し、サイズが同じならリサイズしない。
+        """
+        ui_config = self.config['ui']
+        size = (ui_config.get('display_width', 640), ui_config.get('display_height', 480))
+        image = self.display_converter.convert(frame, size)
         
-        # ラベルに画像を設定
-        self.camera_label.config(image=photo, text="")
-        self.camera_label.image = photo  # 参照を保持
+        # 既存のPhotoImageへ貼り付ける
+        if self.photo is None or (self.photo.width(), self.photo.height()) != size:
+            self.photo = ImageTk.PhotoImage(image)
+            self.camera_label.config(image=self.photo, text="")
+        else:
+            self.photo.paste(image)
+            if not self.camera_label.cget('image'):
+                self.camera_label.config(image=self.photo, text="")
     
     def on_closing(self):
         """アプリケーション終了時の処理"""
+        self.config_service.stop()
         if self.is_camera_active:
             self.stop_camera()
+        self.recognition.shutdown()
+        if self.latency_reporter is not None:
+            self.latency_reporter.stop()
         self.root.quit()
         self.root.destroy()
     
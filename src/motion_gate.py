@@ -0,0 +1,154 @@
+"""
+動き検出ゲート
+小さなグレースケール画像で背景（移動平均）との差分をとり、画面に変化がない間は認識を止める
+
+勤務時間の大半、カメラは変化のない補充台を映しているだけなので、毎フレーム認識する必要はない。
+動きが検出されたら cooldown 秒のあいだ認識を続け、その後は動きがあるまで前回の判定結果を使い続ける。
+"""
+
+from typing import Optional
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """背景差分による動き検出ゲート"""
+
+    def __init__(self, analysis_width: int = 64, pixel_threshold: int = 20, motion_ratio: float = 0.01,
+                 background_alpha: float = 0.05, cooldown: float = 2.0):
+        """
+        動き検出ゲートの初期化
+
+        Args:
+            analysis_width: 判定に使う縮小画像の幅
+            pixel_threshold: 変化とみなす画素値の差（0〜255）
+            motion_ratio: 動きありとみなす変化画素の割合
+            background_alpha: 背景の移動平均の重み（照明のゆっくりした変化に追従する）
+            cooldown: 最後に動きを検出してから認識を続ける時間（秒）
+        """
+        self.analysis_width = analysis_width
+        self.pixel_threshold = pixel_threshold
+        self.motion_ratio = motion_ratio
+        self.background_alpha = background_alpha
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+
+        self._small: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._background: Optional[np.ndarray] = None
+        self._background_u8: Optional[np.ndarray] = None
+        self._diff: Optional[np.ndarray] = None
+        self.last_motion: Optional[float] = None
+        self.last_ratio = 0.0
+
+        self.frames = 0
+        self.frames_passed = 0
+        self.frames_gated = 0
+        self.motion_events = 0
+        self.motion_active = False
+
+    @classmethod
+    def from_config(cls, motion_config: dict) -> Optional["MotionGate"]:
+        """
+        config.yamlのmotionセクションから動き検出ゲートを作成
+
+        Args:
+            motion_config: 動き検出設定
+
+        Returns:
+            MotionGate: 動き検出ゲート、enabled: falseの場合はNone
+        """
+        if not motion_config.get('enabled', True):
+            return None
+        return cls(
+            analysis_width=motion_config.get('analysis_width', 64),
+            pixel_threshold=motion_config.get('pixel_threshold', 20),
+            motion_ratio=motion_config.get('motion_ratio', 0.01),
+            background_alpha=motion_config.get('background_alpha', 0.05),
+            cooldown=motion_config.get('cooldown', 2.0),
+        )
+
+    def _to_gray(self, frame: np.ndarray) -> np.ndarray:
+        """フレームを縮小してグレースケールに変換（バッファはサイズが変わったときだけ確保）"""
+        height, width = frame.shape[:2]
+        small_width = min(self.analysis_width, width)
+        small_height = max(1, int(round(height * small_width / width)))
+        if self._gray is None or self._gray.shape != (small_height, small_width):
+            self._small = np.empty((small_height, small_width, 3), dtype=np.uint8)
+            self._gray = np.empty((small_height, small_width), dtype=np.uint8)
+            self._background_u8 = np.empty_like(self._gray)
+            self._diff = np.empty_like(self._gray)
+            self._background = None
+
+        cv2.resize(frame, (small_width, small_height), dst=self._small, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    def update(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """
+        フレームを背景と比較し、認識を実行すべきかを返す
+
+        Args:
+            frame: 入力フレーム（BGR形式）
+            timestamp: フレーム取得時刻（time.monotonic()）、Noneで現在時刻
+
+        Returns:
+            bool: 認識を実行する場合True（動きがある、またはcooldown中）
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        with self.lock:
+            gray = self._to_gray(frame)
+            if self._background is None:
+                # 最初のフレームは背景にして、前回の判定がないので認識する
+                self._background = gray.astype(np.float32)
+                self.last_ratio = 1.0
+                motion = True
+            else:
+                cv2.convertScaleAbs(self._background, dst=self._background_u8)
+                cv2.absdiff(gray, self._background_u8, dst=self._diff)
+                cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+                self.last_ratio = cv2.countNonZero(self._diff) / self._diff.size
+                motion = self.last_ratio >= self.motion_ratio
+                cv2.accumulateWeighted(gray, self._background, self.background_alpha)
+
+            if motion:
+                if not self.motion_active:
+                    self.motion_events += 1
+                self.motion_active = True
+                self.last_motion = now
+            else:
+                self.motion_active = False
+
+            passed = self.last_motion is not None and now - self.last_motion <= self.cooldown
+            self.frames += 1
+            if passed:
+                self.frames_passed += 1
+            else:
+                self.frames_gated += 1
+            return passed
+
+    def reset(self):
+        """背景を破棄（次のフレームから作り直す）"""
+        with self.lock:
+            self._background = None
+            self.last_motion = None
+            self.motion_active = False
+
+    def get_stats(self) -> dict:
+        """
+        ゲートの統計を取得
+
+        Returns:
+            dict: 通過・抑止したフレーム数、動きの検出回数、直近の変化画素の割合
+        """
+        with self.lock:
+            return {
+                "frames": self.frames,
+                "frames_passed": self.frames_passed,
+                "frames_gated": self.frames_gated,
+                "gated_ratio": self.frames_gated / self.frames if self.frames else 0.0,
+                "motion_events": self.motion_events,
+                "last_motion_ratio": self.last_ratio,
+            }
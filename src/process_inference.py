@@ -0,0 +1,316 @@
+"""
+プロセス並列の画像認識
+認識をワーカープロセスで実行し、アプリのプロセス（UI・カメラ取得）とGILを奪い合わないようにする
+
+- フレームは共有メモリで渡す。CameraManager(shared_memory=True) のリングのスロットはそのまま参照し、
+  それ以外のフレームはワーカーごとの共有メモリの入力バッファへ1回コピーする（pickleしない）
+- ワーカーからは検出結果の配列（座標・信頼度・クラスID）だけを返す
+- 1回の呼び出しが1つのワーカーを使うので、InferencePipelineの認識ワーカー数をプロセス数と同じにして使う
+"""
+
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+import multiprocessing
+import queue
+import threading
+
+import numpy as np
+
+from src.latency_monitor import record_recognizer_timings
+from src.recognizer.detection import DEFAULT_CLASS_NAMES
+from src.recognizer.errors import ModelLoadError, RecognitionError
+from src.recognizer.postprocess import DetectionBatch
+
+
+# ワーカーの起動（モデル読み込み）を待つ時間（秒）
+DEFAULT_START_TIMEOUT = 60.0
+
+# 停止要求からワーカーの終了を待つ時間（秒）
+DEFAULT_STOP_TIMEOUT = 2.0
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """作成済みの共有メモリに接続"""
+    return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(conn, model_config: dict, warmup_iterations: int = 0, warmup_shape: tuple = (480, 640, 3)):
+    """
+    ワーカープロセスの本体
+
+    モデルを読み込んでウォームアップしてから "ready" を返す。
+    (共有メモリ名, オフセット, 形状) を受け取って認識し、検出結果の配列を返す。
+    閾値の辞書を受け取ると AIRecognizer.set_thresholds で反映して ("ok",) を返す。Noneで終了する。
+    """
+    from src.recognizer.ai_recognizer import AIRecognizer
+
+    try:
+        recognizer = AIRecognizer.from_config(model_config)
+        if warmup_iterations > 0:
+            recognizer.warmup(warmup_iterations, warmup_shape)
+    except Exception as e:
+        conn.send(("error", str(e)))
+        conn.close()
+        return
+    conn.send(("ready", recognizer.model.name))
+
+    attached: Dict[str, shared_memory.SharedMemory] = {}
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+            if isinstance(task, dict):
+                recognizer.set_thresholds(**task)
+                conn.send(("ok",))
+                continue
+
+            name, offset, shape = task
+            shm = attached.get(name)
+            if shm is None:
+                # カメラを再起動するとリングの共有メモリも作り直されるので、使わなくなった接続は閉じる
+                if len(attached) >= 2:
+                    for old in list(attached):
+                        attached.pop(old).close()
+                shm = attached[name] = _attach(name)
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            frame.flags.writeable = False
+            try:
+                batch = recognizer.detect_batch(frame)
+                conn.send(("ok", batch.boxes, batch.scores, batch.class_ids, recognizer.last_timings))
+            except Exception as e:
+                conn.send(("error", str(e)))
+            del frame
+    finally:
+        for shm in attached.values():
+            shm.close()
+        conn.close()
+
+
+class _Worker:
+    """ワーカープロセス1つ分の接続と入力バッファ"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.input: Optional[shared_memory.SharedMemory] = None
+        self.input_view: Optional[np.ndarray] = None
+
+    def input_buffer(self, shape: tuple) -> np.ndarray:
+        """リング外のフレーム用の入力バッファ（形状が変わったときだけ作り直す）"""
+        if self.input_view is None or self.input_view.shape != shape:
+            self.release_input()
+            self.input = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+            self.input_view = np.ndarray(shape, dtype=np.uint8, buffer=self.input.buf)
+        return self.input_view
+
+    def release_input(self):
+        """入力バッファを削除"""
+        if self.input is not None:
+            self.input_view = None
+            self.input.close()
+            self.input.unlink()
+            self.input = None
+
+
+class ProcessRecognizer:
+    """認識をワーカープロセスで実行するクラス（AIRecognizer.detect_batchと同じ呼び出し方）"""
+
+    def __init__(self, model_config: dict, num_processes: int = 1, camera_manager=None,
+                 start_timeout: float = DEFAULT_START_TIMEOUT, warmup_iterations: int = 0,
+                 warmup_shape: tuple = (480, 640, 3)):
+        """
+        プロセス並列認識の初期化（start()でワーカーを起動する）
+
+        Args:
+            model_config: config.yamlのmodelセクション（各ワーカーがAIRecognizer.from_configで読み込む）
+            num_processes: ワーカープロセス数
+            camera_manager: フレームの取得元（共有メモリのリングならスロットを直接渡す）
+            start_timeout: ワーカーの起動を待つ時間（秒）
+            warmup_iterations: 各ワーカーが起動時にダミーフレームで推論する回数
+            warmup_shape: ウォームアップのダミーフレームの形状（カメラと同じ (高さ, 幅, 3)）
+        """
+        self.model_config = dict(model_config)
+        self.class_names = list(model_config.get('class_names') or DEFAULT_CLASS_NAMES)
+        self.num_processes = max(1, num_processes)
+        self.camera_manager = camera_manager
+        self.start_timeout = start_timeout
+        self.warmup_iterations = warmup_iterations
+        self.warmup_shape = tuple(warmup_shape)
+        self.backend_name = ""
+        self.workers: List[_Worker] = []
+        self.idle: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.last_timings = {"preprocess_ms": 0.0, "inference_ms": 0.0, "postprocess_ms": 0.0, "total_ms": 0.0}
+        self.frames_shared = 0
+        self.frames_copied = 0
+        # 段階ごとの所要時間の記録先（LatencyMonitor、任意）。ワーカーで計った時間を記録する
+        self.latency_monitor = None
+
+    @classmethod
+    def from_config(cls, model_config: dict, pipeline_config: dict, **kwargs) -> "ProcessRecognizer":
+        """
+        config.yamlのmodel・pipelineセクションからプロセス並列認識を作成
+
+        Args:
+            model_config: モデル設定
+            pipeline_config: パイプライン設定（num_processes）
+            **kwargs: 追加の引数（camera_managerなど）
+        """
+        return cls(model_config, num_processes=pipeline_config.get('num_processes', 1), **kwargs)
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.workers)
+
+    def start(self):
+        """
+        ワーカープロセスを起動し、全ワーカーのモデル読み込み（とウォームアップ）を待つ
+
+        Raises:
+            ModelLoadError: ワーカーがモデルを読み込めない、または起動が間に合わない場合
+        """
+        if self.workers:
+            return
+        # fork後のスレッド・GLコンテキストの不整合を避けるため、常にspawnで起動する
+        context = multiprocessing.get_context("spawn")
+        for index in range(self.num_processes):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_main,
+                                      args=(child_conn, self.model_config, self.warmup_iterations, self.warmup_shape),
+                                      name=f"inference-process-{index}", daemon=True)
+            process.start()
+            child_conn.close()
+            self.workers.append(_Worker(process, parent_conn))
+
+        for worker in self.workers:
+            if not worker.conn.poll(self.start_timeout):
+                self.close()
+                raise ModelLoadError("認識ワーカープロセスの起動がタイムアウトしました")
+            status, detail = worker.conn.recv()
+            if status != "ready":
+                self.close()
+                raise ModelLoadError(f"認識ワーカープロセスでモデルを読み込めませんでした: {detail}")
+            self.backend_name = detail
+            self.idle.put(worker)
+        print(f"認識ワーカープロセスを起動しました（{self.num_processes}プロセス, バックエンド: {self.backend_name}）")
+
+    def close(self, timeout: float = DEFAULT_STOP_TIMEOUT):
+        """ワーカープロセスを停止して共有メモリを解放（複数回呼んでも安全）"""
+        with self.lock:
+            workers, self.workers = self.workers, []
+        if not workers:
+            return
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(timeout)
+            worker.conn.close()
+            worker.release_input()
+        self.idle = queue.Queue()
+        print("認識ワーカープロセスを停止しました")
+
+    def _locate(self, frame: np.ndarray):
+        """フレームが共有メモリのリングのスロットなら (共有メモリ名, オフセット) を返す"""
+        ring = getattr(self.camera_manager, "frame_ring", None)
+        locate = getattr(ring, "locate", None)
+        return locate(frame) if locate is not None else None
+
+    def detect_batch(self, frame: np.ndarray) -> DetectionBatch:
+        """
+        空いているワーカープロセスで物体検出を実行
+
+        Args:
+            frame: 入力フレーム（BGR形式、uint8）
+
+        Returns:
+            DetectionBatch: 信頼度の高い順の検出結果
+
+        Raises:
+            RecognitionError: ワーカーが起動していない、または推論に失敗した場合
+        """
+        if frame is None or frame.ndim != 3 or frame.dtype != np.uint8:
+            raise RecognitionError("入力フレームが不正です")
+        if not self.workers:
+            raise RecognitionError("認識ワーカープロセスが起動していません")
+
+        worker = self.idle.get()
+        try:
+            location = self._locate(frame)
+            if location is not None:
+                name, offset = location
+                with self.lock:
+                    self.frames_shared += 1
+            else:
+                np.copyto(worker.input_buffer(frame.shape), frame)
+                name, offset = worker.input.name, 0
+                with self.lock:
+                    self.frames_copied += 1
+            try:
+                worker.conn.send((name, offset, frame.shape))
+                reply = worker.conn.recv()
+            except (EOFError, BrokenPipeError, OSError) as e:
+                raise RecognitionError(f"認識ワーカープロセスとの通信に失敗しました: {e}")
+        finally:
+            self.idle.put(worker)
+
+        if reply[0] != "ok":
+            raise RecognitionError(f"推論エラー: {reply[1]}")
+        _, boxes, scores, class_ids, timings = reply
+        self.last_timings = timings
+        record_recognizer_timings(self.latency_monitor, timings)
+        return DetectionBatch(boxes, scores, class_ids, self.class_names)
+
+    __call__ = detect_batch
+
+    def set_thresholds(self, confidence_threshold: Optional[float] = None, nms_threshold: Optional[float] = None):
+        """
+        全ワーカーの信頼度・NMSの閾値を変更（認識中のワーカーはそのフレームの後に反映する）
+
+        Args:
+            confidence_threshold: 検出とみなす信頼度の下限（Noneで変更しない）
+            nms_threshold: NMSのIoU閾値（Noneで変更しない）
+
+        Raises:
+            RecognitionError: ワーカーとの通信に失敗した場合
+        """
+        thresholds = {"confidence_threshold": confidence_threshold, "nms_threshold": nms_threshold}
+        thresholds = {key: value for key, value in thresholds.items() if value is not None}
+        # 後から起動するワーカーも同じ閾値で読み込む
+        self.model_config.update(thresholds)
+        if not thresholds:
+            return
+        # 空いたワーカーを1つずつ取り出して送る（認識の要求と同じ接続を使うので、取り出している間は他に使われない）
+        workers = [self.idle.get() for _ in range(len(self.workers))]
+        try:
+            for worker in workers:
+                worker.conn.send(thresholds)
+                worker.conn.recv()
+        except (EOFError, BrokenPipeError, OSError) as e:
+            raise RecognitionError(f"認識ワーカープロセスとの通信に失敗しました: {e}")
+        finally:
+            for worker in workers:
+                self.idle.put(worker)
+
+    def get_stats(self) -> dict:
+        """
+        フレームの受け渡し統計を取得
+
+        Returns:
+            dict: プロセス数、共有メモリのスロットをそのまま渡したフレーム数、入力バッファへコピーしたフレーム数
+        """
+        with self.lock:
+            return {
+                "num_processes": self.num_processes,
+                "frames_shared": self.frames_shared,
+                "frames_copied": self.frames_copied,
+            }
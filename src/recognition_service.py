@@ -0,0 +1,326 @@
+"""
+認識サービス
+画面（Kivy / Tk）からカメラに認識パイプラインをつなぎ、認識をスレッドまたはワーカープロセスで実行する
+
+pipeline.mode が "process" の場合はワーカープロセスを一度だけ起動してカメラの開始・停止をまたいで使い回し、
+アプリ終了時（shutdown）に停止する。カメラは shared_memory=True で作るとフレームをコピーせずに渡せる。
+安全確認（SafetyChecker）を渡すと、認識結果ごとに判定を更新する。
+motion.enabled のときは動き検出ゲートをつなぎ、画面に変化がない間は認識を止める。
+tape.enabled のときは色付きテープの判定（CascadeRecognizer）を先に行い、テープの色が直近のYOLOの結果と
+一致しないフレーム・判定が曖昧なフレームだけYOLOを実行する。
+tracking.enabled のときはYOLOをキーフレームでだけ実行し、間のフレームは追跡（TrackingRecognizer）で補う。
+
+最初の推論はグラフ最適化・スレッドプールの起動・重みのページフォルトで遅いため、preload() で
+薬液選択画面の表示中にモデルの読み込みとダミーフレームでのウォームアップをバックグラウンドで済ませておける。
+attach() はUIスレッドを止めない。モデルの準備ができていなければFalseを返し（先読みしていなければここで
+バックグラウンドの読み込みを始める）、画面は is_loading / load_state で進み具合を表示して、
+読み込みが終わったら attach() を呼び直す。
+信頼度・NMSの閾値は update_model_config() でモデルを読み込み直さずに変更できる。
+"""
+
+from typing import Any, List, Optional, Tuple
+import threading
+import time
+
+from src.inference_pipeline import InferencePipeline, PipelineResult
+from src.medicine_selector import MedicineSelector
+from src.motion_gate import MotionGate
+from src.recognizer.cascade import CascadeRecognizer, CascadeResult
+from src.recognizer.tracker import TrackingRecognizer
+
+
+# 読み込み済みのモデルへそのまま反映できる設定（config.yamlのmodelセクション）
+THRESHOLD_KEYS = ("confidence_threshold", "nms_threshold")
+
+# 終了時に読み込みの完了を待つ時間（秒、ワーカープロセスの起動は最大60秒かかるためUIスレッドで待ち切らない）
+LOAD_JOIN_TIMEOUT = 1.0
+
+
+class RecognitionService:
+    """カメラと認識処理をつなぐクラス"""
+
+    def __init__(self, model_config: dict, pipeline_config: dict, safety_checker=None, latency_monitor=None,
+                 motion_config: Optional[dict] = None, tape_config: Optional[dict] = None,
+                 tracking_config: Optional[dict] = None, medicine_selector: Optional[MedicineSelector] = None):
+        """
+        認識サービスの初期化（モデルはpreloadまたは最初のattachで読み込む）
+
+        Args:
+            model_config: config.yamlのmodelセクション
+            pipeline_config: config.yamlのpipelineセクション
+            safety_checker: 認識結果で判定を更新する安全確認（SafetyChecker、任意）
+            latency_monitor: 前処理・推論・判定などの所要時間の記録先（LatencyMonitor、任意）
+            motion_config: config.yamlのmotionセクション（attachのたびに動き検出ゲートを作る）
+            tape_config: config.yamlのtapeセクション（enabled: true でテープ判定を先に行う、省略時は使わない）
+            tracking_config: config.yamlのtrackingセクション（enabled: true で検出器を追跡で間引く、省略時は使わない）
+            medicine_selector: 選択中の薬液の参照先（テープ判定の照合用、画面のMedicineSelector）
+        """
+        self.model_config = model_config or {}
+        self.pipeline_config = pipeline_config or {}
+        self.motion_config = motion_config or {}
+        self.tape_config = tape_config or {}
+        self.tracking_config = tracking_config or {}
+        self.medicine_selector = medicine_selector or MedicineSelector()
+        self.mode = self.pipeline_config.get('mode', 'thread')
+        self.safety_checker = safety_checker
+        self.latency_monitor = latency_monitor
+        self.recognizer: Optional[Any] = None
+        self.pipeline: Optional[InferencePipeline] = None
+        self.cascade: Optional[CascadeRecognizer] = None
+        self.tracking: Optional[TrackingRecognizer] = None
+        # 先読みで行うダミーフレームでの推論回数（model.warmup_iterations）
+        self.warmup_iterations = self.model_config.get('warmup_iterations', 3)
+        # idle / loading / warming_up / ready / failed
+        self.load_state = "idle"
+        self.load_times = {"load_ms": 0.0, "warmup_ms": 0.0}
+        self.load_lock = threading.Lock()
+        self.load_thread: Optional[threading.Thread] = None
+        # shutdownのたびに増やし、終了前に始まった読み込みの結果を捨てる
+        self.load_generation = 0
+
+    @classmethod
+    def from_config(cls, config: dict, **kwargs) -> "RecognitionService":
+        """
+        config.yaml全体から認識サービスを作成
+
+        Args:
+            config: 設定（model・pipeline・motion・tape・trackingセクションを使う）
+            **kwargs: 追加の引数（safety_checker、latency_monitor、medicine_selectorなど）
+        """
+        return cls(config.get('model', {}), config.get('pipeline', {}), motion_config=config.get('motion', {}),
+                   tape_config=config.get('tape', {}), tracking_config=config.get('tracking', {}), **kwargs)
+
+    @property
+    def uses_processes(self) -> bool:
+        """ワーカープロセスで認識するか（カメラを共有メモリで作るかの判定に使う）"""
+        return self.mode == 'process'
+
+    @property
+    def is_loading(self) -> bool:
+        """先読み（モデルの読み込み・ウォームアップ）の途中か"""
+        thread = self.load_thread
+        return thread is not None and thread.is_alive()
+
+    @property
+    def is_ready(self) -> bool:
+        """モデルの読み込みが済んでいるか"""
+        return self.recognizer is not None
+
+    def get_load_status(self) -> dict:
+        """
+        モデルの準備状況を取得
+
+        Returns:
+            dict: 状態（idle / loading / warming_up / ready / failed）、読み込み・ウォームアップの時間（ミリ秒）
+        """
+        return {"state": self.load_state, **self.load_times}
+
+    def preload(self, frame_shape: Tuple[int, int, int] = (480, 640, 3)):
+        """
+        モデルの読み込みとウォームアップをバックグラウンドで開始（読み込み済み・読み込み中なら何もしない）
+
+        Args:
+            frame_shape: ウォームアップのダミーフレームの形状（カメラと同じ (高さ, 幅, 3)）
+        """
+        self._start_load(frame_shape, self.warmup_iterations)
+
+    def _start_load(self, frame_shape: Tuple[int, int, int], warmup_iterations: int):
+        """読み込みスレッドを開始（読み込み済み・読み込み中なら何もしない）"""
+        with self.load_lock:
+            if self.recognizer is not None or self.is_loading:
+                return
+            self.load_state = "loading"
+            self.load_thread = threading.Thread(target=self._load,
+                                                args=(None, frame_shape, warmup_iterations, self.load_generation),
+                                                name="model-preload", daemon=True)
+            self.load_thread.start()
+
+    def _load(self, camera_manager, frame_shape: Tuple[int, int, int], warmup_iterations: int,
+              generation: int) -> bool:
+        """認識クラスを読み込んでウォームアップ（読み込めなければFalse）"""
+        self.load_state = "loading"
+        start = time.perf_counter()
+        warmup_ms = 0.0
+        recognizer = None
+        try:
+            if self.uses_processes:
+                from src.process_inference import ProcessRecognizer
+                # ワーカープロセスは起動時にウォームアップしてから準備完了を返す
+                recognizer = ProcessRecognizer.from_config(self.model_config, self.pipeline_config,
+                                                           camera_manager=camera_manager,
+                                                           warmup_iterations=warmup_iterations,
+                                                           warmup_shape=frame_shape)
+                recognizer.start()
+            else:
+                from src.recognizer.ai_recognizer import AIRecognizer
+                recognizer = AIRecognizer.from_config(self.model_config)
+                if warmup_iterations > 0:
+                    self.load_state = "warming_up"
+                    warmup_ms = sum(recognizer.warmup(warmup_iterations, frame_shape))
+        except Exception as e:
+            # 読み込みエラー（ModelLoadError）だけでなく、ウォームアップの推論エラー（RecognitionError）や
+            # 出力形状の不一致も、ワーカープロセスの起動失敗と同じく認識を無効にする
+            print(f"認識を無効にします: {e}")
+            _close(recognizer)
+            if generation == self.load_generation:
+                self.load_state = "failed"
+            return False
+
+        with self.load_lock:
+            if generation != self.load_generation:
+                # 読み込み中にshutdownされた
+                _close(recognizer)
+                return False
+            # 読み込み中に変わった閾値を反映してから公開する
+            thresholds = {key: self.model_config[key] for key in THRESHOLD_KEYS if key in self.model_config}
+            if thresholds:
+                recognizer.set_thresholds(**thresholds)
+            self.load_times = {"load_ms": 1000.0 * (time.perf_counter() - start) - warmup_ms,
+                               "warmup_ms": warmup_ms}
+            recognizer.latency_monitor = self.latency_monitor
+            self.recognizer = recognizer
+            self.load_state = "ready"
+        if warmup_iterations > 0:
+            print(f"認識モデルの準備ができました（読み込み {self.load_times['load_ms']:.0f} ms, "
+                  f"ウォームアップ {warmup_iterations}回）")
+        return True
+
+    def _ensure_recognizer(self, camera_manager) -> bool:
+        """
+        認識クラスを用意（待たずに返す）
+
+        Returns:
+            bool: 準備ができていればTrue（読み込み中・読み込みに失敗した場合はFalse）
+        """
+        if self.is_loading:
+            return False
+        if self.recognizer is not None:
+            if self.uses_processes:
+                self.recognizer.camera_manager = camera_manager
+            return True
+        # 読み込みに失敗したモデルはshutdownまで読み込み直さない
+        if self.load_state == "failed":
+            return False
+        # 先読みしていなければここで読み込みを始める（すぐに実際のフレームで推論するのでウォームアップはしない）
+        self._start_load((camera_manager.height, camera_manager.width, 3), 0)
+        return False
+
+    def attach(self, camera_manager) -> bool:
+        """
+        起動済みのカメラに認識パイプラインをつないで開始
+
+        Args:
+            camera_manager: フレームの取得元（CameraManager）
+
+        Returns:
+            bool: 認識を開始した場合True（モデルの読み込み中・読み込めない場合はFalseで、プレビューだけ続ける。
+                  読み込み中なら is_loading がFalseになってから呼び直す）
+        """
+        self.detach()
+        if not self._ensure_recognizer(camera_manager):
+            return False
+        config = dict(self.pipeline_config)
+        if self.uses_processes:
+            # 1つの認識ワーカースレッドが1つのワーカープロセスを使う
+            config['num_workers'] = self.recognizer.num_processes
+        # 背景はカメラごとに作り直す
+        motion_gate = MotionGate.from_config(self.motion_config)
+        self.pipeline = InferencePipeline.from_config(camera_manager, self._build_process(), config,
+                                                      result_callback=self._on_result, motion_gate=motion_gate,
+                                                      latency_monitor=self.latency_monitor)
+        self.pipeline.start()
+        return True
+
+    def _build_process(self):
+        """1フレームを認識する関数（テープ判定 → 追跡付きの検出器、設定で無効な段は省く）"""
+        detector = self.recognizer
+        # 追跡はカメラごとに作り直す（前のカメラの物体を引き継がない）
+        self.tracking = None
+        if self.tracking_config.get('enabled', False):
+            detector = self.tracking = TrackingRecognizer.from_config(detector, self.tracking_config)
+        self.cascade = None
+        if self.tape_config.get('enabled', False):
+            self.cascade = CascadeRecognizer.from_config(self.tape_config, self.medicine_selector, detector)
+            return self.cascade.check
+        return detector.detect_batch
+
+    def _on_result(self, result: PipelineResult):
+        """認識結果で安全確認の判定を更新（認識ワーカースレッドから呼ばれる）"""
+        if self.safety_checker is None:
+            return
+        start = time.monotonic()
+        if isinstance(result.result, CascadeResult):
+            cascade_result = result.result
+            if cascade_result.source == "tape":
+                # テープの色の面積・2番目の色との差から求めた信頼度で重み付けする
+                self.safety_checker.update(cascade_result.medicine, cascade_result.tape.confidence,
+                                           result.timestamp)
+            elif cascade_result.detections is not None:
+                self.safety_checker.update_from_detections(cascade_result.detections, result.timestamp)
+        else:
+            self.safety_checker.update_from_detections(result.result, result.timestamp)
+        if self.latency_monitor is not None:
+            self.latency_monitor.record("decision", time.monotonic() - start)
+
+    def detach(self):
+        """認識パイプラインを停止（カメラを止める前に呼ぶ、ワーカープロセスは残す）"""
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+
+    def shutdown(self):
+        """
+        認識パイプラインとワーカープロセスを停止（アプリ終了時に呼ぶ）
+
+        読み込み中なら LOAD_JOIN_TIMEOUT 秒だけ待ち、終わらなければ読み込みスレッドが完了時に結果を破棄する。
+        """
+        self.detach()
+        thread = self.load_thread
+        if thread is not None:
+            thread.join(timeout=LOAD_JOIN_TIMEOUT)
+            self.load_thread = None
+        with self.load_lock:
+            self.load_generation += 1
+            recognizer, self.recognizer = self.recognizer, None
+            self.load_state = "idle"
+        _close(recognizer)
+
+    def update_model_config(self, model_config: dict, changes: dict) -> List[str]:
+        """
+        設定の再読み込みで変わったmodelセクションを反映
+
+        信頼度・NMSの閾値は読み込み済みの認識クラス（ワーカープロセスを含む）へそのまま反映する。
+        それ以外の項目は次にモデルを読み込むときに使う。読み込み中なら待たずに設定だけ変え、
+        読み込みの完了時に反映される（設定の監視スレッドから呼ぶ）。
+
+        Args:
+            model_config: 新しいmodelセクション
+            changes: 変わった項目（キー → (旧値, 新値)）
+
+        Returns:
+            List[str]: 反映内容（ログ用）
+        """
+        self.model_config.update(model_config)
+        if 'warmup_iterations' in changes:
+            self.warmup_iterations = self.model_config.get('warmup_iterations', 3)
+        thresholds = {key: changes[key][1] for key in THRESHOLD_KEYS if key in changes}
+        if not thresholds:
+            return []
+        # 読み込みスレッドは公開の直前にmodel_configの閾値を反映するので、公開前ならそちらに任せる
+        with self.load_lock:
+            recognizer = self.recognizer
+        if recognizer is None:
+            return ["認識: 閾値はモデルの読み込み時に反映"]
+        recognizer.set_thresholds(**thresholds)
+        return [f"認識: {key} を {value} に変更" for key, value in thresholds.items()]
+
+    def get_latest_result(self) -> Optional[PipelineResult]:
+        """最新の認識結果（認識していなければNone）"""
+        return self.pipeline.get_latest_result() if self.pipeline is not None else None
+
+
+def _close(recognizer):
+    """認識クラスを閉じる（ワーカープロセスを持つ場合）"""
+    close = getattr(recognizer, 'close', None)
+    if close is not None:
+        close()
@@ -0,0 +1,14 @@
+"""
+画像認識パッケージ
+YOLO（ONNX形式）モデルによる薬液ボトルの検出
+"""
+
+from src.recognizer.ai_recognizer import AIRecognizer
+from src.recognizer.backends import InferenceBackend, OnnxRuntimeBackend, OpenCVDnnBackend, create_backend
+from src.recognizer.cascade import CascadeRecognizer, CascadeResult
+from src.recognizer.detection import CLASS_INFO, DEFAULT_CLASS_NAMES, Detection
+from src.recognizer.errors import ModelLoadError, RecognitionError
+from src.recognizer.postprocess import DetectionBatch
+from src.recognizer.preprocess import LetterboxPreprocessor
+from src.recognizer.tape import TapeClassifier, TapeResult
+from src.recognizer.tracker import IoUTracker, TrackingRecognizer
@@ -0,0 +1,231 @@
+"""
+AI画像認識クラス
+YOLO（ONNX形式）モデルをCPUで実行して薬液ボトルを検出する
+
+1フレームあたりの処理時間は前処理・推論・後処理ごとに last_timings に記録される。
+目安（640x640入力、4コアCPU）: YOLOv8n で前処理 1 ms 前後、推論 30〜60 ms、後処理 1 ms 未満。
+後処理はNumPyでまとめて行い、検出結果は DetectionBatch（配列）で受け取れる（detect_batch）。
+tools/quantize_model.py で作成したINT8モデルも同じように読み込める（config.yaml の model.precision）。
+"""
+
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.latency_monitor import record_recognizer_timings
+from src.recognizer.backends import InferenceBackend, create_backend
+from src.recognizer.detection import DEFAULT_CLASS_NAMES, Detection
+from src.recognizer.errors import ModelLoadError, RecognitionError
+from src.recognizer.postprocess import DetectionBatch, postprocess
+from src.recognizer.preprocess import LetterboxPreprocessor
+
+
+class AIRecognizer:
+    """AI画像認識クラス"""
+
+    def __init__(self, model_path: str, confidence_threshold: float = 0.5, nms_threshold: float = 0.4,
+                 input_size: int = 640, backend: str = "auto", num_threads: int = 0,
+                 class_names: Optional[List[str]] = None):
+        """
+        AI画像認識クラスの初期化
+
+        Args:
+            model_path: ONNXモデルのパス
+            confidence_threshold: 検出とみなす信頼度の下限
+            nms_threshold: NMSのIoU閾値
+            input_size: モデルの入力サイズ（正方形）
+            backend: 推論バックエンド（"auto"、"onnxruntime"、"opencv"）
+            num_threads: 推論スレッド数（0で既定値）
+            class_names: クラス名のリスト（モデルの出力順）
+
+        Raises:
+            ModelLoadError: モデルを読み込めない場合
+        """
+        self.confidence_threshold = confidence_threshold
+        self.nms_threshold = nms_threshold
+        self.input_size = input_size
+        self.num_threads = num_threads
+        self.class_names = list(class_names) if class_names else list(DEFAULT_CLASS_NAMES)
+        self.backend_name = backend
+        self.model_path = model_path
+        self.model = self.load_yolo_model(model_path)
+        self._local = threading.local()
+        self.last_timings = {"preprocess_ms": 0.0, "inference_ms": 0.0, "postprocess_ms": 0.0, "total_ms": 0.0}
+        # 段階ごとの所要時間の記録先（LatencyMonitor、任意）
+        self.latency_monitor = None
+
+    @classmethod
+    def from_config(cls, model_config: dict) -> "AIRecognizer":
+        """
+        config.yamlのmodelセクションから認識クラスを作成
+
+        Args:
+            model_config: モデル設定
+
+        Returns:
+            AIRecognizer: 認識クラス
+
+        Raises:
+            ModelLoadError: モデルを読み込めない、または精度の指定が不正な場合
+        """
+        precision = model_config.get('precision', 'fp32')
+        if precision == 'int8':
+            model_path = model_config.get('int8_path', 'models/best.int8.onnx')
+        elif precision == 'fp32':
+            model_path = model_config.get('onnx_path', 'models/best.onnx')
+        else:
+            raise ModelLoadError(f"不明なモデル精度: {precision}")
+        return cls(
+            model_path=model_path,
+            confidence_threshold=model_config.get('confidence_threshold', 0.5),
+            nms_threshold=model_config.get('nms_threshold', 0.4),
+            input_size=model_config.get('input_size', 640),
+            backend=model_config.get('backend', 'auto'),
+            num_threads=model_config.get('num_threads', 0),
+            class_names=model_config.get('class_names'),
+        )
+
+    def load_yolo_model(self, model_path: str) -> InferenceBackend:
+        """YOLOモデル読み込み"""
+        model = create_backend(model_path, self.backend_name, self.num_threads)
+        print(f"YOLOモデルを読み込みました: {model_path} (バックエンド: {model.name})")
+        return model
+
+    def preprocess_image(self, frame: np.ndarray) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """
+        レターボックスでリサイズしてNCHW形式のfloat32に変換
+
+        入力テンソルは呼び出したスレッドの前処理バッファで、同じスレッドの次の呼び出しで上書きされる。
+
+        Args:
+            frame: 入力フレーム（BGR形式）
+
+        Returns:
+            Tuple: 入力テンソル、縮小率、(左, 上)のパディング
+        """
+        preprocessor = getattr(self._local, "preprocessor", None)
+        if preprocessor is None or preprocessor.input_size != self.input_size:
+            # 認識ワーカーが複数あってもバッファを共有しないようスレッドごとに持つ
+            preprocessor = LetterboxPreprocessor(self.input_size)
+            self._local.preprocessor = preprocessor
+        return preprocessor(frame)
+
+    def postprocess(self, output: np.ndarray, scale: float, pad: Tuple[int, int],
+                    frame_shape: Tuple[int, int]) -> DetectionBatch:
+        """
+        YOLOの出力から信頼度フィルタリングとNMSを行い、元フレーム座標の検出結果に変換
+
+        Args:
+            output: モデルの出力
+            scale: 前処理の縮小率
+            pad: 前処理の(左, 上)パディング
+            frame_shape: 元フレームの(高さ, 幅)
+
+        Returns:
+            DetectionBatch: 信頼度の高い順の検出結果
+        """
+        return postprocess(output, self.class_names, self.confidence_threshold, self.nms_threshold,
+                           scale, pad, frame_shape)
+
+    def detect_batch(self, frame: np.ndarray) -> DetectionBatch:
+        """
+        物体検出を実行し、検出結果を配列のまま返す
+
+        Args:
+            frame: 入力フレーム（BGR形式）
+
+        Returns:
+            DetectionBatch: 信頼度の高い順の検出結果
+
+        Raises:
+            RecognitionError: 推論に失敗した場合
+        """
+        if frame is None or frame.ndim != 3:
+            raise RecognitionError("入力フレームが不正です")
+
+        start = time.perf_counter()
+        blob, scale, pad = self.preprocess_image(frame)
+        preprocessed = time.perf_counter()
+        output = self.model.infer(blob)
+        inferred = time.perf_counter()
+        batch = self.postprocess(output, scale, pad, frame.shape[:2])
+        finished = time.perf_counter()
+
+        self.last_timings = {
+            "preprocess_ms": 1000.0 * (preprocessed - start),
+            "inference_ms": 1000.0 * (inferred - preprocessed),
+            "postprocess_ms": 1000.0 * (finished - inferred),
+            "total_ms": 1000.0 * (finished - start),
+        }
+        record_recognizer_timings(self.latency_monitor, self.last_timings)
+        return batch
+
+    def warmup(self, iterations: int = 3, frame_shape: Tuple[int, int, int] = (480, 640, 3)) -> List[float]:
+        """
+        ダミーフレームで推論して、初回の推論の遅さ（グラフ最適化・スレッドプールの起動・重みのページフォルト）を先に済ませる
+
+        遅延計測（latency_monitor）と last_timings には記録しない。
+
+        Args:
+            iterations: 推論の回数
+            frame_shape: ダミーフレームの形状（カメラと同じ (高さ, 幅, 3)）
+
+        Returns:
+            List[float]: 各回の処理時間（ミリ秒）
+
+        Raises:
+            RecognitionError: 推論に失敗した場合
+        """
+        frame = np.zeros(frame_shape, dtype=np.uint8)
+        times = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            blob, scale, pad = self.preprocess_image(frame)
+            self.postprocess(self.model.infer(blob), scale, pad, frame.shape[:2])
+            times.append(1000.0 * (time.perf_counter() - start))
+        return times
+
+    def set_thresholds(self, confidence_threshold: Optional[float] = None, nms_threshold: Optional[float] = None):
+        """
+        信頼度・NMSの閾値を変更（次の後処理から反映される）
+
+        Args:
+            confidence_threshold: 検出とみなす信頼度の下限（Noneで変更しない）
+            nms_threshold: NMSのIoU閾値（Noneで変更しない）
+        """
+        if confidence_threshold is not None:
+            self.confidence_threshold = confidence_threshold
+        if nms_threshold is not None:
+            self.nms_threshold = nms_threshold
+
+    def detect_objects(self, frame: np.ndarray) -> List[Detection]:
+        """
+        物体検出実行
+
+        Args:
+            frame: 入力フレーム（BGR形式）
+
+        Returns:
+            List[Detection]: 信頼度の高い順の検出結果
+
+        Raises:
+            RecognitionError: 推論に失敗した場合
+        """
+        return self.detect_batch(frame).to_detections()
+
+    def classify_medicine(self, detections: List[Detection]) -> Optional[str]:
+        """
+        薬液種類の分類
+
+        Args:
+            detections: 検出結果
+
+        Returns:
+            str: 最も信頼度の高い検出の薬液名、検出がなければNone
+        """
+        for detection in sorted(detections, key=lambda d: d.confidence, reverse=True):
+            if detection.medicine_type:
+                return detection.medicine_type
+        return None
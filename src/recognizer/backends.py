@@ -0,0 +1,158 @@
+"""
+推論バックエンド
+ONNXモデルをCPUで実行する実装（onnxruntime / OpenCV DNN）を切り替えて使う
+"""
+
+import os
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from src.recognizer.errors import ModelLoadError, RecognitionError
+
+
+class InferenceBackend:
+    """推論バックエンドの基底クラス"""
+
+    name = "base"
+
+    def infer(self, blob: np.ndarray) -> np.ndarray:
+        """
+        推論を実行
+
+        Args:
+            blob: NCHW形式のfloat32入力
+
+        Returns:
+            np.ndarray: モデルの最初の出力
+        """
+        raise NotImplementedError
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """onnxruntime（CPUExecutionProvider）による推論"""
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path: str, num_threads: int = 0):
+        """
+        onnxruntimeバックエンドの初期化
+
+        Args:
+            model_path: ONNXモデルのパス
+            num_threads: 演算スレッド数（0でonnxruntimeの既定値）
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ModelLoadError(f"onnxruntimeがインストールされていません: {e}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        try:
+            self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        except Exception as e:
+            raise ModelLoadError(f"ONNXモデルを読み込めませんでした: {model_path} ({e})")
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+    def infer(self, blob: np.ndarray) -> np.ndarray:
+        try:
+            return self.session.run([self.output_name], {self.input_name: blob})[0]
+        except Exception as e:
+            raise RecognitionError(f"推論エラー: {e}")
+
+
+class OpenCVDnnBackend(InferenceBackend):
+    """
+    OpenCV DNNモジュールによる推論（追加の依存なし）
+
+    cv2.dnn.Net は setInput → forward の間に入力・出力を内部に保持するため、複数の認識ワーカースレッドで
+    共有すると入出力が入れ替わる。スレッドごとに Net を読み込んで使う。
+    """
+
+    name = "opencv"
+
+    def __init__(self, model_path: str, num_threads: int = 0):
+        """
+        OpenCV DNNバックエンドの初期化
+
+        Args:
+            model_path: ONNXモデルのパス
+            num_threads: 演算スレッド数（0でOpenCVの既定値）
+        """
+        self.model_path = model_path
+        self._local = threading.local()
+        # 読み込めるかはここで確かめ、このスレッドの Net として使う
+        self._local.net = self._load_net()
+        if num_threads > 0:
+            cv2.setNumThreads(num_threads)
+
+    def _load_net(self):
+        """Net を読み込む"""
+        try:
+            net = cv2.dnn.readNetFromONNX(self.model_path)
+        except cv2.error as e:
+            raise ModelLoadError(f"ONNXモデルを読み込めませんでした: {self.model_path} ({e})")
+        net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        return net
+
+    @property
+    def net(self):
+        """呼び出し元のスレッドの Net（初めて使うスレッドで読み込む）"""
+        net = getattr(self._local, "net", None)
+        if net is None:
+            net = self._local.net = self._load_net()
+        return net
+
+    def infer(self, blob: np.ndarray) -> np.ndarray:
+        net = self.net
+        try:
+            net.setInput(blob)
+            return net.forward()
+        except cv2.error as e:
+            raise RecognitionError(f"推論エラー: {e}")
+
+
+BACKENDS = {
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenCVDnnBackend.name: OpenCVDnnBackend,
+}
+
+
+def create_backend(model_path: str, backend: str = "auto", num_threads: int = 0) -> InferenceBackend:
+    """
+    推論バックエンドを作成
+
+    Args:
+        model_path: ONNXモデルのパス
+        backend: "auto"（onnxruntime優先、なければOpenCV）、"onnxruntime"、"opencv"
+        num_threads: 演算スレッド数（0で既定値）
+
+    Returns:
+        InferenceBackend: 推論バックエンド
+
+    Raises:
+        ModelLoadError: モデルファイルがない、またはどのバックエンドでも読み込めない場合
+    """
+    if not os.path.exists(model_path):
+        raise ModelLoadError(f"モデルファイルが見つかりません: {model_path}")
+
+    if backend != "auto":
+        if backend not in BACKENDS:
+            raise ModelLoadError(f"不明な推論バックエンド: {backend}")
+        return BACKENDS[backend](model_path, num_threads)
+
+    last_error: Optional[Exception] = None
+    for backend_class in (OnnxRuntimeBackend, OpenCVDnnBackend):
+        try:
+            return backend_class(model_path, num_threads)
+        except ModelLoadError as e:
+            print(f"推論バックエンド {backend_class.name} を使用できません: {e}")
+            last_error = e
+    raise ModelLoadError(f"利用できる推論バックエンドがありません: {last_error}")
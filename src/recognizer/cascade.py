@@ -0,0 +1,153 @@
+"""
+段階的認識（カスケード）
+色付きテープの判定で薬液が決まればYOLOを実行せず、テープの判定が曖昧な場合だけ検出器を使う
+
+テープの判定はフレーム全体の色によるため、ボトル以外の物でも決まりうる。検出器がある場合は
+直近の検出器の結果と同じ薬液のときだけテープの判定を使い（テープは検出器の答えの確認に使う）、
+テープだけで決めたフレームが confirm_interval 回続いたら検出器で確かめ直す。
+テープで分かるのは薬液の種類だけで、蓋の開閉状態は検出器の結果にしか含まれない。
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+import threading
+import time
+
+import numpy as np
+
+from src.medicine_selector import MedicineSelector, MedicineType
+from src.recognizer.detection import medicine_of_class
+from src.recognizer.postprocess import DetectionBatch
+from src.recognizer.tape import TapeClassifier, TapeResult
+
+
+@dataclass
+class CascadeResult:
+    """段階的認識の結果データクラス"""
+    medicine: Optional[MedicineType]  # 認識した薬液（判定できなければNone）
+    matches_selection: Optional[bool]  # 選択中の薬液と一致するか（未選択・判定不能ならNone）
+    source: str  # 判定に使った段（"tape"、"detector"、"none"）
+    tape: Optional[TapeResult]  # テープ判定の結果（テープ判定を使わない場合はNone）
+    detections: Optional[DetectionBatch]  # 検出器の結果（テープで決まった場合はNone）
+    latency_ms: float  # このフレームの処理時間（ミリ秒）
+
+
+class CascadeRecognizer:
+    """テープ判定 → YOLO検出の段階的認識クラス"""
+
+    def __init__(self, tape_classifier: Optional[TapeClassifier], medicine_selector: MedicineSelector,
+                 detector=None, confirm_interval: int = 10):
+        """
+        段階的認識クラスの初期化
+
+        Args:
+            tape_classifier: テープ判定、Noneで常に検出器を使う
+            medicine_selector: 選択中の薬液の参照先
+            detector: テープで決まらない場合の検出器（detect_batchを持つAIRecognizerなど）、Noneでテープのみ
+            confirm_interval: テープだけで決めてよい連続フレーム数（これを超えたら検出器で確かめ直す）
+        """
+        self.tape_classifier = tape_classifier
+        self.medicine_selector = medicine_selector
+        self.detector = detector
+        self.confirm_interval = confirm_interval
+        self.lock = threading.Lock()
+        # 直近の検出器の結果（テープの判定はこれと一致する場合だけ使う）と、その後テープだけで決めたフレーム数
+        self.confirmed_medicine: Optional[MedicineType] = None
+        self.unconfirmed_frames = 0
+        self.frames = 0
+        self.fast_path_frames = 0
+        self.detector_frames = 0
+        self.total_latency = 0.0
+        self.fast_path_latency = 0.0
+        self.detector_latency = 0.0
+
+    @classmethod
+    def from_config(cls, tape_config: dict, medicine_selector: MedicineSelector,
+                    detector=None) -> "CascadeRecognizer":
+        """
+        config.yamlのtapeセクションから段階的認識クラスを作成
+
+        Args:
+            tape_config: テープ判定設定（enabled: falseでテープ判定を使わない）
+            medicine_selector: 選択中の薬液の参照先
+            detector: テープで決まらない場合の検出器
+        """
+        tape_classifier = TapeClassifier.from_config(tape_config) if tape_config.get('enabled', True) else None
+        return cls(tape_classifier, medicine_selector, detector,
+                   confirm_interval=tape_config.get('confirm_interval', 10))
+
+    def check(self, frame: np.ndarray) -> CascadeResult:
+        """
+        フレームの薬液を認識し、選択中の薬液と照合
+
+        Args:
+            frame: 入力フレーム（BGR形式）
+
+        Returns:
+            CascadeResult: 認識結果
+        """
+        start = time.perf_counter()
+        tape = self.tape_classifier.classify(frame) if self.tape_classifier else None
+        detections = None
+        if tape is not None and tape.decisive and self._tape_confirmed(tape.medicine):
+            medicine, source = tape.medicine, "tape"
+        elif self.detector is not None:
+            detections = self.detector.detect_batch(frame)
+            medicine = medicine_of_class(detections.class_name(0)) if len(detections) else None
+            source = "detector"
+            with self.lock:
+                self.confirmed_medicine = medicine
+                self.unconfirmed_frames = 0
+        else:
+            medicine, source = None, "none"
+        latency = time.perf_counter() - start
+
+        with self.lock:
+            self.frames += 1
+            self.total_latency += latency
+            if source == "tape":
+                self.fast_path_frames += 1
+                self.fast_path_latency += latency
+            elif source == "detector":
+                self.detector_frames += 1
+                self.detector_latency += latency
+
+        selected = self.medicine_selector.get_selected_medicine()
+        matches = None if selected is None or medicine is None else medicine == selected
+        return CascadeResult(medicine, matches, source, tape, detections, 1000.0 * latency)
+
+    def _tape_confirmed(self, medicine: MedicineType) -> bool:
+        """テープの判定を使ってよいか（検出器がなければ常に使う）"""
+        if self.detector is None:
+            return True
+        with self.lock:
+            if medicine != self.confirmed_medicine or self.unconfirmed_frames >= self.confirm_interval:
+                return False
+            self.unconfirmed_frames += 1
+            return True
+
+    def reset_stats(self):
+        """統計をクリア"""
+        with self.lock:
+            self.frames = self.fast_path_frames = self.detector_frames = 0
+            self.total_latency = self.fast_path_latency = self.detector_latency = 0.0
+
+    def get_stats(self) -> dict:
+        """
+        段階的認識の統計を取得
+
+        Returns:
+            dict: テープだけで判定できた割合、段ごとの平均処理時間（ミリ秒）など
+        """
+        with self.lock:
+            return {
+                "frames": self.frames,
+                "fast_path_frames": self.fast_path_frames,
+                "detector_frames": self.detector_frames,
+                "fast_path_rate": self.fast_path_frames / self.frames if self.frames else 0.0,
+                "avg_latency_ms": 1000.0 * self.total_latency / self.frames if self.frames else 0.0,
+                "avg_fast_path_ms": (1000.0 * self.fast_path_latency / self.fast_path_frames
+                                     if self.fast_path_frames else 0.0),
+                "avg_detector_ms": (1000.0 * self.detector_latency / self.detector_frames
+                                    if self.detector_frames else 0.0),
+            }
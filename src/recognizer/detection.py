@@ -0,0 +1,68 @@
+"""
+検出結果データクラス
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from src.medicine_selector import MedicineType
+
+
+# YOLOモデルのクラス名（学習データのディレクトリ構成と同じ順序）
+DEFAULT_CLASS_NAMES = [
+    "sodium_hypochlorite_closed",
+    "sodium_hypochlorite_open",
+    "acetic_acid_closed",
+    "acetic_acid_open",
+]
+
+# クラス名 → (薬液の種類, 蓋の状態)
+CLASS_INFO: Dict[str, Tuple[MedicineType, str]] = {
+    "sodium_hypochlorite_closed": (MedicineType.SODIUM_HYPOCHLORITE, "closed"),
+    "sodium_hypochlorite_open": (MedicineType.SODIUM_HYPOCHLORITE, "open"),
+    "acetic_acid_closed": (MedicineType.ACETIC_ACID, "closed"),
+    "acetic_acid_open": (MedicineType.ACETIC_ACID, "open"),
+}
+
+
+@dataclass
+class Detection:
+    """検出結果データクラス"""
+    class_name: str
+    confidence: float
+    bbox: Tuple[int, int, int, int]  # x, y, width, height
+    medicine_type: str
+    cap_status: str  # "open" or "closed"
+    track_id: Optional[int] = None  # 追跡ID（追跡を使わない場合はNone）
+
+
+def make_detection(class_name: str, confidence: float, bbox: Tuple[int, int, int, int],
+                   track_id: Optional[int] = None) -> Detection:
+    """
+    クラス名から薬液の種類と蓋の状態を補完してDetectionを作成
+
+    Args:
+        class_name: YOLOのクラス名
+        confidence: 信頼度
+        bbox: 元フレーム座標の (x, y, width, height)
+        track_id: 追跡ID
+
+    Returns:
+        Detection: 検出結果
+    """
+    medicine, cap_status = CLASS_INFO.get(class_name, (None, "unknown"))
+    return Detection(
+        class_name=class_name,
+        confidence=float(confidence),
+        bbox=bbox,
+        medicine_type=medicine.value if medicine else "",
+        cap_status=cap_status,
+        track_id=track_id,
+    )
+
+
+def medicine_of_class(class_name: str) -> Optional[MedicineType]:
+    """クラス名に対応する薬液の種類を取得"""
+    info = CLASS_INFO.get(class_name)
+    return info[0] if info else None
+
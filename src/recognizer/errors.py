@@ -0,0 +1,13 @@
+"""
+画像認識関連の例外クラス
+"""
+
+
+class ModelLoadError(Exception):
+    """モデル読み込みエラー"""
+    pass
+
+
+class RecognitionError(Exception):
+    """認識エラー"""
+    pass
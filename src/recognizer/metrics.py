@@ -0,0 +1,214 @@
+"""
+検出精度の評価
+画像ごとの検出結果を正解ラベルと照合し、クラスごとの適合率・再現率・AP（IoU 0.5）とmAPを求める。
+また画像単位で、薬液の種類と蓋の状態を正しく判定できた割合（識別の正解率）を求める。
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from src.recognizer.detection import CLASS_INFO
+from src.recognizer.postprocess import DetectionBatch
+from src.recognizer.tracker import iou_matrix
+
+
+def average_precision(recall: np.ndarray, precision: np.ndarray) -> float:
+    """
+    適合率-再現率曲線の面積（全点補間、VOC2010以降と同じ）
+
+    Args:
+        recall: 信頼度の高い順に累積した再現率
+        precision: 信頼度の高い順に累積した適合率
+
+    Returns:
+        float: AP
+    """
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([0.0], precision, [0.0]))
+    # 適合率を右側の最大値で包絡させる
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    changed = np.flatnonzero(recall[1:] != recall[:-1])
+    return float(np.sum((recall[changed + 1] - recall[changed]) * precision[changed + 1]))
+
+
+class DetectionEvaluator:
+    """画像ごとに検出結果を照合して集計する評価クラス（複数の評価結果はmergeで統合できる）"""
+
+    def __init__(self, class_names: Sequence[str], iou_threshold: float = 0.5):
+        """
+        評価クラスの初期化
+
+        Args:
+            class_names: クラス名のリスト
+            iou_threshold: 正解とみなすIoUの下限
+        """
+        self.class_names = list(class_names)
+        self.iou_threshold = iou_threshold
+        num_classes = len(self.class_names)
+        self.scores: List[List[np.ndarray]] = [[] for _ in range(num_classes)]
+        self.matches: List[List[np.ndarray]] = [[] for _ in range(num_classes)]
+        self.ground_truths = np.zeros(num_classes, dtype=np.int64)
+        self.images = 0
+
+    def add(self, batch: DetectionBatch, gt_boxes: np.ndarray, gt_class_ids: np.ndarray):
+        """
+        1画像の検出結果を正解と照合（信頼度の高い検出から、同じクラスの未対応の正解に対応させる）
+
+        Args:
+            batch: 検出結果
+            gt_boxes: 正解の (x, y, width, height)、形状 (M, 4)
+            gt_class_ids: 正解のクラスID、形状 (M,)
+        """
+        self.images += 1
+        gt_class_ids = np.asarray(gt_class_ids, dtype=np.int32)
+        for class_id in range(len(self.class_names)):
+            gt = np.asarray(gt_boxes)[gt_class_ids == class_id]
+            self.ground_truths[class_id] += len(gt)
+            selected = batch.class_ids == class_id
+            if not np.any(selected):
+                continue
+
+            scores = batch.scores[selected]
+            order = np.argsort(-scores, kind="stable")
+            scores = scores[order]
+            boxes = batch.boxes[selected][order]
+            matched = np.zeros(len(scores), dtype=bool)
+            if len(gt):
+                iou = iou_matrix(boxes, gt)
+                used = np.zeros(len(gt), dtype=bool)
+                for index in range(len(scores)):
+                    candidates = np.where(used, -1.0, iou[index])
+                    best = int(np.argmax(candidates))
+                    if candidates[best] >= self.iou_threshold:
+                        used[best] = True
+                        matched[index] = True
+            self.scores[class_id].append(scores)
+            self.matches[class_id].append(matched)
+
+    def merge(self, other: "DetectionEvaluator"):
+        """別の評価クラスの集計を取り込む（並列評価の結果の統合用）"""
+        for class_id in range(len(self.class_names)):
+            self.scores[class_id].extend(other.scores[class_id])
+            self.matches[class_id].extend(other.matches[class_id])
+        self.ground_truths += other.ground_truths
+        self.images += other.images
+
+    def compute(self) -> Dict:
+        """
+        クラスごとの指標とmAPを計算
+
+        Returns:
+            dict: per_class（クラス名 → ap, precision, recall, tp, fp, gt）、mAP、画像数
+        """
+        per_class = {}
+        aps = []
+        for class_id, name in enumerate(self.class_names):
+            gt_count = int(self.ground_truths[class_id])
+            if self.scores[class_id]:
+                scores = np.concatenate(self.scores[class_id])
+                matches = np.concatenate(self.matches[class_id])
+            else:
+                scores, matches = np.empty(0), np.empty(0, dtype=bool)
+            order = np.argsort(-scores, kind="stable")
+            tp = np.cumsum(matches[order])
+            fp = np.cumsum(~matches[order])
+            tp_total = int(tp[-1]) if len(tp) else 0
+            fp_total = int(fp[-1]) if len(fp) else 0
+
+            if gt_count:
+                recall = tp / gt_count
+                precision = tp / np.maximum(tp + fp, 1)
+                ap = average_precision(recall, precision) if len(tp) else 0.0
+                aps.append(ap)
+            else:
+                ap = float("nan")
+            per_class[name] = {
+                "ap": ap,
+                "precision": tp_total / (tp_total + fp_total) if tp_total + fp_total else 0.0,
+                "recall": tp_total / gt_count if gt_count else 0.0,
+                "tp": tp_total,
+                "fp": fp_total,
+                "gt": gt_count,
+            }
+        return {
+            "images": self.images,
+            "mAP": float(np.mean(aps)) if aps else 0.0,
+            "per_class": per_class,
+        }
+
+
+class StateAccuracy:
+    """画像単位で薬液の種類・蓋の状態の判定を集計する評価クラス（mergeで統合できる）"""
+
+    def __init__(self, class_names: Sequence[str], confidence_threshold: float = 0.5):
+        """
+        評価クラスの初期化
+
+        各画像の正解は最も大きいラベル、判定は信頼度が閾値以上で最も高い検出とする（アプリの判定と同じ）。
+
+        Args:
+            class_names: クラス名のリスト
+            confidence_threshold: 判定に使う検出の信頼度の下限
+        """
+        self.class_names = list(class_names)
+        self.confidence_threshold = confidence_threshold
+        self.images = 0
+        self.unlabeled = 0
+        self.missed = 0
+        self.medicine_correct = 0
+        self.cap_state_correct = 0
+        self.class_correct = 0
+
+    def add(self, batch: DetectionBatch, gt_boxes: np.ndarray, gt_class_ids: np.ndarray):
+        """
+        1画像の判定を正解と照合（ラベルのない画像は数えるだけで正解率には含めない）
+
+        Args:
+            batch: 検出結果
+            gt_boxes: 正解の (x, y, width, height)、形状 (M, 4)
+            gt_class_ids: 正解のクラスID、形状 (M,)
+        """
+        if len(gt_class_ids) == 0:
+            self.unlabeled += 1
+            return
+        self.images += 1
+        gt_boxes = np.asarray(gt_boxes)
+        expected = self.class_names[int(gt_class_ids[int(np.argmax(gt_boxes[:, 2] * gt_boxes[:, 3]))])]
+
+        confident = np.flatnonzero(batch.scores >= self.confidence_threshold)
+        if len(confident) == 0:
+            self.missed += 1
+            return
+        predicted = self.class_names[int(batch.class_ids[confident[np.argmax(batch.scores[confident])]])]
+        expected_info = CLASS_INFO.get(expected, (None, None))
+        predicted_info = CLASS_INFO.get(predicted, (None, None))
+        self.class_correct += predicted == expected
+        self.medicine_correct += predicted_info[0] is not None and predicted_info[0] == expected_info[0]
+        self.cap_state_correct += predicted_info[1] is not None and predicted_info[1] == expected_info[1]
+
+    def merge(self, other: "StateAccuracy"):
+        """別の評価クラスの集計を取り込む（並列評価の結果の統合用）"""
+        self.images += other.images
+        self.unlabeled += other.unlabeled
+        self.missed += other.missed
+        self.medicine_correct += other.medicine_correct
+        self.cap_state_correct += other.cap_state_correct
+        self.class_correct += other.class_correct
+
+    def compute(self) -> Dict:
+        """
+        正解率を計算
+
+        Returns:
+            dict: 薬液・蓋の状態・クラス（両方）の正解率、検出なしの割合、画像数
+        """
+        images = max(self.images, 1)
+        return {
+            "images": self.images,
+            "unlabeled": self.unlabeled,
+            "medicine_accuracy": self.medicine_correct / images,
+            "cap_state_accuracy": self.cap_state_correct / images,
+            "class_accuracy": self.class_correct / images,
+            "miss_rate": self.missed / images,
+        }
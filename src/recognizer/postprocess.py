@@ -0,0 +1,233 @@
+"""
+YOLO出力の後処理
+モデル出力のデコード・信頼度フィルタリング・クラスごとのNMSをNumPyでまとめて行い、
+検出結果を列ごとの配列（DetectionBatch）として返す
+
+640x640入力のYOLOv8では1フレームあたり8400個のアンカーがあり、
+1候補ずつPythonで処理すると後処理だけで数ミリ秒〜数十ミリ秒かかるため、候補単位のループは行わない。
+reference_postprocess は従来の1候補ずつの実装で、結果の照合とベンチマークに使う。
+"""
+
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from src.recognizer.detection import Detection, make_detection
+from src.recognizer.preprocess import map_boxes_to_frame
+
+
+class DetectionBatch:
+    """1フレーム分の検出結果（候補ごとのオブジェクトを作らず配列で保持）"""
+
+    __slots__ = ("boxes", "scores", "class_ids", "class_names", "track_ids")
+
+    def __init__(self, boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                 class_names: Sequence[str], track_ids: Optional[np.ndarray] = None):
+        """
+        検出結果の初期化
+
+        Args:
+            boxes: 元フレーム座標の (x, y, width, height)、形状 (N, 4) のint32
+            scores: 信頼度、形状 (N,) のfloat32
+            class_ids: クラスID、形状 (N,) のint32
+            class_names: クラス名のリスト（class_idsの参照先）
+            track_ids: 追跡ID、形状 (N,) のint64（追跡を使わない場合はNone）
+        """
+        self.boxes = boxes
+        self.scores = scores
+        self.class_ids = class_ids
+        self.class_names = class_names
+        self.track_ids = track_ids
+
+    @classmethod
+    def empty(cls, class_names: Sequence[str]) -> "DetectionBatch":
+        """検出なしの結果を作成"""
+        return cls(np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.float32),
+                   np.empty(0, dtype=np.int32), class_names)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __iter__(self) -> Iterator[Detection]:
+        return iter(self.to_detections())
+
+    def class_name(self, index: int) -> str:
+        """index番目の検出のクラス名"""
+        return self.class_names[self.class_ids[index]]
+
+    def to_detections(self) -> List[Detection]:
+        """Detectionのリストに変換（UIや安全確認など個別に扱う場合のみ使う）"""
+        track_ids = self.track_ids if self.track_ids is not None else [None] * len(self.scores)
+        return [
+            make_detection(self.class_names[class_id], float(score), tuple(int(v) for v in box),
+                           None if track_id is None else int(track_id))
+            for box, score, class_id, track_id in zip(self.boxes, self.scores, self.class_ids, track_ids)
+        ]
+
+
+def _to_anchor_rows(output: np.ndarray, num_classes: int) -> Tuple[np.ndarray, bool]:
+    """出力を (アンカー数, チャンネル数) に揃え、objectnessの有無を返す"""
+    predictions = output[0]
+    has_objectness = predictions.shape[-1] == 5 + num_classes
+    if not has_objectness and predictions.shape[0] == 4 + num_classes:
+        predictions = predictions.T
+    return predictions, has_objectness
+
+
+def decode_predictions(output: np.ndarray, num_classes: int,
+                       confidence_threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    YOLOの出力から信頼度が閾値以上の候補を取り出す
+
+    YOLOv8形式 (1, 4+クラス数, N) とYOLOv5形式 (1, N, 5+クラス数) に対応。
+
+    Args:
+        output: モデルの出力
+        num_classes: クラス数
+        confidence_threshold: 信頼度の下限
+
+    Returns:
+        Tuple: 入力画像座標の (cx, cy, w, h)（新しい配列のため書き換えてよい）、信頼度、クラスID
+    """
+    predictions, has_objectness = _to_anchor_rows(output, num_classes)
+    if has_objectness:
+        class_scores = predictions[:, 5:] * predictions[:, 4:5]
+    else:
+        class_scores = predictions[:, 4:]
+
+    class_ids = np.argmax(class_scores, axis=1)
+    scores = np.take_along_axis(class_scores, class_ids[:, np.newaxis], axis=1)[:, 0]
+    keep = np.flatnonzero(scores >= confidence_threshold)
+    return predictions[keep, :4], scores[keep], class_ids[keep].astype(np.int32)
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                        iou_threshold: float) -> np.ndarray:
+    """
+    クラスごとのNMS（cv2.dnn.NMSBoxesBatchedと同じ結果）
+
+    残す候補ごとに残りの全候補とのIoUを一度に計算するため、
+    Pythonのループ回数は検出数（通常は数個）だけになる。
+
+    Args:
+        boxes: (x, y, width, height)、形状 (N, 4)
+        scores: 信頼度、形状 (N,)
+        class_ids: クラスID、形状 (N,)
+        iou_threshold: これを超えて重なる同クラスの候補を除く
+
+    Returns:
+        np.ndarray: 残す候補のインデックス（信頼度の高い順）
+    """
+    x0 = boxes[:, 0]
+    y0 = boxes[:, 1]
+    x1 = x0 + boxes[:, 2]
+    y1 = y0 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        width = np.minimum(x1[best], x1[rest]) - np.maximum(x0[best], x0[rest])
+        height = np.minimum(y1[best], y1[rest]) - np.maximum(y0[best], y0[rest])
+        inter = np.maximum(width, 0) * np.maximum(height, 0)
+        union = areas[best] + areas[rest] - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        order = rest[(iou <= iou_threshold) | (class_ids[rest] != class_ids[best])]
+    return np.array(keep, dtype=np.intp)
+
+
+def postprocess(output: np.ndarray, class_names: Sequence[str], confidence_threshold: float,
+                nms_threshold: float, scale: float, pad: Tuple[int, int],
+                frame_shape: Tuple[int, int]) -> DetectionBatch:
+    """
+    YOLOの出力をデコードしてNMSを行い、元フレーム座標の検出結果に変換
+
+    Args:
+        output: モデルの出力
+        class_names: クラス名のリスト（モデルの出力順）
+        confidence_threshold: 信頼度の下限
+        nms_threshold: NMSのIoU閾値
+        scale: 前処理の縮小率
+        pad: 前処理の(左, 上)パディング
+        frame_shape: 元フレームの(高さ, 幅)
+
+    Returns:
+        DetectionBatch: 信頼度の高い順の検出結果
+    """
+    centers, scores, class_ids = decode_predictions(output, len(class_names), confidence_threshold)
+    if not len(scores):
+        return DetectionBatch.empty(class_names)
+
+    # 中心座標 → 左上座標にしてから元フレーム座標へ（デコード結果のfloat32配列をその場で書き換える）
+    boxes = centers
+    boxes[:, 0:2] -= boxes[:, 2:4] / 2
+    map_boxes_to_frame(boxes, scale, pad)
+
+    keep = non_max_suppression(boxes, scores, class_ids, nms_threshold)
+    scores, class_ids = scores[keep], class_ids[keep]
+
+    # 四隅をフレーム内に収めて整数の (x, y, width, height) に戻す
+    # （右下の足し算は従来実装と同じ丸めにするため、残った検出（数個）だけfloat64で行う）
+    frame_height, frame_width = frame_shape
+    corners = boxes[keep].astype(np.float64)
+    corners[:, 2:4] += corners[:, 0:2]
+    np.clip(corners[:, 0::2], 0, frame_width, out=corners[:, 0::2])
+    np.clip(corners[:, 1::2], 0, frame_height, out=corners[:, 1::2])
+    corners = corners.astype(np.int32)
+    corners[:, 2:4] -= corners[:, 0:2]
+
+    return DetectionBatch(corners, scores.astype(np.float32, copy=False), class_ids, class_names)
+
+
+def reference_postprocess(output: np.ndarray, class_names: Sequence[str], confidence_threshold: float,
+                          nms_threshold: float, scale: float, pad: Tuple[int, int],
+                          frame_shape: Tuple[int, int]) -> List[Detection]:
+    """
+    1候補ずつ処理する従来の後処理（照合・ベンチマーク用）
+
+    引数はpostprocessと同じ。
+
+    Returns:
+        List[Detection]: 信頼度の高い順の検出結果
+    """
+    predictions, has_objectness = _to_anchor_rows(output, len(class_names))
+
+    boxes, scores, class_ids = [], [], []
+    for row in predictions:
+        if has_objectness:
+            class_scores = row[5:] * row[4]
+        else:
+            class_scores = row[4:]
+        class_id = int(np.argmax(class_scores))
+        confidence = float(class_scores[class_id])
+        if confidence < confidence_threshold:
+            continue
+        cx, cy, w, h = row[:4]
+        x = (cx - w / 2 - pad[0]) / scale
+        y = (cy - h / 2 - pad[1]) / scale
+        boxes.append([float(x), float(y), float(w / scale), float(h / scale)])
+        scores.append(confidence)
+        class_ids.append(class_id)
+
+    if not boxes:
+        return []
+
+    # クラスごとにNMSを適用
+    keep = cv2.dnn.NMSBoxesBatched(boxes, scores, class_ids, confidence_threshold, nms_threshold)
+
+    frame_height, frame_width = frame_shape
+    detections = []
+    for index in np.array(keep).flatten():
+        x, y, w, h = boxes[index]
+        x0 = int(max(0, min(frame_width, x)))
+        y0 = int(max(0, min(frame_height, y)))
+        x1 = int(max(0, min(frame_width, x + w)))
+        y1 = int(max(0, min(frame_height, y + h)))
+        detections.append(make_detection(class_names[class_ids[index]], scores[index],
+                                         (x0, y0, x1 - x0, y1 - y0)))
+    detections.sort(key=lambda d: d.confidence, reverse=True)
+    return detections
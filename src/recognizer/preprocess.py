@@ -0,0 +1,145 @@
+"""
+レターボックス前処理
+フレームをモデル入力（NCHW・RGB・0〜1のfloat32）に変換する処理を、事前確保したバッファ上で行う
+
+毎フレーム同じ形状の配列を作り直さないよう、縮小後の画像と入力テンソルは1回だけ確保し、
+フレームサイズごとの縮小率・パディングもキャッシュする。パディング部分の値は変わらないため、
+入力テンソルのパディングはフレームサイズが変わったときだけ書き込む。
+"""
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# YOLOの学習時と同じパディング色
+PAD_VALUE = 114
+
+
+class LetterboxPreprocessor:
+    """事前確保したバッファでレターボックス前処理を行うクラス（スレッドごとに1つ使う）"""
+
+    def __init__(self, input_size: int = 640, pad_value: int = PAD_VALUE):
+        """
+        前処理クラスの初期化
+
+        Args:
+            input_size: モデルの入力サイズ（正方形）
+            pad_value: パディングの画素値
+        """
+        self.input_size = input_size
+        self.pad_value = pad_value
+        self.blob = np.empty((1, 3, input_size, input_size), dtype=np.float32)
+        self.frame_size: Optional[Tuple[int, int]] = None
+        self.scale = 1.0
+        self.pad = (0, 0)
+        self.resized: Optional[np.ndarray] = None
+        self._planes = ()
+
+    def _configure(self, width: int, height: int):
+        """フレームサイズに合わせて縮小率・パディング・バッファを用意"""
+        size = self.input_size
+        scale = min(size / width, size / height)
+        new_width, new_height = int(round(width * scale)), int(round(height * scale))
+        left, top = (size - new_width) // 2, (size - new_height) // 2
+
+        self.frame_size = (width, height)
+        self.scale = scale
+        self.pad = (left, top)
+        if (new_width, new_height) == (width, height):
+            self.resized = None
+        elif self.resized is None or self.resized.shape[:2] != (new_height, new_width):
+            self.resized = np.empty((new_height, new_width, 3), dtype=np.uint8)
+
+        self.blob.fill(np.float32(self.pad_value) / np.float32(255.0))
+        # BGR→RGBの並べ替えは書き込み先のチャンネルで行う
+        self._planes = tuple(
+            (2 - channel, self.blob[0, channel, top:top + new_height, left:left + new_width])
+            for channel in range(3)
+        )
+
+    def __call__(self, frame: np.ndarray) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """
+        フレームを前処理
+
+        返す入力テンソルは内部バッファのため、次の呼び出しで上書きされる。
+
+        Args:
+            frame: 入力フレーム（BGR形式、読み取り専用でもよい）
+
+        Returns:
+            Tuple: 入力テンソル、縮小率、(左, 上)のパディング
+        """
+        height, width = frame.shape[:2]
+        if self.frame_size != (width, height):
+            self._configure(width, height)
+
+        source = frame
+        if self.resized is not None:
+            source = cv2.resize(frame, self.resized.shape[1::-1], dst=self.resized,
+                                interpolation=cv2.INTER_LINEAR)
+
+        for source_channel, plane in self._planes:
+            np.divide(source[:, :, source_channel], np.float32(255.0), out=plane)
+        return self.blob, self.scale, self.pad
+
+    def map_boxes(self, boxes: np.ndarray) -> np.ndarray:
+        """
+        入力画像座標の (x, y, width, height) を元フレーム座標にその場で変換
+
+        Args:
+            boxes: 形状 (N, 4) の浮動小数点配列（書き換えられる）
+
+        Returns:
+            np.ndarray: 変換後のboxes（同じ配列）
+        """
+        return map_boxes_to_frame(boxes, self.scale, self.pad)
+
+
+def map_boxes_to_frame(boxes: np.ndarray, scale: float, pad: Tuple[int, int]) -> np.ndarray:
+    """
+    入力画像座標の (x, y, width, height) を元フレーム座標にその場で変換
+
+    配列の型（モデル出力のfloat32）のまま計算し、新しい配列は確保しない。
+
+    Args:
+        boxes: 形状 (N, 4) の浮動小数点配列（書き換えられる）
+        scale: 前処理の縮小率
+        pad: 前処理の(左, 上)パディング
+
+    Returns:
+        np.ndarray: 変換後のboxes（同じ配列）
+    """
+    boxes[:, 0] -= pad[0]
+    boxes[:, 1] -= pad[1]
+    boxes /= scale
+    return boxes
+
+
+def letterbox_reference(frame: np.ndarray, input_size: int,
+                        pad_value: int = PAD_VALUE) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    毎回配列を確保する従来の前処理（照合・ベンチマーク用）
+
+    Args:
+        frame: 入力フレーム（BGR形式）
+        input_size: モデルの入力サイズ（正方形）
+        pad_value: パディングの画素値
+
+    Returns:
+        Tuple: 入力テンソル、縮小率、(左, 上)のパディング
+    """
+    height, width = frame.shape[:2]
+    size = input_size
+    scale = min(size / width, size / height)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    left, top = (size - new_width) // 2, (size - new_height) // 2
+
+    resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), pad_value, dtype=np.uint8)
+    canvas[top:top + new_height, left:left + new_width] = resized
+
+    rgb = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
+    blob = rgb.transpose(2, 0, 1)[np.newaxis].astype(np.float32) / 255.0
+    return blob, scale, (left, top)
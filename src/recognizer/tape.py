@@ -0,0 +1,140 @@
+"""
+色付きテープ判定
+ボトルの蓋に貼った色付きテープの色から薬液の種類を判定する（REQ-003）
+
+縮小したフレームをHSVに変換し、薬液ごとに事前に用意した色範囲（cv2.inRange）の画素数を数える。
+YOLOの推論（数十ミリ秒）に比べて1ミリ秒未満で終わるため、認識の最初の段として使う。
+
+フレーム全体の色を数えるため、ボトル以外の赤・青の物（手袋・ラベルなど）でも判定が決まりうる。
+そのため信頼度はテープ色の面積と2番目の色との差から求め、検出器の結果より重くならないようにする。
+既定の色範囲は仮の値で、実機のテープとカメラで調整してから使う。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+
+import cv2
+import numpy as np
+
+from src.medicine_selector import MedicineType
+
+
+# 既定のテープ色（HSV、OpenCVの色相は0〜180）
+DEFAULT_TAPE_COLORS: Dict[MedicineType, List[Tuple[Sequence[int], Sequence[int]]]] = {
+    # 赤（色相が0付近と180付近にまたがる）
+    MedicineType.SODIUM_HYPOCHLORITE: [((0, 100, 80), (10, 255, 255)), ((170, 100, 80), (180, 255, 255))],
+    # 青
+    MedicineType.ACETIC_ACID: [((100, 100, 80), (130, 255, 255))],
+}
+
+
+@dataclass
+class TapeResult:
+    """テープ判定結果データクラス"""
+    medicine: Optional[MedicineType]  # 判定した薬液（曖昧ならNone）
+    ratios: Dict[MedicineType, float] = field(default_factory=dict)  # 薬液ごとのテープ色の画素の割合
+    decisive: bool = False  # テープだけで判定できたかどうか
+    confidence: float = 0.0  # 判定の信頼度（面積と2番目の色との差から求める、曖昧なら0）
+
+
+class TapeClassifier:
+    """色付きテープによる薬液判定クラス"""
+
+    def __init__(self, colors: Optional[Dict[MedicineType, List[Tuple[Sequence[int], Sequence[int]]]]] = None,
+                 analysis_width: int = 160, min_area_ratio: float = 0.01, dominance: float = 3.0,
+                 confidence_area_ratio: float = 0.05):
+        """
+        テープ判定クラスの初期化
+
+        Args:
+            colors: 薬液ごとのHSV色範囲 (下限, 上限) のリスト
+            analysis_width: 判定に使う縮小画像の幅
+            min_area_ratio: テープとみなす画素の割合の下限
+            dominance: 2番目に多い色に対して何倍以上あれば判定できたとみなすか
+            confidence_area_ratio: 面積による信頼度の減点がなくなるテープ色の画素の割合
+        """
+        colors = colors or DEFAULT_TAPE_COLORS
+        self.ranges = {
+            medicine: [(np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8))
+                       for lower, upper in color_ranges]
+            for medicine, color_ranges in colors.items()
+        }
+        self.analysis_width = analysis_width
+        self.min_area_ratio = min_area_ratio
+        self.dominance = dominance
+        self.confidence_area_ratio = confidence_area_ratio
+        self.lock = threading.Lock()
+        self._small: Optional[np.ndarray] = None
+        self._hsv: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_config(cls, tape_config: dict) -> "TapeClassifier":
+        """
+        config.yamlのtapeセクションから判定クラスを作成
+
+        colorsのキーはMedicineTypeの名前（sodium_hypochlorite、acetic_acid）。
+
+        Args:
+            tape_config: テープ判定設定
+        """
+        colors = None
+        if tape_config.get('colors'):
+            colors = {
+                MedicineType[name.upper()]: [(lower, upper) for lower, upper in color_ranges]
+                for name, color_ranges in tape_config['colors'].items()
+            }
+        return cls(
+            colors=colors,
+            analysis_width=tape_config.get('analysis_width', 160),
+            min_area_ratio=tape_config.get('min_area_ratio', 0.01),
+            dominance=tape_config.get('dominance', 3.0),
+            confidence_area_ratio=tape_config.get('confidence_area_ratio', 0.05),
+        )
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """フレームを縮小してHSVに変換（バッファはサイズが変わったときだけ確保）"""
+        height, width = frame.shape[:2]
+        small_width = min(self.analysis_width, width)
+        small_height = max(1, int(round(height * small_width / width)))
+        if self._small is None or self._small.shape[:2] != (small_height, small_width):
+            self._small = np.empty((small_height, small_width, 3), dtype=np.uint8)
+            self._hsv = np.empty_like(self._small)
+            self._mask = np.empty((small_height, small_width), dtype=np.uint8)
+
+        source = frame
+        if (small_width, small_height) != (width, height):
+            source = cv2.resize(frame, (small_width, small_height), dst=self._small, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(source, cv2.COLOR_BGR2HSV, dst=self._hsv)
+
+    def classify(self, frame: np.ndarray) -> TapeResult:
+        """
+        テープの色から薬液を判定
+
+        Args:
+            frame: 入力フレーム（BGR形式）
+
+        Returns:
+            TapeResult: 判定結果（テープが見えない・複数の色が同程度ならdecisive=False）
+        """
+        with self.lock:
+            hsv = self._prepare(frame)
+            total = hsv.shape[0] * hsv.shape[1]
+            ratios = {}
+            for medicine, color_ranges in self.ranges.items():
+                count = 0
+                for lower, upper in color_ranges:
+                    cv2.inRange(hsv, lower, upper, dst=self._mask)
+                    count += cv2.countNonZero(self._mask)
+                ratios[medicine] = count / total
+
+        ranked = sorted(ratios.items(), key=lambda item: item[1], reverse=True)
+        best, best_ratio = ranked[0]
+        second_ratio = ranked[1][1] if len(ranked) > 1 else 0.0
+        decisive = best_ratio >= self.min_area_ratio and best_ratio >= self.dominance * second_ratio
+        if not decisive:
+            return TapeResult(None, ratios, False)
+        # 面積が小さいほど・2番目の色が多いほど信頼度を下げる
+        confidence = min(1.0, best_ratio / self.confidence_area_ratio) * (1.0 - second_ratio / best_ratio)
+        return TapeResult(best, ratios, True, confidence)
@@ -0,0 +1,321 @@
+"""
+検出結果の追跡
+YOLOの検出をキーフレームごとにだけ行い、その間のフレームは追跡（IoUによる対応付け＋カルマンフィルタ）で
+検出結果を引き継ぐ
+
+ボトルは一度検出されるとほとんど動かないため、30fpsで毎フレームYOLOを実行する必要はない（REQ-007: CPU 80%以下）。
+検出器は次の場合にだけ実行する:
+- 前回の検出から keyframe_interval フレーム経過した
+- 引き継いだ検出の信頼度が min_track_confidence を下回った
+
+結果として返すのは直近のキーフレームで検出器が確認した追跡だけで、対応する検出がなくなった追跡は
+結果に出さずに、再び検出されたときの対応付け（追跡IDの引き継ぎ）のためだけに残す。
+別の物体に置き換わった直後に、前の物体の追跡が判定に使われ続けないようにするため。
+"""
+
+from typing import List, Optional, Sequence, Tuple
+import threading
+
+import cv2
+import numpy as np
+
+from src.recognizer.postprocess import DetectionBatch
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    2組の (x, y, width, height) のすべての組み合わせのIoU
+
+    Args:
+        boxes_a: 形状 (N, 4)
+        boxes_b: 形状 (M, 4)
+
+    Returns:
+        np.ndarray: 形状 (N, M) のIoU
+    """
+    a = np.asarray(boxes_a, dtype=np.float64)[:, np.newaxis, :]
+    b = np.asarray(boxes_b, dtype=np.float64)[np.newaxis, :, :]
+    width = np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0])
+    height = np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1])
+    inter = np.maximum(width, 0) * np.maximum(height, 0)
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+class Track:
+    """追跡中の1つの物体"""
+
+    __slots__ = ("track_id", "class_id", "score", "confidence", "kalman", "box", "misses", "age")
+
+    def __init__(self, track_id: int, box: np.ndarray, class_id: int, score: float):
+        """
+        追跡の初期化
+
+        Args:
+            track_id: 追跡ID
+            box: 元フレーム座標の (x, y, width, height)
+            class_id: クラスID
+            score: 検出器の信頼度
+        """
+        self.track_id = track_id
+        self.class_id = class_id
+        self.score = score
+        self.confidence = score
+        self.misses = 0
+        self.age = 0
+        self.box = np.asarray(box, dtype=np.float64).copy()
+
+        # 状態 (cx, cy, w, h, vx, vy, vw, vh) の等速モデル
+        kalman = cv2.KalmanFilter(8, 4)
+        kalman.transitionMatrix = np.eye(8, dtype=np.float32)
+        kalman.transitionMatrix[:4, 4:] = np.eye(4, dtype=np.float32)
+        kalman.measurementMatrix = np.eye(4, 8, dtype=np.float32)
+        kalman.processNoiseCov = np.diag([1, 1, 1, 1, 0.1, 0.1, 0.1, 0.1]).astype(np.float32)
+        kalman.measurementNoiseCov = np.eye(4, dtype=np.float32) * 4
+        kalman.errorCovPost = np.diag([10, 10, 10, 10, 100, 100, 100, 100]).astype(np.float32)
+        kalman.statePost = np.zeros((8, 1), dtype=np.float32)
+        kalman.statePost[:4, 0] = self._to_center(self.box)
+        self.kalman = kalman
+
+    @staticmethod
+    def _to_center(box: np.ndarray) -> np.ndarray:
+        x, y, w, h = box
+        return np.array([x + w / 2, y + h / 2, w, h], dtype=np.float32)
+
+    def predict(self, confidence_decay: float):
+        """1フレーム先の位置を予測し、検出からの経過に応じて信頼度を下げる"""
+        cx, cy, w, h = self.kalman.predict()[:4, 0]
+        w, h = max(float(w), 1.0), max(float(h), 1.0)
+        self.box[:] = (cx - w / 2, cy - h / 2, w, h)
+        self.confidence *= confidence_decay
+        self.age += 1
+
+    def update(self, box: np.ndarray, score: float):
+        """検出結果で状態を補正"""
+        self.kalman.correct(self._to_center(np.asarray(box, dtype=np.float64)).reshape(4, 1))
+        self.box[:] = box
+        self.score = score
+        self.confidence = score
+        self.misses = 0
+
+
+class IoUTracker:
+    """IoUによる対応付けとカルマンフィルタで検出結果を追跡するクラス"""
+
+    def __init__(self, iou_threshold: float = 0.3, max_misses: int = 2, confidence_decay: float = 0.95):
+        """
+        追跡クラスの初期化
+
+        Args:
+            iou_threshold: 同じ物体とみなすIoUの下限
+            max_misses: 対応する検出がないまま（結果には出さずに）追跡を残すキーフレーム数
+            confidence_decay: 1フレームごとの信頼度の減衰率
+        """
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.confidence_decay = confidence_decay
+        self.tracks: List[Track] = []
+        self.next_id = 1
+
+    def reset(self):
+        """すべての追跡を破棄"""
+        self.tracks = []
+
+    def predict(self):
+        """すべての追跡を1フレーム進める"""
+        for track in self.tracks:
+            track.predict(self.confidence_decay)
+
+    def update(self, boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray):
+        """
+        検出結果を追跡に対応付け（同じクラスでIoUの大きい組から順に対応させる）
+
+        対応する検出がない追跡は、同じ場所に別のクラスが検出されていれば破棄し、
+        そうでなければ max_misses 回まで結果に出さずに残す。
+
+        Args:
+            boxes: 元フレーム座標の (x, y, width, height)、形状 (N, 4)
+            scores: 信頼度、形状 (N,)
+            class_ids: クラスID、形状 (N,)
+        """
+        matched_tracks = set()
+        matched_detections = set()
+        replaced_tracks = set()
+        if self.tracks and len(scores):
+            track_boxes = np.array([track.box for track in self.tracks])
+            track_classes = np.array([track.class_id for track in self.tracks])
+            iou = iou_matrix(track_boxes, boxes)
+            other_class = track_classes[:, np.newaxis] != np.asarray(class_ids)[np.newaxis, :]
+            # 同じ場所に別のクラスが検出された追跡（置き換わった物体）
+            replaced_tracks = set(np.flatnonzero((np.where(other_class, iou, 0.0) >= self.iou_threshold).any(axis=1))
+                                  .tolist())
+            iou[other_class] = 0.0
+            while True:
+                track_index, detection_index = np.unravel_index(np.argmax(iou), iou.shape)
+                if iou[track_index, detection_index] < self.iou_threshold:
+                    break
+                self.tracks[track_index].update(boxes[detection_index], float(scores[detection_index]))
+                matched_tracks.add(int(track_index))
+                matched_detections.add(int(detection_index))
+                iou[track_index, :] = 0.0
+                iou[:, detection_index] = 0.0
+
+        survivors = []
+        for index, track in enumerate(self.tracks):
+            if index not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses or index in replaced_tracks:
+                    continue
+            survivors.append(track)
+        for index in range(len(scores)):
+            if index not in matched_detections:
+                survivors.append(Track(self.next_id, boxes[index], int(class_ids[index]), float(scores[index])))
+                self.next_id += 1
+        self.tracks = survivors
+
+    def confirmed_tracks(self) -> List[Track]:
+        """直近のキーフレームで検出器が確認した追跡（結果として返す追跡）"""
+        return [track for track in self.tracks if track.misses == 0]
+
+    def min_confidence(self) -> float:
+        """結果として返す追跡の信頼度の最小値（追跡がなければ1.0）"""
+        return min((track.confidence for track in self.confirmed_tracks()), default=1.0)
+
+    def to_batch(self, class_names: Sequence[str], frame_shape: Tuple[int, int]) -> DetectionBatch:
+        """
+        直近のキーフレームで確認した追跡をフレームの範囲に収めた検出結果に変換
+
+        Args:
+            class_names: クラス名のリスト
+            frame_shape: フレームの(高さ, 幅)
+
+        Returns:
+            DetectionBatch: 信頼度の高い順、track_ids付きの検出結果
+        """
+        tracks = sorted(self.confirmed_tracks(), key=lambda track: track.confidence, reverse=True)
+        if not tracks:
+            batch = DetectionBatch.empty(class_names)
+            batch.track_ids = np.empty(0, dtype=np.int64)
+            return batch
+
+        frame_height, frame_width = frame_shape
+        corners = np.array([track.box for track in tracks], dtype=np.float64)
+        corners[:, 2:4] += corners[:, 0:2]
+        np.clip(corners[:, 0::2], 0, frame_width, out=corners[:, 0::2])
+        np.clip(corners[:, 1::2], 0, frame_height, out=corners[:, 1::2])
+        corners = corners.astype(np.int32)
+        corners[:, 2:4] -= corners[:, 0:2]
+        return DetectionBatch(
+            corners,
+            np.array([track.confidence for track in tracks], dtype=np.float32),
+            np.array([track.class_id for track in tracks], dtype=np.int32),
+            class_names,
+            np.array([track.track_id for track in tracks], dtype=np.int64),
+        )
+
+
+class TrackingRecognizer:
+    """キーフレームでだけ検出器を実行し、間のフレームは追跡で補う認識クラス"""
+
+    def __init__(self, detector, keyframe_interval: int = 10, min_track_confidence: float = 0.35,
+                 tracker: Optional[IoUTracker] = None):
+        """
+        追跡付き認識クラスの初期化
+
+        Args:
+            detector: 検出器（detect_batchとclass_namesを持つAIRecognizerなど）
+            keyframe_interval: 検出器を実行する間隔（フレーム数）、1で毎フレーム
+            min_track_confidence: 引き継いだ信頼度がこれを下回ったら検出器を実行する
+            tracker: 追跡クラス（Noneで既定値）
+        """
+        self.detector = detector
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.min_track_confidence = min_track_confidence
+        self.tracker = tracker or IoUTracker()
+        self.lock = threading.Lock()
+        # 検出器の実行中か（実行中にほかのワーカーが来たら追跡の結果を返す）
+        self.detecting = False
+        self.frames_since_keyframe = 0
+        self.frames = 0
+        self.detector_calls = 0
+
+    @classmethod
+    def from_config(cls, detector, tracking_config: dict) -> "TrackingRecognizer":
+        """
+        config.yamlのtrackingセクションから追跡付き認識クラスを作成
+
+        Args:
+            detector: 検出器
+            tracking_config: 追跡設定
+        """
+        tracker = IoUTracker(
+            iou_threshold=tracking_config.get('iou_threshold', 0.3),
+            max_misses=tracking_config.get('max_misses', 2),
+            confidence_decay=tracking_config.get('confidence_decay', 0.95),
+        )
+        return cls(
+            detector,
+            keyframe_interval=tracking_config.get('keyframe_interval', 10),
+            min_track_confidence=tracking_config.get('min_track_confidence', 0.35),
+            tracker=tracker,
+        )
+
+    @property
+    def class_names(self) -> List[str]:
+        return self.detector.class_names
+
+    def reset(self):
+        """追跡を破棄し、次のフレームで検出器を実行する"""
+        with self.lock:
+            self.tracker.reset()
+            self.frames_since_keyframe = 0
+
+    def detect_batch(self, frame: np.ndarray) -> DetectionBatch:
+        """
+        検出結果を取得（必要なときだけ検出器を実行）
+
+        Args:
+            frame: 入力フレーム（BGR形式）
+
+        Returns:
+            DetectionBatch: track_ids付きの検出結果
+        """
+        with self.lock:
+            self.frames += 1
+            keyframe = not self.detecting and (self.frames_since_keyframe == 0
+                                               or self.frames_since_keyframe >= self.keyframe_interval
+                                               or self.tracker.min_confidence() < self.min_track_confidence)
+            self.tracker.predict()
+            if not keyframe:
+                self.frames_since_keyframe += 1
+                return self.tracker.to_batch(self.class_names, frame.shape[:2])
+            self.detecting = True
+            self.detector_calls += 1
+            self.frames_since_keyframe = 1
+
+        # 検出器の実行中はロックを外し、ほかの認識ワーカーは追跡の結果を返す
+        try:
+            batch = self.detector.detect_batch(frame)
+        except Exception:
+            with self.lock:
+                self.detecting = False
+            raise
+        with self.lock:
+            self.detecting = False
+            self.tracker.update(batch.boxes.astype(np.float64), batch.scores, batch.class_ids)
+            return self.tracker.to_batch(self.class_names, frame.shape[:2])
+
+    def get_stats(self) -> dict:
+        """
+        追跡の統計を取得
+
+        Returns:
+            dict: フレーム数、検出器の実行回数と割合、追跡中の物体数
+        """
+        with self.lock:
+            return {
+                "frames": self.frames,
+                "detector_calls": self.detector_calls,
+                "detector_ratio": self.detector_calls / self.frames if self.frames else 0.0,
+                "tracks": len(self.tracker.tracks),
+            }
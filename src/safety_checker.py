@@ -0,0 +1,258 @@
+"""
+安全確認クラス
+選択した薬液と認識した薬液を照合し、◯（一致）/ ✕（不一致）を判定する（REQ-009: 誤操作検出率100%）
+
+1フレームの認識結果だけで判定すると誤認識でちらつき、多数のフレームを待つと判定が遅れる。
+そのため、フレームごとの認識結果を次の2つで逐次判定する（1フレームあたりO(1)）。
+
+- 逐次確率比検定（SPRT）: 信頼度で重み付けした対数尤度比を累積し、閾値を超えた時点で即座に判定する。
+  「一致」と誤って判定する確率（alpha）は「不一致」と誤って判定する確率（beta）より十分小さくするため、
+  ✕は◯より少ないフレームで出る。
+- スライディングウィンドウ: 直近のフレームの信頼度付き一致率で判定を維持・変更する。
+  判定を出す閾値と取り消す閾値を分けて（ヒステリシス）、1フレームのノイズで判定が揺れないようにする。
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, List, Optional, Union
+import math
+import threading
+import time
+
+from src.medicine_selector import MedicineType
+
+
+class Verdict(Enum):
+    """判定結果"""
+    PENDING = "判定中"
+    SAFE = "◯"
+    UNSAFE = "✕"
+
+
+@dataclass
+class SessionRecord:
+    """1回の補充作業（セッション）の判定記録データクラス"""
+    selected_medicine: str
+    verdict: Verdict  # 最初に出た判定
+    time_to_verdict: float  # セッション開始から最初の判定までの時間（秒）
+    frames_to_verdict: int  # 最初の判定までに使ったフレーム数
+    early_exit: bool  # SPRTで（ウィンドウが埋まる前に）判定したかどうか
+
+
+MedicineLike = Union[MedicineType, str, None]
+
+
+def _medicine_name(medicine: MedicineLike) -> Optional[str]:
+    """MedicineTypeまたは薬液名を薬液名に揃える"""
+    if isinstance(medicine, MedicineType):
+        return medicine.value
+    return medicine or None
+
+
+class SafetyChecker:
+    """安全確認クラス（逐次判定エンジン）"""
+
+    def __init__(self, window: int = 15, safe_enter: float = 0.8, safe_exit: float = 0.6,
+                 alpha: float = 1e-4, beta: float = 1e-2, frame_accuracy: float = 0.9,
+                 min_confidence: float = 0.3,
+                 on_verdict: Optional[Callable[[Verdict], None]] = None):
+        """
+        安全確認クラスの初期化
+
+        Args:
+            window: スライディングウィンドウのフレーム数
+            safe_enter: ◯を出すウィンドウ内の一致率（これ未満かつ1-safe_enter以下で✕）
+            safe_exit: ◯を取り消して✕にするウィンドウ内の一致率
+            alpha: 不一致なのに◯と判定する確率の上限（SPRT）
+            beta: 一致しているのに✕と判定する確率の上限（SPRT）
+            frame_accuracy: 1フレームの認識結果が正しい確率（SPRTの尤度）
+            min_confidence: これ未満の信頼度の認識結果は使わない
+            on_verdict: 判定が変わったときに呼ばれるコールバック（音声・表示用）
+        """
+        self.window = max(1, window)
+        self.safe_enter = safe_enter
+        self.safe_exit = safe_exit
+        self.min_confidence = min_confidence
+        self.on_verdict = on_verdict
+        # 1フレームあたりの対数尤度比と判定閾値
+        self.frame_llr = math.log(frame_accuracy / (1.0 - frame_accuracy))
+        self.safe_llr = math.log((1.0 - beta) / alpha)
+        self.unsafe_llr = math.log(beta / (1.0 - alpha))
+        self.lock = threading.Lock()
+
+        self.history: List[SessionRecord] = []
+        self.selected_medicine: Optional[str] = None
+        self._reset_session(None, time.monotonic())
+
+    @classmethod
+    def from_config(cls, safety_config: dict, **kwargs) -> "SafetyChecker":
+        """
+        config.yamlのsafetyセクションから安全確認クラスを作成
+
+        Args:
+            safety_config: 安全確認設定
+            **kwargs: 追加の引数（on_verdictなど）
+        """
+        return cls(
+            window=safety_config.get('window', 15),
+            safe_enter=safety_config.get('safe_enter', 0.8),
+            safe_exit=safety_config.get('safe_exit', 0.6),
+            alpha=safety_config.get('alpha', 1e-4),
+            beta=safety_config.get('beta', 1e-2),
+            frame_accuracy=safety_config.get('frame_accuracy', 0.9),
+            min_confidence=safety_config.get('min_confidence', 0.3),
+            **kwargs
+        )
+
+    @staticmethod
+    def check_safety(selected_medicine: MedicineLike, detected_medicine: MedicineLike) -> bool:
+        """
+        安全性チェック（1回分の照合）
+
+        Args:
+            selected_medicine: 選択された薬液
+            detected_medicine: 認識された薬液
+
+        Returns:
+            bool: 一致する場合True
+        """
+        selected = _medicine_name(selected_medicine)
+        return selected is not None and selected == _medicine_name(detected_medicine)
+
+    def _reset_session(self, selected: Optional[str], now: float):
+        """セッションの状態を初期化（self.lock内で呼ぶ）"""
+        self.selected_medicine = selected
+        self.verdict = Verdict.PENDING
+        self.session_start = now
+        self.session_frames = 0
+        self.recorded = False
+        self.llr = 0.0
+        self.votes: deque = deque()
+        self.weight_sum = 0.0
+        self.match_weight_sum = 0.0
+
+    def start_session(self, selected_medicine: MedicineLike, timestamp: Optional[float] = None):
+        """
+        補充作業（セッション）を開始
+
+        Args:
+            selected_medicine: 選択された薬液
+            timestamp: 開始時刻（time.monotonic()）、Noneで現在時刻
+        """
+        with self.lock:
+            self._reset_session(_medicine_name(selected_medicine),
+                                time.monotonic() if timestamp is None else timestamp)
+
+    def update(self, detected_medicine: MedicineLike, confidence: float = 1.0,
+               timestamp: Optional[float] = None) -> Verdict:
+        """
+        1フレームの認識結果で判定を更新
+
+        Args:
+            detected_medicine: 認識された薬液（認識できなかったフレームはNone）
+            confidence: 認識の信頼度（0〜1）
+            timestamp: フレーム取得時刻（time.monotonic()）、Noneで現在時刻
+
+        Returns:
+            Verdict: 現在の判定
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        detected = _medicine_name(detected_medicine)
+        with self.lock:
+            if self.selected_medicine is None or detected is None or confidence < self.min_confidence:
+                return self.verdict
+
+            self.session_frames += 1
+            match = detected == self.selected_medicine
+            weight = min(1.0, confidence)
+
+            # SPRT: 判定の両閾値の間に収めて、判定後の取り消しにも同じ証拠量が要るようにする
+            self.llr += weight * self.frame_llr if match else -weight * self.frame_llr
+            self.llr = max(self.unsafe_llr, min(self.safe_llr, self.llr))
+
+            # スライディングウィンドウ: 追加と押し出しの差分だけ合計を更新する
+            self.votes.append((match, weight))
+            self.weight_sum += weight
+            self.match_weight_sum += weight if match else 0.0
+            if len(self.votes) > self.window:
+                old_match, old_weight = self.votes.popleft()
+                self.weight_sum -= old_weight
+                self.match_weight_sum -= old_weight if old_match else 0.0
+            match_ratio = self.match_weight_sum / self.weight_sum if self.weight_sum > 0 else 0.0
+            window_full = len(self.votes) >= self.window
+
+            previous = self.verdict
+            early = False
+            if self.verdict == Verdict.PENDING:
+                if self.llr <= self.unsafe_llr:
+                    self.verdict, early = Verdict.UNSAFE, not window_full
+                elif self.llr >= self.safe_llr:
+                    self.verdict, early = Verdict.SAFE, not window_full
+                elif window_full and match_ratio >= self.safe_enter:
+                    self.verdict = Verdict.SAFE
+                elif window_full and match_ratio <= 1.0 - self.safe_enter:
+                    self.verdict = Verdict.UNSAFE
+            elif self.verdict == Verdict.SAFE:
+                if match_ratio < self.safe_exit or self.llr <= self.unsafe_llr:
+                    self.verdict = Verdict.UNSAFE
+            elif match_ratio >= self.safe_enter and self.llr >= self.safe_llr:
+                # ✕から◯に戻すには両方の条件を満たす十分な証拠が必要
+                self.verdict = Verdict.SAFE
+
+            if self.verdict != Verdict.PENDING and not self.recorded:
+                self.recorded = True
+                self.history.append(SessionRecord(
+                    self.selected_medicine, self.verdict, now - self.session_start,
+                    self.session_frames, early
+                ))
+            verdict = self.verdict
+
+        if verdict != previous and self.on_verdict:
+            self.on_verdict(verdict)
+        return verdict
+
+    def update_from_detections(self, detections, timestamp: Optional[float] = None) -> Verdict:
+        """
+        検出結果（DetectionBatchまたはDetectionのリスト）の最も信頼度の高い検出で判定を更新
+
+        Args:
+            detections: 1フレームの検出結果
+            timestamp: フレーム取得時刻
+
+        Returns:
+            Verdict: 現在の判定
+        """
+        best = max(detections, key=lambda d: d.confidence, default=None)
+        if best is None:
+            return self.update(None, 0.0, timestamp)
+        return self.update(best.medicine_type, best.confidence, timestamp)
+
+    def get_verdict(self) -> Verdict:
+        """現在の判定を取得"""
+        with self.lock:
+            return self.verdict
+
+    def get_stats(self) -> dict:
+        """
+        セッションごとの判定までの時間の統計を取得
+
+        Returns:
+            dict: セッション数、判定までの平均・p95・最大時間（ミリ秒）、平均フレーム数、SPRTで判定した割合
+        """
+        with self.lock:
+            records = list(self.history)
+        if not records:
+            return {"sessions": 0, "avg_time_to_verdict_ms": 0.0, "p95_time_to_verdict_ms": 0.0,
+                    "max_time_to_verdict_ms": 0.0, "avg_frames_to_verdict": 0.0, "early_exit_rate": 0.0}
+
+        times = sorted(record.time_to_verdict for record in records)
+        p95_index = min(len(times) - 1, int(len(times) * 0.95))
+        return {
+            "sessions": len(records),
+            "avg_time_to_verdict_ms": 1000.0 * sum(times) / len(times),
+            "p95_time_to_verdict_ms": 1000.0 * times[p95_index],
+            "max_time_to_verdict_ms": 1000.0 * times[-1],
+            "avg_frames_to_verdict": sum(record.frames_to_verdict for record in records) / len(records),
+            "early_exit_rate": sum(record.early_exit for record in records) / len(records),
+        }
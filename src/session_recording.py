@@ -0,0 +1,389 @@
+"""
+セッションの記録・再生
+カメラのフレームと取得時刻をファイルに記録し、cv2.VideoCaptureの代わりに再生する
+（現場で起きた判定の遅れや誤検出を、カメラなしの開発環境で再現するため）
+
+ファイル形式（リトルエンディアン）:
+- ヘッダー（64バイト）: マジック、バージョン、形式（raw / jpeg）、幅、高さ、fps
+- フレームのデータ（raw: BGRのままの画素、jpeg: JPEGの圧縮データ）。各フレームは64バイト境界から始まる
+- インデックス: フレームごとの (オフセット, サイズ, 取得時刻) の配列
+- フッター（24バイト）: インデックスのオフセット、フレーム数、マジック
+
+再生ではファイル全体をメモリマップし、インデックスから任意のフレームへ直接シークする。
+rawはマップした画素をそのままコピーするだけなのでデコード不要、jpegはファイルが小さい。
+"""
+
+from typing import Callable, Optional, Tuple
+import mmap
+import os
+import struct
+import time
+
+import cv2
+import numpy as np
+
+
+MAGIC = b"DSREC001"
+FOOTER_MAGIC = b"DSRIDX01"
+VERSION = 1
+CODECS = ("raw", "jpeg")
+
+# マジック, バージョン, 形式, 幅, 高さ, fps
+_HEADER = struct.Struct("<8sI4sIId")
+HEADER_SIZE = 64
+# インデックスのオフセット, フレーム数, マジック
+_FOOTER = struct.Struct("<QQ8s")
+# フレームの開始位置の境界（rawの画素をメモリマップからそのまま参照できるように揃える）
+ALIGNMENT = 64
+
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("size", "<u8"), ("timestamp", "<f8")])
+
+
+class RecordingFormatError(Exception):
+    """記録ファイルが壊れている、または対応していない形式の場合のエラー"""
+
+
+class SessionRecorder:
+    """フレームと取得時刻をファイルに記録するクラス"""
+
+    def __init__(self, path: str, fps: float = 30.0, codec: str = "raw", jpeg_quality: int = 90):
+        """
+        記録の初期化（ファイルは最初のフレームで作成し、幅・高さもそのフレームから決める）
+
+        Args:
+            path: 記録ファイルのパス（time.strftimeの書式を含めると作成時の日時に置き換える）
+            fps: 記録元の公称フレームレート（再生時のCAP_PROP_FPS）
+            codec: フレームの保存形式（raw: 無圧縮BGR / jpeg: JPEG圧縮）
+            jpeg_quality: jpeg形式の画質（0〜100）
+        """
+        if codec not in CODECS:
+            raise ValueError(f"対応していない形式です: {codec}")
+        self.path = path
+        self.fps = fps
+        self.codec = codec
+        self.jpeg_quality = jpeg_quality
+        self.width = 0
+        self.height = 0
+        self.frame_count = 0
+        self.bytes_written = 0
+        self.closed = False
+        self._entries = []
+        self._file = None
+        self._position = 0
+
+    def __enter__(self) -> "SessionRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self):
+        """記録ファイルを作成してヘッダーの領域を確保"""
+        self.path = time.strftime(self.path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(b"\0" * HEADER_SIZE)
+        self._position = HEADER_SIZE
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """
+        1フレームを記録
+
+        Args:
+            frame: フレーム（BGR形式、uint8）
+            timestamp: 取得時刻（time.monotonic()の秒、Noneで現在時刻）
+
+        Raises:
+            ValueError: フレームの形状が最初のフレームと異なる場合
+        """
+        if self.closed:
+            raise ValueError("記録は終了しています")
+        if frame.ndim != 3 or frame.shape[2] != 3 or frame.dtype != np.uint8:
+            raise ValueError("フレームはBGR形式のuint8である必要があります")
+        height, width = frame.shape[:2]
+        if self._file is None:
+            self._open()
+            self.width, self.height = width, height
+        elif (width, height) != (self.width, self.height):
+            raise ValueError(f"フレームサイズが変わりました: {width}x{height} (記録中 {self.width}x{self.height})")
+
+        if self.codec == "jpeg":
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                raise ValueError("JPEGへの圧縮に失敗しました")
+            data = encoded.data
+        else:
+            data = np.ascontiguousarray(frame).data
+
+        padding = -self._position % ALIGNMENT
+        if padding:
+            self._file.write(b"\0" * padding)
+            self._position += padding
+        self._file.write(data)
+        size = data.nbytes
+        self._entries.append((self._position, size, time.monotonic() if timestamp is None else timestamp))
+        self._position += size
+        self.frame_count += 1
+        self.bytes_written += size
+
+    def close(self):
+        """インデックスとヘッダーを書き込んでファイルを閉じる（複数回呼んでも安全）"""
+        self.closed = True
+        if self._file is None:
+            return
+        index = np.array(self._entries, dtype=INDEX_DTYPE)
+        if len(index):
+            # 取得時刻は最初のフレームからの経過秒で保存する
+            index["timestamp"] -= index["timestamp"][0]
+        self._file.write(index.tobytes())
+        self._file.write(_FOOTER.pack(self._position, len(index), FOOTER_MAGIC))
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, self.codec.ljust(4).encode("ascii"),
+                                      self.width, self.height, float(self.fps)))
+        self._file.close()
+        self._file = None
+        print(f"セッションを記録しました: {self.path} ({self.frame_count}フレーム, {self.codec})")
+
+
+class RecordingVideoCapture:
+    """VideoCapture互換オブジェクトを包み、読み出したフレームを記録するクラス"""
+
+    def __init__(self, capture, recorder: SessionRecorder):
+        """
+        Args:
+            capture: 記録元のVideoCapture互換オブジェクト
+            recorder: 記録先（release()で閉じる）
+        """
+        self.capture = capture
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.capture, name)
+
+    def _record(self, ret: bool, frame: Optional[np.ndarray]):
+        if ret and frame is not None:
+            # 合成カメラなど撮影時刻を持つ取得元はその時刻を使う
+            self.recorder.write(frame, getattr(self.capture, "grabbed_timestamp", None))
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, frame = self.capture.read(image)
+        self._record(ret, frame)
+        return ret, frame
+
+    def retrieve(self, image: Optional[np.ndarray] = None, flag: int = 0) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, frame = self.capture.retrieve(image, flag)
+        self._record(ret, frame)
+        return ret, frame
+
+    def release(self):
+        self.capture.release()
+        self.recorder.close()
+
+
+class ReplayVideoCapture:
+    """記録ファイルを再生するcv2.VideoCapture互換の映像ソース"""
+
+    def __init__(self, path: str, realtime: bool = True, speed: float = 1.0, loop: bool = False):
+        """
+        再生の初期化
+
+        Args:
+            path: 記録ファイルのパス
+            realtime: Trueの場合は記録時の取得間隔どおりにgrab()が待機する（Falseで待たずに返す）
+            speed: realtime時の再生速度の倍率
+            loop: Trueの場合は最後まで再生したら先頭に戻る
+
+        Raises:
+            RecordingFormatError: 記録ファイルが壊れている、または対応していない形式の場合
+        """
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        if not os.path.isfile(path) or os.path.getsize(path) < HEADER_SIZE + _FOOTER.size:
+            raise RecordingFormatError(f"記録ファイルがないか短すぎます: {path}")
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except Exception:
+            self._map.close()
+            raise
+        self.data = np.frombuffer(self._map, dtype=np.uint8)
+        self.frame_index = 0
+        self.opened = True
+        self.read_count = 0
+        # 直近にgrab()したフレームの再生時刻（time.monotonic()）と記録時の取得時刻（先頭からの秒）
+        self.grabbed_timestamp = 0.0
+        self.recorded_timestamp = 0.0
+        self._pending: Optional[int] = None
+        self._start_time: Optional[float] = None
+        self._start_offset = 0.0
+
+    def _read_header(self):
+        """ヘッダー・フッター・インデックスを読み込む"""
+        magic, version, codec, width, height, fps = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise RecordingFormatError(f"記録ファイルの形式が不正です: {self.path}")
+        index_offset, count, footer_magic = _FOOTER.unpack_from(self._map, len(self._map) - _FOOTER.size)
+        if footer_magic != FOOTER_MAGIC or index_offset + count * INDEX_DTYPE.itemsize + _FOOTER.size != len(self._map):
+            raise RecordingFormatError(f"記録ファイルのインデックスが壊れています（記録が途中で終了した可能性）: {self.path}")
+        self.codec = codec.decode("ascii").strip()
+        if self.codec not in CODECS:
+            raise RecordingFormatError(f"対応していない形式です: {self.codec}")
+        self.width, self.height, self.fps = width, height, fps
+        self.index = np.frombuffer(self._map, dtype=INDEX_DTYPE, count=count, offset=index_offset)
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.index)
+
+    @property
+    def duration(self) -> float:
+        """記録の長さ（秒）"""
+        return float(self.index["timestamp"][-1]) if self.frame_count else 0.0
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def release(self):
+        """再生を終了してメモリマップを閉じる（記録ファイルのハンドルも解放される）"""
+        self.opened = False
+        self._pending = None
+        # メモリマップを参照する配列を手放してから閉じる
+        self.data = None
+        self.index = np.empty(0, dtype=INDEX_DTYPE)
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # frame_data()のビューが残っている間は、最後のビューが解放されたときに閉じられる
+                pass
+            self._map = None
+
+    def set(self, prop_id: int, value: float) -> bool:
+        """再生位置（CAP_PROP_POS_FRAMES / CAP_PROP_POS_MSEC）だけ変更できる"""
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            self.seek(int(value))
+            return True
+        if prop_id == cv2.CAP_PROP_POS_MSEC:
+            position = np.searchsorted(self.index["timestamp"], value / 1000.0)
+            self.seek(int(position))
+            return True
+        # 解像度・fpsは記録時のまま
+        return False
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index)
+        if prop_id == cv2.CAP_PROP_POS_MSEC:
+            return 1000.0 * self.recorded_timestamp
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        return 0.0
+
+    def seek(self, frame_index: int):
+        """
+        次にgrab()するフレームを変更（realtime時は再生時刻の基準もそこに合わせる）
+
+        Args:
+            frame_index: フレーム番号（0始まり）
+        """
+        self.frame_index = min(max(0, frame_index), self.frame_count)
+        self._pending = None
+        self._start_time = None
+
+    def grab(self) -> bool:
+        """次のフレームへ進む（realtime時は記録時の取得時刻まで待つ、デコードはしない）"""
+        if not self.opened or not self.frame_count:
+            return False
+        if self.frame_index >= self.frame_count:
+            if not self.loop:
+                return False
+            self.seek(0)
+
+        recorded = float(self.index["timestamp"][self.frame_index])
+        now = time.monotonic()
+        if self.realtime:
+            if self._start_time is None:
+                self._start_time, self._start_offset = now, recorded
+            due = self._start_time + (recorded - self._start_offset) / self.speed
+            if due > now:
+                time.sleep(due - now)
+                now = due
+        self.grabbed_timestamp = now
+        self.recorded_timestamp = recorded
+        self._pending = self.frame_index
+        self.frame_index += 1
+        return True
+
+    def frame_data(self, frame_index: int) -> np.ndarray:
+        """フレームの保存データ（メモリマップへのビュー、rawなら画素そのもの）"""
+        offset, size, _ = self.index[frame_index]
+        data = self.data[int(offset):int(offset) + int(size)]
+        if self.codec == "raw":
+            return data.reshape(self.height, self.width, 3)
+        return data
+
+    def retrieve(self, image: Optional[np.ndarray] = None, flag: int = 0) -> Tuple[bool, Optional[np.ndarray]]:
+        """grab()したフレームを取り出す（imageが同じ形状ならそこへ書き込む）"""
+        if self._pending is None:
+            return False, None
+        data = self.frame_data(self._pending)
+        self._pending = None
+        if self.codec == "jpeg":
+            frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            if frame is None:
+                return False, None
+            if image is None or image.shape != frame.shape or image.dtype != np.uint8:
+                return True, frame
+            np.copyto(image, frame)
+            return True, image
+        if image is None or image.shape != data.shape or image.dtype != np.uint8:
+            image = np.empty(data.shape, dtype=np.uint8)
+        np.copyto(image, data)
+        return True, image
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """grab()とretrieve()をまとめて実行"""
+        if not self.grab():
+            return False, None
+        self.read_count += 1
+        return self.retrieve(image)
+
+
+def capture_factory_from_config(camera_config: dict) -> Optional[Callable[[int], object]]:
+    """
+    config.yamlのcameraセクションから記録・再生用のcapture_factoryを作成
+
+    - replay_path: 指定するとカメラの代わりにこの記録ファイルを再生する
+    - record_path: 指定するとカメラから読み出したフレームをこのファイルに記録する
+      （time.strftimeの書式で日時を含めると、カメラを開くたびに別のファイルになる）
+
+    Args:
+        camera_config: カメラ設定
+
+    Returns:
+        Optional[Callable]: device_idからVideoCapture互換オブジェクトを作る関数（どちらも未指定ならNone）
+    """
+    replay_path = camera_config.get('replay_path')
+    record_path = camera_config.get('record_path')
+    if replay_path:
+        realtime = camera_config.get('replay_realtime', True)
+        speed = camera_config.get('replay_speed', 1.0)
+        loop = camera_config.get('replay_loop', False)
+        return lambda device_id: ReplayVideoCapture(replay_path, realtime=realtime, speed=speed, loop=loop)
+    if record_path:
+        fps = camera_config.get('fps', 30)
+        codec = camera_config.get('record_codec', 'jpeg')
+        return lambda device_id: RecordingVideoCapture(cv2.VideoCapture(device_id),
+                                                       SessionRecorder(record_path, fps=fps, codec=codec))
+    return None
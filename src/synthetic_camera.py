@@ -0,0 +1,181 @@
+"""
+合成カメラクラス
+cv2.VideoCaptureの代わりに使える、カメラなしで動作する合成映像ソース
+"""
+
+from collections import deque
+from typing import List, Optional, Tuple
+import time
+
+import cv2
+import numpy as np
+
+
+class SyntheticVideoCapture:
+    """cv2.VideoCapture互換の合成映像ソース"""
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0,
+                 realtime: bool = False, max_frames: Optional[int] = None,
+                 supported_modes: Optional[List[Tuple[str, int, int, float]]] = None,
+                 buffer_size: int = 0, motion: bool = True):
+        """
+        合成カメラの初期化
+
+        Args:
+            width: 生成する映像の幅
+            height: 生成する映像の高さ
+            fps: 生成フレームレート
+            realtime: Trueの場合はfpsに合わせてread()が待機する
+            max_frames: 生成する最大フレーム数（Noneで無制限）
+            supported_modes: 対応モード (fourcc, 幅, 高さ, 最大fps) のリスト。
+                指定するとUVCドライバと同様に、set()の要求を最も近い対応モードへ丸める
+            buffer_size: ドライバのフレームバッファ数（realtime時のみ）。
+                センサーはfpsで撮り続け、空きバッファがなければ新しいフレームを捨てるため、
+                読み出しが遅いとgrab()は古いフレームを即座に返す（V4L2と同じ挙動）
+            motion: Trueの場合は動く縦帯を描画する（Falseで変化のない映像、途中で切り替え可能）
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = supported_modes[0][0] if supported_modes else "YUYV"
+        self.realtime = realtime
+        self.max_frames = max_frames
+        self.supported_modes = supported_modes
+        # ドライバと同様に要求値を保持し、実際の値は対応モードから決める
+        self.requested = {"width": width, "height": height, "fps": fps, "fourcc": self.fourcc}
+        self.set_count = 0
+        self.frame_index = 0
+        self.opened = True
+        self.read_count = 0
+        # retrieve()で新しい配列を確保した回数（渡されたバッファへ書き込んだ場合は数えない）
+        self.frames_allocated = 0
+        self.buffer_size = buffer_size
+        self.motion = motion
+        # 直近にgrab()したフレームがセンサーで撮られた時刻（time.monotonic()）
+        self.grabbed_timestamp = 0.0
+        self._next_time = time.monotonic()
+        self._sensor_start = self._next_time
+        self._sensor_next = 0
+        self._queue: deque = deque()
+        self._pending = False
+        self._build_background()
+
+    def _build_background(self):
+        """背景パターンを1回だけ生成"""
+        rng = np.random.default_rng(0)
+        self.background = rng.integers(0, 200, (self.height, self.width, 3), dtype=np.uint8)
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+    def set(self, prop_id: int, value: float) -> bool:
+        self.set_count += 1
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            self.requested["width"] = int(value)
+        elif prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.requested["height"] = int(value)
+        elif prop_id == cv2.CAP_PROP_FPS:
+            self.requested["fps"] = float(value)
+        elif prop_id == cv2.CAP_PROP_FOURCC:
+            code = int(value)
+            self.requested["fourcc"] = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+        else:
+            return False
+        self._apply_requested_mode()
+        return True
+
+    def _apply_requested_mode(self):
+        """要求された設定を最も近い対応モードへ丸める"""
+        requested = self.requested
+        if self.supported_modes:
+            same_fourcc = [m for m in self.supported_modes if m[0] == requested["fourcc"]] or self.supported_modes
+            area = requested["width"] * requested["height"]
+            fourcc, width, height, max_fps = min(
+                same_fourcc,
+                key=lambda m: (abs(m[1] * m[2] - area), -m[3])
+            )
+            self.fourcc = fourcc
+            self.width, self.height = width, height
+            self.fps = min(requested["fps"], max_fps)
+        else:
+            self.fourcc = requested["fourcc"]
+            self.width, self.height = requested["width"], requested["height"]
+            self.fps = requested["fps"]
+        if self.background.shape[:2] != (self.height, self.width):
+            self._build_background()
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index)
+        if prop_id == cv2.CAP_PROP_FOURCC:
+            return float(cv2.VideoWriter_fourcc(*self.fourcc))
+        return 0.0
+
+    def grab(self) -> bool:
+        """次のフレームを確保（デコードはしない）"""
+        if not self.opened or (self.max_frames is not None and self.frame_index >= self.max_frames):
+            return False
+        if self.realtime and self.buffer_size > 0:
+            return self._grab_buffered()
+        if self.realtime:
+            now = time.monotonic()
+            if self._next_time > now:
+                time.sleep(self._next_time - now)
+            self._next_time = max(self._next_time, now) + 1.0 / self.fps
+        self.frame_index += 1
+        self.grabbed_timestamp = time.monotonic()
+        self._pending = True
+        return True
+
+    def _fill_queue(self, now: float):
+        """現在時刻までにセンサーが撮ったフレームを空きバッファへ入れる"""
+        interval = 1.0 / self.fps
+        while self._sensor_start + self._sensor_next * interval <= now:
+            if len(self._queue) < self.buffer_size:
+                self._queue.append((self._sensor_next, self._sensor_start + self._sensor_next * interval))
+            self._sensor_next += 1
+
+    def _grab_buffered(self) -> bool:
+        """ドライバのバッファから最も古いフレームを取り出す（空なら次の撮影まで待つ）"""
+        self._fill_queue(time.monotonic())
+        while not self._queue:
+            next_time = self._sensor_start + self._sensor_next / self.fps
+            time.sleep(max(0.0, next_time - time.monotonic()))
+            self._fill_queue(time.monotonic())
+        index, timestamp = self._queue.popleft()
+        self.frame_index = index + 1
+        self.grabbed_timestamp = timestamp
+        self._pending = True
+        return True
+
+    def retrieve(self, image: Optional[np.ndarray] = None, flag: int = 0) -> Tuple[bool, Optional[np.ndarray]]:
+        """確保したフレームを生成（imageが同じ形状ならそこへ書き込む）"""
+        if not self._pending:
+            return False, None
+        self._pending = False
+        shape = (self.height, self.width, 3)
+        if image is None or image.shape != shape or image.dtype != np.uint8:
+            image = np.empty(shape, dtype=np.uint8)
+            self.frames_allocated += 1
+        np.copyto(image, self.background)
+        if self.motion:
+            # 動きのある縦帯を描画してフレームごとに内容を変える
+            x = (self.frame_index * 8) % self.width
+            image[:, x:x + 16] = 255
+        return True, image
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """grab()とretrieve()をまとめて実行"""
+        if not self.grab():
+            return False, None
+        self.read_count += 1
+        return self.retrieve(image)
@@ -152,6 +152,125 @@ def test_android_app_structure():
         traceback.print_exc()
 
 
+def test_camera_screen_reuse():
+    """カメラ画面の遅延作成テスト（get_camera_screenは最初の1回だけ画面を作る）"""
+    print("=== カメラ画面の遅延作成テスト ===")
+    
+    try:
+        from src import android_camera_screen
+        from src.android_app_english import DialysisSupplyApp
+    except ImportError as e:
+        print(f"⚠️ Kivyがインストールされていません。テストをスキップします。 ({e})")
+        return
+    from types import SimpleNamespace
+    from src.config_service import ConfigService
+    from src.frame_timing import StartupTimer
+    
+    created = []
+    
+    class StubCameraScreen:
+        """画面を作らずに引数だけ記録する（ウィンドウなしで動かすため）"""
+        
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+            created.append(self)
+    
+    # アプリの画面まわりだけを用意してメソッドを呼ぶ
+    added = []
+    preloads = []
+    medicine_selector = MedicineSelector()
+    app = SimpleNamespace(
+        camera_screen=None,
+        config_service=ConfigService(defaults={'ui': {'preview_mode': 'texture'}, 'camera': {'width': 160}}),
+        screen_manager=SimpleNamespace(add_widget=added.append),
+        medicine_screen=SimpleNamespace(medicine_selector=medicine_selector),
+        startup_timer=StartupTimer(enabled=False),
+        preload_recognition=lambda: preloads.append(True),
+    )
+    original = android_camera_screen.CameraScreen
+    android_camera_screen.CameraScreen = StubCameraScreen
+    try:
+        screen = DialysisSupplyApp.get_camera_screen(app)
+        assert DialysisSupplyApp.get_camera_screen(app) is screen, "2回目以降は同じ画面を返すはず"
+    finally:
+        android_camera_screen.CameraScreen = original
+    
+    assert len(created) == 1 and added == [screen], "画面は1回だけ作って追加するはず"
+    assert len(preloads) == 1 and "camera_ready" in app.startup_timer.marks, "作ったときだけ先読みを始めるはず"
+    assert screen.kwargs['medicine_selector'] is medicine_selector, "選択中の薬液を共有するはず"
+    assert screen.kwargs['camera_config'] == {'width': 160}, "共有の設定から作るはず"
+    print("✅ カメラ画面の遅延作成テスト: 成功")
+
+
+def test_texture_preview():
+    """テクスチャプレビューのテスト（テクスチャの使い回しと転送用バッファ）"""
+    print("=== テクスチャプレビューテスト ===")
+    
+    try:
+        from src import kivy_preview
+    except ImportError as e:
+        print(f"⚠️ Kivyがインストールされていません。テストをスキップします。 ({e})")
+        return
+    from types import SimpleNamespace
+    import numpy as np
+    
+    class StubTexture:
+        """GLなしで転送内容だけ記録するテクスチャ"""
+        
+        created = []
+        
+        def __init__(self, size):
+            self.size = size
+            self.buffers = []
+        
+        @classmethod
+        def create(cls, size, colorfmt):
+            cls.created.append(cls(size))
+            return cls.created[-1]
+        
+        def flip_vertical(self):
+            pass
+        
+        def blit_buffer(self, buffer, colorfmt, bufferfmt):
+            self.buffers.append(buffer)
+    
+    updates = []
+    widget = SimpleNamespace(texture=None, canvas=SimpleNamespace(ask_update=lambda: updates.append(True)))
+    original = kivy_preview.Texture
+    kivy_preview.Texture = StubTexture
+    try:
+        preview = kivy_preview.TexturePreview(widget)
+        
+        # 書き込み可能で連続したフレームはそのまま転送する
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        preview.display(frame)
+        preview.display(frame)
+        texture = widget.texture
+        assert len(StubTexture.created) == 1 and texture.size == (160, 120), "同じサイズならテクスチャを使い回すはず"
+        assert preview.staging is None and np.shares_memory(texture.buffers[-1], frame), "コピーせずに転送するはず"
+        
+        # 読み取り専用の共有フレームは転送用バッファへコピーする（バッファは使い回す）
+        shared = np.full((120, 160, 3), 7, dtype=np.uint8)
+        shared.setflags(write=False)
+        preview.display(shared)
+        staging = preview.staging
+        preview.display(shared)
+        assert staging is not None and preview.staging is staging, "転送用バッファを使い回すはず"
+        assert np.array_equal(texture.buffers[-1], shared.reshape(-1)), "フレームの内容を転送するはず"
+        
+        # サイズが変わればテクスチャを作り直し、転送用バッファも捨てる
+        preview.display(np.zeros((240, 320, 3), dtype=np.uint8))
+        assert widget.texture.size == (320, 240) and preview.staging is None, "新しいサイズのテクスチャになるはず"
+        assert len(updates) == 5, "転送のたびに再描画を要求するはず"
+        
+        preview.clear()
+        assert widget.texture is None and preview.texture is None, "表示がクリアされるはず"
+    finally:
+        kivy_preview.Texture = original
+    
+    print("✅ テクスチャプレビューテスト: 成功")
+
+
 def main():
     """メインテスト関数"""
     print("透析供給装置薬液補充アプリ - Android版動作確認テスト")
@@ -178,6 +297,14 @@ def main():
         test_android_app_structure()
         print()
         
+        # カメラ画面の遅延作成テスト
+        test_camera_screen_reuse()
+        print()
+        
+        # テクスチャプレビューテスト
+        test_texture_preview()
+        print()
+        
         print("=" * 60)
         print("✅ 全テスト完了")
         print()
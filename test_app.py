@@ -70,13 +70,15 @@ def test_camera_manager():
             
             # フレーム取得テスト
             print("フレーム取得テストを実行中...")
+            last_seq = 0
             for i in range(5):  # 5フレーム取得テスト
-                frame = camera_manager.get_current_frame()
-                if frame is not None:
-                    print(f"フレーム {i+1}: 取得成功 (形状: {frame.shape})")
+                ref = camera_manager.wait_for_frame(last_seq, timeout=1.0)
+                if ref is not None:
+                    with ref:
+                        print(f"フレーム {i+1}: 取得成功 (通し番号: {ref.seq}, 形状: {ref.frame.shape})")
+                        last_seq = ref.seq
                 else:
                     print(f"フレーム {i+1}: 取得失敗")
-                time.sleep(0.1)
             
             # カメラ停止
             camera_manager.stop_camera()
@@ -89,6 +91,649 @@ def test_camera_manager():
     print("✅ カメラ管理機能テスト: 完了")
 
 
+def test_frame_handoff():
+    """最新フレーム受け渡しとフレーム時間計測のテスト"""
+    print("=== 最新フレーム受け渡しテスト ===")
+    
+    import numpy as np
+    from src.frame_timing import FrameTimeMonitor
+    
+    camera_manager = CameraManager(device_id=0, width=64, height=48, fps=30)
+    seq, frame = camera_manager.get_frame_if_newer(0)
+    assert frame is None, "フレーム未取得時はNoneのはず"
+    
+    # キャプチャスレッドの保存処理を模擬
+    with camera_manager.lock:
+        camera_manager.current_frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        camera_manager.frame_seq = 3
+    seq, frame = camera_manager.get_frame_if_newer(0)
+    assert seq == 3 and frame is not None, "新しいフレームが取得できるはず"
+    seq, frame = camera_manager.get_frame_if_newer(seq)
+    assert frame is None, "同じフレームは再取得されないはず"
+    
+    monitor = FrameTimeMonitor(report_interval=0)
+    for _ in range(5):
+        monitor.tick()
+    stats = monitor.get_stats()
+    assert stats["frames"] == 4, "フレーム間隔が4つ記録されるはず"
+    
+    print("✅ 最新フレーム受け渡しテスト: 成功")
+
+
+def test_frame_ring():
+    """リングバッファのテスト"""
+    print("=== リングバッファテスト ===")
+    
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    camera_manager = CameraManager(
+        width=320, height=240, ring_size=3,
+        capture_factory=lambda device_id: SyntheticVideoCapture(640, 480)
+    )
+    assert camera_manager.start_camera(), "合成カメラで起動できるはず"
+    try:
+        ref = camera_manager.wait_for_frame(0, timeout=1.0)
+        assert ref is not None, "フレームが取得できるはず"
+        assert ref.frame.shape == (240, 320, 3), "指定サイズにリサイズされているはず"
+        assert not ref.frame.flags.writeable, "読み取り専用ビューのはず"
+        
+        # 保持中のスロットは上書きされない
+        held = ref.frame.copy()
+        time.sleep(0.2)
+        assert (ref.frame == held).all(), "保持中のフレームは上書きされないはず"
+        newer = camera_manager.acquire_frame(ref.seq)
+        assert newer is not None and newer.seq > ref.seq, "新しいフレームが取得できるはず"
+        newer.release()
+        ref.release()
+    finally:
+        camera_manager.stop_camera()
+    
+    print("✅ リングバッファテスト: 成功")
+
+
+def test_wait_for_frame():
+    """新フレーム待機APIのテスト"""
+    print("=== 新フレーム待機テスト ===")
+    
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    for ring_size in (0, 3):
+        camera_manager = CameraManager(
+            width=160, height=120, fps=100, ring_size=ring_size,
+            capture_factory=lambda device_id: SyntheticVideoCapture(160, 120)
+        )
+        assert camera_manager.start_camera(), "合成カメラで起動できるはず"
+        try:
+            seqs = []
+            last_timestamp = 0.0
+            last_seq = 0
+            for _ in range(5):
+                ref = camera_manager.wait_for_frame(last_seq, timeout=1.0)
+                assert ref is not None, "タイムアウト前に新しいフレームが届くはず"
+                with ref:
+                    assert ref.seq > last_seq, "通し番号は単調増加するはず"
+                    assert ref.timestamp >= last_timestamp, "取得時刻は単調増加するはず"
+                    last_seq, last_timestamp = ref.seq, ref.timestamp
+                    seqs.append(ref.seq)
+            assert len(set(seqs)) == len(seqs), "同じフレームを2回受け取らないはず"
+        finally:
+            camera_manager.stop_camera()
+        
+        # 停止後は待機せずにNoneが返る
+        assert camera_manager.wait_for_frame(last_seq + 1000, timeout=1.0) is None, "停止後はNoneのはず"
+    
+    print("✅ 新フレーム待機テスト: 成功")
+
+
+def test_capture_negotiation():
+    """取得モードネゴシエーションのテスト"""
+    print("=== 取得モードネゴシエーションテスト ===")
+    
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    modes = [("YUYV", 640, 480, 30), ("YUYV", 1280, 720, 10), ("MJPG", 640, 480, 30), ("MJPG", 1280, 720, 30)]
+    
+    # 要求どおりのサイズが非圧縮で出せるならYUYVを選び、リサイズしない
+    camera_manager = CameraManager(
+        width=640, height=480, fps=30, negotiate=True,
+        capture_factory=lambda device_id: SyntheticVideoCapture(supported_modes=modes)
+    )
+    assert camera_manager.start_camera(), "合成カメラで起動できるはず"
+    try:
+        info = camera_manager.get_camera_info()
+        assert info["negotiated_mode"]["fourcc"] == "YUYV", "YUYVが選ばれるはず"
+        assert not info["resize"], "同じサイズならリサイズしないはず"
+    finally:
+        camera_manager.stop_camera()
+    
+    # YUYVでは30fpsに届かない解像度ではMJPGを選ぶ
+    camera_manager = CameraManager(
+        width=1280, height=720, fps=30, negotiate=True,
+        capture_factory=lambda device_id: SyntheticVideoCapture(supported_modes=modes)
+    )
+    camera_manager.camera = camera_manager.capture_factory(0)
+    mode = camera_manager.negotiate_capture_mode()
+    assert (mode.fourcc, mode.width, mode.height, mode.fps) == ("MJPG", 1280, 720, 30), "MJPG 1280x720@30が選ばれるはず"
+    
+    print("✅ 取得モードネゴシエーションテスト: 成功")
+
+
+def test_low_latency_capture():
+    """低遅延取得モードのテスト"""
+    print("=== 低遅延取得モードテスト ===")
+    
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    camera_manager = CameraManager(
+        width=160, height=120, fps=30, low_latency=True,
+        capture_factory=lambda device_id: SyntheticVideoCapture(160, 120, fps=100, realtime=True, buffer_size=4)
+    )
+    camera_manager.camera = camera_manager.capture_factory(0)
+    camera_manager._capture_step()
+    # 利用者が遅れている間にドライバのバッファが埋まる
+    time.sleep(0.08)
+    assert camera_manager._capture_step(), "フレームが取得できるはず"
+    age = time.monotonic() - camera_manager.camera.grabbed_timestamp
+    stats = camera_manager.get_capture_stats()
+    assert stats["stale_frames_dropped"] > 0, "溜まった古いフレームは読み捨てられるはず"
+    assert stats["frames_decoded"] == 2, "デコードは取得したフレームだけのはず"
+    assert age < 0.03, "最新に近いフレームが取得されるはず"
+    
+    print("✅ 低遅延取得モードテスト: 成功")
+
+
+def test_display_converter():
+    """表示用の変換（Tk版）のテスト"""
+    print("=== 表示変換テスト ===")
+    
+    import cv2
+    import numpy as np
+    from src.main_app import DisplayConverter
+    
+    rng = np.random.default_rng(0)
+    converter = DisplayConverter()
+    frame = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    
+    # 表示サイズと同じならリサイズせず、色の並びだけ変える
+    image = converter.convert(frame, (160, 120))
+    assert converter.resize_buffer is None, "同じサイズならリサイズしないはず"
+    assert image.size == (160, 120) and np.array_equal(np.asarray(image), frame[:, :, ::-1]), "RGBに変換されるはず"
+    rgb_buffer = converter.rgb_buffer
+    converter.convert(frame[::-1].copy(), (160, 120))
+    assert converter.rgb_buffer is rgb_buffer, "変換先のバッファを使い回すはず"
+    
+    # サイズが違えばリサイズ用のバッファへ縮小する（サイズが同じ間は使い回す）
+    image = converter.convert(frame, (80, 60))
+    resize_buffer = converter.resize_buffer
+    expected = cv2.cvtColor(cv2.resize(frame, (80, 60), interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2RGB)
+    assert image.size == (80, 60) and np.array_equal(np.asarray(image), expected), "表示サイズに縮小されるはず"
+    converter.convert(frame, (80, 60))
+    assert converter.resize_buffer is resize_buffer, "リサイズ用のバッファを使い回すはず"
+    
+    print("✅ 表示変換テスト: 成功")
+
+
+def test_inference_pipeline():
+    """非同期認識パイプラインのテスト"""
+    print("=== 非同期認識パイプラインテスト ===")
+    
+    from src.inference_pipeline import InferencePipeline, LatestQueue
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    # 最新優先キュー: 満杯なら古い要素が捨てられる
+    dropped = []
+    queue = LatestQueue(2, on_drop=dropped.append)
+    for item in range(4):
+        queue.put(item)
+    assert dropped == [0, 1], "古い要素から捨てられるはず"
+    assert queue.get(timeout=0) == 2, "残った最も古い要素から取り出されるはず"
+    
+    camera_manager = CameraManager(
+        width=160, height=120, fps=30, ring_size=5,
+        capture_factory=lambda device_id: SyntheticVideoCapture(160, 120, fps=30, realtime=True)
+    )
+    # カメラ（30fps）より遅い認識処理を模擬
+    def slow_inference(frame):
+        time.sleep(0.05)
+        return int(frame[0, 0, 0])
+    
+    pipeline = InferencePipeline(camera_manager, slow_inference, num_workers=1, queue_size=1)
+    assert camera_manager.start_camera(), "合成カメラは開始できるはず"
+    pipeline.start()
+    try:
+        time.sleep(1.0)
+    finally:
+        pipeline.stop()
+        camera_manager.stop_camera()
+    
+    stats = pipeline.get_stats()
+    print(f"パイプライン統計: {stats}")
+    assert stats["frames_processed"] > 5, "認識は取得と並行して進むはず"
+    assert stats["frames_seen"] >= 20, "認識が遅くても取得は止まらないはず"
+    assert stats["frames_skipped"] > 0, "認識が遅い分のフレームは間引かれるはず"
+    assert stats["stride"] >= 2, "認識時間に応じて間引き間隔が広がるはず"
+    assert stats["p95_latency_ms"] < 100, "取得から認識完了までの遅延は上限内のはず"
+    assert camera_manager.frame_ring.held_count() == 0, "停止後はすべてのフレームが解放されるはず"
+    assert pipeline.get_latest_result() is not None, "最新の認識結果が取得できるはず"
+    
+    print("✅ 非同期認識パイプラインテスト: 成功")
+
+
+def test_motion_gate():
+    """動き検出ゲートのテスト"""
+    print("=== 動き検出ゲートテスト ===")
+    
+    import numpy as np
+    from src.motion_gate import MotionGate
+    
+    gate = MotionGate(cooldown=0.5)
+    scene = np.full((480, 640, 3), 100, dtype=np.uint8)
+    assert gate.update(scene, timestamp=0.0), "最初のフレームは認識するはず"
+    assert gate.update(scene, timestamp=0.1), "cooldown中は認識を続けるはず"
+    assert not gate.update(scene, timestamp=1.0), "変化がなければ認識を止めるはず"
+    
+    # 照明のわずかな変化（センサーノイズ程度）では動きとみなさない
+    assert not gate.update(scene + 5, timestamp=1.1), "小さな変化では認識しないはず"
+    
+    # ボトルが置かれると動きとして検出される
+    moved = scene.copy()
+    moved[150:330, 250:350] = 220
+    assert gate.update(moved, timestamp=1.2), "動きがあれば認識するはず"
+    assert gate.update(moved, timestamp=1.6), "背景に馴染むまでは動きありのはず"
+    
+    stats = gate.get_stats()
+    assert stats["frames_gated"] == 2 and stats["motion_events"] == 2, "抑止と動きの回数が記録されるはず"
+    
+    print("✅ 動き検出ゲートテスト: 成功")
+
+
+def test_recognition_motion_gate():
+    """認識サービスから動き検出ゲートが使われるかのテスト"""
+    print("=== 認識サービスの動き検出ゲートテスト ===")
+    
+    from src.recognition_service import RecognitionService
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    class CountingRecognizer:
+        """認識回数を数えるだけの認識クラス"""
+        
+        def __init__(self):
+            self.calls = 0
+        
+        def detect_batch(self, frame):
+            self.calls += 1
+            return []
+    
+    captures = []
+    
+    def factory(device_id):
+        captures.append(SyntheticVideoCapture(160, 120, fps=30, realtime=True))
+        return captures[-1]
+    
+    service = RecognitionService.from_config({'motion': {'enabled': True, 'cooldown': 0.2, 'background_alpha': 0.5}})
+    recognizer = service.recognizer = CountingRecognizer()
+    camera_manager = CameraManager(width=160, height=120, fps=30, ring_size=5, capture_factory=factory)
+    assert camera_manager.start_camera(), "合成カメラは開始できるはず"
+    try:
+        assert service.attach(camera_manager), "認識を開始できるはず"
+        assert service.pipeline.motion_gate is not None, "motion.enabled なら動き検出ゲートを使うはず"
+        time.sleep(0.5)
+        assert recognizer.calls > 0, "動きがある間は認識するはず"
+        
+        # 映像が止まると cooldown の後は認識しない
+        captures[-1].motion = False
+        time.sleep(0.6)
+        calls = recognizer.calls
+        time.sleep(0.5)
+        stats = service.pipeline.get_stats()
+        print(f"パイプライン統計: {stats}")
+        assert recognizer.calls == calls, "変化がない間は認識しないはず"
+        assert stats["frames_gated"] > 0, "抑止したフレームが数えられるはず"
+        
+        service.motion_config = {'enabled': False}
+        assert service.attach(camera_manager), "認識を開始できるはず"
+        assert service.pipeline.motion_gate is None, "motion.enabled: false ならゲートを使わないはず"
+    finally:
+        service.shutdown()
+        camera_manager.stop_camera()
+    
+    print("✅ 認識サービスの動き検出ゲートテスト: 成功")
+
+
+def test_safety_checker():
+    """逐次判定による安全確認のテスト"""
+    print("=== 安全確認テスト ===")
+    
+    from src.safety_checker import SafetyChecker, Verdict
+    
+    sodium, acetic = MedicineType.SODIUM_HYPOCHLORITE, MedicineType.ACETIC_ACID
+    assert SafetyChecker.check_safety(sodium, sodium.value), "同じ薬液は一致するはず"
+    assert not SafetyChecker.check_safety(sodium, acetic), "異なる薬液は一致しないはず"
+    
+    changes = []
+    checker = SafetyChecker(window=15, on_verdict=changes.append)
+    
+    # 正しいボトル: 信頼度の高いフレームが続けばウィンドウが埋まる前に◯
+    checker.start_session(sodium, timestamp=0.0)
+    frames = 0
+    while checker.get_verdict() == Verdict.PENDING:
+        frames += 1
+        checker.update(sodium, 0.9, timestamp=frames / 30)
+    assert checker.get_verdict() == Verdict.SAFE and frames < 15, "少ないフレームで◯になるはず"
+    
+    # 1フレームの誤認識では判定は揺れない
+    checker.update(acetic, 0.9, timestamp=1.0)
+    assert checker.get_verdict() == Verdict.SAFE, "1フレームのノイズで判定は変わらないはず"
+    
+    # 途中でボトルが入れ替わったら✕
+    for index in range(15):
+        checker.update(acetic, 0.9, timestamp=1.1 + index / 30)
+    assert checker.get_verdict() == Verdict.UNSAFE, "入れ替わったら✕になるはず"
+    assert changes == [Verdict.SAFE, Verdict.UNSAFE], "判定の変化が通知されるはず"
+    
+    # 間違ったボトル: ✕は◯より少ないフレームで出る
+    checker.start_session(sodium, timestamp=10.0)
+    unsafe_frames = 0
+    while checker.get_verdict() == Verdict.PENDING:
+        unsafe_frames += 1
+        checker.update(acetic, 0.9, timestamp=10.0 + unsafe_frames / 30)
+    assert checker.get_verdict() == Verdict.UNSAFE and unsafe_frames < frames, "✕は◯より早く出るはず"
+    
+    # 信頼度の低い・認識できないフレームは判定に使わない
+    checker.start_session(sodium, timestamp=20.0)
+    checker.update(acetic, 0.1, timestamp=20.1)
+    checker.update(None, 0.0, timestamp=20.2)
+    assert checker.get_verdict() == Verdict.PENDING, "根拠のないフレームでは判定しないはず"
+    
+    stats = checker.get_stats()
+    print(f"判定までの時間: {stats}")
+    assert stats["sessions"] == 2 and stats["early_exit_rate"] == 1.0, "セッションごとに記録されるはず"
+    
+    print("✅ 安全確認テスト: 成功")
+
+
+def test_process_inference():
+    """共有メモリを使ったプロセス並列認識のテスト"""
+    print("=== プロセス並列認識テスト ===")
+    
+    import multiprocessing
+    import tempfile
+    from multiprocessing import shared_memory
+    import numpy as np
+    from src.frame_ring import SharedFrameRing
+    from src.inference_pipeline import InferencePipeline
+    from src.process_inference import ProcessRecognizer
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    # 共有メモリのリング: 利用者に渡したビューからスロットの位置が分かる
+    ring = SharedFrameRing(3, (4, 6, 3))
+    index = ring.acquire_write_slot()
+    ring.publish(index, 1, 0.0)
+    with ring.acquire_latest() as ref:
+        assert ring.locate(ref.frame) == (ring.name, index * ring.slot_bytes), "スロットの位置が分かるはず"
+    assert ring.locate(np.zeros((4, 6, 3), dtype=np.uint8)) is None, "リング外のフレームは位置を持たないはず"
+    name = ring.name
+    ring.close()
+    try:
+        shared_memory.SharedMemory(name=name).close()
+        assert False, "close後は共有メモリが削除されるはず"
+    except FileNotFoundError:
+        pass
+    
+    try:
+        from tools.make_dummy_model import build_dummy_model
+        tmp_dir = tempfile.TemporaryDirectory()
+        model_path = build_dummy_model(os.path.join(tmp_dir.name, "dummy.onnx"), input_size=320)
+    except ImportError:
+        print("⚠️ onnxがインストールされていません。認識のテストをスキップします。")
+        return
+    
+    camera_manager = CameraManager(
+        width=320, height=240, fps=30, ring_size=6, shared_memory=True,
+        capture_factory=lambda device_id: SyntheticVideoCapture(320, 240, fps=30, realtime=True)
+    )
+    recognizer = ProcessRecognizer({"onnx_path": model_path, "input_size": 320}, num_processes=2,
+                                   camera_manager=camera_manager)
+    recognizer.start()
+    pipeline = InferencePipeline(camera_manager, recognizer.detect_batch, num_workers=2)
+    try:
+        assert camera_manager.start_camera(), "合成カメラは開始できるはず"
+        ring_name = camera_manager.frame_ring.name
+        pipeline.start()
+        time.sleep(1.0)
+        pipeline.stop()
+        
+        # リング外のフレームはワーカーの入力バッファへコピーして渡す
+        batch = recognizer.detect_batch(np.zeros((240, 320, 3), dtype=np.uint8))
+        assert len(batch) == 1 and batch.class_name(0) == "sodium_hypochlorite_closed", "検出結果が返るはず"
+        
+        # 閾値はワーカーを再起動せずに変更できる（ダミーモデルの信頼度は0.9）
+        recognizer.set_thresholds(confidence_threshold=0.95)
+        assert len(recognizer.detect_batch(np.zeros((240, 320, 3), dtype=np.uint8))) == 0, "閾値が反映されるはず"
+    finally:
+        pipeline.stop()
+        camera_manager.stop_camera()
+        recognizer.close()
+        tmp_dir.cleanup()
+    
+    stats = recognizer.get_stats()
+    print(f"パイプライン統計: {pipeline.get_stats()}, 受け渡し統計: {stats}")
+    result = pipeline.get_latest_result()
+    assert result is not None and len(result.result) == 1, "ワーカープロセスの認識結果が返るはず"
+    assert stats["frames_shared"] > 5 and stats["frames_copied"] == 2, "リングのフレームはコピーせずに渡すはず"
+    assert not multiprocessing.active_children(), "停止後にワーカープロセスは残らないはず"
+    try:
+        shared_memory.SharedMemory(name=ring_name).close()
+        assert False, "カメラ停止後は共有メモリが削除されるはず"
+    except FileNotFoundError:
+        pass
+    
+    print("✅ プロセス並列認識テスト: 成功")
+
+
+def test_session_replay():
+    """セッションの記録・再生のテスト"""
+    print("=== セッション記録・再生テスト ===")
+    
+    import tempfile
+    import cv2
+    import numpy as np
+    from src.session_recording import RecordingVideoCapture, ReplayVideoCapture, SessionRecorder
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    tmp_dir = tempfile.TemporaryDirectory()
+    raw_path = os.path.join(tmp_dir.name, "session.dsr")
+    jpeg_path = os.path.join(tmp_dir.name, "session_jpeg.dsr")
+    
+    # 合成カメラから読み出したフレームを取得時刻ごと記録する
+    source = SyntheticVideoCapture(160, 120, fps=30)
+    capture = RecordingVideoCapture(source, SessionRecorder(raw_path, fps=30, codec="raw"))
+    originals = []
+    for index in range(10):
+        ret, frame = capture.read()
+        originals.append(frame.copy())
+    capture.release()
+    with SessionRecorder(jpeg_path, fps=30, codec="jpeg") as recorder:
+        for index, frame in enumerate(originals):
+            recorder.write(frame, index * 0.05)
+    assert os.path.getsize(jpeg_path) < os.path.getsize(raw_path), "jpegは無圧縮より小さいはず"
+    
+    # 待たずに再生すると、記録どおりのフレームが同じ順で得られる
+    replay = ReplayVideoCapture(raw_path, realtime=False)
+    assert replay.frame_count == 10 and (replay.width, replay.height) == (160, 120), "記録の情報が読めるはず"
+    buffer = np.empty((120, 160, 3), dtype=np.uint8)
+    for original in originals:
+        ret, frame = replay.read(buffer)
+        assert ret and frame is buffer and np.array_equal(frame, original), "記録したフレームが再生されるはず"
+    assert not replay.read()[0], "最後まで再生したら終了するはず"
+    
+    # インデックスから任意のフレームへシークできる
+    replay.set(cv2.CAP_PROP_POS_FRAMES, 7)
+    ret, frame = replay.read()
+    assert np.array_equal(frame, originals[7]), "シークできるはず"
+    
+    jpeg_replay = ReplayVideoCapture(jpeg_path, realtime=False)
+    jpeg_replay.set(cv2.CAP_PROP_POS_MSEC, 350)
+    assert jpeg_replay.read()[0] and abs(jpeg_replay.recorded_timestamp - 0.35) < 1e-9, "時刻でもシークできるはず"
+    jpeg_replay.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    ret, frame = jpeg_replay.read()
+    expected = cv2.imdecode(cv2.imencode(".jpg", originals[0], [cv2.IMWRITE_JPEG_QUALITY, 90])[1], cv2.IMREAD_COLOR)
+    assert ret and np.array_equal(frame, expected), "jpegは圧縮・展開したフレームが再生されるはず"
+    
+    # 開いて閉じるのを繰り返してもメモリマップ（ファイルハンドル）が残らない
+    fd_dir = "/proc/self/fd"
+    open_fds = len(os.listdir(fd_dir)) if os.path.isdir(fd_dir) else None
+    for index in range(100):
+        replay = ReplayVideoCapture(raw_path if index % 2 else jpeg_path, realtime=False)
+        assert replay.read()[0], "記録したフレームが再生されるはず"
+        view = replay.frame_data(0) if index == 0 else None
+        replay.release()
+        assert replay._map is None and replay.frame_count == 0, "閉じたらメモリマップを手放すはず"
+        assert not replay.read()[0], "閉じたら再生しないはず"
+        del view
+    if open_fds is not None:
+        assert len(os.listdir(fd_dir)) <= open_fds, "閉じた記録ファイルのハンドルが残らないはず"
+    
+    # 記録時の間隔どおりに再生する（2倍速）
+    replay = ReplayVideoCapture(jpeg_path, realtime=True, speed=2.0)
+    start = time.monotonic()
+    while replay.read()[0]:
+        pass
+    elapsed = time.monotonic() - start
+    assert 0.2 <= elapsed < 0.4, f"記録の長さ0.45秒の半分で再生されるはず ({elapsed:.2f}秒)"
+    
+    # CameraManagerのカメラの代わりに使える
+    camera_manager = CameraManager.from_config(
+        {'width': 160, 'height': 120, 'fps': 100, 'ring_size': 4, 'negotiate': True, 'low_latency': True,
+         'replay_path': raw_path, 'replay_realtime': False}
+    )
+    assert not camera_manager.negotiate and not camera_manager.low_latency, "待たない再生では読み捨てないはず"
+    assert camera_manager.start_camera(), "記録ファイルを開けるはず"
+    time.sleep(0.3)
+    camera_manager.stop_camera()
+    assert camera_manager.frame_seq == 10, "記録した全フレームが取得されるはず"
+    tmp_dir.cleanup()
+    
+    print("✅ セッション記録・再生テスト: 成功")
+
+
+def test_startup_timer():
+    """起動時間計測のテスト"""
+    print("=== 起動時間計測テスト ===")
+    
+    import contextlib
+    import io
+    from src.frame_timing import STARTUP_PROFILE_ENV, StartupTimer
+    
+    # 各時点は最初の1回だけ記録し、有効なら計測側が読み取れる形で出力する
+    output = io.StringIO()
+    timer = StartupTimer(enabled=True)
+    with contextlib.redirect_stdout(output):
+        timer.mark("first_frame")
+        first = timer.marks["first_frame"]
+        timer.mark("interactive")
+        timer.mark("first_frame")
+    lines = output.getvalue().splitlines()
+    assert [line.split()[:2] for line in lines] == [["STARTUP", "first_frame"], ["STARTUP", "interactive"]], \
+        "時点ごとに1行ずつ出力されるはず"
+    assert float(lines[0].split()[2]) == round(first, 6), "記録した時刻が出力されるはず"
+    assert timer.marks["first_frame"] == first <= timer.marks["interactive"], "同じ時点は上書きしないはず"
+    
+    # 無効なら記録だけして出力しない（省略時は環境変数で切り替える）
+    output = io.StringIO()
+    previous = os.environ.pop(STARTUP_PROFILE_ENV, None)
+    try:
+        timer = StartupTimer()
+        with contextlib.redirect_stdout(output):
+            timer.mark("app_started")
+        assert not timer.enabled and "app_started" in timer.marks, "環境変数がなければ出力しないはず"
+        assert output.getvalue() == "", "無効なら何も出力しないはず"
+        os.environ[STARTUP_PROFILE_ENV] = "1"
+        assert StartupTimer().enabled, f"{STARTUP_PROFILE_ENV}=1 なら出力するはず"
+    finally:
+        os.environ.pop(STARTUP_PROFILE_ENV, None)
+        if previous is not None:
+            os.environ[STARTUP_PROFILE_ENV] = previous
+    
+    print("✅ 起動時間計測テスト: 成功")
+
+
+def test_latency_monitor():
+    """処理段階ごとの遅延計測のテスト"""
+    print("=== 遅延計測テスト ===")
+    
+    import json
+    import socket
+    import tempfile
+    import urllib.request
+    from src.inference_pipeline import InferencePipeline
+    from src.latency_monitor import LatencyHistogram, LatencyMonitor, LatencyReporter
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    assert LatencyMonitor.from_config({'enabled': False}) is None, "無効なら計測しないはず"
+    
+    # 分位点の誤差はバケット幅（10%）以内
+    histogram = LatencyHistogram(window=0)
+    for ms in range(1, 101):
+        histogram.record(ms / 1000.0)
+    p50, p95, p99 = histogram.quantiles()
+    for value, expected in ((p50, 0.050), (p95, 0.095), (p99, 0.099)):
+        assert expected <= value <= expected * 1.1, f"分位点の誤差は10%以内のはず: {value} / {expected}"
+    stats = histogram.get_stats()
+    assert stats["count"] == 100 and abs(stats["avg_ms"] - 50.5) < 1e-6, "件数と平均は正確なはず"
+    
+    # カメラ・パイプラインが各段階を記録する
+    monitor = LatencyMonitor(window=10.0)
+    camera_manager = CameraManager(
+        width=160, height=120, fps=30, ring_size=5, latency_monitor=monitor,
+        capture_factory=lambda device_id: SyntheticVideoCapture(160, 120, fps=30, realtime=True)
+    )
+    pipeline = InferencePipeline(camera_manager, lambda frame: int(frame[0, 0, 0]), num_workers=1,
+                                 latency_monitor=monitor)
+    assert camera_manager.start_camera(), "合成カメラは開始できるはず"
+    pipeline.start()
+    try:
+        time.sleep(0.5)
+    finally:
+        pipeline.stop()
+        camera_manager.stop_camera()
+    snapshot = monitor.snapshot()
+    print(f"段階ごとの遅延: {snapshot}")
+    assert snapshot["capture"]["count"] > 5, "取得の所要時間が記録されるはず"
+    assert snapshot["frame_to_result"]["count"] > 5, "取得から認識完了までが記録されるはず"
+    assert "display" not in snapshot, "記録のない段階は出力しないはず"
+    assert "capture" in monitor.format_overlay(), "画面表示用のテキストに段階が含まれるはず"
+    
+    prometheus = monitor.to_prometheus()
+    assert 'dialysis_stage_latency_seconds{stage="capture",quantile="0.95"}' in prometheus, "分位点を出力するはず"
+    assert 'dialysis_stage_latency_seconds_count{stage="frame_to_result"}' in prometheus, "件数を出力するはず"
+    
+    # ファイルへの書き出しとHTTPでの公開（ポートは空いているものを使う）
+    tmp_dir = tempfile.TemporaryDirectory()
+    dump_path = os.path.join(tmp_dir.name, "latency.json")
+    reporter = LatencyReporter(monitor, path=dump_path, interval=60.0, port=0)
+    reporter.start()
+    reporter.stop()
+    with open(dump_path, "r", encoding="utf-8") as f:
+        assert "capture" in json.load(f)["stages"], "停止時にJSONで書き出されるはず"
+    
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    reporter = LatencyReporter(monitor, port=port)
+    reporter.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert b"dialysis_stage_latency_seconds" in response.read(), "/metrics で公開されるはず"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics.json", timeout=5) as response:
+            assert "frame_to_result" in json.load(response)["stages"], "/metrics.json で公開されるはず"
+    finally:
+        reporter.stop()
+    tmp_dir.cleanup()
+    
+    print("✅ 遅延計測テスト: 成功")
+
+
 def test_config_loading():
     """設定ファイル読み込みテスト"""
     print("=== 設定ファイル読み込みテスト ===")
@@ -121,6 +766,95 @@ def test_config_loading():
         print(f"❌ 設定ファイル読み込みテスト: 失敗 - {e}")
 
 
+def test_config_reload():
+    """設定ファイルの再読み込み（カメラ・認識の閾値へのその場での反映）のテスト"""
+    print("=== 設定ファイル再読み込みテスト ===")
+    
+    import os
+    import tempfile
+    import time
+    import yaml
+    from src.config_service import ConfigService, validate_config
+    from src.synthetic_camera import SyntheticVideoCapture
+    
+    assert validate_config({'camera': {'fps': 30}, 'model': {'confidence_threshold': 0.5}}) == [], "正常な設定のはず"
+    assert validate_config({'camera': {'fps': 0}}), "fps 0は不正のはず"
+    assert validate_config({'camera': {'width': True}}), "真偽値は数値として扱わないはず"
+    assert validate_config({'pipeline': {'mode': 'gpu'}}), "選択肢にない値は不正のはず"
+    
+    tmp_dir = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp_dir.name, "config.yaml")
+    config = {'camera': {'width': 160, 'height': 120, 'fps': 30},
+              'model': {'confidence_threshold': 0.5, 'nms_threshold': 0.4}}
+    
+    def write(data):
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(data, f)
+        # 更新時刻の分解能が粗いファイルシステムでも変更を検出できるようにする
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    # 起動時に不正な値があればファイル全体を使わず、デフォルト設定になる
+    write({'camera': {'width': 160, 'height': 120, 'fps': 0}})
+    service = ConfigService(path, defaults=config)
+    assert service.load() == config and service.load() is not config, "不正な値があればデフォルト設定のはず"
+    
+    write(config)
+    service = ConfigService(path)
+    assert service.load() == config, "設定ファイルを読み込むはず"
+    assert not service.check_for_changes(), "変わっていなければ再読み込みしないはず"
+    
+    camera_manager = CameraManager(
+        width=160, height=120, fps=30, ring_size=5,
+        capture_factory=lambda device_id: SyntheticVideoCapture(160, 120, fps=30, realtime=True)
+    )
+    thresholds = {}
+    service.subscribe('camera', lambda section, changes: camera_manager.reconfigure(
+        fps=section.get('fps'), width=section.get('width'), height=section.get('height')))
+    service.subscribe('model', lambda section, changes: thresholds.update(changes) or [],
+                      keys=('confidence_threshold',))
+    
+    assert camera_manager.start_camera(), "カメラが起動するはず"
+    try:
+        held = camera_manager.wait_for_frame(0, timeout=5.0)
+        assert held is not None and held.frame.shape == (120, 160, 3), "変更前の解像度のはず"
+        
+        config['camera'] = {'width': 320, 'height': 240, 'fps': 60}
+        config['model']['confidence_threshold'] = 0.7
+        write(config)
+        start = time.monotonic()
+        assert service.check_for_changes(), "変更を反映するはず"
+        assert thresholds == {'confidence_threshold': (0.5, 0.7)}, "閾値の変更が通知されるはず"
+        
+        # 取得中のカメラを開いたまま、新しい解像度のリングへ切り替わる
+        frame_shape = None
+        while time.monotonic() - start < 5.0:
+            ref = camera_manager.wait_for_frame(held.seq, timeout=1.0)
+            if ref is not None:
+                with ref:
+                    frame_shape = ref.frame.shape
+                if frame_shape == (240, 320, 3):
+                    break
+        assert frame_shape == (240, 320, 3), f"新しい解像度で取得するはず: {frame_shape}"
+        assert camera_manager.fps == 60, "fpsが変わるはず"
+        assert held.frame.shape == (120, 160, 3), "保持中の古いフレームは解放まで使えるはず"
+        held.release()
+        
+        # 不正な値は反映せず、前の設定を使い続ける
+        write({'camera': {'width': 320, 'height': 240, 'fps': -1}, 'model': config['model']})
+        assert not service.check_for_changes(), "不正な値は反映しないはず"
+        assert service.section('camera')['fps'] == 60, "前の設定を使い続けるはず"
+    finally:
+        camera_manager.stop_camera()
+        tmp_dir.cleanup()
+    
+    # 停止中のカメラは次回の起動時に反映する
+    effects = camera_manager.reconfigure(fps=15)
+    assert camera_manager.fps == 15 and effects, "停止中は設定だけ変わるはず"
+    
+    print("✅ 設定ファイル再読み込みテスト: 成功")
+
+
 def main():
     """メインテスト関数"""
     print("透析供給装置薬液補充アプリ - 動作確認テスト")
@@ -131,6 +865,10 @@ def main():
         test_config_loading()
         print()
         
+        # 設定ファイル再読み込みテスト
+        test_config_reload()
+        print()
+        
         # 薬液選択機能テスト
         test_medicine_selector()
         print()
@@ -139,6 +877,62 @@ def main():
         test_camera_manager()
         print()
         
+        # 最新フレーム受け渡しテスト
+        test_frame_handoff()
+        print()
+        
+        # リングバッファテスト
+        test_frame_ring()
+        print()
+        
+        # 新フレーム待機テスト
+        test_wait_for_frame()
+        print()
+        
+        # 取得モードネゴシエーションテスト
+        test_capture_negotiation()
+        print()
+        
+        # 低遅延取得モードテスト
+        test_low_latency_capture()
+        print()
+        
+        # 表示変換テスト
+        test_display_converter()
+        print()
+        
+        # 非同期認識パイプラインテスト
+        test_inference_pipeline()
+        print()
+        
+        # 動き検出ゲートテスト
+        test_motion_gate()
+        print()
+        
+        # 認識サービスの動き検出ゲートテスト
+        test_recognition_motion_gate()
+        print()
+        
+        # 安全確認テスト
+        test_safety_checker()
+        print()
+        
+        # プロセス並列認識テスト
+        test_process_inference()
+        print()
+        
+        # セッション記録・再生テスト
+        test_session_replay()
+        print()
+        
+        # 遅延計測テスト
+        test_latency_monitor()
+        print()
+        
+        # 起動時間計測テスト
+        test_startup_timer()
+        print()
+        
         print("=" * 50)
         print("✅ 全テスト完了")
         
@@ -0,0 +1,804 @@
+#!/usr/bin/env python3
+"""
+透析供給装置薬液補充アプリ 画像認識テストスクリプト
+ダミーのONNXモデルを使い、GPU・学習済みモデルなしで認識処理を確認する
+"""
+
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.medicine_selector import MedicineSelector, MedicineType
+from src.recognizer import AIRecognizer, CascadeRecognizer, DetectionBatch, ModelLoadError, TapeClassifier
+from src.recognizer.detection import DEFAULT_CLASS_NAMES
+from src.recognizer.metrics import DetectionEvaluator, StateAccuracy
+from src.recognizer.postprocess import postprocess, reference_postprocess
+from src.recognizer.preprocess import LetterboxPreprocessor, letterbox_reference
+from src.recognizer.tracker import TrackingRecognizer
+
+
+# 入力320四方の座標で、重なる2候補（同クラス）・別クラス1候補・低スコア1候補
+DUMMY_BOXES = [
+    (160.0, 160.0, 100.0, 150.0, 0, 0.9),
+    (165.0, 160.0, 100.0, 150.0, 0, 0.8),
+    (60.0, 60.0, 40.0, 40.0, 2, 0.7),
+    (250.0, 250.0, 20.0, 20.0, 1, 0.1),
+]
+
+
+def make_dummy_model(directory: str):
+    """ダミーモデルを作成（onnxがなければNone）"""
+    try:
+        from tools.make_dummy_model import build_dummy_model
+    except ImportError:
+        return None
+    try:
+        return build_dummy_model(os.path.join(directory, "dummy.onnx"), input_size=320, boxes=DUMMY_BOXES)
+    except ImportError:
+        return None
+
+
+def make_tape_frame(colors) -> np.ndarray:
+    """灰色の背景に色付きテープ（BGR）を貼った合成フレームを作成"""
+    frame = np.full((480, 640, 3), 128, dtype=np.uint8)
+    for index, color in enumerate(colors):
+        frame[200:260, 100 + 220 * index:220 + 220 * index] = color
+    return frame
+
+
+def test_recognizer_backends():
+    """推論バックエンドごとの検出テスト"""
+    print("=== 画像認識テスト ===")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = make_dummy_model(tmp_dir)
+        if model_path is None:
+            print("⚠️ onnxがインストールされていません。テストをスキップします。")
+            return
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        backends = ["opencv"]
+        try:
+            import onnxruntime
+            backends.append("onnxruntime")
+        except ImportError:
+            print("⚠️ onnxruntimeがないためOpenCV DNNのみテストします")
+
+        for backend in backends:
+            recognizer = AIRecognizer(model_path, input_size=320, backend=backend)
+            detections = recognizer.detect_objects(frame)
+
+            # 重なる同クラスの候補はNMSで1つになり、低スコアは除外される
+            assert len(detections) == 2, f"{backend}: 検出は2件のはず"
+            first, second = detections
+            assert first.class_name == "sodium_hypochlorite_closed", "最も信頼度の高い検出が先頭のはず"
+            assert abs(first.confidence - 0.9) < 1e-4, "信頼度が保持されるはず"
+            # 縮小率0.5・上パディング40を戻した元フレーム座標
+            assert first.bbox == (220, 90, 200, 300), "元フレーム座標に戻っているはず"
+            assert first.medicine_type == MedicineType.SODIUM_HYPOCHLORITE.value, "薬液名が補完されるはず"
+            assert first.cap_status == "closed", "蓋の状態が補完されるはず"
+            assert second.medicine_type == MedicineType.ACETIC_ACID.value, "別クラスの検出も残るはず"
+
+            assert recognizer.classify_medicine(detections) == MedicineType.SODIUM_HYPOCHLORITE.value
+            assert recognizer.last_timings["total_ms"] > 0, "処理時間が記録されるはず"
+            print(f"✅ {backend}: {recognizer.last_timings['total_ms']:.2f} ms/frame")
+
+        # OpenCV DNNの Net は認識ワーカースレッドごとに別のものを使う
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        recognizer = AIRecognizer(model_path, input_size=320, backend="opencv")
+        expected = [d.bbox for d in recognizer.detect_objects(frame)]
+        barrier = threading.Barrier(4)
+
+        def detect(_):
+            barrier.wait()
+            return recognizer.model.net, [d.bbox for d in recognizer.detect_objects(frame)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(detect, range(4)))
+        assert len({id(net) for net, _ in results}) == 4, "スレッドごとに Net を使うはず"
+        assert all(boxes == expected for _, boxes in results), "並行でも同じ結果のはず"
+
+    print("✅ 画像認識テスト: 成功")
+
+
+def test_letterbox_preprocessor():
+    """事前確保バッファによる前処理のテスト"""
+    print("=== 前処理テスト ===")
+
+    rng = np.random.default_rng(0)
+    preprocessor = LetterboxPreprocessor(320)
+    blob_buffer = preprocessor.blob
+    # サイズが変わってもパディングが正しく書き直されるか確認
+    for height, width in [(480, 640), (720, 1280), (320, 320), (480, 640)]:
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        frame.setflags(write=False)
+        blob, scale, pad = preprocessor(frame)
+        expected_blob, expected_scale, expected_pad = letterbox_reference(frame, 320)
+        assert blob is blob_buffer, "入力テンソルは毎回同じバッファのはず"
+        assert np.array_equal(blob, expected_blob), f"{width}x{height}: 従来実装と同じ入力テンソルのはず"
+        assert (scale, pad) == (expected_scale, expected_pad), "縮小率とパディングが一致するはず"
+
+    # 入力画像座標 → 元フレーム座標（640x480: 縮小率0.5・上パディング40）
+    boxes = np.array([[160.0, 140.0, 100.0, 150.0]])
+    mapped = preprocessor.map_boxes(boxes)
+    assert mapped is boxes, "その場で変換されるはず"
+    assert np.allclose(boxes, [[320.0, 200.0, 200.0, 300.0]]), "元フレーム座標に戻るはず"
+
+    print("✅ 前処理テスト: 成功")
+
+
+def test_vectorized_postprocess():
+    """配列による後処理が従来実装と一致するかのテスト"""
+    print("=== 後処理一致テスト ===")
+
+    rng = np.random.default_rng(0)
+    args = (DEFAULT_CLASS_NAMES, 0.5, 0.45, 0.5, (0, 80), (480, 640))
+    for trial in range(40):
+        anchors = int(rng.integers(0, 2000))
+        if trial % 2:
+            # YOLOv5形式 (1, N, 5+クラス数)
+            output = rng.uniform(0, 1, (1, anchors, 9)).astype(np.float32)
+            output[0, :, 0:2] *= 640
+            output[0, :, 2:4] = output[0, :, 2:4] * 200 + 5
+        else:
+            # YOLOv8形式 (1, 4+クラス数, N)
+            output = (rng.uniform(0, 1, (1, 8, anchors)) ** 4).astype(np.float32)
+            output[0, 0:2] = rng.uniform(-50, 690, (2, anchors))
+            output[0, 2:4] = rng.uniform(5, 200, (2, anchors))
+
+        batch = postprocess(output, *args)
+        assert isinstance(batch, DetectionBatch), "配列形式の検出結果が返るはず"
+        assert batch.to_detections() == reference_postprocess(output, *args), f"試行{trial}: 結果が一致するはず"
+
+    empty = postprocess(np.zeros((1, 8, 100), dtype=np.float32), *args)
+    assert len(empty) == 0 and empty.boxes.shape == (0, 4), "候補がなければ空の結果のはず"
+
+    print("✅ 後処理一致テスト: 成功")
+
+
+def test_tape_cascade():
+    """色付きテープによる段階的認識のテスト"""
+    print("=== テープ判定テスト ===")
+
+    red, blue = (0, 0, 220), (220, 0, 0)
+    selector = MedicineSelector()
+    selector.select_medicine(MedicineType.SODIUM_HYPOCHLORITE)
+
+    # 信頼度はテープ色の面積と2番目の色との差から求める（画面の2.3%なので減点される）
+    classifier = TapeClassifier()
+    tape = classifier.classify(make_tape_frame([red]))
+    assert tape.decisive and tape.medicine == MedicineType.SODIUM_HYPOCHLORITE, "赤テープは次亜塩素酸ナトリウムのはず"
+    assert 0.3 < tape.confidence < 0.6, f"面積に応じた信頼度のはず: {tape.confidence}"
+    large = np.full((480, 640, 3), 128, dtype=np.uint8)
+    large[100:300, 100:400] = red
+    assert classifier.classify(large).confidence == 1.0, "十分大きく1色だけなら信頼度1のはず"
+    mixed = make_tape_frame([red])
+    mixed[200:210, 320:340] = blue
+    assert classifier.classify(mixed).confidence < tape.confidence, "2番目の色があれば信頼度が下がるはず"
+
+    # 検出器がなければテープだけで決める
+    cascade = CascadeRecognizer(TapeClassifier(), selector)
+    result = cascade.check(make_tape_frame([blue]))
+    assert result.source == "tape" and result.medicine == MedicineType.ACETIC_ACID, "青テープは酢酸のはず"
+    assert result.matches_selection is False, "選択中の薬液と一致しないはず"
+
+    # 検出器があれば、直近の検出器の結果と一致するときだけテープで決める
+    detector = MovingBottleDetector()
+    cascade = CascadeRecognizer(TapeClassifier(), selector, detector, confirm_interval=3)
+    result = cascade.check(make_tape_frame([red]))
+    assert result.source == "detector" and detector.calls == 1, "最初は検出器で確かめるはず"
+    result = cascade.check(make_tape_frame([red]))
+    assert result.source == "tape" and result.detections is None, "検出器と一致すればテープで決まるはず"
+    assert result.matches_selection is True, "選択中の薬液と一致するはず"
+
+    # 検出器と違う色のテープ（ボトル以外の物の可能性）は検出器に任せる
+    result = cascade.check(make_tape_frame([blue]))
+    assert result.source == "detector", "検出器と違う色なら検出器を使うはず"
+    assert result.medicine == MedicineType.SODIUM_HYPOCHLORITE, "検出器の結果で判定されるはず"
+
+    # テープだけで決めるのは confirm_interval フレームまで
+    sources = [cascade.check(make_tape_frame([red])).source for _ in range(4)]
+    assert sources == ["tape", "tape", "tape", "detector"], f"一定フレームごとに検出器で確かめ直すはず: {sources}"
+
+    # テープが見えない・2色が同程度なら検出器に任せる
+    for frame in (make_tape_frame([]), make_tape_frame([red, blue])):
+        result = cascade.check(frame)
+        assert not result.tape.decisive and result.tape.confidence == 0.0, "テープの判定は曖昧なはず"
+        assert result.source == "detector", "曖昧な場合は検出器を使うはず"
+
+    stats = cascade.get_stats()
+    assert stats["frames"] == 9 and stats["fast_path_frames"] == 4, "テープで決まったフレームが記録されるはず"
+    print(f"段階的認識統計: {stats}")
+
+    print("✅ テープ判定テスト: 成功")
+
+
+class MovingBottleDetector:
+    """1フレームに2px右へ動くボトルと静止したボトルを返す模擬検出器"""
+
+    class_names = DEFAULT_CLASS_NAMES
+
+    def __init__(self):
+        self.frame_index = 0
+        self.calls = 0
+        self.visible = True
+
+    def detect_batch(self, frame):
+        self.calls += 1
+        if not self.visible:
+            return DetectionBatch.empty(self.class_names)
+        boxes = np.array([[100 + 2 * self.frame_index, 100, 80, 120], [400, 300, 50, 50]], dtype=np.int32)
+        return DetectionBatch(boxes, np.array([0.9, 0.8], dtype=np.float32),
+                              np.array([0, 2], dtype=np.int32), self.class_names)
+
+
+def test_tracking_recognizer():
+    """追跡による検出結果の引き継ぎテスト"""
+    print("=== 追跡テスト ===")
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    detector = MovingBottleDetector()
+    tracking = TrackingRecognizer(detector, keyframe_interval=5)
+
+    first_ids = None
+    for index in range(30):
+        detector.frame_index = index
+        batch = tracking.detect_batch(frame)
+        assert len(batch) == 2, "キーフレームの間も検出結果が引き継がれるはず"
+        ids = dict(zip(batch.class_ids.tolist(), batch.track_ids.tolist()))
+        first_ids = first_ids or ids
+        assert ids == first_ids, "追跡IDはフレーム間で変わらないはず"
+    assert detector.calls == 6, "検出器はキーフレーム（5フレームごと）だけ実行されるはず"
+
+    # 等速で動く物体はキーフレームの間も予測位置が追従する
+    moving = batch.boxes[batch.class_ids == 0][0]
+    assert abs(int(moving[0]) - (100 + 2 * 29)) <= 2, "予測位置が実際の位置に近いはず"
+    assert batch.to_detections()[0].track_id == first_ids[0], "Detectionにも追跡IDが付くはず"
+
+    # 検出されなくなった物体は信頼度が下がって再検出され、追跡が終わる
+    detector.visible = False
+    for _ in range(15):
+        batch = tracking.detect_batch(frame)
+    assert len(batch) == 0, "見えなくなった物体の追跡は終わるはず"
+
+    stats = tracking.get_stats()
+    print(f"追跡統計: {stats}")
+
+    # キーフレームの間にボトルが別の薬液に置き換わったら、前のボトルの追跡は結果に出さない
+    class SwappingDetector:
+        class_names = DEFAULT_CLASS_NAMES
+
+        def __init__(self):
+            self.detections = [(0, (100, 100, 80, 120))]
+
+        def detect_batch(self, frame):
+            boxes = np.array([box for _, box in self.detections], dtype=np.int32)
+            return DetectionBatch(boxes, np.full(len(boxes), 0.9, dtype=np.float32),
+                                  np.array([class_id for class_id, _ in self.detections], dtype=np.int32),
+                                  self.class_names)
+
+    detector = SwappingDetector()
+    tracking = TrackingRecognizer(detector, keyframe_interval=5)
+    for _ in range(3):
+        tracking.detect_batch(frame)
+    detector.detections = [(2, (102, 100, 80, 120))]
+    classes = [tracking.detect_batch(frame).class_ids.tolist() for _ in range(10)]
+    assert classes[:2] == [[0], [0]], "次のキーフレームまでは前の追跡を引き継ぐはず"
+    assert all(ids == [2] for ids in classes[2:]), f"キーフレーム以降は新しいボトルだけのはず: {classes}"
+    assert len(tracking.tracker.tracks) == 1, "同じ場所で置き換わった追跡は破棄されるはず"
+
+    # 別の場所へ入れ替わった場合も結果には出さず、再び検出されたら同じ追跡IDを引き継ぐ
+    first_id = tracking.detect_batch(frame).track_ids[0]
+    detector.detections = [(0, (400, 300, 80, 120))]
+    for _ in range(5):
+        batch = tracking.detect_batch(frame)
+    assert batch.class_ids.tolist() == [0] and len(tracking.tracker.tracks) == 2, "見えない追跡は内部にだけ残るはず"
+    detector.detections = [(2, (102, 100, 80, 120))]
+    for _ in range(5):
+        batch = tracking.detect_batch(frame)
+    assert batch.track_ids.tolist() == [first_id], "再び検出されたら同じ追跡IDのはず"
+
+    # 検出器の実行中もほかのワーカーは待たずに追跡の結果を返す
+    import threading
+    import time
+
+    class BlockingDetector(SwappingDetector):
+        def __init__(self):
+            super().__init__()
+            self.started = threading.Event()
+            self.release = threading.Event()
+
+        def detect_batch(self, frame):
+            self.started.set()
+            self.release.wait(5.0)
+            return super().detect_batch(frame)
+
+    detector = BlockingDetector()
+    tracking = TrackingRecognizer(detector, keyframe_interval=5)
+    worker = threading.Thread(target=tracking.detect_batch, args=(frame,))
+    worker.start()
+    assert detector.started.wait(5.0), "最初のフレームで検出器を実行するはず"
+    start = time.monotonic()
+    batch = tracking.detect_batch(frame)
+    waited = time.monotonic() - start
+    detector.release.set()
+    worker.join()
+    assert waited < 1.0 and len(batch) == 0, "検出器の実行を待たずに返るはず"
+    assert tracking.get_stats()["detector_calls"] == 1, "実行中の検出器を重ねて呼ばないはず"
+
+    print("✅ 追跡テスト: 成功")
+
+
+def test_service_recognition_stages():
+    """認識サービスが設定に従ってテープ判定・追跡を組み込むかのテスト"""
+    print("=== 認識サービスの段階的認識テスト ===")
+
+    from src.inference_pipeline import PipelineResult
+    from src.recognition_service import RecognitionService
+    from src.safety_checker import SafetyChecker, Verdict
+
+    red, blue = (0, 0, 220), (220, 0, 0)
+    selector = MedicineSelector()
+    selector.select_medicine(MedicineType.SODIUM_HYPOCHLORITE)
+
+    def run(service, frames):
+        """サービスの認識関数と結果の処理にフレームを順に通す"""
+        process = service._build_process()
+        for seq, frame in enumerate(frames, 1):
+            service._on_result(PipelineResult(seq, float(seq), process(frame), 0.0, 0.0))
+
+    # tape.enabled: テープの色が検出器の結果と一致するフレームは検出器を呼ばずに判定する
+    safety_checker = SafetyChecker(window=3)
+    service = RecognitionService.from_config({'tape': {'enabled': True}}, safety_checker=safety_checker,
+                                             medicine_selector=selector)
+    detector = service.recognizer = MovingBottleDetector()
+    safety_checker.start_session(MedicineType.SODIUM_HYPOCHLORITE, 0.0)
+    run(service, [make_tape_frame([red])] * 8)
+    assert detector.calls == 1, "最初の1回だけ検出器で確かめるはず"
+    assert safety_checker.get_verdict() == Verdict.SAFE, "テープの判定で◯になるはず"
+    assert service.cascade.get_stats()["fast_path_frames"] == 7, "テープで決まったフレームが数えられるはず"
+
+    # テープの信頼度は面積で減点されるため、1フレームあたりの重みは検出器より小さい
+    safety_checker.start_session(MedicineType.SODIUM_HYPOCHLORITE, 10.0)
+    run(service, [make_tape_frame([red])] * 2)
+    tape_weight = safety_checker.weight_sum
+    safety_checker.start_session(MedicineType.SODIUM_HYPOCHLORITE, 15.0)
+    run(service, [make_tape_frame([])] * 2)
+    assert tape_weight < safety_checker.weight_sum, "テープのフレームは検出器より軽く数えられるはず"
+
+    # 検出器と違う色のテープはテープだけで決めず、検出器の結果で判定する
+    calls = detector.calls
+    safety_checker.start_session(MedicineType.SODIUM_HYPOCHLORITE, 20.0)
+    run(service, [make_tape_frame([blue])] * 5)
+    assert detector.calls == calls + 5, "検出器と違う色なら毎回検出器を使うはず"
+    assert safety_checker.get_verdict() == Verdict.SAFE, "検出器の結果で判定されるはず"
+
+    # tracking.enabled: テープで決まらないフレームはキーフレームでだけ検出器を使う
+    safety_checker = SafetyChecker(window=3)
+    service = RecognitionService.from_config(
+        {'tape': {'enabled': True}, 'tracking': {'enabled': True, 'keyframe_interval': 5}},
+        safety_checker=safety_checker, medicine_selector=selector)
+    detector = service.recognizer = MovingBottleDetector()
+    safety_checker.start_session(MedicineType.SODIUM_HYPOCHLORITE, 0.0)
+    run(service, [make_tape_frame([])] * 10 + [make_tape_frame([red])] * 3)
+    assert detector.calls == 2, f"10フレーム中2回だけ検出器を使うはず: {detector.calls}"
+    assert service.tracking.get_stats()["frames"] == 10, "テープで決まったフレームは追跡を通らないはず"
+    assert safety_checker.get_verdict() == Verdict.SAFE, "追跡で引き継いだ検出でも判定されるはず"
+
+    # tape・trackingセクションがなければ検出器だけを使う
+    service = RecognitionService({}, {})
+    detector = service.recognizer = MovingBottleDetector()
+    run(service, [make_tape_frame([red])] * 2)
+    assert service.cascade is None and service.tracking is None, "テープ判定・追跡を使わないはず"
+    assert detector.calls == 2, "毎フレーム検出器を使うはず"
+
+    print("✅ 認識サービスの段階的認識テスト: 成功")
+
+
+def test_quantized_model():
+    """INT8量子化モデルの読み込みテスト"""
+    print("=== INT8量子化テスト ===")
+
+    try:
+        from onnxruntime.quantization import quantize_static
+        from tools.quantize_model import quantize_model
+    except ImportError:
+        print("⚠️ onnx / onnxruntime がインストールされていません。テストをスキップします。")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = make_dummy_model(tmp_dir)
+        image_dir = os.path.join(tmp_dir, "calibration")
+        os.makedirs(image_dir)
+        rng = np.random.default_rng(0)
+        for index in range(4):
+            cv2.imwrite(os.path.join(image_dir, f"{index}.jpg"),
+                        rng.integers(0, 256, (480, 640, 3), dtype=np.uint8))
+
+        int8_path = quantize_model(model_path, image_dir, os.path.join(tmp_dir, "dummy.int8.onnx"))
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        expected = AIRecognizer(model_path, input_size=320, backend="onnxruntime").detect_objects(frame)
+        model_config = {"precision": "int8", "int8_path": int8_path, "input_size": 320, "backend": "onnxruntime"}
+        recognizer = AIRecognizer.from_config(model_config)
+        assert recognizer.model_path == int8_path, "precision: int8 ならINT8モデルを読み込むはず"
+
+        detections = recognizer.detect_objects(frame)
+        assert [d.class_name for d in detections] == [d.class_name for d in expected], "FP32と同じ物体を検出するはず"
+        for detection, reference in zip(detections, expected):
+            # 出力ノードは量子化しないので信頼度は0〜1のまま
+            assert abs(detection.confidence - reference.confidence) < 0.02, "信頼度がFP32に近いはず"
+
+        try:
+            AIRecognizer.from_config({"precision": "fp16", "onnx_path": model_path})
+            assert False, "不明な精度は読み込めないはず"
+        except ModelLoadError:
+            pass
+
+    print("✅ INT8量子化テスト: 成功")
+
+
+def test_detection_metrics():
+    """検出精度（適合率・再現率・mAP）の集計テスト"""
+    print("=== 検出精度テスト ===")
+
+    def batch(rows):
+        return DetectionBatch(np.array([row[:4] for row in rows], dtype=np.int32).reshape(-1, 4),
+                              np.array([row[4] for row in rows], dtype=np.float32),
+                              np.array([row[5] for row in rows], dtype=np.int32), DEFAULT_CLASS_NAMES)
+
+    gt_boxes = np.array([[100, 100, 80, 120], [400, 300, 50, 50]], dtype=np.float64)
+    gt_class_ids = np.array([0, 2])
+
+    # 正解どおりの検出はAP 1
+    evaluator = DetectionEvaluator(DEFAULT_CLASS_NAMES)
+    evaluator.add(batch([(100, 100, 80, 120, 0.9, 0), (402, 300, 50, 50, 0.8, 2)]), gt_boxes, gt_class_ids)
+    result = evaluator.compute()
+    assert result["mAP"] == 1.0, "正解どおりならmAPは1のはず"
+
+    # 信頼度の高い誤検出が混じると適合率とAPが下がる
+    other = DetectionEvaluator(DEFAULT_CLASS_NAMES)
+    other.add(batch([(300, 10, 80, 120, 0.95, 0), (100, 100, 80, 120, 0.9, 0)]), gt_boxes[:1], gt_class_ids[:1])
+    result = other.compute()["per_class"]["sodium_hypochlorite_closed"]
+    assert (result["tp"], result["fp"], result["gt"]) == (1, 1, 1), "誤検出が数えられるはず"
+    assert result["precision"] == 0.5 and abs(result["ap"] - 0.5) < 1e-9, "APは0.5のはず"
+
+    # 並列評価の結果を統合できる
+    evaluator.merge(other)
+    merged = evaluator.compute()
+    assert merged["images"] == 2 and merged["per_class"]["sodium_hypochlorite_closed"]["gt"] == 2, "集計が統合されるはず"
+
+    # 画像単位の判定: 最も大きいラベルと、閾値以上で最も信頼度の高い検出を比べる
+    accuracy = StateAccuracy(DEFAULT_CLASS_NAMES, confidence_threshold=0.5)
+    accuracy.add(batch([(100, 100, 80, 120, 0.9, 0)]), gt_boxes, gt_class_ids)
+    accuracy.add(batch([(100, 100, 80, 120, 0.9, 1), (402, 300, 50, 50, 0.95, 2)]), gt_boxes[:1], gt_class_ids[:1])
+    accuracy.add(batch([(100, 100, 80, 120, 0.3, 0)]), gt_boxes[:1], gt_class_ids[:1])
+    other_accuracy = StateAccuracy(DEFAULT_CLASS_NAMES, confidence_threshold=0.5)
+    other_accuracy.add(batch([(100, 100, 80, 120, 0.9, 1)]), gt_boxes[:1], gt_class_ids[:1])
+    other_accuracy.add(batch([]), gt_boxes[:0], gt_class_ids[:0])
+    accuracy.merge(other_accuracy)
+    result = accuracy.compute()
+    assert (result["images"], result["unlabeled"]) == (4, 1), "ラベルのない画像は正解率に含めないはず"
+    assert result["medicine_accuracy"] == 0.5, "薬液は1枚目と4枚目が正解のはず"
+    assert result["cap_state_accuracy"] == 0.5, "蓋の状態は1枚目と2枚目が正解のはず"
+    assert result["class_accuracy"] == 0.25, "両方正解なのは1枚目だけのはず"
+    assert result["miss_rate"] == 0.25, "閾値未満の検出だけなら検出なしのはず"
+
+    print("✅ 検出精度テスト: 成功")
+
+
+def test_dataset_build():
+    """学習データの検証・縮小・分割のテスト"""
+    print("=== 学習データ作成テスト ===")
+
+    from src.dataset import read_image_list, stratified_split, validate_yolo_label
+    from tools.build_dataset import build_dataset
+
+    # 層ごとに8:1:1で分割され、同じ入力なら同じ分割になる
+    keys = {f"{klass}_{index}.jpg": klass for klass in range(2) for index in range(20)}
+    splits = stratified_split(keys)
+    assert [len(splits[name]) for name in ("train", "val", "test")] == [32, 4, 4], "8:1:1で分割されるはず"
+    assert sum(name.startswith("0_") for name in splits["val"]) == 2, "クラスごとに比率が保たれるはず"
+    assert stratified_split(keys) == splits, "同じ入力なら同じ分割になるはず"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "data", "images")
+        rng = np.random.default_rng(0)
+        for class_id, name in enumerate(DEFAULT_CLASS_NAMES):
+            image_dir = os.path.join(source, name)
+            label_dir = os.path.join(tmp_dir, "data", "labels", name)
+            os.makedirs(image_dir)
+            os.makedirs(label_dir)
+            for index in range(10):
+                cv2.imwrite(os.path.join(image_dir, f"{index}.jpg"),
+                            rng.integers(0, 256, (960, 1280, 3), dtype=np.uint8))
+                with open(os.path.join(label_dir, f"{index}.txt"), "w", encoding="utf-8") as f:
+                    f.write(f"{class_id} 0.5 0.5 0.2 0.3\n")
+        bad_label = os.path.join(tmp_dir, "data", "labels", DEFAULT_CLASS_NAMES[0], "9.txt")
+        with open(bad_label, "w", encoding="utf-8") as f:
+            f.write("7 0.5 0.5 0.2 0.3\n0 1.5 0.5 0.2\n")
+        rows, errors = validate_yolo_label(bad_label, len(DEFAULT_CLASS_NAMES))
+        assert not rows and len(errors) == 2, "範囲外のクラスIDと値の数の誤りが見つかるはず"
+
+        output = os.path.join(tmp_dir, "data", "processed")
+        splits_dir = os.path.join(tmp_dir, "data", "splits")
+        result = build_dataset(source, output, splits_dir, image_size=320, workers=2)
+        assert result["valid"] == 39 and len(result["errors"]) == 2, "不正なラベルの画像は除かれるはず"
+        assert result["splits"] == {"train": 31, "val": 4, "test": 4}, "8:1:1で分割されるはず"
+        val = read_image_list(os.path.join(splits_dir, "val.txt"))
+        assert cv2.imread(val[0]).shape == (240, 320, 3), "長辺が学習サイズに縮小されるはず"
+        assert result["cache_hit_rate"] == 0.0, "初回はキャッシュを使わないはず"
+
+        # 変わっていない画像はキャッシュから、ラベルを直した画像だけ処理し直す
+        with open(bad_label, "w", encoding="utf-8") as f:
+            f.write("0 0.5 0.5 0.2 0.3\n")
+        result = build_dataset(source, output, splits_dir, image_size=320, workers=2)
+        assert result["valid"] == 40 and result["cached"] == 39, "変わっていない画像はキャッシュを使うはず"
+        print(f"作成結果: {result['splits']}, キャッシュ利用率 {result['cache_hit_rate']:.1%}")
+
+    print("✅ 学習データ作成テスト: 成功")
+
+
+def test_model_preload():
+    """モデルの先読み・ウォームアップのテスト"""
+    print("=== モデル先読みテスト ===")
+
+    import time
+    from src.camera_manager import CameraManager
+    from src.recognition_service import RecognitionService
+    from src.safety_checker import SafetyChecker, Verdict
+    from src.synthetic_camera import SyntheticVideoCapture
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = make_dummy_model(tmp_dir)
+        if model_path is None:
+            print("⚠️ onnxがインストールされていません。テストをスキップします。")
+            return
+
+        recognizer = AIRecognizer(model_path, input_size=320)
+        times = recognizer.warmup(2, (120, 160, 3))
+        assert len(times) == 2 and recognizer.last_timings["total_ms"] == 0.0, "ウォームアップは計測に残らないはず"
+
+        safety_checker = SafetyChecker(window=3)
+        service = RecognitionService({"onnx_path": model_path, "input_size": 320, "warmup_iterations": 2}, {},
+                                     safety_checker=safety_checker)
+        service.preload((120, 160, 3))
+        service.preload((120, 160, 3))
+        deadline = time.monotonic() + 30.0
+        while service.is_loading and time.monotonic() < deadline:
+            time.sleep(0.01)
+        status = service.get_load_status()
+        print(f"準備状況: {status}")
+        assert service.is_ready and status["state"] == "ready", "先読みでモデルが用意されるはず"
+        assert status["warmup_ms"] > 0, "ウォームアップの時間が記録されるはず"
+        preloaded = service.recognizer
+
+        # 補充開始時は読み込み済みのモデルをそのまま使う
+        camera_manager = CameraManager(
+            width=160, height=120, fps=30, ring_size=5,
+            capture_factory=lambda device_id: SyntheticVideoCapture(160, 120, fps=30, realtime=True)
+        )
+        assert camera_manager.start_camera(), "合成カメラは開始できるはず"
+        safety_checker.start_session(MedicineType.SODIUM_HYPOCHLORITE)
+        try:
+            assert service.attach(camera_manager), "認識を開始できるはず"
+            assert service.recognizer is preloaded, "先読みしたモデルを使うはず"
+            deadline = time.monotonic() + 10.0
+            while safety_checker.get_verdict() == Verdict.PENDING and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            service.shutdown()
+            camera_manager.stop_camera()
+        assert safety_checker.get_verdict() == Verdict.SAFE, "ダミーモデルの検出で判定されるはず"
+        assert service.get_load_status()["state"] == "idle", "終了後は未読み込みに戻るはず"
+
+    print("✅ モデル先読みテスト: 成功")
+
+
+def test_model_background_load():
+    """先読みしていない場合に attach がUIスレッドを止めずにモデルを読み込むかのテスト"""
+    print("=== バックグラウンド読み込みテスト ===")
+
+    import time
+    from src.camera_manager import CameraManager
+    from src.recognition_service import RecognitionService
+    from src.synthetic_camera import SyntheticVideoCapture
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = make_dummy_model(tmp_dir)
+        if model_path is None:
+            print("⚠️ onnxがインストールされていません。テストをスキップします。")
+            return
+
+        camera_manager = CameraManager(
+            width=160, height=120, fps=30, ring_size=5,
+            capture_factory=lambda device_id: SyntheticVideoCapture(160, 120, fps=30, realtime=True)
+        )
+        assert camera_manager.start_camera(), "合成カメラは開始できるはず"
+        service = RecognitionService({"onnx_path": model_path, "input_size": 320}, {})
+        failed = RecognitionService({"onnx_path": os.path.join(tmp_dir, "missing.onnx")}, {})
+        try:
+            # 未読み込みなら読み込みを始めてすぐに返り、画面は is_loading を見て呼び直す
+            assert not service.attach(camera_manager), "読み込み中は認識を開始しないはず"
+            assert service.is_loading or service.is_ready, "バックグラウンドで読み込みを始めるはず"
+            deadline = time.monotonic() + 30.0
+            while not service.attach(camera_manager) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert service.pipeline is not None, "読み込みが終われば認識を開始できるはず"
+            print(f"準備状況: {service.get_load_status()}")
+
+            # 読み込めないモデルは何度 attach しても読み込み直さない
+            assert not failed.attach(camera_manager), "読み込み中は認識を開始しないはず"
+            while failed.is_loading and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert not failed.attach(camera_manager), "読み込めなければ認識を開始しないはず"
+            assert not failed.is_loading and failed.load_state == "failed", "失敗したら読み込みを繰り返さないはず"
+        finally:
+            service.shutdown()
+            failed.shutdown()
+            camera_manager.stop_camera()
+
+    print("✅ バックグラウンド読み込みテスト: 成功")
+
+
+def test_model_load_failures():
+    """ウォームアップの失敗・読み込み中の終了と設定変更のテスト"""
+    print("=== モデル準備の失敗・中断テスト ===")
+
+    import threading
+    import time
+    from src.recognition_service import LOAD_JOIN_TIMEOUT, RecognitionService
+    from src.recognizer.errors import RecognitionError
+
+    def wait_loaded(service):
+        deadline = time.monotonic() + 30.0
+        while service.is_loading and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    factory = AIRecognizer.__dict__['from_config']
+    try:
+        # ウォームアップの推論エラー・出力形状の不一致は読み込みの失敗として扱う
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = make_dummy_model(tmp_dir)
+            if model_path is None:
+                print("⚠️ onnxがインストールされていません。ウォームアップの失敗はスキップします。")
+            for infer in (None, lambda blob: np.zeros((1, 2), dtype=np.float32)) if model_path else ():
+                def broken_backend(cls, model_config, infer=infer):
+                    recognizer = AIRecognizer(model_path, input_size=320)
+                    if infer is None:
+                        def infer(blob):
+                            raise RecognitionError("推論エラー: テスト")
+                    recognizer.model = SimpleNamespace(name="broken", infer=infer)
+                    return recognizer
+
+                AIRecognizer.from_config = classmethod(broken_backend)
+                service = RecognitionService({"warmup_iterations": 2}, {})
+                service.preload((120, 160, 3))
+                wait_loaded(service)
+                assert service.get_load_status()["state"] == "failed", "ウォームアップの失敗は読み込みの失敗のはず"
+                camera_manager = SimpleNamespace(width=160, height=120)
+                assert not service.attach(camera_manager) and not service.is_loading, \
+                    "失敗した読み込みをウォームアップなしでやり直さないはず"
+
+        # 読み込み中の閾値の変更は待たずに返り、読み込みの完了時に反映される
+        release = threading.Event()
+        loaded = []
+
+        class SlowRecognizer:
+            def __init__(self, model_config):
+                self.thresholds = {}
+                self.closed = False
+                release.wait(10.0)
+                loaded.append(self)
+
+            def set_thresholds(self, **thresholds):
+                self.thresholds.update(thresholds)
+
+            def close(self):
+                self.closed = True
+
+        AIRecognizer.from_config = classmethod(lambda cls, model_config: SlowRecognizer(model_config))
+        service = RecognitionService({"confidence_threshold": 0.5, "warmup_iterations": 0}, {})
+        service.preload((120, 160, 3))
+        start = time.monotonic()
+        effects = service.update_model_config({"confidence_threshold": 0.7},
+                                              {"confidence_threshold": (0.5, 0.7)})
+        assert time.monotonic() - start < 0.5 and effects, "読み込みの完了を待たないはず"
+        release.set()
+        wait_loaded(service)
+        assert service.recognizer.thresholds["confidence_threshold"] == 0.7, "読み込みの完了時に反映されるはず"
+        service.shutdown()
+
+        # 読み込み中の終了は一定時間で返り、後から読み込まれたモデルは閉じて捨てる
+        release.clear()
+        service.preload((120, 160, 3))
+        start = time.monotonic()
+        service.shutdown()
+        assert time.monotonic() - start < LOAD_JOIN_TIMEOUT + 0.5, "読み込みの完了を待ち続けないはず"
+        release.set()
+        deadline = time.monotonic() + 5.0
+        while not (len(loaded) == 2 and loaded[-1].closed) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(loaded) == 2 and loaded[-1].closed, "終了後に読み込まれたモデルは閉じるはず"
+        assert service.recognizer is None and service.load_state == "idle", "終了後は未読み込みのままのはず"
+    finally:
+        AIRecognizer.from_config = factory
+
+    print("✅ モデル準備の失敗・中断テスト: 成功")
+
+
+def test_model_load_error():
+    """モデル読み込みエラーのテスト"""
+    print("=== モデル読み込みエラーテスト ===")
+
+    try:
+        AIRecognizer("models/does_not_exist.onnx")
+        assert False, "存在しないモデルは読み込めないはず"
+    except ModelLoadError as e:
+        print(f"✅ 想定どおりのエラー: {e}")
+
+
+def main():
+    """メインテスト関数"""
+    print("透析供給装置薬液補充アプリ - 画像認識テスト")
+    print("=" * 50)
+
+    try:
+        test_recognizer_backends()
+        print()
+
+        test_letterbox_preprocessor()
+        print()
+
+        test_vectorized_postprocess()
+        print()
+
+        test_tape_cascade()
+        print()
+
+        test_tracking_recognizer()
+        print()
+
+        test_service_recognition_stages()
+        print()
+
+        test_quantized_model()
+        print()
+
+        test_detection_metrics()
+        print()
+
+        test_dataset_build()
+        print()
+
+        test_model_preload()
+        print()
+
+        test_model_background_load()
+        print()
+
+        test_model_load_failures()
+        print()
+
+        test_model_load_error()
+        print()
+
+        print("=" * 50)
+        print("✅ 全テスト完了")
+
+    except Exception as e:
+        print(f"❌ テスト実行中にエラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+学習データの作成ツール
+labelImgで作ったYOLO形式のデータ（data/images と data/labels）を検証し、画像を学習サイズへ縮小して
+data/processed に書き出し、クラスのバランスを保って学習用・検証用・テスト用に8:1:1で分割する
+
+- 画像の縮小・ラベルの検証はワーカープロセスで並列に行う
+- 画像とラベルの内容のハッシュを data/processed/cache.json に保存し、変わっていない画像はデコードせずに飛ばす
+- 分割は data/splits/{train,val,test}.txt（1行1画像パス）と、学習用の設定 data/processed/dataset.yaml に書き出す
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.dataset import SPLIT_RATIOS, find_images, label_path_for, stratified_split, validate_yolo_label
+from src.recognizer.detection import DEFAULT_CLASS_NAMES
+
+
+CACHE_FILE = "cache.json"
+
+# ラベルのない画像（背景）の層
+BACKGROUND = -1
+
+
+def _content_hash(image_bytes: bytes, label_bytes: bytes, settings: str) -> str:
+    digest = hashlib.sha1(image_bytes)
+    digest.update(b"\0")
+    digest.update(label_bytes)
+    digest.update(b"\0")
+    digest.update(settings.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _primary_class(class_ids: List[int]) -> int:
+    """画像の代表クラス（最も多いクラス、同数ならIDの小さい方、物体がなければ背景）"""
+    if not class_ids:
+        return BACKGROUND
+    counts = Counter(class_ids)
+    return min(counts, key=lambda class_id: (-counts[class_id], class_id))
+
+
+def _process_image(task: tuple, output_root: str, image_size: int, jpeg_quality: int, num_classes: int) -> dict:
+    """
+    1画像を検証・縮小して書き出す（ワーカープロセスで実行）
+
+    ハッシュがキャッシュと同じで出力も残っていれば、デコードせずにキャッシュの結果を返す。
+    """
+    source, relative, cached = task
+    label_path = label_path_for(source)
+    with open(source, "rb") as f:
+        image_bytes = f.read()
+    label_bytes = b""
+    if os.path.exists(label_path):
+        with open(label_path, "rb") as f:
+            label_bytes = f.read()
+    content_hash = _content_hash(image_bytes, label_bytes, f"{image_size}:{jpeg_quality}:{num_classes}")
+
+    stem = os.path.splitext(relative)[0]
+    image_out = os.path.join(output_root, "images", stem + ".jpg")
+    label_out = os.path.join(output_root, "labels", stem + ".txt")
+    if cached and cached["hash"] == content_hash and os.path.exists(image_out) and os.path.exists(label_out):
+        return {"relative": relative, "hash": content_hash, "classes": cached["classes"], "cached": True,
+                "errors": []}
+
+    rows, errors = validate_yolo_label(label_path, num_classes)
+    if errors:
+        return {"relative": relative, "hash": content_hash, "classes": [], "cached": False, "errors": errors}
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return {"relative": relative, "hash": content_hash, "classes": [], "cached": False,
+                "errors": [f"画像を読み込めません: {source}"]}
+
+    # 長辺を学習サイズに合わせて縮小する（縦横比を保つのでYOLO形式の相対座標はそのまま使える）
+    height, width = image.shape[:2]
+    scale = image_size / max(height, width)
+    if scale < 1.0:
+        image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    os.makedirs(os.path.dirname(image_out), exist_ok=True)
+    os.makedirs(os.path.dirname(label_out), exist_ok=True)
+    cv2.imwrite(image_out, image, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+    with open(label_out, "w", encoding="utf-8") as f:
+        f.writelines(f"{class_id} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n" for class_id, cx, cy, w, h in rows)
+    return {"relative": relative, "hash": content_hash, "classes": [row[0] for row in rows], "cached": False,
+            "errors": []}
+
+
+def _load_cache(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("images", {})
+    except (OSError, ValueError):
+        print(f"⚠️ キャッシュを読み込めないため作り直します: {path}")
+        return {}
+
+
+def _remove_stale(output_root: str, relatives: List[str]):
+    """元画像がなくなった出力を削除"""
+    for relative in relatives:
+        stem = os.path.splitext(relative)[0]
+        for path in (os.path.join(output_root, "images", stem + ".jpg"),
+                     os.path.join(output_root, "labels", stem + ".txt")):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def build_dataset(source_root: str = "data/images", output_root: str = "data/processed",
+                  splits_dir: str = "data/splits", image_size: int = 640, jpeg_quality: int = 95,
+                  workers: int = 0, class_names: Optional[List[str]] = None, seed: int = 0) -> dict:
+    """
+    学習データを検証・縮小して分割
+
+    Args:
+        source_root: labelImgの画像ディレクトリ（ラベルは同じ構成の labels 以下）
+        output_root: 縮小した画像・ラベルの出力先
+        splits_dir: 分割ファイルの出力先
+        image_size: 学習サイズ（長辺の最大値）
+        jpeg_quality: 出力するJPEGの画質
+        workers: ワーカープロセス数（0でCPUコア数）
+        class_names: クラス名のリスト
+        seed: 分割のシード
+
+    Returns:
+        dict: 画像数、キャッシュの利用数、不正なラベル、処理速度、分割ごとのクラス別画像数
+    """
+    class_names = list(class_names or DEFAULT_CLASS_NAMES)
+    workers = workers or os.cpu_count() or 1
+    cache_path = os.path.join(output_root, CACHE_FILE)
+    cache = _load_cache(cache_path)
+
+    images = find_images(source_root)
+    relatives = [os.path.relpath(path, source_root) for path in images]
+    tasks = [(path, relative, cache.get(relative)) for path, relative in zip(images, relatives)]
+    process = functools.partial(_process_image, output_root=output_root, image_size=image_size,
+                                jpeg_quality=jpeg_quality, num_classes=len(class_names))
+
+    start = time.perf_counter()
+    results = []
+    if tasks:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = list(executor.map(process, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+    elapsed = time.perf_counter() - start
+
+    valid = [result for result in results if not result["errors"]]
+    errors = [error for result in results for error in result["errors"]]
+    _remove_stale(output_root, sorted(set(cache) - {result["relative"] for result in valid}))
+
+    # 代表クラスを層にして分割する
+    splits = stratified_split({result["relative"]: _primary_class(result["classes"]) for result in valid},
+                              SPLIT_RATIOS, seed)
+    classes_of = {result["relative"]: result["classes"] for result in valid}
+    os.makedirs(splits_dir, exist_ok=True)
+    split_files = {}
+    balance = {}
+    for split, relatives_in_split in splits.items():
+        split_files[split] = os.path.join(splits_dir, f"{split}.txt")
+        with open(split_files[split], "w", encoding="utf-8") as f:
+            for relative in relatives_in_split:
+                f.write(os.path.join(output_root, "images", os.path.splitext(relative)[0] + ".jpg") + "\n")
+        counts = Counter(_primary_class(classes_of[relative]) for relative in relatives_in_split)
+        balance[split] = {name: counts.get(class_id, 0) for class_id, name in enumerate(class_names)}
+        balance[split]["background"] = counts.get(BACKGROUND, 0)
+
+    os.makedirs(output_root, exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"images": {result["relative"]: {"hash": result["hash"], "classes": result["classes"]}
+                              for result in valid}}, f, ensure_ascii=False)
+    with open(os.path.join(output_root, "dataset.yaml"), "w", encoding="utf-8") as f:
+        for split, path in split_files.items():
+            f.write(f"{split}: {os.path.abspath(path)}\n")
+        f.write(f"nc: {len(class_names)}\n")
+        f.write("names: [" + ", ".join(class_names) + "]\n")
+
+    cached = sum(1 for result in results if result["cached"])
+    return {
+        "images": len(results),
+        "valid": len(valid),
+        "cached": cached,
+        "cache_hit_rate": cached / len(results) if results else 0.0,
+        "errors": errors,
+        "workers": workers,
+        "elapsed_s": elapsed,
+        "images_per_s": len(results) / elapsed if elapsed > 0 else 0.0,
+        "splits": {split: len(names) for split, names in splits.items()},
+        "balance": balance,
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="学習データを検証・縮小して8:1:1に分割")
+    parser.add_argument("--source", default="data/images", help="labelImgの画像ディレクトリ")
+    parser.add_argument("--output", default="data/processed")
+    parser.add_argument("--splits", default="data/splits")
+    parser.add_argument("--image-size", type=int, default=640, help="学習サイズ（長辺）")
+    parser.add_argument("--quality", type=int, default=95)
+    parser.add_argument("--workers", type=int, default=0, help="ワーカープロセス数（0でCPUコア数）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = build_dataset(args.source, args.output, args.splits, args.image_size, args.quality,
+                           args.workers, seed=args.seed)
+    for error in result["errors"]:
+        print(f"⚠️ {error}")
+    print(f"学習データ作成: {result['images']}枚（有効 {result['valid']}枚, 不正 {len(result['errors'])}件）  "
+          f"{result['images_per_s']:.1f} 画像/秒  キャッシュ利用率 {result['cache_hit_rate']:.1%}  "
+          f"(ワーカー {result['workers']})")
+    for split, counts in result["balance"].items():
+        detail = "  ".join(f"{name} {count}" for name, count in counts.items())
+        print(f"  {split:5s} {result['splits'][split]:5d}枚: {detail}")
+
+
+if __name__ == "__main__":
+    main()
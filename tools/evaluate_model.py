@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+モデルの評価ツール
+labelImgのYOLO形式のデータセット（画像ディレクトリまたは分割ファイル）でモデルを評価し、
+クラスごとの適合率・再現率・AP、mAP、画像単位の薬液・蓋の状態の正解率、
+処理速度（画像/秒、1画像あたりの処理時間 p50 / p95 / p99）をJSONのレポートに出力する
+
+画像は数十枚ずつのまとまりでワーカープロセスへ順に渡し（全画像を先に読み込まない）、
+各ワーカーがモデルを1回だけ読み込んで評価する。ワーカーごとの集計は DetectionEvaluator.merge で統合する。
+--compare で以前のレポート（別のモデルのものなど）と比較できる。
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.dataset import DEFAULT_VAL_SPLIT, label_path_for, load_yolo_labels, resolve_images
+from src.recognizer.detection import DEFAULT_CLASS_NAMES
+from src.recognizer.metrics import DetectionEvaluator, StateAccuracy
+
+
+# REQ-006: 薬液の識別の正解率の目標
+TARGET_ACCURACY = 0.95
+
+# ワーカープロセスごとの認識クラス（_init_workerで読み込む）
+_recognizer = None
+_settings: dict = {}
+
+
+def _init_worker(model_path: str, class_names: List[str], input_size: int, backend: str, num_threads: int,
+                 confidence_threshold: float, accuracy_threshold: float):
+    """ワーカープロセスでモデルを1回だけ読み込む"""
+    global _recognizer, _settings
+    from src.recognizer import AIRecognizer
+
+    _recognizer = AIRecognizer(model_path, confidence_threshold=confidence_threshold, input_size=input_size,
+                               backend=backend, num_threads=num_threads, class_names=class_names)
+    _settings = {"class_names": class_names, "accuracy_threshold": accuracy_threshold}
+
+
+def _evaluate_chunk(paths: List[str]) -> dict:
+    """画像のまとまりを評価（ワーカープロセスで実行）"""
+    class_names = _settings["class_names"]
+    evaluator = DetectionEvaluator(class_names)
+    accuracy = StateAccuracy(class_names, _settings["accuracy_threshold"])
+    latencies, inference_ms, unreadable = [], [], []
+    for path in paths:
+        start = time.perf_counter()
+        frame = cv2.imread(path)
+        if frame is None:
+            unreadable.append(path)
+            continue
+        batch = _recognizer.detect_batch(frame)
+        latencies.append(1000.0 * (time.perf_counter() - start))
+        inference_ms.append(_recognizer.last_timings["inference_ms"])
+
+        height, width = frame.shape[:2]
+        gt_boxes, gt_class_ids = load_yolo_labels(label_path_for(path), width, height)
+        evaluator.add(batch, gt_boxes, gt_class_ids)
+        accuracy.add(batch, gt_boxes, gt_class_ids)
+    return {"evaluator": evaluator, "accuracy": accuracy, "latencies": latencies,
+            "inference_ms": inference_ms, "unreadable": unreadable, "backend": _recognizer.model.name}
+
+
+def _chunks(images: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(images), size):
+        yield images[start:start + size]
+
+
+def _percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"avg": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    array = np.asarray(values)
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {"avg": float(array.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+def evaluate(model_path: str, images: List[str], class_names: Optional[List[str]] = None, input_size: int = 640,
+             backend: str = "onnxruntime", workers: int = 0, num_threads: int = 0, chunk_size: int = 32,
+             confidence_threshold: float = 0.25, accuracy_threshold: float = 0.5) -> dict:
+    """
+    データセットでモデルをプロセス並列に評価
+
+    Args:
+        model_path: ONNXモデルのパス
+        images: 画像パス（ラベルは labels 以下の同名の .txt）
+        class_names: クラス名のリスト
+        input_size: モデルの入力サイズ
+        backend: 推論バックエンド
+        workers: ワーカープロセス数（0でCPUコア数）
+        num_threads: ワーカーごとの推論スレッド数（0でコア数をワーカーで等分）
+        chunk_size: 1回にワーカーへ渡す画像数
+        confidence_threshold: mAPの集計に含める検出の信頼度の下限
+        accuracy_threshold: 正解率の判定に使う検出の信頼度の下限（アプリの confidence_threshold）
+
+    Returns:
+        dict: 評価レポート
+    """
+    class_names = list(class_names or DEFAULT_CLASS_NAMES)
+    cpu_count = os.cpu_count() or 1
+    workers = workers or cpu_count
+    num_threads = num_threads or max(1, cpu_count // workers)
+
+    evaluator = DetectionEvaluator(class_names)
+    accuracy = StateAccuracy(class_names, accuracy_threshold)
+    latencies, inference_ms, unreadable = [], [], []
+    backend_name = ""
+
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(model_path, class_names, input_size, backend, num_threads,
+                                       confidence_threshold, accuracy_threshold)) as executor:
+        # 処理中のまとまりをワーカー数の2倍までに抑え、結果を受け取るたびに次を渡す
+        chunks = _chunks(images, chunk_size)
+        pending = set()
+        while True:
+            for paths in chunks:
+                pending.add(executor.submit(_evaluate_chunk, paths))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                evaluator.merge(result["evaluator"])
+                accuracy.merge(result["accuracy"])
+                latencies.extend(result["latencies"])
+                inference_ms.extend(result["inference_ms"])
+                unreadable.extend(result["unreadable"])
+                backend_name = result["backend"]
+    elapsed = time.perf_counter() - start
+
+    for path in unreadable:
+        print(f"⚠️ 画像を読み込めません: {path}")
+    metrics = evaluator.compute()
+    for values in metrics["per_class"].values():
+        # 正解のないクラスのAPはNaNなので、JSONではnullにする
+        if values["ap"] != values["ap"]:
+            values["ap"] = None
+    return {
+        "model": model_path,
+        "model_mb": os.path.getsize(model_path) / 1e6,
+        "backend": backend_name,
+        "input_size": input_size,
+        "workers": workers,
+        "threads_per_worker": num_threads,
+        "confidence_threshold": confidence_threshold,
+        "images": metrics["images"],
+        "unreadable": len(unreadable),
+        "elapsed_s": elapsed,
+        "images_per_s": metrics["images"] / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": _percentiles(latencies),
+        "inference_ms": _percentiles(inference_ms),
+        "mAP": metrics["mAP"],
+        "per_class": metrics["per_class"],
+        "accuracy": accuracy.compute(),
+    }
+
+
+def _format_number(value) -> str:
+    return "   n/a" if value is None or value != value else f"{value:6.3f}"
+
+
+def compare_reports(current: dict, baseline: dict) -> List[str]:
+    """
+    2つのレポートの主な指標を比較
+
+    Args:
+        current: 今回のレポート
+        baseline: 比較対象のレポート
+
+    Returns:
+        List[str]: 指標ごとの比較（表示用の行）
+    """
+    rows = [("mAP@0.5", "mAP"), ("薬液の正解率", "accuracy.medicine_accuracy"),
+            ("蓋の状態の正解率", "accuracy.cap_state_accuracy"), ("クラスの正解率", "accuracy.class_accuracy"),
+            ("画像/秒", "images_per_s"), ("処理 p50 ms", "latency_ms.p50"), ("処理 p95 ms", "latency_ms.p95"),
+            ("処理 p99 ms", "latency_ms.p99")]
+    rows += [(f"AP {name}", f"per_class.{name}.ap") for name in current["per_class"]]
+
+    def lookup(report: dict, key: str):
+        value = report
+        for part in key.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return None
+            value = value[part]
+        return value
+
+    lines = []
+    for label, key in rows:
+        old, new = lookup(baseline, key), lookup(current, key)
+        diff = new - old if old is not None and new is not None else None
+        lines.append(f"{_format_number(old)} → {_format_number(new)} "
+                     f"({'   n/a' if diff is None or diff != diff else f'{diff:+.3f}'})  {label}")
+    return lines
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="データセットでモデルを評価")
+    parser.add_argument("dataset", nargs="?", default=DEFAULT_VAL_SPLIT, help="画像ディレクトリまたは分割ファイル")
+    parser.add_argument("--model", default="models/best.onnx")
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--backend", default="onnxruntime")
+    parser.add_argument("--workers", type=int, default=0, help="ワーカープロセス数（0でCPUコア数）")
+    parser.add_argument("--threads", type=int, default=0, help="ワーカーごとの推論スレッド数")
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--confidence", type=float, default=0.25, help="mAPの集計に含める信頼度の下限")
+    parser.add_argument("--accuracy-threshold", type=float, default=0.5, help="正解率の判定に使う信頼度の下限")
+    parser.add_argument("--output", default=None, help="レポートの保存先（JSON）")
+    parser.add_argument("--compare", default=None, help="比較するレポート（JSON）")
+    args = parser.parse_args()
+
+    images = resolve_images(args.dataset)
+    if not images:
+        print(f"画像が見つかりません: {args.dataset}")
+        return
+    report = evaluate(args.model, images, input_size=args.input_size, backend=args.backend, workers=args.workers,
+                      num_threads=args.threads, chunk_size=args.chunk_size, confidence_threshold=args.confidence,
+                      accuracy_threshold=args.accuracy_threshold)
+    report["dataset"] = args.dataset
+
+    accuracy = report["accuracy"]
+    latency = report["latency_ms"]
+    print(f"評価結果: {report['model']} ({report['backend']}, {report['images']}枚, "
+          f"ワーカー {report['workers']} x {report['threads_per_worker']}スレッド)")
+    for name, values in report["per_class"].items():
+        print(f"  {name:28s} AP {_format_number(values['ap'])}  適合率 {values['precision']:.3f}  "
+              f"再現率 {values['recall']:.3f}  (正解 {values['gt']})")
+    print(f"  mAP@0.5 {report['mAP']:.3f}  薬液の正解率 {accuracy['medicine_accuracy']:.3f}  "
+          f"蓋の状態の正解率 {accuracy['cap_state_accuracy']:.3f}  検出なし {accuracy['miss_rate']:.3f}")
+    print(f"  {report['images_per_s']:.1f} 画像/秒  処理時間 p50 {latency['p50']:.1f} ms  "
+          f"p95 {latency['p95']:.1f} ms  p99 {latency['p99']:.1f} ms")
+    result = "達成" if accuracy["medicine_accuracy"] >= TARGET_ACCURACY else "未達"
+    print(f"  薬液の識別の正解率 {accuracy['medicine_accuracy']:.1%}（目標 {TARGET_ACCURACY:.0%}: {result}）")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"{args.compare} ({baseline.get('model', '')}) との比較:")
+        for line in compare_reports(report, baseline):
+            print(f"  {line}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"レポートを保存しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
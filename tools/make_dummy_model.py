@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+ダミーYOLOモデル作成ツール
+学習済みモデルがない環境でも認識処理を動かせるよう、YOLOv8と同じ入出力形式の
+小さなONNXモデルを作成する（テスト・ベンチマーク用）
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+# (cx, cy, w, h, クラスID, スコア) ※入力画像（input_size四方）の座標
+DEFAULT_BOXES = [
+    (320.0, 320.0, 200.0, 300.0, 0, 0.9),
+]
+
+
+def build_dummy_model(path: str, input_size: int = 640, num_classes: int = 4,
+                      boxes: Optional[List[Tuple[float, float, float, float, int, float]]] = None,
+                      patch: int = 32, hidden_channels: int = 16) -> str:
+    """
+    ダミーYOLOモデルを作成
+
+    入力 images (1, 3, S, S) をパッチごとの畳み込みで処理し、YOLOv8形式の
+    出力 (1, 4+クラス数, (S/patch)^2) を返す。出力値は入力に依存せず、
+    boxesで指定した候補が先頭のアンカーに入る。
+
+    Args:
+        path: 保存先のパス
+        input_size: 入力サイズ（patchの倍数）
+        num_classes: クラス数
+        boxes: 出力する候補 (cx, cy, w, h, クラスID, スコア) のリスト
+        patch: 1アンカーあたりのパッチサイズ
+        hidden_channels: 中間層のチャンネル数（推論負荷の調整用）
+
+    Returns:
+        str: 保存したパス
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    boxes = DEFAULT_BOXES if boxes is None else boxes
+    grid = input_size // patch
+    anchors = grid * grid
+    channels = 4 + num_classes
+    if len(boxes) > anchors:
+        raise ValueError("候補数がアンカー数を超えています")
+
+    rng = np.random.default_rng(0)
+    w1 = (rng.standard_normal((hidden_channels, 3, patch, patch)) * 0.01).astype(np.float32)
+    b1 = np.zeros(hidden_channels, dtype=np.float32)
+    # 出力を固定値にするため2層目の重みは0
+    w2 = np.zeros((channels, hidden_channels, 1, 1), dtype=np.float32)
+    b2 = np.zeros(channels, dtype=np.float32)
+
+    constant = np.zeros((1, channels, anchors), dtype=np.float32)
+    for index, (cx, cy, w, h, class_id, score) in enumerate(boxes):
+        constant[0, :4, index] = (cx, cy, w, h)
+        constant[0, 4 + class_id, index] = score
+
+    nodes = [
+        helper.make_node("Conv", ["images", "w1", "b1"], ["h1"], kernel_shape=[patch, patch], strides=[patch, patch]),
+        helper.make_node("Relu", ["h1"], ["h2"]),
+        helper.make_node("Conv", ["h2", "w2", "b2"], ["h3"], kernel_shape=[1, 1]),
+        helper.make_node("Reshape", ["h3", "shape"], ["h4"]),
+        helper.make_node("Add", ["h4", "predictions"], ["output0"]),
+    ]
+    initializers = [
+        numpy_helper.from_array(w1, "w1"),
+        numpy_helper.from_array(b1, "b1"),
+        numpy_helper.from_array(w2, "w2"),
+        numpy_helper.from_array(b2, "b2"),
+        numpy_helper.from_array(np.array([1, channels, anchors], dtype=np.int64), "shape"),
+        numpy_helper.from_array(constant, "predictions"),
+    ]
+    graph = helper.make_graph(
+        nodes, "dummy_yolo",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, [1, 3, input_size, input_size])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [1, channels, anchors])],
+        initializers,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    onnx.save(model, path)
+    return path
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="ダミーYOLOモデル（ONNX）を作成")
+    parser.add_argument("output", nargs="?", default="models/dummy.onnx")
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--num-classes", type=int, default=4)
+    parser.add_argument("--hidden-channels", type=int, default=16)
+    args = parser.parse_args()
+
+    path = build_dummy_model(args.output, args.input_size, args.num_classes, hidden_channels=args.hidden_channels)
+    print(f"ダミーモデルを作成しました: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+INT8量子化ツール
+エクスポート済みのONNXモデル（FP32）を、校正用画像で活性化の範囲を求めて静的INT8量子化する
+（onnxruntime.quantization、QDQ形式）
+
+校正用画像は推論時と同じレターボックス前処理（LetterboxPreprocessor）で入力テンソルにするため、
+実際のカメラ映像に近い画像（検証用の分割とは別の学習画像など）を数十〜数百枚使う。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.dataset import resolve_images
+from src.recognizer.preprocess import LetterboxPreprocessor
+
+
+# 校正方法（onnxruntime.quantization.CalibrationMethodの名前）
+CALIBRATION_METHODS = ("MinMax", "Entropy", "Percentile")
+
+
+def _model_input(model) -> Tuple[str, int]:
+    """モデルの入力名と入力サイズ（正方形）を取得"""
+    graph_input = model.graph.input[0]
+    dims = graph_input.type.tensor_type.shape.dim
+    size = dims[-1].dim_value if len(dims) == 4 else 0
+    return graph_input.name, size
+
+
+def _output_nodes(model) -> List[str]:
+    """
+    モデルの出力を作るノードの名前（名前のないノードには名前を付ける）
+
+    YOLOの出力は座標（0〜入力サイズ）と信頼度（0〜1）を1つのテンソルにまとめたもので、
+    1つのスケールでINT8にすると信頼度の分解能がなくなるため、このノードは量子化しない。
+    """
+    outputs = {output.name for output in model.graph.output}
+    names = []
+    for index, node in enumerate(model.graph.node):
+        if not node.name:
+            node.name = f"{node.op_type}_{index}"
+        if outputs.intersection(node.output):
+            names.append(node.name)
+    return names
+
+
+class ImageCalibrationReader:
+    """校正用画像を前処理して1枚ずつonnxruntimeの校正処理に渡すクラス（CalibrationDataReader）"""
+
+    def __init__(self, image_paths: List[str], input_name: str, input_size: int):
+        """
+        校正データの初期化
+
+        Args:
+            image_paths: 校正用画像のパス
+            input_name: モデルの入力名
+            input_size: モデルの入力サイズ
+        """
+        self.image_paths = list(image_paths)
+        self.input_name = input_name
+        self.preprocessor = LetterboxPreprocessor(input_size)
+        self.index = 0
+        self.skipped = 0
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        """次の校正用入力（なければNone）"""
+        while self.index < len(self.image_paths):
+            path = self.image_paths[self.index]
+            self.index += 1
+            frame = cv2.imread(path)
+            if frame is None:
+                self.skipped += 1
+                print(f"⚠️ 画像を読み込めません: {path}")
+                continue
+            blob, _, _ = self.preprocessor(frame)
+            # 前処理バッファは次の画像で上書きされるため、校正処理にはコピーを渡す
+            return {self.input_name: blob.copy()}
+        return None
+
+    def rewind(self):
+        """最初の画像から読み直す"""
+        self.index = 0
+
+
+def quantize_model(model_path: str, calibration: str, output_path: str, input_size: int = 0,
+                   max_images: int = 200, method: str = "MinMax", per_channel: bool = True,
+                   quantize_output: bool = False) -> str:
+    """
+    ONNXモデルを静的INT8量子化
+
+    Args:
+        model_path: FP32のONNXモデルのパス
+        calibration: 校正用画像のディレクトリ、または画像パスを列挙した分割ファイル
+        output_path: INT8モデルの保存先
+        input_size: モデルの入力サイズ（0でモデルから取得）
+        max_images: 校正に使う画像数の上限（等間隔に間引く）
+        method: 校正方法（MinMax / Entropy / Percentile）
+        per_channel: 重みをチャンネルごとに量子化するか
+        quantize_output: 出力を作るノードも量子化するか
+
+    Returns:
+        str: 保存したパス
+
+    Raises:
+        ImportError: onnx / onnxruntime がない場合
+        ValueError: 校正用画像がない、または入力サイズが分からない場合
+    """
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"不明な校正方法: {method}")
+
+    images = resolve_images(calibration)
+    if not images:
+        raise ValueError(f"校正用画像がありません: {calibration}")
+    if max_images > 0 and len(images) > max_images:
+        step = len(images) / max_images
+        images = [images[int(index * step)] for index in range(max_images)]
+
+    model = onnx.load(model_path)
+    input_name, model_size = _model_input(model)
+    input_size = input_size or model_size
+    if input_size <= 0:
+        raise ValueError("モデルの入力サイズが分かりません（--input-size で指定してください）")
+    excluded = [] if quantize_output else _output_nodes(model)
+
+    reader = ImageCalibrationReader(images, input_name, input_size)
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # ノード名を付けたモデルを量子化する（校正用の中間ファイルもここに作られる）
+        named_path = os.path.join(tmp_dir, "model.onnx")
+        onnx.save(model, named_path)
+        quantize_static(
+            named_path, output_path, reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=getattr(CalibrationMethod, method),
+            nodes_to_exclude=excluded,
+        )
+    print(f"INT8モデルを作成しました: {output_path} "
+          f"(校正画像 {len(images) - reader.skipped}枚, {method}, "
+          f"{os.path.getsize(model_path) / 1e6:.1f} MB → {os.path.getsize(output_path) / 1e6:.1f} MB)")
+    return output_path
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="ONNXモデルを静的INT8量子化")
+    parser.add_argument("calibration", help="校正用画像のディレクトリ、または分割ファイル（.txt）")
+    parser.add_argument("--model", default="models/best.onnx", help="FP32のONNXモデル")
+    parser.add_argument("--output", default=None, help="保存先（既定: <モデル名>.int8.onnx）")
+    parser.add_argument("--input-size", type=int, default=0)
+    parser.add_argument("--max-images", type=int, default=200)
+    parser.add_argument("--method", choices=CALIBRATION_METHODS, default="MinMax")
+    parser.add_argument("--per-tensor", action="store_true", help="重みをテンソル単位で量子化")
+    parser.add_argument("--quantize-output", action="store_true", help="出力を作るノードも量子化")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.model)[0] + ".int8.onnx"
+    quantize_model(args.model, args.calibration, output, args.input_size, args.max_images,
+                   args.method, not args.per_tensor, args.quantize_output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+セッション記録ツール
+カメラ（または合成カメラ・動画ファイル）のフレームと取得時刻を記録ファイルに保存し、
+記録ファイルの内容（フレーム数・長さ・取得間隔）を表示する
+
+記録したファイルは config.yaml の camera.replay_path に指定すると、カメラの代わりに再生される。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.session_recording import CODECS, ReplayVideoCapture, SessionRecorder
+
+
+def record(output: str, source: str = "0", duration: float = 10.0, width: int = 640, height: int = 480,
+           fps: float = 30.0, codec: str = "jpeg") -> SessionRecorder:
+    """
+    映像ソースから指定時間だけ記録
+
+    Args:
+        output: 記録ファイルのパス
+        source: カメラのデバイスID、動画ファイルのパス、または "synthetic"（合成カメラ）
+        duration: 記録時間（秒）
+        width: 要求する映像幅
+        height: 要求する映像高さ
+        fps: 要求するフレームレート
+        codec: 記録の形式（raw / jpeg）
+
+    Returns:
+        SessionRecorder: 閉じた記録（フレーム数・書き込んだバイト数）
+    """
+    if source == "synthetic":
+        from src.synthetic_camera import SyntheticVideoCapture
+        capture = SyntheticVideoCapture(width, height, fps=fps, realtime=True)
+    else:
+        capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        capture.set(cv2.CAP_PROP_FPS, fps)
+    if not capture.isOpened():
+        raise RuntimeError(f"映像ソースを開けませんでした: {source}")
+
+    recorder = SessionRecorder(output, fps=capture.get(cv2.CAP_PROP_FPS) or fps, codec=codec)
+    try:
+        end = time.monotonic() + duration
+        frame = None
+        while time.monotonic() < end:
+            ret, frame = capture.read(frame)
+            if not ret:
+                break
+            recorder.write(frame, getattr(capture, "grabbed_timestamp", None))
+    finally:
+        capture.release()
+        recorder.close()
+    return recorder
+
+
+def describe(path: str) -> dict:
+    """
+    記録ファイルの内容を集計
+
+    Args:
+        path: 記録ファイルのパス
+
+    Returns:
+        dict: 形式、サイズ、フレーム数、長さ、取得間隔（平均・最大）
+    """
+    replay = ReplayVideoCapture(path, realtime=False)
+    intervals = np.diff(replay.index["timestamp"]) * 1000.0
+    return {
+        "codec": replay.codec,
+        "width": replay.width,
+        "height": replay.height,
+        "fps": replay.fps,
+        "frames": replay.frame_count,
+        "duration": replay.duration,
+        "file_mb": os.path.getsize(path) / 1e6,
+        "avg_interval_ms": float(intervals.mean()) if len(intervals) else 0.0,
+        "max_interval_ms": float(intervals.max()) if len(intervals) else 0.0,
+    }
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="セッションの記録・記録ファイルの表示")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="映像ソースから記録")
+    record_parser.add_argument("output", help="記録ファイルのパス（strftimeの書式を使用可）")
+    record_parser.add_argument("--source", default="0", help="デバイスID、動画ファイル、または synthetic")
+    record_parser.add_argument("--duration", type=float, default=10.0)
+    record_parser.add_argument("--width", type=int, default=640)
+    record_parser.add_argument("--height", type=int, default=480)
+    record_parser.add_argument("--fps", type=float, default=30.0)
+    record_parser.add_argument("--codec", choices=CODECS, default="jpeg")
+
+    info_parser = subparsers.add_parser("info", help="記録ファイルの内容を表示")
+    info_parser.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        recorder = record(args.output, args.source, args.duration, args.width, args.height, args.fps, args.codec)
+        if recorder.frame_count == 0:
+            print("フレームを取得できなかったため記録していません")
+            return
+        path = recorder.path
+    else:
+        path = args.path
+
+    info = describe(path)
+    print(f"{path}: {info['codec']} {info['width']}x{info['height']} ({info['fps']:.0f}fps)  "
+          f"{info['frames']}フレーム / {info['duration']:.1f}秒  {info['file_mb']:.1f} MB  "
+          f"取得間隔 平均 {info['avg_interval_ms']:.1f} ms  最大 {info['max_interval_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()